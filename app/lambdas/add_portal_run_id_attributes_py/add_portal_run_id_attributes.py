@@ -2,15 +2,36 @@
 
 """
 Add portal run id attributes from the filemanager
+
+The records under the output uri are listed and patched one page at a time,
+records that already carry the portal run id are skipped.
+
+If a cacheKey is given (the step function execution name), the cursor is saved to the store after each page,
+so a retry, or the next invocation after we stop early, resumes from the page we got up to.
+Without a cacheKey (or a store), it lists from the first page again, and skips the records we have already patched.
+We stop between pages once the lambda is running out of time,
+and return isComplete as false so that the step function invokes us again.
+Once every page has been patched the cursor is deleted, so the next pass starts from the first page again,
+and only patches the records the filemanager has ingested since.
+
+The orcabus api tools are imported on first use.
 """
 
 # Standard imports
+from functools import partial
 from urllib.parse import urlparse
 from pathlib import Path
 
 # Layer imports
-from orcabus_api_tools.filemanager import file_manager_patch_request
-from orcabus_api_tools.filemanager.globals import S3_LIST_ENDPOINT
+from bssh_manager_tools.utils.metrics_helpers import set_metrics_context
+from bssh_manager_tools.utils.portal_run_id_attribute_helpers import (
+    PortalRunIdPatchingCursor,
+    delete_portal_run_id_patching_cursor,
+    patch_portal_run_id_attributes,
+    read_portal_run_id_patching_cursor,
+    write_portal_run_id_patching_cursor,
+)
+from bssh_manager_tools.utils.store_helpers import get_store
 
 
 def handler(event, context):
@@ -20,9 +41,12 @@ def handler(event, context):
     :param context:
     :return:
     """
+    # Tag the metrics of our external calls with this handler and the portal run id
+    set_metrics_context(handler_name="add_portal_run_id_attributes", portal_run_id=event.get("portalRunId"))
 
     output_uri = event.get("outputUri")
     portal_run_id = event.get("portalRunId")
+    cache_key = event.get("cacheKey")
 
     # Get the output uri and key
     output_uri_parsed = urlparse(output_uri)
@@ -33,18 +57,35 @@ def handler(event, context):
     if not Path(output_key).name == portal_run_id:
         raise ValueError(f"The output uri {output_uri} does not end with the portal run id {portal_run_id}")
 
-    # Add the portal run id attribute to the output uri
-    file_manager_patch_request(
-        endpoint=S3_LIST_ENDPOINT,
-        params={
-            "bucket": output_bucket,
-            "key": f"{output_key.rstrip('/')}/*",
-        },
-        json_data=[
-            {
-                'op': 'add',
-                'path': '/portalRunId',
-                'value': portal_run_id
-            }
-        ]
+    # Resume from the saved cursor
+    store = get_store()
+    if store is None or cache_key is None:
+        store = None
+        cursor = PortalRunIdPatchingCursor()
+    else:
+        cursor = (
+            read_portal_run_id_patching_cursor(store, output_uri, cache_key) or
+            PortalRunIdPatchingCursor()
+        )
+
+    # Add the portal run id attribute to every record under the output uri
+    cursor = patch_portal_run_id_attributes(
+        bucket=output_bucket,
+        key_prefix=f"{output_key.rstrip('/')}/",
+        portal_run_id=portal_run_id,
+        cursor=cursor,
+        get_remaining_time_seconds=(
+            (lambda: context.get_remaining_time_in_millis() / 1000)
+            if hasattr(context, "get_remaining_time_in_millis") else None
+        ),
+        on_page_patched=(
+            partial(write_portal_run_id_patching_cursor, store, output_uri, cache_key)
+            if store is not None else None
+        ),
     )
+
+    # The next pass starts from the first page
+    if store is not None and cursor.is_complete:
+        delete_portal_run_id_patching_cursor(store, output_uri, cache_key)
+
+    return cursor.to_dict()
@@ -2,22 +2,19 @@
 
 """
 Given a bclconvert portal run id, create a BSSH Copy Workflow Run Draft object:
+
+The orcabus api tools are imported on first use.
 """
 
 # Standard imports
+from functools import partial
 from os import environ
 from pathlib import Path
 from urllib.parse import urlparse, urlunparse
 
 # Layer imports
-from orcabus_api_tools.utils.aws_helpers import get_ssm_value
-from orcabus_api_tools.workflow import (
-    create_portal_run_id,
-    create_workflow_run_name_from_workflow_name_workflow_version_and_portal_run_id,
-    get_latest_payload_from_portal_run_id,
-    list_workflows,
-    get_workflow_run_from_portal_run_id
-)
+from bssh_manager_tools.utils.concurrency_helpers import run_concurrently
+from bssh_manager_tools.utils.ssm_parameter_helpers import get_ssm_parameter_values
 
 # Globals
 BSSH_WORKFLOW_NAME_SSM_PARAMETER_ENV_VAR = 'BSSH_WORKFLOW_NAME_SSM_PARAMETER_NAME'
@@ -27,24 +24,55 @@ PRIMARY_DATA_OUTPUT_URI_PREFIX_SSM_PARAMETER_ENV_VAR = 'PRIMARY_DATA_OUTPUT_URI_
 
 
 def handler(event, context):
+    from orcabus_api_tools.workflow import (
+        create_portal_run_id,
+        create_workflow_run_name_from_workflow_name_workflow_version_and_portal_run_id,
+        get_latest_payload_from_portal_run_id,
+        list_workflows,
+        get_workflow_run_from_portal_run_id
+    )
+
     # Get the inputs
     bclconvert_portal_run_id = event.get("bclconvertPortalRunId")
 
     # Get the workflow name and version from the environment
-    workflow_name = get_ssm_value(environ[BSSH_WORKFLOW_NAME_SSM_PARAMETER_ENV_VAR])
-    workflow_version = get_ssm_value(environ[BSSH_WORKFLOW_VERSION_SSM_PARAMETER_ENV_VAR])
-    payload_version = get_ssm_value(environ[BSSH_PAYLOAD_VERSION_SSM_PARAMETER_ENV_VAR])
-    output_uri_prefix = get_ssm_value(environ[PRIMARY_DATA_OUTPUT_URI_PREFIX_SSM_PARAMETER_ENV_VAR])
+    # All four parameters are fetched in one call, and cached for the life of the container
+    ssm_parameter_names = [
+        environ[BSSH_WORKFLOW_NAME_SSM_PARAMETER_ENV_VAR],
+        environ[BSSH_WORKFLOW_VERSION_SSM_PARAMETER_ENV_VAR],
+        environ[BSSH_PAYLOAD_VERSION_SSM_PARAMETER_ENV_VAR],
+        environ[PRIMARY_DATA_OUTPUT_URI_PREFIX_SSM_PARAMETER_ENV_VAR],
+    ]
+    ssm_parameter_values = get_ssm_parameter_values(ssm_parameter_names)
+    workflow_name, workflow_version, payload_version, output_uri_prefix = map(
+        lambda ssm_parameter_name_iter_: ssm_parameter_values[ssm_parameter_name_iter_],
+        ssm_parameter_names
+    )
 
     # Generate the portal run id
     portal_run_id = create_portal_run_id()
 
-    # Get the workflow, from the workflow name and version
-    try:
-        workflow = next(iter(list_workflows(
+    # Get the workflow, from the workflow name and version,
+    # and the bclconvert payload and workflow run object
+    # None of these requests depend on each other, so we make them at the same time
+    orcabus_api_responses = run_concurrently({
+        "workflow_list": partial(
+            list_workflows,
             workflow_name=workflow_name,
             workflow_version=workflow_version
-        )))
+        ),
+        "bclconvert_payload": partial(
+            get_latest_payload_from_portal_run_id,
+            portal_run_id=bclconvert_portal_run_id
+        ),
+        "bclconvert_workflow_run": partial(
+            get_workflow_run_from_portal_run_id,
+            portal_run_id=bclconvert_portal_run_id
+        ),
+    })
+
+    try:
+        workflow = next(iter(orcabus_api_responses["workflow_list"]))
     except StopIteration:
         workflow = {
             "name": workflow_name,
@@ -59,12 +87,8 @@ def handler(event, context):
     )
 
     # Get the bclconvert data object
-    bclconvert_payload = get_latest_payload_from_portal_run_id(
-        portal_run_id=bclconvert_portal_run_id
-    )
-    bclconvert_libraries = get_workflow_run_from_portal_run_id(
-        portal_run_id=bclconvert_portal_run_id
-    )['libraries']
+    bclconvert_payload = orcabus_api_responses["bclconvert_payload"]
+    bclconvert_libraries = orcabus_api_responses["bclconvert_workflow_run"]['libraries']
 
     # Get values repeated through the payload
     instrument_run_id = bclconvert_payload['data']['tags']['instrumentRunId']
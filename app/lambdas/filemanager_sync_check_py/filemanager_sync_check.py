@@ -3,78 +3,168 @@
 """
 Filemanager sync script
 
-Check if the filemanager has the same number of files as the aws s3 api command returns
+Check if the filemanager has a record for every file that ICAv2 has under the s3 prefix
+
+The ICAv2 listing is projected down to the expected key and size of each file,
+the filemanager records are then streamed against it page by page,
+stopping as soon as every file has been found (or a stale record proves the sync is incomplete).
+
+Returns the number of files synced so far, the number expected, and a sample of the missing keys
+
+If a cacheKey is given (the step function execution name), the expected files are only listed via ICAv2
+on the first check, and read back from the store on every check after that.
+wrapica is only imported when the files are listed, so the checks after the first do not import it.
+
+The step function also passes in the syncedCount and wait from the previous check,
+and we return how long to wait before the next check (nextWaitSeconds)
+and how long to keep checking before giving up (maxTotalWaitSeconds),
+and how much of that to spend waiting on the S3 object created events of a tracked run (maxEventWaitSeconds)
 """
 
 # Standard imports
 import logging
+from pathlib import Path
+from typing import Dict, Optional
 from urllib.parse import urlparse
 
-# Wrapica imports
-from wrapica.project_data import find_project_data_bulk, convert_uri_to_project_data_obj
-
 # Layer imports
-from icav2_tools import set_icav2_env_vars
-from orcabus_api_tools.filemanager import list_files_recursively
+from bssh_manager_tools.utils.expected_inventory_helpers import read_expected_inventory, write_expected_inventory
+from bssh_manager_tools.utils.filemanager_listing_helpers import iter_filemanager_record_pages
+from bssh_manager_tools.utils.filemanager_sync_helpers import (
+    check_filemanager_sync,
+    get_max_event_wait_seconds,
+    get_max_total_wait_seconds,
+    get_next_wait_seconds,
+)
+from bssh_manager_tools.utils.icav2_credential_helpers import set_cached_icav2_env_vars
+from bssh_manager_tools.utils.icav2_listing_helpers import (
+    IGNORED_FILE_NAMES,
+    iter_listing_records,
+    iter_project_data_bulk,
+)
+from bssh_manager_tools.utils.logger import set_basic_logger
+from bssh_manager_tools.utils.metrics_helpers import set_metrics_context
+from bssh_manager_tools.utils.store_helpers import get_store
 
-# Setup logging
-logger = logging.getLogger(__name__)
+# Set logger
+logger = set_basic_logger()
 logger.setLevel(logging.INFO)
 
 
+def get_expected_sizes_by_key(s3_prefix: str) -> Dict[str, Optional[int]]:
+    """
+    List the files under the s3 prefix via ICAv2, and project each one down to its s3 key and size
+    :param s3_prefix:
+    :return:
+    """
+    from wrapica.project_data import convert_uri_to_project_data_obj
+
+    s3_path = urlparse(s3_prefix).path.lstrip('/')
+    s3_path = s3_path.rstrip('/') + '/'
+
+    icav2_project_data_obj = convert_uri_to_project_data_obj(s3_prefix)
+
+    return dict(map(
+        lambda listing_record_iter_: (
+            s3_path + listing_record_iter_.relative_path,
+            listing_record_iter_.file_size_in_bytes
+        ),
+        iter_listing_records(
+            iter_project_data_bulk(
+                project_id=icav2_project_data_obj.project_id,
+                parent_folder_path=Path(icav2_project_data_obj.data.details.path)
+            ),
+            parent_folder_path=Path(icav2_project_data_obj.data.details.path)
+        )
+    ))
+
+
+def get_cached_expected_sizes_by_key(s3_prefix: str, cache_key: Optional[str]) -> Dict[str, Optional[int]]:
+    """
+    Get the expected files from the store if we have listed them already, otherwise list them via ICAv2
+    :param s3_prefix:
+    :param cache_key:
+    :return:
+    """
+    store = get_store()
+
+    if store is None or cache_key is None:
+        return get_expected_sizes_by_key(s3_prefix)
+
+    expected_sizes_by_key = read_expected_inventory(store, s3_prefix, cache_key)
+    if expected_sizes_by_key is not None:
+        return expected_sizes_by_key
+
+    expected_sizes_by_key = get_expected_sizes_by_key(s3_prefix)
+    write_expected_inventory(store, s3_prefix, cache_key, expected_sizes_by_key)
+
+    return expected_sizes_by_key
+
+
 def handler(event, context):
     """
-    List the files in the filemanaegr recursively
+    Compare the files in the filemanager against the files in ICAv2
     :param event:
     :param context:
     :return:
     """
-    # Set icav2 env vars
-    set_icav2_env_vars()
+    # Tag the metrics of our external calls with this handler and the portal run id
+    set_metrics_context(handler_name="filemanager_sync_check", portal_run_id=event.get("portalRunId"))
+
+    # Set icav2 env vars, the access token is cached for the life of the container
+    set_cached_icav2_env_vars()
 
     # Get the bucket, key from the event
     s3_prefix = event.get('s3Prefix', '')
+    cache_key = event.get('cacheKey')
+
+    # Get the progress as of the previous check
+    previous_synced_count = event.get('previousSyncedCount')
+    previous_wait_seconds = event.get('previousWaitSeconds')
 
     # Get the bucket
     s3_bucket = urlparse(s3_prefix).netloc
     s3_path = urlparse(s3_prefix).path.lstrip('/')
 
-    # List files in the filemanager
-    filemanager_files = list(filter(
-        lambda x: not x['key'].endswith('.iap_xaccount_test.tmp'),
-        list_files_recursively(
-            bucket=s3_bucket,
-            key=s3_path
-        )
-    ))
+    # List files via icav2 (or read back the files we listed on the first check)
+    expected_sizes_by_key = get_cached_expected_sizes_by_key(s3_prefix, cache_key)
 
-    # Num unique files
-    filemanager_files_count = len(list(set(
-        list(map(
-            lambda fm_iter_: fm_iter_['ingestId'],
-            filemanager_files
-        ))
-    )))
+    # Stream the filemanager records against the expected files
+    sync_check_result = check_filemanager_sync(
+        expected_sizes_by_key=expected_sizes_by_key,
+        filemanager_record_pages=map(
+            lambda filemanager_record_page_iter_: list(filter(
+                lambda filemanager_record_iter_: (
+                    Path(filemanager_record_iter_.key).name not in IGNORED_FILE_NAMES
+                ),
+                filemanager_record_page_iter_
+            )),
+            iter_filemanager_record_pages(
+                bucket=s3_bucket,
+                key_prefix=s3_path
+            )
+        )
+    )
 
-    # List files via icav2
-    icav2_project_data_obj = convert_uri_to_project_data_obj(s3_prefix)
-    icav2_project_data_list = find_project_data_bulk(
-        project_id=icav2_project_data_obj.project_id,
-        parent_folder_id=icav2_project_data_obj.data.id,
-        data_type='FILE'
+    logger.info(
+        "Filemanager has synced %s of %s files, after reading %s pages",
+        sync_check_result.synced_count, sync_check_result.expected_count, sync_check_result.pages_read
     )
 
-    if not filemanager_files_count == len(icav2_project_data_list):
+    if sync_check_result.size_mismatched_keys:
         logger.info(
-            f"Filemanager has {filemanager_files_count} files, "
-            f"ICAv2 has {len(icav2_project_data_list)} files"
+            "Filemanager has %s files with a different size to ICAv2, i.e. %s",
+            len(sync_check_result.size_mismatched_keys), sync_check_result.size_mismatched_keys[0]
         )
-        return {
-            "isSynced": False,
-        }
-
-    # If the number of files is the same, we pass the check
-    else:
-        return {
-            "isSynced": True,
-        }
+
+    return {
+        **sync_check_result.to_dict(),
+        "nextWaitSeconds": get_next_wait_seconds(
+            expected_count=sync_check_result.expected_count,
+            synced_count=sync_check_result.synced_count,
+            previous_synced_count=previous_synced_count,
+            previous_wait_seconds=previous_wait_seconds
+        ),
+        "maxTotalWaitSeconds": get_max_total_wait_seconds(sync_check_result.expected_count),
+        "maxEventWaitSeconds": get_max_event_wait_seconds(sync_check_result.expected_count),
+    }
@@ -12,54 +12,305 @@ The BCLConversion complete object looks something like this:
   "outputUri": "icav2://7595e8f2-32d3-4c76-a324-c6a85dae87b5/ilmn_primary/231116_A01052_0172_BHVLM5DSX7/abcd1234/"  // A prefix to where the output should be stored
 }
 
-While the outputs will look something like this:
+Two optional inputs control resuming a copy that has partially completed:
+
+  "incremental": true,  // Only copy files that are missing or a different size in the destination
+  "coalesceMissingFolders": true,  // In incremental mode, copy whole subfolders that are missing from the destination
+
+E-tags are not compared, a copy made with a different multipart part size has a different e-tag for identical content.
+If the destination Reports folder is missing altogether, it is copied as a single folder copy.
+
+And two optional inputs select the distributed map mode for very large runs (see copy_job_manifest_helpers):
+
+  "copyJobManifestMinCopyJobCount": 8,  // Write a manifest if there are more copy jobs than this
+  "copyJobManifestMaxInlinePayloadSizeInBytes": 131072,  // Write a manifest if the copy job list is larger than this
+
+If we have a store, the copy job list is memoised (see copy_job_list_cache_helpers),
+so planning the same analysis again, into this or any other output uri, rebases the saved copy job list
+onto the output uri, unless a file under the BCLConvert output folder (or a planning parameter) has changed since.
+On a cache miss, the Samples copy units and the Reports listing snapshot are built from the same listing,
+rather than listing the Samples and Reports folders again.
+Incremental plans depend on the destination, so they are never memoised.
+
+While the outputs will look something like this,
+each copy job is encoded as a base uri plus the source names relative to it (see copy_job_encoding_helpers):
 
 {
-    "instrument_run_id": "231116_A01052_0172_BHVLM5DSX7",
-    "output_uri": "icav2://7595e8f2-32d3-4c76-a324-c6a85dae87b5/ilmn_primary/231116_A01052_0172_BHVLM5DSX7/20240207abcduuid/",
+    "icav2CopyJobList": [
+        {
+            "sourceBaseUri": "icav2://a1234567-1234-1234-1234-1234567890ab/ilmn-analyses/.../output/Samples/",
+            "sourceNameList": ["SampleA/", "SampleB/"],
+            "destinationUri": "icav2://7595e8f2-32d3-4c76-a324-c6a85dae87b5/ilmn_primary/231116_A01052_0172_BHVLM5DSX7/20240207abcduuid/Samples/"
+        }
+    ],
+    "icav2CopyJobManifest": null
+}
+
+For a very large run, the copy job list is empty and the copy jobs are in a json lines manifest in the store instead:
+
+{
+    "icav2CopyJobList": [],
+    "icav2CopyJobManifest": {
+        "manifestUri": "s3://store-bucket/copy-job-manifests/20240207abcduuid/copy-jobs.jsonl",
+        "bucket": "store-bucket",
+        "key": "copy-job-manifests/20240207abcduuid/copy-jobs.jsonl",
+        "resultsPrefix": "copy-job-manifests/20240207abcduuid/results/",
+        "copyJobCount": 123
+    }
 }
 
 """
 
 
 # Imports
+import json
+import typing
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
 from urllib.parse import urlparse
 import logging
 
-# Set ICAv2 environment variables
-from icav2_tools import set_icav2_env_vars
-
-# Wrapica imports
-from wrapica.libica_models import ProjectData
-from wrapica.project_data import (
-    get_project_data_obj_by_id,
-    get_project_data_folder_id_from_project_id_and_path,
-    convert_project_id_and_data_path_to_uri,
-    convert_uri_to_project_data_obj
-)
-from wrapica.utils.globals import FILE_DATA_TYPE, FOLDER_DATA_TYPE, ICAV2_URI_SCHEME
-
 # Local imports
+from bssh_manager_tools.utils.concurrency_helpers import TaskNode, run_task_graph
+from bssh_manager_tools.utils.copy_job_list_cache_helpers import (
+    get_source_listing_fingerprint,
+    read_copy_job_list_cache_entry,
+    write_copy_job_list_cache_entry,
+)
+from bssh_manager_tools.utils.copy_job_encoding_helpers import encode_copy_job
+from bssh_manager_tools.utils.copy_job_manifest_helpers import (
+    get_copy_job_list_payload_size_in_bytes,
+    get_copy_job_manifest_key,
+    get_copy_job_manifest_reference,
+    is_copy_job_list_too_large_for_payload,
+    is_copy_job_manifest_required,
+    write_copy_job_manifest,
+)
 from bssh_manager_tools.utils.icav2_analysis_helpers import (
     get_run_folder_obj_from_analysis_id,
     get_interop_files_from_run_folder,
     get_bclconvert_outputs_from_analysis_id,
 )
+from bssh_manager_tools.utils.copy_job_planning_helpers import (
+    CopyUnit,
+    get_max_shard_count,
+    get_target_shard_size_in_bytes,
+    is_listing_record_copied,
+    iter_top_level_listing_record_groups,
+    plan_copy_shards,
+    plan_incremental_copy_units,
+)
+from bssh_manager_tools.utils.globals import FILE_DATA_TYPE, FOLDER_DATA_TYPE, ICAV2_URI_SCHEME
+from bssh_manager_tools.utils.icav2_credential_helpers import set_cached_icav2_env_vars
+from bssh_manager_tools.utils.icav2_listing_helpers import (
+    iter_folder_listing_records_concurrently,
+    iter_listing_records,
+    project_data_to_listing_record,
+)
+from bssh_manager_tools.utils.listing_diff_helpers import ListingRecord, listing_record_sort_key
+from bssh_manager_tools.utils.listing_snapshot_helpers import write_listing_snapshot
 from bssh_manager_tools.utils.logger import set_basic_logger
+from bssh_manager_tools.utils.metrics_helpers import set_metrics_context
+from bssh_manager_tools.utils.store_helpers import Store, get_store
+
+# Type checking imports, wrapica is imported on first use
+if typing.TYPE_CHECKING:
+    from wrapica.libica_models import ProjectData
 
 # Set logger
 logger = set_basic_logger()
 logger.setLevel(logging.INFO)
 
 
+def get_samples_copy_units(
+        samples_folder_obj: 'ProjectData',
+        samples_folder_uri: str,
+        store: Optional[Store],
+        samples_listing_records: Optional[Iterable[ListingRecord]] = None
+) -> List[CopyUnit]:
+    """
+    List the Samples folder and collect one copy unit per top-level entry (one per sample subfolder).
+    If we have a store, we also save a listing snapshot of each sample subfolder for the validation step.
+    :param samples_folder_obj:
+    :param samples_folder_uri:
+    :param store:
+    :param samples_listing_records: The listing records of the Samples folder, if already listed,
+      otherwise the Samples folder is listed here
+    :return:
+    """
+    samples_folder_uri = samples_folder_uri.rstrip("/") + "/"
+    copy_units: List[CopyUnit] = []
+
+    if samples_listing_records is None:
+        samples_listing_records = iter_folder_listing_records_concurrently(samples_folder_obj)
+    else:
+        samples_listing_records = sorted(samples_listing_records, key=listing_record_sort_key)
+
+    for top_level_name, is_folder, listing_records in iter_top_level_listing_record_groups(
+        samples_listing_records
+    ):
+        source_uri = samples_folder_uri + top_level_name + ("/" if is_folder else "")
+
+        if is_folder and store is not None:
+            write_listing_snapshot(
+                store=store,
+                folder_uri=source_uri,
+                listing_records=listing_records
+            )
+
+        copy_units.append(
+            CopyUnit(
+                source_uri=source_uri,
+                size_in_bytes=sum(map(
+                    lambda listing_record_iter_: listing_record_iter_.file_size_in_bytes or 0,
+                    listing_records
+                )),
+                file_count=len(listing_records)
+            )
+        )
+
+    return copy_units
+
+
+def iter_destination_folder_listing_records(destination_folder_uri: str) -> Iterator[ListingRecord]:
+    """
+    List the destination folder, a destination folder that does not exist yet has no listing records
+    :param destination_folder_uri:
+    :return:
+    """
+    from wrapica.project_data import convert_uri_to_project_data_obj
+
+    try:
+        destination_folder_obj = convert_uri_to_project_data_obj(destination_folder_uri)
+    except (FileNotFoundError, NotADirectoryError):
+        logger.info("%s does not exist yet", destination_folder_uri)
+        return iter([])
+
+    return iter_folder_listing_records_concurrently(destination_folder_obj)
+
+
+def get_uncopied_file_uri_list(
+        source_file_uri_list: List[str],
+        source_data_obj_list: List['ProjectData'],
+        destination_folder_uri: str
+) -> List[str]:
+    """
+    Filter the source file uris down to those whose size does not match
+    the file of the same name directly under the destination folder
+    :param source_file_uri_list:
+    :param source_data_obj_list: The source data objects, in the same order as the source file uris
+    :param destination_folder_uri:
+    :return:
+    """
+    destination_listing_records_by_path: Dict[str, ListingRecord] = dict(map(
+        lambda listing_record_iter_: (listing_record_iter_.relative_path, listing_record_iter_),
+        iter_destination_folder_listing_records(destination_folder_uri)
+    ))
+
+    return list(map(
+        lambda source_iter_: source_iter_[0],
+        filter(
+            lambda source_iter_: (
+                source_iter_[1].data.details.name not in destination_listing_records_by_path or
+                not is_listing_record_copied(
+                    project_data_to_listing_record(
+                        source_iter_[1],
+                        parent_folder_path=Path(source_iter_[1].data.details.path).parent
+                    ),
+                    destination_listing_records_by_path[source_iter_[1].data.details.name]
+                )
+            ),
+            zip(source_file_uri_list, source_data_obj_list)
+        )
+    ))
+
+
+def get_copy_job_list_output(
+        store: Optional[Store],
+        event: Dict,
+        icav2_copy_job_list: List[Dict],
+        reusable_manifest_id: Optional[str] = None
+) -> Dict:
+    """
+    Output the copy job list inline, or write it to a copy job manifest in the store if it is too large
+    :param store:
+    :param event:
+    :param icav2_copy_job_list:
+    :param reusable_manifest_id: The portal run id of a copy job manifest already written from this copy job list
+    :return:
+    """
+    # Very large runs are iterated over from a manifest in the store by a distributed map,
+    # rather than passed through the step function payload
+    if (
+        store is not None and
+        event.get("portalRunId") is not None and
+        is_copy_job_manifest_required(
+            icav2_copy_job_list,
+            min_copy_job_count=event.get("copyJobManifestMinCopyJobCount"),
+            max_inline_payload_size_in_bytes=event.get("copyJobManifestMaxInlinePayloadSizeInBytes")
+        )
+    ):
+        # A retry of the same portal run does not need to write its manifest again
+        if (
+            reusable_manifest_id == event["portalRunId"] and
+            store.exists(get_copy_job_manifest_key(event["portalRunId"]))
+        ):
+            logger.info("Outputting the existing copy job manifest")
+            return {
+                "icav2CopyJobList": [],
+                "icav2CopyJobManifest": get_copy_job_manifest_reference(
+                    store=store,
+                    manifest_id=event["portalRunId"],
+                    copy_job_count=len(icav2_copy_job_list)
+                )
+            }
+
+        logger.info("Outputting the copy job manifest")
+        return {
+            "icav2CopyJobList": [],
+            "icav2CopyJobManifest": write_copy_job_manifest(
+                store=store,
+                manifest_id=event["portalRunId"],
+                icav2_copy_job_list=icav2_copy_job_list
+            )
+        }
+
+    # Without a store (or a portal run id to key the manifest on) we can only pass the list inline,
+    # fail here rather than with a States.DataLimitExceeded further down the step function
+    if is_copy_job_list_too_large_for_payload(
+        icav2_copy_job_list,
+        max_inline_payload_size_in_bytes=event.get("copyJobManifestMaxInlinePayloadSizeInBytes")
+    ):
+        raise ValueError(
+            f"The copy job list ({get_copy_job_list_payload_size_in_bytes(icav2_copy_job_list)} bytes) "
+            f"is too large to pass inline through the step function payload, "
+            f"a manifest requires both a store (BSSH_MANAGER_STORE_URI) and a portalRunId"
+        )
+    logger.info("Outputting the copy job list")
+    return {
+        "icav2CopyJobList": icav2_copy_job_list,
+        "icav2CopyJobManifest": None
+    }
+
+
 def handler(event, context):
     """
     Read in the event and collect the workflow session details
     """
-    # Set ICAv2 configuration from secrets
+    from wrapica.project_data import (
+        get_project_data_obj_by_id,
+        get_project_data_obj_from_project_id_and_path,
+        get_project_data_folder_id_from_project_id_and_path,
+        convert_project_id_and_data_path_to_uri,
+        convert_uri_to_project_data_obj
+    )
+
+    # Tag the metrics of our external calls with this handler and the portal run id
+    set_metrics_context(handler_name="get_icav2_copy_job_list", portal_run_id=event.get("portalRunId"))
+
+    # Set ICAv2 configuration from secrets, the access token is cached for the life of the container
     logger.info("Setting icav2 env vars from secrets manager")
-    set_icav2_env_vars()
+    set_cached_icav2_env_vars()
 
     # Get the BCLConvert analysis ID
     logger.info("Collecting the analysis id and project context")
@@ -68,52 +319,143 @@ def handler(event, context):
 
     logger.info("Collect the output uri prefix")
     output_uri = event['outputUri']
-    dest_project_data_obj = convert_uri_to_project_data_obj(
-        output_uri,
-        create_data_if_not_found=True
-    )
 
-    # Get the input run inputs
-    logger.info("Collecting input run data objects")
-    input_run_folder_obj: ProjectData = get_run_folder_obj_from_analysis_id(
-        project_id=project_id,
-        analysis_id=analysis_id
-    )
+    # Incremental mode, only copy files that are missing or different in the destination
+    is_incremental = event.get('incremental', False)
+    coalesce_missing_folders = event.get('coalesceMissingFolders', True)
 
-    # Get the analysis output path
-    logger.info("Collecting output data objects")
-    bclconvert_output_folder_id, bclconvert_output_data_list = get_bclconvert_outputs_from_analysis_id(
-        project_id=project_id,
-        analysis_id=analysis_id
-    )
+    # Return the memoised copy job list, if the source listing has not changed since it was planned
+    store = get_store()
+    bclconvert_outputs = None
+    dest_project_data_obj: Optional['ProjectData'] = None
+    source_listing_fingerprint = None
+    # The listing records of each folder under the bclconvert output folder, by folder name,
+    # so that a planning in full does not list the Samples and Reports folders again
+    output_listing_records_by_folder_name: Optional[Dict[str, List[ListingRecord]]] = None
+    if store is not None and not is_incremental:
+        logger.info("Fingerprinting the bclconvert output listing")
+        bclconvert_outputs = get_bclconvert_outputs_from_analysis_id(
+            project_id=project_id,
+            analysis_id=analysis_id
+        )
+        output_listing_records = sorted(
+            iter_listing_records(
+                bclconvert_outputs.iter_files("output"),
+                parent_folder_path=Path(bclconvert_outputs.output_folder_obj.data.details.path) / "output"
+            ),
+            key=listing_record_sort_key
+        )
+        source_listing_fingerprint = get_source_listing_fingerprint(
+            listing_records=output_listing_records
+        )
+        # The saved copy jobs are rebased onto the destination folder of this output uri
+        dest_project_data_obj = convert_uri_to_project_data_obj(
+            output_uri,
+            create_data_if_not_found=True
+        )
+        copy_job_list_cache_entry = read_copy_job_list_cache_entry(
+            store=store,
+            project_id=project_id,
+            analysis_id=analysis_id,
+            source_listing_fingerprint=source_listing_fingerprint,
+            destination_folder_uri=convert_project_id_and_data_path_to_uri(
+                project_id=dest_project_data_obj.project_id,
+                data_path=Path(dest_project_data_obj.data.details.path),
+                data_type=FOLDER_DATA_TYPE,
+                uri_type=ICAV2_URI_SCHEME
+            )
+        )
+        if copy_job_list_cache_entry is not None:
+            logger.info("Outputting the memoised copy job list")
+            return get_copy_job_list_output(
+                store,
+                event,
+                copy_job_list_cache_entry.icav2_copy_job_list,
+                reusable_manifest_id=copy_job_list_cache_entry.manifest_id
+            )
 
-    # Get the output folder object
-    logger.info("Get bclconvert output folder object")
-    bclconvert_output_folder_obj = get_project_data_obj_by_id(
-        project_id=project_id,
-        data_id=bclconvert_output_folder_id
-    )
+        output_listing_records_by_folder_name = dict(map(
+            lambda listing_record_group_iter_: (listing_record_group_iter_[0], listing_record_group_iter_[2]),
+            filter(
+                lambda listing_record_group_iter_: listing_record_group_iter_[1],
+                iter_top_level_listing_record_groups(output_listing_records)
+            )
+        ))
+        del output_listing_records
 
-    # Now we have the bsshoutput.json, we can filter the output_data_list to just be those under 'output/'
-    # We also collect the bcl convert output object to get relative files from this directory
-    # Such as the IndexMetricsOut.bin file in the Reports Directory
-    # Which we also copy over to the interops directory
-    bcl_convert_output_path = Path(bclconvert_output_folder_obj.data.details.path) / "output"
-    bcl_convert_output_fol_id = get_project_data_folder_id_from_project_id_and_path(
-        project_id,
-        bcl_convert_output_path,
-        create_folder_if_not_found=False
-    )
-    bcl_convert_output_obj = get_project_data_obj_by_id(
-        project_id=project_id,
-        data_id=bcl_convert_output_fol_id
-    )
+    # Collect the ICAv2 data objects we need,
+    # the destination folder, run folder and bclconvert output lookups are independent of one another
+    # so each lookup is started as soon as the lookups it depends on have completed
+    logger.info("Collecting the destination, input run and output data objects")
+    lookup_graph_result = run_task_graph({
+        "dest_project_data_obj": TaskNode(
+            func=lambda: dest_project_data_obj or convert_uri_to_project_data_obj(
+                output_uri,
+                create_data_if_not_found=True
+            )
+        ),
+        "input_run_folder_obj": TaskNode(
+            func=lambda: get_run_folder_obj_from_analysis_id(
+                project_id=project_id,
+                analysis_id=analysis_id
+            )
+        ),
+        # This is a lazy handle, the output files are only listed if we need them below
+        "bclconvert_outputs": TaskNode(
+            func=lambda: bclconvert_outputs or get_bclconvert_outputs_from_analysis_id(
+                project_id=project_id,
+                analysis_id=analysis_id
+            )
+        ),
+        "bclconvert_output_folder_obj": TaskNode(
+            func=lambda bclconvert_outputs: bclconvert_outputs.output_folder_obj,
+            dependencies=("bclconvert_outputs",)
+        ),
+        # We also collect the bcl convert output object to get relative files from this directory
+        # Such as the IndexMetricsOut.bin file in the Reports Directory
+        # Which we also copy over to the interops directory
+        "bcl_convert_output_obj": TaskNode(
+            func=lambda bclconvert_output_folder_obj: get_project_data_obj_by_id(
+                project_id=project_id,
+                data_id=get_project_data_folder_id_from_project_id_and_path(
+                    project_id,
+                    Path(bclconvert_output_folder_obj.data.details.path) / "output",
+                    create_folder_if_not_found=False
+                )
+            ),
+            dependencies=("bclconvert_output_folder_obj",)
+        ),
+        "interop_files": TaskNode(
+            func=lambda input_run_folder_obj: get_interop_files_from_run_folder(
+                input_run_folder_obj
+            ),
+            dependencies=("input_run_folder_obj",)
+        ),
+        "samples_folder_obj": TaskNode(
+            func=lambda bcl_convert_output_obj: get_project_data_obj_from_project_id_and_path(
+                project_id=bcl_convert_output_obj.project_id,
+                data_path=Path(bcl_convert_output_obj.data.details.path) / "Samples",
+                data_type=FOLDER_DATA_TYPE
+            ),
+            dependencies=("bcl_convert_output_obj",)
+        ),
+    })
 
-    # Get the interop files
-    interop_files = get_interop_files_from_run_folder(
-        input_run_folder_obj
+    logger.info("ICAv2 lookup timings: %s", json.dumps(lookup_graph_result.get_timing_trace()))
+    logger.info(
+        "ICAv2 lookup critical path: %s",
+        " -> ".join(map(
+            lambda timing_iter_: timing_iter_.task_name,
+            lookup_graph_result.critical_path
+        ))
     )
 
+    dest_project_data_obj = lookup_graph_result.results["dest_project_data_obj"]
+    bclconvert_outputs = lookup_graph_result.results["bclconvert_outputs"]
+    bcl_convert_output_obj: 'ProjectData' = lookup_graph_result.results["bcl_convert_output_obj"]
+    interop_files: List['ProjectData'] = lookup_graph_result.results["interop_files"]
+    samples_folder_obj: 'ProjectData' = lookup_graph_result.results["samples_folder_obj"]
+
     # Convert interop files to uris and add to the run manifest
     interops_as_uri = list(
         map(
@@ -146,46 +488,155 @@ def handler(event, context):
             data_type=FILE_DATA_TYPE
         )
 
-    logger.info("Outputting the copy job list")
+    # Get the Samples and Reports directories
+    samples_folder_uri, reports_folder_uri = map(
+        lambda folder_name_iter_: convert_project_id_and_data_path_to_uri(
+            project_id=bcl_convert_output_obj.project_id,
+            data_path=Path(bcl_convert_output_obj.data.details.path) / folder_name_iter_,
+            data_type=FOLDER_DATA_TYPE,
+        ),
+        ["Samples", "Reports"]
+    )
 
-    return {
-        "icav2CopyJobList": [
-            # Samples and Report directories
-            {
-                "sourceUriList": [
-                    # Samples
-                    convert_project_id_and_data_path_to_uri(
-                        project_id=bcl_convert_output_obj.project_id,
-                        data_path=Path(bcl_convert_output_obj.data.details.path) / "Samples",
-                        data_type=FOLDER_DATA_TYPE,
-                    ),
-                    # Reports
-                    convert_project_id_and_data_path_to_uri(
-                        project_id=bcl_convert_output_obj.project_id,
-                        data_path=Path(bcl_convert_output_obj.data.details.path) / "Reports",
-                        data_type=FOLDER_DATA_TYPE,
-                    )
-                ],
-                "destinationUri": convert_project_id_and_data_path_to_uri(
-                    project_id=dest_project_data_obj.project_id,
-                    data_path=Path(dest_project_data_obj.data.details.path),
-                    data_type=FOLDER_DATA_TYPE,
-                    uri_type=ICAV2_URI_SCHEME
-                ),
-            },
-            # InterOp Directory (copied on a per-file level)
-            {
-                "sourceUriList": interops_as_uri + ([index_metrics_uri] if index_metrics_uri else []),
-                "destinationUri": convert_project_id_and_data_path_to_uri(
-                    project_id=dest_project_data_obj.project_id,
-                    data_path=Path(dest_project_data_obj.data.details.path) / "InterOp",
-                    data_type=FOLDER_DATA_TYPE,
-                    uri_type=ICAV2_URI_SCHEME
+    # Save a snapshot of the source listing for the validation step, so it doesn't need to list the source again
+    # The Reports folder is only listed (page by page) when we have somewhere to save the snapshot,
+    # and have not already listed it for the fingerprint
+    if store is not None:
+        logger.info("Writing the Reports listing snapshot")
+        write_listing_snapshot(
+            store=store,
+            folder_uri=reports_folder_uri,
+            listing_records=(
+                output_listing_records_by_folder_name.get("Reports", [])
+                if output_listing_records_by_folder_name is not None
+                else iter_listing_records(
+                    bclconvert_outputs.iter_files(Path("output") / "Reports"),
+                    parent_folder_path=Path(bcl_convert_output_obj.data.details.path) / "Reports"
                 )
-            }
+            )
+        )
+
+    # Get the destination folder uris
+    destination_folder_uri, destination_samples_folder_uri, destination_interop_folder_uri = map(
+        lambda data_path_iter_: convert_project_id_and_data_path_to_uri(
+            project_id=dest_project_data_obj.project_id,
+            data_path=data_path_iter_,
+            data_type=FOLDER_DATA_TYPE,
+            uri_type=ICAV2_URI_SCHEME
+        ),
+        [
+            Path(dest_project_data_obj.data.details.path),
+            Path(dest_project_data_obj.data.details.path) / "Samples",
+            Path(dest_project_data_obj.data.details.path) / "InterOp",
         ]
-    }
+    )
+
+    interop_source_uri_list = interops_as_uri + ([index_metrics_uri] if index_metrics_uri else [])
+
+    if is_incremental:
+        # Only copy what is missing or different in the destination
+        logger.info("Incremental mode, comparing the sources against the destination")
+        copy_units_by_destination_uri: Dict[str, List[CopyUnit]] = {}
+        # A missing Samples folder is still planned per sample subfolder, so that it can be sharded,
+        # a missing Reports folder is copied as a whole
+        for source_folder_obj, source_folder_uri, destination_subfolder_uri, coalesce_missing_root_folder in [
+            (samples_folder_obj, samples_folder_uri, destination_samples_folder_uri, False),
+            (
+                get_project_data_obj_from_project_id_and_path(
+                    project_id=bcl_convert_output_obj.project_id,
+                    data_path=Path(bcl_convert_output_obj.data.details.path) / "Reports",
+                    data_type=FOLDER_DATA_TYPE
+                ),
+                reports_folder_uri,
+                destination_folder_uri.rstrip("/") + "/Reports/",
+                True
+            ),
+        ]:
+            for destination_uri, copy_units in plan_incremental_copy_units(
+                source_listing_records=iter_folder_listing_records_concurrently(source_folder_obj),
+                destination_listing_records=iter_destination_folder_listing_records(destination_subfolder_uri),
+                source_folder_uri=source_folder_uri,
+                destination_folder_uri=destination_subfolder_uri,
+                coalesce_missing_folders=coalesce_missing_folders,
+                coalesce_missing_root_folder=coalesce_missing_root_folder
+            ).items():
+                copy_units_by_destination_uri.setdefault(destination_uri, []).extend(copy_units)
+
+        interop_source_uri_list = get_uncopied_file_uri_list(
+            source_file_uri_list=interop_source_uri_list,
+            source_data_obj_list=(
+                interop_files +
+                ([convert_uri_to_project_data_obj(index_metrics_uri)] if index_metrics_uri else [])
+            ),
+            destination_folder_uri=destination_interop_folder_uri
+        )
+    else:
+        # Split the Samples folder into size-balanced shards, so that the copy jobs can run concurrently
+        copy_units_by_destination_uri = {
+            destination_samples_folder_uri: get_samples_copy_units(
+                samples_folder_obj=samples_folder_obj,
+                samples_folder_uri=samples_folder_uri,
+                store=store,
+                samples_listing_records=(
+                    output_listing_records_by_folder_name.get("Samples", [])
+                    if output_listing_records_by_folder_name is not None
+                    else None
+                )
+            ),
+            destination_folder_uri: [
+                CopyUnit(source_uri=reports_folder_uri, size_in_bytes=0, file_count=0)
+            ],
+        }
+
+    logger.info("Planning the copy jobs")
+    icav2_copy_job_list = []
+    for destination_uri, copy_units in copy_units_by_destination_uri.items():
+        copy_shards = plan_copy_shards(
+            copy_units=copy_units,
+            target_shard_size_in_bytes=get_target_shard_size_in_bytes(),
+            max_shard_count=get_max_shard_count()
+        )
+        for shard_index, copy_shard in enumerate(copy_shards, start=1):
+            logger.info(
+                "Copy job %s / %s into %s: %s sources, %s files, %s bytes",
+                shard_index, len(copy_shards), destination_uri, len(copy_shard),
+                sum(map(lambda copy_unit_iter_: copy_unit_iter_.file_count, copy_shard)),
+                sum(map(lambda copy_unit_iter_: copy_unit_iter_.size_in_bytes, copy_shard))
+            )
+            icav2_copy_job_list.append(encode_copy_job(
+                source_uri_list=list(map(
+                    lambda copy_unit_iter_: copy_unit_iter_.source_uri,
+                    copy_shard
+                )),
+                destination_uri=destination_uri,
+            ))
+
+    # InterOp Directory (copied on a per-file level)
+    if len(interop_source_uri_list) > 0:
+        icav2_copy_job_list.append(encode_copy_job(
+            source_uri_list=interop_source_uri_list,
+            destination_uri=destination_interop_folder_uri
+        ))
+
+    copy_job_list_output = get_copy_job_list_output(store, event, icav2_copy_job_list)
+
+    # Memoise the copy job list, against the fingerprint of the source listing we started from
+    if source_listing_fingerprint is not None:
+        write_copy_job_list_cache_entry(
+            store=store,
+            project_id=project_id,
+            analysis_id=analysis_id,
+            source_listing_fingerprint=source_listing_fingerprint,
+            icav2_copy_job_list=icav2_copy_job_list,
+            destination_folder_uri=destination_folder_uri,
+            manifest_id=(
+                event.get("portalRunId")
+                if copy_job_list_output["icav2CopyJobManifest"] is not None
+                else None
+            )
+        )
 
+    return copy_job_list_output
 
 # if __name__ == "__main__":
 #     from os import environ
@@ -4,13 +4,15 @@
 Get the workflow run object for a given workflow run id.
 
 We also get the payload and drop the 'currentState' attribute
+
+The orcabus api tools are imported on first use.
 """
 
+# Standard imports
+from functools import partial
+
 # Layer imports
-from orcabus_api_tools.workflow import (
-    get_workflow_run_from_portal_run_id,
-    get_latest_payload_from_portal_run_id
-)
+from bssh_manager_tools.utils.concurrency_helpers import run_concurrently
 
 
 def handler(event, context):
@@ -20,13 +22,21 @@ def handler(event, context):
     :param context:
     :return:
     """
+    from orcabus_api_tools.workflow import (
+        get_workflow_run_from_portal_run_id,
+        get_latest_payload_from_portal_run_id
+    )
 
     # Inputs
     portal_run_id = event['portalRunId']
 
-    # Get the workflow run object
-    workflow_run_object = get_workflow_run_from_portal_run_id(portal_run_id)
-    payload = get_latest_payload_from_portal_run_id(portal_run_id)
+    # Get the workflow run object and payload, the two requests are independent so we make them at the same time
+    orcabus_api_responses = run_concurrently({
+        "workflow_run_object": partial(get_workflow_run_from_portal_run_id, portal_run_id),
+        "payload": partial(get_latest_payload_from_portal_run_id, portal_run_id),
+    })
+    workflow_run_object = orcabus_api_responses["workflow_run_object"]
+    payload = orcabus_api_responses["payload"]
 
     # Drop the 'currentState' attribute from the workflow run object
     if 'currentState' in workflow_run_object:
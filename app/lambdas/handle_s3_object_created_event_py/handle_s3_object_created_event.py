@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+"""
+Count an S3 object created event against the tracked run whose output uri it is under
+
+Invoked by the event rule on the S3 'Object Created' events under the output prefix.
+The first event for each key increments the run's synced count,
+and the event that brings the synced count up to the expected count resumes the step function.
+
+Events for files the sync check ignores, or for objects that are not under a tracked run, are skipped.
+
+The event detail is as EventBridge delivers it from S3, i.e.
+{
+  "bucket": {"name": "bucket"},
+  "object": {"key": "path/to/portal_run_id/file.fastq.gz", "size": 123}
+}
+"""
+
+# Standard imports
+import logging
+from pathlib import Path
+from urllib.parse import unquote_plus
+
+# Layer imports
+from bssh_manager_tools.utils.filemanager_sync_tracker_helpers import get_sync_tracker, record_object_created
+from bssh_manager_tools.utils.icav2_listing_helpers import IGNORED_FILE_NAMES
+from bssh_manager_tools.utils.logger import set_basic_logger
+from bssh_manager_tools.utils.metrics_helpers import set_metrics_context
+
+# Set logger
+logger = set_basic_logger()
+logger.setLevel(logging.INFO)
+
+
+def handler(event, context):
+    """
+    Count the object against its tracked run
+    :param event:
+    :param context:
+    :return:
+    """
+    # Tag the metrics of our external calls with this handler
+    set_metrics_context(handler_name="handle_s3_object_created_event")
+
+    bucket = event["detail"]["bucket"]["name"]
+    key = unquote_plus(event["detail"]["object"]["key"])
+
+    if Path(key).name in IGNORED_FILE_NAMES:
+        return {
+            "isCounted": False,
+        }
+
+    sync_tracker = get_sync_tracker()
+
+    if sync_tracker is None:
+        raise ValueError("No sync tracker configured")
+
+    run = record_object_created(sync_tracker, bucket, key)
+
+    return {
+        "isCounted": run is not None,
+    }
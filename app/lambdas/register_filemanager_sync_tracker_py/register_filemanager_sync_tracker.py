@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""
+Register a run with the filemanager sync tracker, before its copy jobs are launched
+
+From here on, the S3 object created events under the output uri are counted against the run
+(see handle_s3_object_created_event), so once the copy is complete the step function
+can wait for the count rather than polling the filemanager.
+
+The cacheKey (the step function execution name) is the run's tracking id,
+a new execution of the same portal run id counts its keys from zero.
+
+Returns isTracked as false if there is no sync tracker, the step function then polls the filemanager instead.
+"""
+
+# Standard imports
+import logging
+
+# Layer imports
+from bssh_manager_tools.utils.filemanager_sync_tracker_helpers import get_sync_tracker
+from bssh_manager_tools.utils.logger import set_basic_logger
+from bssh_manager_tools.utils.metrics_helpers import set_metrics_context
+
+# Set logger
+logger = set_basic_logger()
+logger.setLevel(logging.INFO)
+
+
+def handler(event, context):
+    """
+    Register the run with the sync tracker
+    :param event:
+    :param context:
+    :return:
+    """
+    # Tag the metrics of our external calls with this handler and the portal run id
+    set_metrics_context(handler_name="register_filemanager_sync_tracker", portal_run_id=event.get("portalRunId"))
+
+    portal_run_id = event.get("portalRunId")
+    s3_prefix = event.get("s3Prefix")
+    cache_key = event.get("cacheKey")
+
+    sync_tracker = get_sync_tracker()
+
+    if sync_tracker is None:
+        logger.info("No sync tracker configured, the filemanager sync will be polled")
+        return {
+            "isTracked": False,
+        }
+
+    sync_tracker.register_run(
+        portal_run_id=portal_run_id,
+        tracking_id=cache_key,
+        s3_prefix=s3_prefix
+    )
+
+    logger.info("Tracking the files created under %s for %s", s3_prefix, portal_run_id)
+
+    return {
+        "isTracked": True,
+    }
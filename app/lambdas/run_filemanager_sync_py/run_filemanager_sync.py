@@ -2,13 +2,15 @@
 
 """
 Run filemanager sync command
+
+The orcabus api tools are imported on first use.
 """
 # Standard library imports
 from pathlib import Path
 from urllib.parse import urlparse
 
 # Layer imports
-from orcabus_api_tools.filemanager.file_helpers import crawl_filemanager_sync
+from bssh_manager_tools.utils.metrics_helpers import record_call, set_metrics_context
 
 
 def handler(event, context):
@@ -18,6 +20,11 @@ def handler(event, context):
     :param context:
     :return:
     """
+    from orcabus_api_tools.filemanager.file_helpers import crawl_filemanager_sync
+
+    # Tag the metrics of our external calls with this handler and the portal run id
+    set_metrics_context(handler_name="run_filemanager_sync", portal_run_id=event.get("portalRunId"))
+
     # Get the s3 input
     s3_prefix = event.get("s3Prefix")
 
@@ -27,7 +34,8 @@ def handler(event, context):
     output_prefix = str(Path(output_uri_parsed.path)).lstrip('/') + "/"
 
     # Add the portal run id attribute to the output uri
-    crawl_filemanager_sync(
-        bucket=output_bucket,
-        prefix=output_prefix
-    )
+    with record_call("crawl_filemanager_sync"):
+        crawl_filemanager_sync(
+            bucket=output_bucket,
+            prefix=output_prefix
+        )
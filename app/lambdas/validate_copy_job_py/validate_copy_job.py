@@ -9,47 +9,411 @@ If sourceUri does not end with a '/', then its a file and will be placed directl
 
 We then confirm that the file size in bytes matches between the two locations
 For directories, we need to perform this recursively.
+Directory listings are streamed and compared on their relative paths,
+so that every missing, extra or mismatched file is reported in a single invocation.
+If the manifest step saved a snapshot of the source listing to the store, we read that snapshot
+rather than listing the source folder again.
+
+Alternatively, a sourceUriList may be given in place of the sourceUri (batch mode).
+Every source uri is then checked concurrently against the same destinationUri,
+sharing one ICAv2 session and one destination lookup,
+and a per-uri result is returned rather than raising on the first invalid copy.
+The source uris share one budget of BSSH_MANAGER_MAX_WORKERS concurrent ICAv2 calls,
+each source uri lists its folders with its share of the budget, so the listings never multiply the thread count.
+The source list may also be given as a sourceBaseUri plus a sourceNameList (or sourceNameListGzip)
+relative to it, as encoded by the manifest step (see copy_job_encoding_helpers).
+
+Multipart copies with a different part size have different e-tags for identical content,
+so by default an e-tag mismatch fails a single file copy, and is only warned on within a folder copy.
+With "verifyContent": true, every file whose size matches but e-tag does not has its content verified
+(see content_verification_helpers), and the copy fails only if the content differs.
+The files are verified concurrently within the same worker budget as the listings,
+and up to the verification budget of the invocation (a maximum number of bytes and files, and a deadline
+ahead of the lambda timeout). Files beyond the budget are not read, but are listed as unverifiedFiles
+in the validation result, and are checked as they would be without verifyContent.
 """
 
 # Standard Imports
+import logging
+import typing
+from functools import partial
 from pathlib import Path
-from typing import cast
-
-# Wrapica imports
-from wrapica.literals import DataType
-from wrapica.project_data import (
-    convert_uri_to_project_data_obj,
-    get_project_data_obj_from_project_id_and_path,
-    find_project_data_bulk
-)
+from typing import Dict, Iterator, List, Optional, Tuple, Union, cast
 
 # Layer imports
-from icav2_tools import set_icav2_env_vars
+from bssh_manager_tools.utils.concurrency_helpers import (
+    get_max_workers,
+    iter_concurrently_in_order,
+    iter_prefetched,
+    run_concurrently,
+)
+from bssh_manager_tools.utils.content_verification_helpers import (
+    ContentVerificationBudget,
+    ContentVerificationResult,
+    RangeReader,
+    get_range_reader_from_url,
+    verify_content_match,
+)
+from bssh_manager_tools.utils.copy_job_encoding_helpers import get_source_uri_list
+from bssh_manager_tools.utils.globals import FILE_DATA_TYPE
+from bssh_manager_tools.utils.icav2_credential_helpers import set_cached_icav2_env_vars
+from bssh_manager_tools.utils.icav2_listing_helpers import iter_folder_listing_records_concurrently
+from bssh_manager_tools.utils.listing_diff_helpers import ListingRecord, diff_listing_records
+from bssh_manager_tools.utils.listing_snapshot_helpers import read_listing_snapshot
+from bssh_manager_tools.utils.logger import set_basic_logger
+from bssh_manager_tools.utils.metrics_helpers import set_metrics_context
+from bssh_manager_tools.utils.store_helpers import get_store
 
-def handler(event, context):
+# Type checking imports, wrapica is imported on first use
+if typing.TYPE_CHECKING:
+    from wrapica.libica_models import ProjectData
+    from wrapica.literals import DataType
+
+# Globals
+# The unverified files listed in a validation result, the count is always reported
+MAX_UNVERIFIED_FILES_REPORTED = 100
+
+# Set logger
+logger = set_basic_logger()
+logger.setLevel(logging.INFO)
+
+
+def get_source_listing_records(
+        source_uri: str,
+        source_data_obj: 'ProjectData',
+        max_workers: Optional[int] = None
+) -> Iterator[ListingRecord]:
     """
-    Given the inputs sourceUri and destinationUri, confirm that the copies have been made correctly.
+    Get the listing records of the source folder,
+    from the snapshot saved by the manifest step if there is one, otherwise by listing the source folder
+    :param source_uri:
+    :param source_data_obj:
+    :param max_workers: The maximum number of subfolders to list at once
+    :return:
     """
-    # Set env vars
-    set_icav2_env_vars()
+    store = get_store()
 
-    # Get the source and destination uris
-    source_uri = event.get("sourceUri")
-    destination_uri = event.get("destinationUri")
+    if store is not None:
+        source_listing_records = read_listing_snapshot(store, source_uri)
+        if source_listing_records is not None:
+            return source_listing_records
+        logger.info("No listing snapshot found for %s, listing the source folder", source_uri)
 
-    # Confirm that the source and destination uris are not None
-    if source_uri is None:
-        raise ValueError("The sourceUri is required")
-    if destination_uri is None:
-        raise ValueError("The destinationUri is required")
+    return iter_folder_listing_records_concurrently(source_data_obj, max_workers=max_workers)
+
+
+def get_range_reader(data_obj: 'ProjectData') -> RangeReader:
+    """
+    Get a range reader for an ICAv2 file through a presigned download url
+    :param data_obj:
+    :return:
+    """
+    from wrapica.project_data import create_download_url
+
+    return get_range_reader_from_url(create_download_url(data_obj.project_id, data_obj.data.id))
+
+
+def verify_file_content(
+        source_data_obj: 'ProjectData',
+        destination_data_obj: 'ProjectData',
+        verification_budget: ContentVerificationBudget,
+        max_workers: Optional[int] = None
+) -> Optional[ContentVerificationResult]:
+    """
+    Check that a source and destination file with the same size but different e-tags have the same content
+    :param source_data_obj:
+    :param destination_data_obj:
+    :param verification_budget: The file is only read if it fits in the budget
+    :param max_workers: The number of concurrent range reads
+    :return: The verification result, or None if the file could not be verified
+    """
+    if not verification_budget.try_reserve(destination_data_obj.data.details.file_size_in_bytes):
+        logger.info(
+            "The verification budget is spent, not verifying the content of %s",
+            destination_data_obj.data.details.path
+        )
+        return None
+
+    try:
+        content_verification_result = verify_content_match(
+            source_e_tag=source_data_obj.data.details.object_e_tag,
+            destination_e_tag=destination_data_obj.data.details.object_e_tag,
+            file_size_in_bytes=destination_data_obj.data.details.file_size_in_bytes,
+            get_source_range_reader=partial(get_range_reader, source_data_obj),
+            get_destination_range_reader=partial(get_range_reader, destination_data_obj),
+            max_workers=max_workers
+        )
+    except OSError as e:
+        # A dropped connection or read timeout leaves the file unverified, rather than failing the invocation
+        logger.warning("Could not read %s to verify its content: %s", destination_data_obj.data.details.path, e)
+        return None
+
+    logger.info(
+        "Verified the content of %s by %s: %s",
+        destination_data_obj.data.details.path,
+        content_verification_result.method,
+        content_verification_result.detail
+    )
+
+    return content_verification_result
+
+
+def verify_folder_file_content(
+        source_data_obj: 'ProjectData',
+        destination_data_obj: 'ProjectData',
+        relative_path: str,
+        verification_budget: ContentVerificationBudget,
+        max_workers: Optional[int] = None
+) -> Tuple[str, Optional[ContentVerificationResult]]:
+    """
+    Verify the content of a single file of a folder copy
+    :param source_data_obj: The source folder
+    :param destination_data_obj: The destination folder
+    :param relative_path: The path of the file, relative to the folders
+    :param verification_budget:
+    :param max_workers: The number of concurrent range reads
+    :return: The relative path, and the verification result or None if the file could not be verified
+    """
+    from wrapica.project_data import get_project_data_obj_from_project_id_and_path
+
+    source_file_obj, destination_file_obj = map(
+        lambda folder_obj_iter_: get_project_data_obj_from_project_id_and_path(
+            project_id=folder_obj_iter_.project_id,
+            data_path=Path(folder_obj_iter_.data.details.path) / relative_path,
+            data_type=FILE_DATA_TYPE
+        ),
+        [source_data_obj, destination_data_obj]
+    )
+
+    return relative_path, verify_file_content(
+        source_file_obj, destination_file_obj, verification_budget, max_workers=max_workers
+    )
+
+
+def verify_folder_files_content(
+        source_data_obj: 'ProjectData',
+        destination_data_obj: 'ProjectData',
+        relative_paths: List[str],
+        verification_budget: ContentVerificationBudget,
+        max_workers: Optional[int] = None
+) -> List[str]:
+    """
+    Verify the content of the files of a folder copy whose e-tags do not match,
+    the files are verified concurrently, each with its share of the workers
+    :param source_data_obj: The source folder
+    :param destination_data_obj: The destination folder
+    :param relative_paths: The paths of the files, relative to the folders
+    :param verification_budget:
+    :param max_workers: The number of concurrent ICAv2 calls and range reads, shared between the files
+    :return: The relative paths of the files that could not be verified
+    """
+    if max_workers is None:
+        max_workers = get_max_workers()
+
+    # One pool across the files, the range reads of each file share what is left of the workers
+    file_max_workers = max(1, min(max_workers, len(relative_paths)))
+
+    verification_results = list(iter_concurrently_in_order(
+        map(
+            lambda relative_path_iter_: partial(
+                verify_folder_file_content,
+                source_data_obj, destination_data_obj,
+                relative_path=relative_path_iter_,
+                verification_budget=verification_budget,
+                max_workers=max(1, max_workers // file_max_workers)
+            ),
+            relative_paths
+        ),
+        max_workers=file_max_workers
+    ))
+
+    # Report every file whose content differs at once
+    content_mismatches = list(filter(
+        lambda verification_result_iter_: (
+            verification_result_iter_[1] is not None and not verification_result_iter_[1].is_match
+        ),
+        verification_results
+    ))
+    if content_mismatches:
+        raise ValueError(
+            f"File sizes match but the file contents do not match for {len(content_mismatches)} files "
+            f"between {source_data_obj.data.details.path} and {destination_data_obj.data.details.path}.\n" +
+            "\n".join(map(
+                lambda content_mismatch_iter_: f"{content_mismatch_iter_[0]}: {content_mismatch_iter_[1].detail}",
+                content_mismatches
+            ))
+        )
+
+    return list(map(
+        lambda verification_result_iter_: verification_result_iter_[0],
+        filter(
+            lambda verification_result_iter_: verification_result_iter_[1] is None,
+            verification_results
+        )
+    ))
+
+
+def validate_folder_copy(
+        source_uri: str,
+        source_data_obj: 'ProjectData',
+        destination_data_obj: 'ProjectData',
+        verification_budget: Optional[ContentVerificationBudget] = None,
+        max_workers: Optional[int] = None
+) -> List[str]:
+    """
+    Confirm that all files within the source folder have been copied over correctly to the destination folder
+    :param source_uri:
+    :param source_data_obj:
+    :param destination_data_obj:
+    :param verification_budget: Verify the content of files whose e-tags do not match, up to this budget
+    :param max_workers: The maximum number of concurrent ICAv2 calls, shared between the two listings
+    :return: The relative paths of the e-tag mismatched files whose content was not verified
+    """
+    if max_workers is None:
+        max_workers = get_max_workers()
+
+    source_listing_records = get_source_listing_records(
+        source_uri, source_data_obj, max_workers=max(1, max_workers // 2)
+    )
+    destination_listing_records = iter_folder_listing_records_concurrently(
+        destination_data_obj, max_workers=max(1, max_workers // 2)
+    )
+
+    # Each listing is fanned out across its subfolders, and both are started on their own thread
+    # before the diff consumes either, so the source and destination trees are listed at the same time
+    # With a single worker, the diff consumes the two listings in turn instead
+    if max_workers > 1:
+        source_listing_records = iter_prefetched(source_listing_records)
+        destination_listing_records = iter_prefetched(destination_listing_records)
+
+    # Stream both listings through the keyed diff so that every discrepancy is reported at once
+    # If either listing raises, the other is closed too, so its background thread stops listing
+    try:
+        listing_diff = diff_listing_records(
+            source_records=source_listing_records,
+            destination_records=destination_listing_records
+        )
+    finally:
+        for listing_records in (source_listing_records, destination_listing_records):
+            if hasattr(listing_records, "close"):
+                listing_records.close()
+
+    logger.info(
+        "Compared %s source files against %s destination files, holding at most %s unmatched files in memory",
+        listing_diff.source_count, listing_diff.destination_count, listing_diff.peak_pending_count
+    )
+
+    # Multipart copies with a different part size will have different e-tags for identical content
+    # So we only warn on e-tag mismatches for folders, as we always have, unless we are verifying the content
+    if listing_diff.e_tag_mismatched:
+        logger.warning(
+            "%s files have matching sizes but different e-tags between %s and %s",
+            len(listing_diff.e_tag_mismatched),
+            source_data_obj.data.details.path,
+            destination_data_obj.data.details.path
+        )
+
+    if listing_diff.has_missing_extra_or_size_mismatches():
+        raise ValueError(
+            f"The source and destination directories do not match.\n"
+            f"{listing_diff.summary()}"
+        )
+
+    if verification_budget is None or not listing_diff.e_tag_mismatched:
+        return []
+
+    unverified_relative_paths = verify_folder_files_content(
+        source_data_obj, destination_data_obj,
+        relative_paths=list(map(
+            lambda e_tag_mismatch_iter_: e_tag_mismatch_iter_[0],
+            listing_diff.e_tag_mismatched
+        )),
+        verification_budget=verification_budget,
+        max_workers=max_workers
+    )
+
+    # Without a content check these are only warned on, as they are without verifyContent
+    if unverified_relative_paths:
+        logger.warning(
+            "Could not verify the content of %s of %s e-tag mismatched files between %s and %s",
+            len(unverified_relative_paths),
+            len(listing_diff.e_tag_mismatched),
+            source_data_obj.data.details.path,
+            destination_data_obj.data.details.path
+        )
+
+    return unverified_relative_paths
+
+
+def validate_file_copy(
+        source_data_obj: 'ProjectData',
+        destination_data_obj: 'ProjectData',
+        verification_budget: Optional[ContentVerificationBudget] = None,
+        max_workers: Optional[int] = None
+):
+    """
+    Confirm that the file size in bytes and e-tag match between the source and destination
+    :param source_data_obj:
+    :param destination_data_obj:
+    :param verification_budget: If the e-tags do not match, verify the content (up to this budget) rather than failing
+    :param max_workers: The number of concurrent range reads
+    :return:
+    """
+    # Confirm that the file size in bytes matches between the source and destination
+    if source_data_obj.data.details.file_size_in_bytes != destination_data_obj.data.details.file_size_in_bytes:
+        raise ValueError(
+            f"The file size in bytes does not match between the source and destination. "
+            f"Source: {source_data_obj.data.details.file_size_in_bytes}, Destination: {destination_data_obj.data.details.file_size_in_bytes}"
+        )
+    if source_data_obj.data.details.object_e_tag != destination_data_obj.data.details.object_e_tag:
+        if verification_budget is not None:
+            content_verification_result = verify_file_content(
+                source_data_obj, destination_data_obj, verification_budget, max_workers=max_workers
+            )
+            if content_verification_result is not None:
+                if not content_verification_result.is_match:
+                    raise ValueError(
+                        f"File sizes match but the file contents do not match between "
+                        f"{source_data_obj.data.details.path} and {destination_data_obj.data.details.path}. "
+                        f"{content_verification_result.detail}"
+                    )
+                return
+            # Unverified, so we fail on the e-tag mismatch as we do without verifyContent
+            raise ValueError(
+                f"File sizes match but the file e-tags do not match between the source and destination, "
+                f"and the content of {destination_data_obj.data.details.path} could not be verified "
+                f"within the verification budget of this invocation. "
+                f"Source: {source_data_obj.data.details.object_e_tag}, Destination: {destination_data_obj.data.details.object_e_tag}"
+            )
+        raise ValueError(
+            f"File sizes match but the file e-tags do not match between the source and destination. This suggests that the contents of the files may be different. "
+            f"The file e-tags do not match between the source and destination. "
+            f"Source: {source_data_obj.data.details.object_e_tag}, Destination: {destination_data_obj.data.details.object_e_tag}"
+        )
+
+
+def validate_source_copy(
+        source_uri: str,
+        source_data_obj: 'ProjectData',
+        parent_destination_data_obj: 'ProjectData',
+        verification_budget: Optional[ContentVerificationBudget] = None,
+        max_workers: Optional[int] = None
+) -> List[str]:
+    """
+    Confirm that the source has been copied over correctly underneath the parent destination folder
+    :param source_uri:
+    :param source_data_obj:
+    :param parent_destination_data_obj:
+    :param verification_budget: Verify the content of files whose e-tags do not match, up to this budget
+    :param max_workers: The maximum number of concurrent ICAv2 calls when listing folders and verifying files
+    :return: The relative paths of the files in a source folder whose content could not be verified
+    """
+    from wrapica.project_data import get_project_data_obj_from_project_id_and_path
 
-    # If the source uri ends with a '/', then its a directory and will be placed as a subfolder underneath the destination uri
-    source_data_obj = convert_uri_to_project_data_obj(source_uri)
-    parent_destination_data_obj = convert_uri_to_project_data_obj(destination_uri)
     destination_data_obj = get_project_data_obj_from_project_id_and_path(
         project_id=parent_destination_data_obj.project_id,
         data_path=Path(parent_destination_data_obj.data.details.path) / source_data_obj.data.details.name,
-        data_type=cast(DataType, source_data_obj.data.details.data_type)
+        data_type=cast('DataType', source_data_obj.data.details.data_type)
     )
 
     # Separate tests for files and folders
@@ -57,87 +421,134 @@ def handler(event, context):
     # If a folder, we need to find all files within the folder and confirm that they have been copied over
     # correctly, and that the number of files matches between the source and destination
     if source_data_obj.data.details.data_type == "FOLDER":
-        all_source_objects = list(filter(
-            lambda project_data_iter_: not (
-                project_data_iter_.data.details.name == ".iap_upload_test.tmp"
-            ),
-            find_project_data_bulk(
-                project_id=source_data_obj.project_id,
-                parent_folder_id=source_data_obj.data.id,
-                data_type="FILE"
-            )
-        ))
+        return validate_folder_copy(
+            source_uri, source_data_obj, destination_data_obj,
+            verification_budget=verification_budget, max_workers=max_workers
+        )
 
-        all_destination_object = list(filter(
-            lambda project_data_iter_: not (
-                project_data_iter_.data.details.name == ".iap_upload_test.tmp"
-            ),
-            find_project_data_bulk(
-                project_id=destination_data_obj.project_id,
-                parent_folder_id=destination_data_obj.data.id,
-                data_type="FILE"
-            )
-        ))
+    # Check that the file size in bytes matches between the source and destination
+    validate_file_copy(
+        source_data_obj, destination_data_obj,
+        verification_budget=verification_budget, max_workers=max_workers
+    )
+    return []
 
-        if len(all_source_objects) != len(all_destination_object):
-            raise ValueError(
-                f"The number of files in the source and destination directories do not match. "
-                f"Source: {len(all_source_objects)}, Destination: {len(all_destination_object)}"
-            )
 
-        all_source_objects_sorted = sorted(
-            all_source_objects,
-            key=lambda x: x.data.details.path
-        )
-        all_destination_objects_sorted = sorted(
-            all_destination_object,
-            key=lambda x: x.data.details.path
+def get_source_uri_validation_result(
+        source_uri: str,
+        parent_destination_data_obj: 'ProjectData',
+        verification_budget: Optional[ContentVerificationBudget] = None,
+        max_workers: Optional[int] = None
+) -> Dict[str, Union[str, bool, int, List[str]]]:
+    """
+    Validate a single source uri, returning the result rather than raising on an invalid copy
+    :param source_uri:
+    :param parent_destination_data_obj:
+    :param verification_budget:
+    :param max_workers: The maximum number of concurrent ICAv2 calls when listing folders and verifying files
+    :return:
+    """
+    from wrapica.project_data import convert_uri_to_project_data_obj
+
+    try:
+        unverified_relative_paths = validate_source_copy(
+            source_uri=source_uri,
+            source_data_obj=convert_uri_to_project_data_obj(source_uri),
+            parent_destination_data_obj=parent_destination_data_obj,
+            verification_budget=verification_budget,
+            max_workers=max_workers
         )
+    except (FileNotFoundError, NotADirectoryError, ValueError) as e:
+        logger.warning("Validation failed for %s: %s", source_uri, e)
+        return {
+            "sourceUri": source_uri,
+            "isValid": False,
+            "errors": [f"{type(e).__name__}: {e}"],
+        }
 
-        for source_object_iter, dest_object_iter_ in zip(
-            all_source_objects_sorted,
-            all_destination_objects_sorted
-        ):
-            # Check we're checking the same file
-            if not (
-                    (
-                            Path(source_object_iter.data.details.path).relative_to(
-                                source_data_obj.data.details.path
-                            )
-                    ) ==
-                    (
-                            Path(dest_object_iter_.data.details.path).relative_to(
-                                destination_data_obj.data.details.path
-                            )
-                    )
-            ):
-                raise ValueError(
-                    f"Paths out of sync, "
-                    f"{source_object_iter.data.details.path} does not equal "
-                    f"{dest_object_iter_.data.details.path}"
-                )
-
-            # Check file size in bytes are same
-            if not (
-                    source_object_iter.data.details.file_size_in_bytes == dest_object_iter_.data.details.file_size_in_bytes
-            ):
-                raise ValueError(
-                    f"File sizes do not match between the source and destination. "
-                    f"{source_object_iter.data.details.file_size_in_bytes} != "
-                    f"{dest_object_iter_.data.details.file_size_in_bytes}"
-                )
+    validation_result: Dict[str, Union[str, bool, int, List[str]]] = {
+        "sourceUri": source_uri,
+        "isValid": True,
+        "errors": [],
+    }
 
-    # Check that the file size in bytes matches between the source and destination
-    else:
-        # Confirm that the file size in bytes matches between the source and destination
-        if source_data_obj.data.details.file_size_in_bytes != destination_data_obj.data.details.file_size_in_bytes:
-            raise ValueError(
-                f"The file size in bytes does not match between the source and destination. "
-                f"Source: {source_data_obj.data.details.file_size_in_bytes}, Destination: {destination_data_obj.data.details.file_size_in_bytes}"
-            )
-        if source_data_obj.data.details.object_e_tag != destination_data_obj.data.details.object_e_tag:
-            raise ValueError(
-                f"File sizes match but the file e-tags do not match between the source and destination. This suggests that the contents of the files may be different. "
-                f"The file e-tags do not match between the source and destination. "
-                f"Source: {source_data_obj.data.details.object_e_tag}, Destination: {destination_data_obj.data.details.object_e_tag}"
-            )
+    # The files that were only checked on their size, as the verification budget was spent
+    if unverified_relative_paths:
+        validation_result["unverifiedFileCount"] = len(unverified_relative_paths)
+        validation_result["unverifiedFiles"] = unverified_relative_paths[:MAX_UNVERIFIED_FILES_REPORTED]
+
+    return validation_result
+
+
+def handler(event, context):
+    """
+    Given the inputs sourceUri (or a source list) and destinationUri, confirm that the copies have been made correctly.
+    """
+    from wrapica.project_data import convert_uri_to_project_data_obj
+
+    # Tag the metrics of our external calls with this handler and the portal run id
+    set_metrics_context(handler_name="validate_copy_job", portal_run_id=event.get("portalRunId"))
+
+    # Set env vars, the access token is cached for the life of the container
+    set_cached_icav2_env_vars()
+
+    # Get the source and destination uris
+    source_uri = event.get("sourceUri")
+    source_uri_list = get_source_uri_list(event)
+    destination_uri = event.get("destinationUri")
+    verify_content = event.get("verifyContent", False)
+
+    # The files verified by this invocation are capped, so that verification cannot run into the lambda timeout
+    verification_budget = ContentVerificationBudget.from_lambda_context(context) if verify_content else None
+
+    # Confirm that the source and destination uris are not None
+    if source_uri is None and source_uri_list is None:
+        raise ValueError("One of sourceUri, sourceUriList, sourceNameList or sourceNameListGzip is required")
+    if destination_uri is None:
+        raise ValueError("The destinationUri is required")
+
+    # Batch mode, one destination lookup shared by all source uris
+    if source_uri_list is not None:
+        parent_destination_data_obj = convert_uri_to_project_data_obj(destination_uri)
+
+        # Split the worker budget between the source uris validated at once,
+        # so that the listings of each source uri do not open pools of their own on top of the batch pool
+        max_workers = get_max_workers()
+        batch_max_workers = max(1, min(max_workers, len(source_uri_list)))
+
+        validation_results = list(iter_concurrently_in_order(
+            map(
+                lambda source_uri_iter_: partial(
+                    get_source_uri_validation_result,
+                    source_uri=source_uri_iter_,
+                    parent_destination_data_obj=parent_destination_data_obj,
+                    verification_budget=verification_budget,
+                    max_workers=max(1, max_workers // batch_max_workers)
+                ),
+                source_uri_list
+            ),
+            max_workers=batch_max_workers
+        ))
+
+        return {
+            "isValid": all(map(
+                lambda validation_result_iter_: validation_result_iter_["isValid"],
+                validation_results
+            )),
+            "destinationUri": destination_uri,
+            "validationResults": validation_results,
+        }
+
+    # If the source uri ends with a '/', then its a directory and will be placed as a subfolder underneath the destination uri
+    # The source and destination parent lookups are independent, so we run them at the same time
+    data_objs = run_concurrently({
+        "source": partial(convert_uri_to_project_data_obj, source_uri),
+        "parent_destination": partial(convert_uri_to_project_data_obj, destination_uri),
+    })
+
+    validate_source_copy(
+        source_uri=source_uri,
+        source_data_obj=data_objs["source"],
+        parent_destination_data_obj=data_objs["parent_destination"],
+        verification_budget=verification_budget
+    )
@@ -2,112 +2,168 @@
 
 """
 Download the draft schema, validate it against the current schema, and print the results.
+
+The schema is compiled into a validator once per registry, schema name and schema version,
+and reused for the life of the lambda container, we return every validation error, not just the first.
+
+boto3 and jsonschema are imported on first use, when a validator is compiled.
 """
 
 # Imports
 import json
-import boto3
 import typing
-import jsonschema
 from os import environ
-from typing import Dict
+from typing import Dict, List, Optional, Tuple, Union
 import logging
-from jsonschema import ValidationError
+
+# Layer imports
+from bssh_manager_tools.utils.logger import set_basic_logger
+from bssh_manager_tools.utils.ssm_parameter_helpers import get_ssm_parameter_values
 
 # Type checking imports
 if typing.TYPE_CHECKING:
+    from jsonschema.protocols import Validator
     from mypy_boto3_schemas import SchemasClient
-    from mypy_boto3_ssm import SSMClient
 
 # Globals
 SSM_REGISTRY_NAME_ENV_VAR = "SSM_REGISTRY_NAME"
 SSM_SCHEMA_NAME_ENV_VAR = "SSM_SCHEMA_NAME"
 
-logger = logging.getLogger()
+# Set logger
+logger = set_basic_logger()
 logger.setLevel(logging.INFO)
 
+# Compiled validators, keyed on registry name, schema name and schema version
+# Lives for the life of the lambda container
+VALIDATOR_CACHE: Dict[Tuple[str, str, Optional[str]], 'Validator'] = {}
+_SCHEMAS_CLIENT: Optional['SchemasClient'] = None
+
+
+def get_schemas_client() -> 'SchemasClient':
+    global _SCHEMAS_CLIENT
+
+    if _SCHEMAS_CLIENT is None:
+        import boto3
+        _SCHEMAS_CLIENT = boto3.client("schemas")
+
+    return _SCHEMAS_CLIENT
+
 
 def get_ssm_parameter_value(parameter_name: str) -> str:
     """
     Get the SSM parameter for the schema.
     :return: The SSM parameter value.
     """
-
-    # Get the ssm client
-    ssm_client: SSMClient = boto3.client("ssm")
-
-    # Get the SSM parameter value
-    response = ssm_client.get_parameter(
-        Name=parameter_name,
-        WithDecryption=True
-    )
-
-    return response["Parameter"]["Value"]
+    return get_ssm_parameter_values([parameter_name])[parameter_name]
 
 
 def get_schema_from_registry(
         registry_name: str,
-        schema_name: str
+        schema_name: str,
+        schema_version: Optional[str] = None
 ) -> str:
     """
     Get the schema from the schema registry.
     :param registry_name: The name of the schema registry.
     :param schema_name: The name of the schema.
+    :param schema_version: The version of the schema, defaults to the latest version.
     :return: The schema as a string.
     """
 
-    # Get the schemas client
-    schemas_client: SchemasClient = boto3.client("schemas")
-
     # Get the schema from the registry
-    response = schemas_client.describe_schema(
+    response = get_schemas_client().describe_schema(
         RegistryName=registry_name,
-        SchemaName=schema_name
+        SchemaName=schema_name,
+        **({"SchemaVersion": schema_version} if schema_version is not None else {})
     )
 
     return response["Content"]
 
 
-def validate_draft_schema(
-        json_schema: str,
-        json_body: str
-) -> bool:
+def get_compiled_validator(
+        registry_name: str,
+        schema_name: str,
+        schema_version: Optional[str] = None
+) -> 'Validator':
+    """
+    Get a validator for the schema, only going to the schema registry
+    the first time we see this registry, schema name and schema version in this container.
+    :param registry_name: The name of the schema registry.
+    :param schema_name: The name of the schema.
+    :param schema_version: The version of the schema.
+    :return: The validator
+    """
+    validator_cache_key = (registry_name, schema_name, schema_version)
+
+    if validator_cache_key not in VALIDATOR_CACHE:
+        from jsonschema.validators import validator_for
+
+        logger.info("Compiling validator for %s/%s version %s", registry_name, schema_name, schema_version)
+        json_schema = json.loads(
+            get_schema_from_registry(
+                registry_name=registry_name,
+                schema_name=schema_name,
+                schema_version=schema_version
+            )
+        )
+
+        # Check the schema against its meta-schema once, rather than on every validation
+        validator_class = validator_for(json_schema)
+        validator_class.check_schema(json_schema)
+
+        VALIDATOR_CACHE[validator_cache_key] = validator_class(json_schema)
+
+    return VALIDATOR_CACHE[validator_cache_key]
+
+
+def get_validation_errors(
+        validator: 'Validator',
+        json_body: Dict
+) -> List[str]:
     """
-    Download the draft schema, validate it against the current schema, and print the results.
+    Validate the event against the schema, and return every validation error
+    :param validator: The compiled validator
+    :param json_body: The event
+    :return: The validation error messages, prefixed with the path to the failing element
     """
-    try:
-        jsonschema.validate(
-            instance=json.loads(json_body),
-            schema=json.loads(json_schema),
+    return list(map(
+        lambda validation_error_iter_: f"{validation_error_iter_.json_path}: {validation_error_iter_.message}",
+        sorted(
+            validator.iter_errors(json_body),
+            key=lambda validation_error_iter_: validation_error_iter_.json_path
         )
-    except ValidationError as e:
-        logger.info(f"Failed validation, {e}")
-        return False
-    return True
+    ))
 
 
-def handler(event, context) -> Dict[str, bool]:
+def handler(event, context) -> Dict[str, Union[bool, List[str]]]:
     """
     Given a draft schema, validate it against the current schema and print the results.
     :return:
     """
-    # Get the SSM parameters
-    schema_registry = get_ssm_parameter_value(environ[SSM_REGISTRY_NAME_ENV_VAR])
-    schema_name = json.loads(get_ssm_parameter_value(environ[SSM_SCHEMA_NAME_ENV_VAR]))['schemaName']
-
-    # Get the current schema from the schema registry
-    current_schema = get_schema_from_registry(
+    # Get the SSM parameters, both in one call, and cached for the life of the container
+    ssm_parameter_values = get_ssm_parameter_values([
+        environ[SSM_REGISTRY_NAME_ENV_VAR],
+        environ[SSM_SCHEMA_NAME_ENV_VAR],
+    ])
+    schema_registry = ssm_parameter_values[environ[SSM_REGISTRY_NAME_ENV_VAR]]
+    schema_latest = json.loads(ssm_parameter_values[environ[SSM_SCHEMA_NAME_ENV_VAR]])
+
+    # Get the current schema from the schema registry (or our cache if we have seen this schema version before)
+    validator = get_compiled_validator(
         registry_name=schema_registry,
-        schema_name=schema_name
+        schema_name=schema_latest['schemaName'],
+        schema_version=schema_latest.get('schemaVersion')
     )
 
-    # Get the draft schema from the schema registry
+    # Validate the event as is
+    validation_errors = get_validation_errors(validator, event)
+
+    if validation_errors:
+        logger.info("Failed validation, %s", validation_errors)
+
     return {
-        "isValid": validate_draft_schema(
-            current_schema,
-            # Assuming the event contains the draft schema as a JSON string
-            json.dumps(event)
-        )
+        "isValid": len(validation_errors) == 0,
+        "errors": validation_errors,
     }
 
 
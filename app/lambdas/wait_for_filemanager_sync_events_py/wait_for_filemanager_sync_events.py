@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+"""
+Wait for the filemanager sync events of a run
+
+Invoked with a task token, once the copy has been validated and the first sync check has found files missing.
+
+The tracker only counts the objects created after the run was registered,
+so we do not wait for every file of the run (files already in place never have an event).
+Instead we find every key the filemanager is still missing, from the expected inventory the sync check
+saved to the store and one full pass of the filemanager records,
+and wait for the events of those that have not had one yet (see set_expected_missing_keys).
+
+If every expected file has already been counted, we send the task success straight away,
+otherwise handle_s3_object_created_event sends it when the last file arrives.
+
+The step function resumes with the synced and expected counts, and confirms the sync with one more sync check.
+If there is no expected inventory in the store, we raise and the step function polls the filemanager instead.
+"""
+
+# Standard imports
+import logging
+from urllib.parse import urlparse
+
+# Layer imports
+from bssh_manager_tools.utils.expected_inventory_helpers import read_expected_inventory
+from bssh_manager_tools.utils.filemanager_listing_helpers import iter_filemanager_record_pages
+from bssh_manager_tools.utils.filemanager_sync_helpers import check_filemanager_sync
+from bssh_manager_tools.utils.filemanager_sync_tracker_helpers import (
+    get_sync_tracker,
+    get_tracked_run,
+    resume_if_complete,
+    set_expected_missing_keys,
+)
+from bssh_manager_tools.utils.logger import set_basic_logger
+from bssh_manager_tools.utils.metrics_helpers import set_metrics_context
+from bssh_manager_tools.utils.store_helpers import get_store
+
+# Set logger
+logger = set_basic_logger()
+logger.setLevel(logging.INFO)
+
+
+def handler(event, context):
+    """
+    Set the expected count and the task token on the tracked run
+    :param event:
+    :param context:
+    :return:
+    """
+    # Tag the metrics of our external calls with this handler and the portal run id
+    set_metrics_context(handler_name="wait_for_filemanager_sync_events", portal_run_id=event.get("portalRunId"))
+
+    portal_run_id = event.get("portalRunId")
+    s3_prefix = event.get("s3Prefix")
+    cache_key = event.get("cacheKey")
+    task_token = event.get("taskToken")
+
+    sync_tracker = get_sync_tracker()
+    store = get_store()
+
+    if sync_tracker is None:
+        raise ValueError("No sync tracker configured")
+
+    expected_sizes_by_key = read_expected_inventory(store, s3_prefix, cache_key) if store is not None else None
+
+    if expected_sizes_by_key is None:
+        raise ValueError(f"No expected inventory for {s3_prefix} under {cache_key}")
+
+    # Read the run before we look for the missing keys,
+    # so that an event counted in between can only make us resume early
+    run = get_tracked_run(sync_tracker, portal_run_id, cache_key)
+
+    if run is None:
+        raise ValueError(f"The run {portal_run_id} is not tracked under {cache_key}")
+
+    # Every missing key, including those with a stale (different size) record
+    sync_check_result = check_filemanager_sync(
+        expected_sizes_by_key=expected_sizes_by_key,
+        filemanager_record_pages=iter_filemanager_record_pages(
+            bucket=urlparse(s3_prefix).netloc,
+            key_prefix=urlparse(s3_prefix).path.lstrip('/')
+        ),
+        max_missing_keys=len(expected_sizes_by_key),
+        stop_on_size_mismatch=False
+    )
+
+    run = set_expected_missing_keys(sync_tracker, run, sync_check_result.missing_keys, task_token)
+
+    if run is None:
+        raise ValueError(f"The run {portal_run_id} is not tracked under {cache_key}")
+
+    logger.info("Synced %s of %s files for %s so far", run.synced_count, run.expected_count, portal_run_id)
+
+    resume_if_complete(sync_tracker, run)
+
+    return run.to_dict()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+
+"""
+Run independent ICAv2 / OrcaBus API calls concurrently
+
+All of our external calls are blocking HTTP round trips, so a small bounded thread pool
+lets us overlap them without pulling in an async http stack.
+
+Calls that depend on the results of other calls can be run as a task graph with run_task_graph,
+each task starts as soon as the tasks it depends on have completed,
+and the start and end time of each task is recorded so that the critical path can be logged.
+
+A lazy iterator (i.e. a paged listing) can be started straight away on a background thread with iter_prefetched,
+so that two listings consumed in turn by the same loop are fetched at the same time.
+"""
+
+# Standard libraries
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from os import environ
+from queue import Full, Queue
+from threading import Event, Thread
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, TypeVar
+
+# Globals
+MAX_WORKERS_ENV_VAR = "BSSH_MANAGER_MAX_WORKERS"
+DEFAULT_MAX_WORKERS = 8
+
+# The number of items a prefetching thread may hold ahead of the caller
+DEFAULT_MAX_PREFETCHED = 1000
+PREFETCH_POLL_SECONDS = 0.1
+
+T = TypeVar("T")
+
+
+def get_max_workers() -> int:
+    """
+    Get the maximum number of worker threads, can be overridden with the BSSH_MANAGER_MAX_WORKERS env var
+    :return:
+    """
+    return max(1, int(environ.get(MAX_WORKERS_ENV_VAR, DEFAULT_MAX_WORKERS)))
+
+
+def run_concurrently(
+    tasks: Dict[str, Callable[[], T]],
+    max_workers: Optional[int] = None,
+) -> Dict[str, T]:
+    """
+    Run a set of independent tasks concurrently and return their results by name.
+
+    If any task raises, the exception is re-raised once all tasks have completed.
+
+    :param tasks: Dictionary of task name to a callable that takes no arguments
+    :param max_workers: The maximum number of threads to use
+    :return: Dictionary of task name to the task result
+    """
+    if max_workers is None:
+        max_workers = get_max_workers()
+
+    # Nothing to gain from a thread pool
+    if len(tasks) <= 1 or max_workers == 1:
+        return {
+            task_name: task()
+            for task_name, task in tasks.items()
+        }
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        futures: Dict[str, Future] = {
+            task_name: executor.submit(task)
+            for task_name, task in tasks.items()
+        }
+
+    return {
+        task_name: future.result()
+        for task_name, future in futures.items()
+    }
+
+
+def iter_concurrently_in_order(
+    tasks: Iterable[Callable[[], T]],
+    max_workers: Optional[int] = None,
+) -> Iterator[T]:
+    """
+    Run tasks concurrently but yield their results in the order the tasks were given.
+
+    At most 2 * max_workers tasks are in flight (or completed but not yet yielded) at any one time,
+    so memory stays bounded no matter how many tasks are given.
+
+    :param tasks: An iterable of callables that take no arguments
+    :param max_workers: The maximum number of threads to use
+    :return: An iterator over the task results
+    """
+    if max_workers is None:
+        max_workers = get_max_workers()
+
+    # Run sequentially
+    if max_workers == 1:
+        for task in tasks:
+            yield task()
+        return
+
+    max_in_flight = 2 * max_workers
+    in_flight: Deque[Future] = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for task in tasks:
+                in_flight.append(executor.submit(task))
+                if len(in_flight) >= max_in_flight:
+                    yield in_flight.popleft().result()
+
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            # If the caller stopped early (or a task raised), don't start any more tasks
+            for future in in_flight:
+                future.cancel()
+
+
+def _prefetch(items: Iterable[T], prefetched: Queue, is_stopped: Event):
+    """
+    Consume an iterable into a queue, until the iterable is exhausted or the consumer has stopped
+    Each queue item is an (is_done, item) tuple, the last item is None or the exception the iterable raised
+    """
+    def _put(queue_item) -> bool:
+        # Block while the queue is full, unless the consumer has stopped
+        while not is_stopped.is_set():
+            try:
+                prefetched.put(queue_item, timeout=PREFETCH_POLL_SECONDS)
+                return True
+            except Full:
+                continue
+        return False
+
+    items_iter = iter(items)
+    try:
+        for item in items_iter:
+            if not _put((False, item)):
+                break
+        else:
+            _put((True, None))
+    except BaseException as e:
+        _put((True, e))
+    finally:
+        if hasattr(items_iter, "close"):
+            items_iter.close()
+
+
+class PrefetchedIterator(Iterator[T]):
+    """
+    An iterator over an iterable that is consumed on a background thread, see iter_prefetched
+
+    The background thread stops once the iterable is exhausted, or once the iterator is closed,
+    either explicitly, by leaving its with block, or when it is garbage collected.
+    Callers should close it (i.e. in a finally block), since it may never be iterated over
+    if something else raises first.
+    """
+
+    def __init__(self, items: Iterable[T], max_prefetched: int = DEFAULT_MAX_PREFETCHED):
+        self._prefetched: Queue = Queue(maxsize=max(1, max_prefetched))
+        self._is_stopped = Event()
+        self._is_done = False
+
+        # The thread only holds the queue and the event, not the iterator,
+        # so that a dropped iterator can still be garbage collected (and closed)
+        self._thread = Thread(target=_prefetch, args=(items, self._prefetched, self._is_stopped), daemon=True)
+        self._thread.start()
+
+    def __next__(self) -> T:
+        if self._is_done:
+            raise StopIteration
+
+        is_done, item = self._prefetched.get()
+        if is_done:
+            self.close()
+            if item is not None:
+                raise item
+            raise StopIteration
+        return item
+
+    def close(self):
+        """
+        Stop the background thread, the remaining items are dropped
+        """
+        self._is_done = True
+        self._is_stopped.set()
+
+    def __enter__(self) -> 'PrefetchedIterator[T]':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+def iter_prefetched(
+    items: Iterable[T],
+    max_prefetched: int = DEFAULT_MAX_PREFETCHED,
+) -> PrefetchedIterator[T]:
+    """
+    Start consuming an iterable on a background thread straight away, and yield its items in order.
+
+    Unlike a generator, which does nothing until its first item is requested,
+    the iterable is consumed as soon as this function is called,
+    with at most max_prefetched items held ahead of the caller.
+    An exception raised by the iterable is re-raised to the caller once the items before it have been yielded.
+    The background thread stops when the returned iterator is closed,
+    so the caller should close it even if it never iterates over it.
+
+    :param items: The iterable to prefetch, i.e. a paged listing
+    :param max_prefetched: The maximum number of items held ahead of the caller
+    :return: An iterator over the items
+    """
+    return PrefetchedIterator(items, max_prefetched=max_prefetched)
+
+
+class TaskNode(NamedTuple):
+    """
+    A task in a task graph, the results of its dependencies are passed to func as keyword arguments
+    """
+    func: Callable[..., Any]
+    dependencies: Tuple[str, ...] = ()
+
+
+class TaskTiming(NamedTuple):
+    """
+    When a task started and ended, in seconds since the task graph started
+    """
+    task_name: str
+    start_seconds: float
+    end_seconds: float
+    dependencies: Tuple[str, ...]
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.end_seconds - self.start_seconds
+
+
+@dataclass
+class TaskGraphResult:
+    """
+    The results of a task graph by task name, and the timing of each task in the order they completed
+    """
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: List[TaskTiming] = field(default_factory=list)
+
+    @property
+    def critical_path(self) -> List[TaskTiming]:
+        """
+        The chain of tasks that determined how long the graph took,
+        starting from the last task to complete and walking back through the dependency that completed last
+        :return: The tasks on the critical path, in the order they ran
+        """
+        if len(self.timings) == 0:
+            return []
+
+        timings_by_name = dict(map(
+            lambda timing_iter_: (timing_iter_.task_name, timing_iter_),
+            self.timings
+        ))
+
+        critical_path = [max(self.timings, key=lambda timing_iter_: timing_iter_.end_seconds)]
+        while len(critical_path[-1].dependencies) > 0:
+            critical_path.append(max(
+                map(
+                    lambda dependency_iter_: timings_by_name[dependency_iter_],
+                    critical_path[-1].dependencies
+                ),
+                key=lambda timing_iter_: timing_iter_.end_seconds
+            ))
+
+        return list(reversed(critical_path))
+
+    def get_timing_trace(self) -> List[Dict]:
+        """
+        Get the timing of each task, in milliseconds, for logging
+        :return:
+        """
+        critical_path_task_names = set(map(
+            lambda timing_iter_: timing_iter_.task_name,
+            self.critical_path
+        ))
+
+        return list(map(
+            lambda timing_iter_: {
+                "taskName": timing_iter_.task_name,
+                "startMs": round(timing_iter_.start_seconds * 1000, 1),
+                "endMs": round(timing_iter_.end_seconds * 1000, 1),
+                "durationMs": round(timing_iter_.duration_seconds * 1000, 1),
+                "isOnCriticalPath": timing_iter_.task_name in critical_path_task_names,
+            },
+            self.timings
+        ))
+
+
+def check_task_graph(tasks: Dict[str, TaskNode]):
+    """
+    Check every dependency is a task in the graph, and that the graph has no cycles
+    :param tasks:
+    :return:
+    """
+    for task_name, task_node in tasks.items():
+        for dependency in task_node.dependencies:
+            if dependency not in tasks:
+                raise ValueError(f"Task {task_name} depends on {dependency}, which is not in the task graph")
+
+    # Remove tasks with no remaining dependencies until none are left, anything left over is in a cycle
+    remaining_dependencies: Dict[str, Set[str]] = {
+        task_name: set(task_node.dependencies)
+        for task_name, task_node in tasks.items()
+    }
+    while len(remaining_dependencies) > 0:
+        ready_task_names = list(filter(
+            lambda task_name_iter_: len(remaining_dependencies[task_name_iter_]) == 0,
+            remaining_dependencies
+        ))
+        if len(ready_task_names) == 0:
+            raise ValueError(f"Task graph has a cycle between {', '.join(sorted(remaining_dependencies))}")
+        for task_name in ready_task_names:
+            del remaining_dependencies[task_name]
+        for dependencies in remaining_dependencies.values():
+            dependencies.difference_update(ready_task_names)
+
+
+def run_task_graph(
+    tasks: Dict[str, TaskNode],
+    max_workers: Optional[int] = None,
+) -> TaskGraphResult:
+    """
+    Run a graph of tasks, each task is started as soon as all of its dependencies have completed.
+
+    If any task raises, no further tasks are started, and the exception is re-raised
+    once the tasks already running have completed.
+
+    :param tasks: Dictionary of task name to task node
+    :param max_workers: The maximum number of threads to use
+    :return: The results and timing of each task
+    """
+    if max_workers is None:
+        max_workers = get_max_workers()
+
+    check_task_graph(tasks)
+
+    task_graph_result = TaskGraphResult()
+    graph_start_time = perf_counter()
+
+    def _run_task(task_name: str) -> TaskTiming:
+        task_node = tasks[task_name]
+        start_seconds = perf_counter() - graph_start_time
+        task_graph_result.results[task_name] = task_node.func(**{
+            dependency: task_graph_result.results[dependency]
+            for dependency in task_node.dependencies
+        })
+        return TaskTiming(
+            task_name=task_name,
+            start_seconds=start_seconds,
+            end_seconds=perf_counter() - graph_start_time,
+            dependencies=tuple(task_node.dependencies),
+        )
+
+    pending_task_names = list(tasks.keys())
+    running: Dict[Future, str] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while len(pending_task_names) > 0 or len(running) > 0:
+            # Start every task whose dependencies have all completed
+            ready_task_names = list(filter(
+                lambda task_name_iter_: all(map(
+                    lambda dependency_iter_: dependency_iter_ in task_graph_result.results,
+                    tasks[task_name_iter_].dependencies
+                )),
+                pending_task_names
+            ))
+            for task_name in ready_task_names:
+                pending_task_names.remove(task_name)
+                running[executor.submit(_run_task, task_name)] = task_name
+
+            done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                if future.exception() is not None:
+                    # Don't start any more tasks, wait for those already running, then raise
+                    wait(running.keys())
+                    raise future.exception()
+                task_graph_result.timings.append(future.result())
+
+    return task_graph_result
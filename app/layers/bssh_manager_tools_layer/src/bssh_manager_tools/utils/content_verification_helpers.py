@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+
+"""
+Verify that a copied file has the same content as its source when their e-tags differ
+
+The e-tag of a multipart upload is the md5 of the concatenated md5s of each part, suffixed by the number of parts, i.e.
+    md5(md5(part_1) + md5(part_2) + ... + md5(part_n)) + "-n"
+so a copy made with a different part size has a different e-tag for identical content.
+
+When the source and destination e-tags differ, we
+  1. infer the part size of the source upload from the number of parts in the source e-tag suffix and the file size,
+  2. recompute the e-tag the destination would have with that part size,
+     each part is read with byte-range reads and hashed on its own worker,
+  3. if no candidate part size gives the source e-tag (or the source e-tag is not an md5 based e-tag),
+     stream the full content of both the source and the destination through SHA-256.
+     The chunks of each file are read concurrently but hashed in order,
+     with at most 2 * max_workers chunks held in memory per file.
+
+Content is read through a RangeReader, which are created from presigned urls (ICAv2 create_download_url)
+or from file:// urls (a local stand-in for tests and benchmarks).
+
+The chunk size can be overridden with the BSSH_MANAGER_VERIFICATION_CHUNK_SIZE_IN_BYTES env var.
+
+Verifying a file reads it at least once in full, so the files verified by a single invocation are limited
+by a ContentVerificationBudget, a maximum number of bytes and files (the BSSH_MANAGER_VERIFICATION_MAX_BYTES and
+BSSH_MANAGER_VERIFICATION_MAX_FILES env vars) and a deadline ahead of the lambda timeout.
+Files that do not fit in the budget are not read, and are reported as unverified by the caller.
+"""
+
+# Standard libraries
+import hashlib
+import re
+import time
+from abc import ABC, abstractmethod
+from functools import partial
+from math import ceil
+from os import environ
+from pathlib import Path
+from threading import Lock
+from typing import Callable, List, NamedTuple, Optional
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+
+# Local libraries
+from .concurrency_helpers import get_max_workers, iter_concurrently_in_order, run_concurrently
+from .logger import get_logger
+
+# Globals
+CHUNK_SIZE_IN_BYTES_ENV_VAR = "BSSH_MANAGER_VERIFICATION_CHUNK_SIZE_IN_BYTES"
+DEFAULT_CHUNK_SIZE_IN_BYTES = 8 * 2 ** 20  # 8 MiB
+DEFAULT_MAX_PART_SIZE_CANDIDATES = 2
+HTTP_TIMEOUT_SECONDS = 60
+
+MAX_BYTES_ENV_VAR = "BSSH_MANAGER_VERIFICATION_MAX_BYTES"
+DEFAULT_MAX_BYTES = 16 * 2 ** 30  # 16 GiB
+MAX_FILES_ENV_VAR = "BSSH_MANAGER_VERIFICATION_MAX_FILES"
+DEFAULT_MAX_FILES = 1000
+# No new file is started within this many seconds of the lambda timeout,
+# leaving time for the files in progress and the response
+DEADLINE_MARGIN_SECONDS = 120
+
+MIB = 2 ** 20
+
+# The part sizes used by the common upload tools, aws cli / boto3 default to 8 MiB
+STANDARD_PART_SIZES_IN_BYTES = [
+    5 * MIB, 8 * MIB, 16 * MIB, 32 * MIB, 64 * MIB, 100 * MIB, 128 * MIB, 256 * MIB, 512 * MIB, 1024 * MIB
+]
+
+MD5_E_TAG_REGEX = re.compile(r"^(?P<md5>[0-9a-f]{32})(?:-(?P<part_count>\d+))?$")
+
+E_TAG_VERIFICATION_METHOD = "e-tag"
+COMPOSITE_E_TAG_VERIFICATION_METHOD = "composite-e-tag"
+SHA256_VERIFICATION_METHOD = "sha256"
+
+# Set logger
+logger = get_logger(__name__)
+
+
+class RangeReader(ABC):
+    """
+    Read byte ranges of a file
+    """
+
+    @abstractmethod
+    def read_range(self, start: int, end: int) -> bytes:
+        """
+        Read the bytes from start up to (but not including) end
+        """
+        raise NotImplementedError
+
+
+class HttpRangeReader(RangeReader):
+    """
+    Read byte ranges from a (presigned) http url with range requests
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def read_range(self, start: int, end: int) -> bytes:
+        if end <= start:
+            return b""
+        request = Request(self.url, headers={"Range": f"bytes={start}-{end - 1}"})
+        with urlopen(request, timeout=HTTP_TIMEOUT_SECONDS) as response:
+            data = response.read()
+        if len(data) != end - start:
+            raise ValueError(f"Expected {end - start} bytes from the range {start}-{end - 1}, got {len(data)}")
+        return data
+
+
+class LocalFileRangeReader(RangeReader):
+    """
+    Read byte ranges from a local file
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def read_range(self, start: int, end: int) -> bytes:
+        if end <= start:
+            return b""
+        with open(self.path, "rb") as file_h:
+            file_h.seek(start)
+            return file_h.read(end - start)
+
+
+class ContentVerificationResult(NamedTuple):
+    """
+    The result of verifying a copy
+    """
+    is_match: bool
+    method: str
+    detail: str
+
+
+class ContentVerificationBudget:
+    """
+    The bytes and files a single invocation may verify, shared by all of its workers
+
+    A file is reserved before it is read, a file that would exceed the bytes or files left,
+    or that would start after the deadline, is not reserved and should be reported as unverified.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_files: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ):
+        """
+        :param max_bytes: The total size of the files that may be verified
+        :param max_files: The number of files that may be verified
+        :param deadline: The time.monotonic() after which no new file is verified
+        """
+        self.bytes_left = int(environ.get(MAX_BYTES_ENV_VAR, DEFAULT_MAX_BYTES)) if max_bytes is None else max_bytes
+        self.files_left = int(environ.get(MAX_FILES_ENV_VAR, DEFAULT_MAX_FILES)) if max_files is None else max_files
+        self.deadline = deadline
+        self._lock = Lock()
+
+    @classmethod
+    def from_lambda_context(cls, context) -> 'ContentVerificationBudget':
+        """
+        Get the budget of a lambda invocation, whose deadline is ahead of the lambda timeout
+        :param context: The lambda context, or None when run locally (no deadline)
+        :return:
+        """
+        if context is None:
+            return cls()
+        return cls(
+            deadline=time.monotonic() + context.get_remaining_time_in_millis() / 1000 - DEADLINE_MARGIN_SECONDS
+        )
+
+    def try_reserve(self, file_size_in_bytes: int) -> bool:
+        """
+        Reserve a file of this size, if it fits in what is left of the budget
+        :param file_size_in_bytes:
+        :return: True if the file may be verified
+        """
+        with self._lock:
+            if (
+                self.files_left < 1 or
+                file_size_in_bytes > self.bytes_left or
+                (self.deadline is not None and time.monotonic() > self.deadline)
+            ):
+                return False
+            self.files_left -= 1
+            self.bytes_left -= file_size_in_bytes
+            return True
+
+
+def get_range_reader_from_url(url: str) -> RangeReader:
+    """
+    Get a range reader from a http(s):// or file:// url
+    :param url:
+    :return:
+    """
+    url_obj = urlparse(url)
+
+    if url_obj.scheme in ["http", "https"]:
+        return HttpRangeReader(url)
+    if url_obj.scheme == "file":
+        return LocalFileRangeReader(Path(url_obj.path))
+
+    raise ValueError(f"Unsupported url scheme '{url_obj.scheme}', expected http, https or file")
+
+
+def get_chunk_size_in_bytes() -> int:
+    """
+    Get the size of each range read,
+    can be overridden with the BSSH_MANAGER_VERIFICATION_CHUNK_SIZE_IN_BYTES env var
+    :return:
+    """
+    return max(1, int(environ.get(CHUNK_SIZE_IN_BYTES_ENV_VAR, DEFAULT_CHUNK_SIZE_IN_BYTES)))
+
+
+def normalise_e_tag(e_tag: Optional[str]) -> Optional[str]:
+    """
+    Strip the quotes and case from an e-tag
+    :param e_tag:
+    :return:
+    """
+    if e_tag is None:
+        return None
+    return e_tag.strip().strip('"').lower()
+
+
+def get_e_tag_part_count(e_tag: Optional[str]) -> Optional[int]:
+    """
+    Get the number of parts of an md5 based e-tag, 0 for a single part upload (a plain md5),
+    or None if the e-tag is not md5 based (i.e. SSE-KMS encrypted objects, or other stores)
+    :param e_tag:
+    :return:
+    """
+    e_tag_match = MD5_E_TAG_REGEX.match(normalise_e_tag(e_tag) or "")
+    if e_tag_match is None:
+        return None
+    if e_tag_match.group("part_count") is None:
+        return 0
+    return int(e_tag_match.group("part_count"))
+
+
+def get_part_size_candidates(
+    file_size_in_bytes: int,
+    part_count: int,
+    max_candidates: int = DEFAULT_MAX_PART_SIZE_CANDIDATES,
+) -> List[int]:
+    """
+    Infer the part sizes that split a file of this size into this number of parts
+
+    Upload tools use a whole number of MiB as the part size, so the smallest candidate,
+    the file size over the number of parts rounded up to the next MiB, is tried first,
+    followed by the standard part sizes of the common upload tools, then the exact minimum part size.
+
+    :param file_size_in_bytes: The size of the file
+    :param part_count: The number of parts in the e-tag suffix
+    :param max_candidates: The maximum number of candidates to return, each costs a read of the file
+    :return:
+    """
+    if part_count < 1 or file_size_in_bytes < part_count:
+        return []
+
+    min_part_size_in_bytes = ceil(file_size_in_bytes / part_count)
+
+    candidates: List[int] = []
+    for part_size_in_bytes in (
+        [ceil(min_part_size_in_bytes / MIB) * MIB] + STANDARD_PART_SIZES_IN_BYTES + [min_part_size_in_bytes]
+    ):
+        if part_size_in_bytes in candidates:
+            continue
+        if ceil(file_size_in_bytes / part_size_in_bytes) != part_count:
+            continue
+        candidates.append(part_size_in_bytes)
+
+    return candidates[:max_candidates]
+
+
+def get_range_digest(
+    range_reader: RangeReader,
+    start: int,
+    end: int,
+    hash_name: str,
+    chunk_size_in_bytes: int,
+) -> bytes:
+    """
+    Hash a byte range, reading it one chunk at a time
+    :return: The digest of the range
+    """
+    range_hash = hashlib.new(hash_name)
+    for chunk_start in range(start, end, chunk_size_in_bytes):
+        range_hash.update(range_reader.read_range(chunk_start, min(chunk_start + chunk_size_in_bytes, end)))
+    return range_hash.digest()
+
+
+def get_composite_e_tag(
+    range_reader: RangeReader,
+    file_size_in_bytes: int,
+    part_size_in_bytes: int,
+    max_workers: Optional[int] = None,
+    chunk_size_in_bytes: Optional[int] = None,
+) -> str:
+    """
+    Compute the e-tag a multipart upload of the file with this part size would have,
+    each part is hashed on its own worker
+    :param range_reader:
+    :param file_size_in_bytes:
+    :param part_size_in_bytes:
+    :param max_workers:
+    :param chunk_size_in_bytes:
+    :return:
+    """
+    if chunk_size_in_bytes is None:
+        chunk_size_in_bytes = get_chunk_size_in_bytes()
+
+    part_digests = list(iter_concurrently_in_order(
+        map(
+            lambda part_start_iter_: partial(
+                get_range_digest,
+                range_reader=range_reader,
+                start=part_start_iter_,
+                end=min(part_start_iter_ + part_size_in_bytes, file_size_in_bytes),
+                hash_name="md5",
+                chunk_size_in_bytes=chunk_size_in_bytes,
+            ),
+            range(0, file_size_in_bytes, part_size_in_bytes)
+        ),
+        max_workers=max_workers
+    ))
+
+    return hashlib.md5(b"".join(part_digests)).hexdigest() + f"-{len(part_digests)}"
+
+
+def get_content_digest(
+    range_reader: RangeReader,
+    file_size_in_bytes: int,
+    hash_name: str,
+    max_workers: Optional[int] = None,
+    chunk_size_in_bytes: Optional[int] = None,
+) -> str:
+    """
+    Hash the full content of a file,
+    the chunks are read concurrently and hashed in order
+    :param range_reader:
+    :param file_size_in_bytes:
+    :param hash_name: i.e. sha256 or md5
+    :param max_workers:
+    :param chunk_size_in_bytes:
+    :return: The hex digest
+    """
+    if chunk_size_in_bytes is None:
+        chunk_size_in_bytes = get_chunk_size_in_bytes()
+
+    content_hash = hashlib.new(hash_name)
+    for chunk in iter_concurrently_in_order(
+        map(
+            lambda chunk_start_iter_: partial(
+                range_reader.read_range,
+                chunk_start_iter_,
+                min(chunk_start_iter_ + chunk_size_in_bytes, file_size_in_bytes)
+            ),
+            range(0, file_size_in_bytes, chunk_size_in_bytes)
+        ),
+        max_workers=max_workers
+    ):
+        content_hash.update(chunk)
+
+    return content_hash.hexdigest()
+
+
+def verify_content_match(
+    source_e_tag: Optional[str],
+    destination_e_tag: Optional[str],
+    file_size_in_bytes: int,
+    get_source_range_reader: Callable[[], RangeReader],
+    get_destination_range_reader: Callable[[], RangeReader],
+    max_workers: Optional[int] = None,
+    chunk_size_in_bytes: Optional[int] = None,
+    max_part_size_candidates: int = DEFAULT_MAX_PART_SIZE_CANDIDATES,
+) -> ContentVerificationResult:
+    """
+    Verify that the source and destination files (of the same size) have the same content
+
+    :param source_e_tag: The e-tag of the source file
+    :param destination_e_tag: The e-tag of the destination file
+    :param file_size_in_bytes: The size of both files
+    :param get_source_range_reader: Returns a range reader for the source, only called if the source is read
+    :param get_destination_range_reader: Returns a range reader for the destination
+    :param max_workers: The number of concurrent range reads, shared between the source and destination
+    :param chunk_size_in_bytes: The size of each range read
+    :param max_part_size_candidates: The number of part sizes to try before falling back to SHA-256
+    :return:
+    """
+    if max_workers is None:
+        max_workers = get_max_workers()
+
+    source_e_tag = normalise_e_tag(source_e_tag)
+    destination_e_tag = normalise_e_tag(destination_e_tag)
+
+    if source_e_tag is not None and source_e_tag == destination_e_tag:
+        return ContentVerificationResult(True, E_TAG_VERIFICATION_METHOD, "The e-tags match")
+
+    # Recompute the source e-tag from the destination content
+    destination_range_reader = get_destination_range_reader()
+    source_part_count = get_e_tag_part_count(source_e_tag)
+
+    if source_part_count == 0:
+        destination_md5 = get_content_digest(
+            destination_range_reader, file_size_in_bytes, "md5",
+            max_workers=max_workers, chunk_size_in_bytes=chunk_size_in_bytes
+        )
+        if destination_md5 == source_e_tag:
+            return ContentVerificationResult(
+                True, COMPOSITE_E_TAG_VERIFICATION_METHOD, "The destination md5 matches the single part source e-tag"
+            )
+    elif source_part_count is not None:
+        for part_size_in_bytes in get_part_size_candidates(
+            file_size_in_bytes, source_part_count, max_candidates=max_part_size_candidates
+        ):
+            composite_e_tag = get_composite_e_tag(
+                destination_range_reader, file_size_in_bytes, part_size_in_bytes,
+                max_workers=max_workers, chunk_size_in_bytes=chunk_size_in_bytes
+            )
+            if composite_e_tag == source_e_tag:
+                return ContentVerificationResult(
+                    True, COMPOSITE_E_TAG_VERIFICATION_METHOD,
+                    f"The destination e-tag with a part size of {part_size_in_bytes} bytes matches the source e-tag"
+                )
+            logger.info(
+                "The destination e-tag with a part size of %s bytes is %s, not the source e-tag %s",
+                part_size_in_bytes, composite_e_tag, source_e_tag
+            )
+
+    # Inconclusive, so compare the full content
+    # The source and destination are streamed at the same time, sharing the workers between them,
+    # with a single worker they are streamed in turn
+    logger.info("The e-tags are inconclusive, comparing the SHA-256 of the full content")
+    content_digests = run_concurrently(
+        {
+            "source": partial(
+                get_content_digest, get_source_range_reader(), file_size_in_bytes, "sha256",
+                max_workers=max(1, max_workers // 2), chunk_size_in_bytes=chunk_size_in_bytes
+            ),
+            "destination": partial(
+                get_content_digest, destination_range_reader, file_size_in_bytes, "sha256",
+                max_workers=max(1, max_workers // 2), chunk_size_in_bytes=chunk_size_in_bytes
+            ),
+        },
+        max_workers=min(2, max_workers)
+    )
+
+    if content_digests["source"] == content_digests["destination"]:
+        return ContentVerificationResult(
+            True, SHA256_VERIFICATION_METHOD, f"The SHA-256 of the content matches ({content_digests['source']})"
+        )
+
+    return ContentVerificationResult(
+        False, SHA256_VERIFICATION_METHOD,
+        f"The SHA-256 of the content does not match. "
+        f"Source: {content_digests['source']}, Destination: {content_digests['destination']}"
+    )
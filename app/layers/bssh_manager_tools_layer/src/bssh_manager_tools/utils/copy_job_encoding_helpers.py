@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+"""
+A compact encoding of a copy job
+
+Every uri in a copy job's sourceUriList repeats the same long prefix, i.e.
+  icav2://<project-id>/ilmn-runs/bssh_aps2-sh-prod_4505508/InterOp/AlignmentMetricsOut.bin
+and the copy job list is carried through the step function state (capped at 256 KiB).
+A copy job is instead encoded as the common base uri of its sources plus the name of each source relative to it:
+
+{
+    "sourceBaseUri": "icav2://<project-id>/ilmn-runs/bssh_aps2-sh-prod_4505508/InterOp/",
+    "sourceNameList": ["AlignmentMetricsOut.bin", "BasecallingMetricsOut.bin", ...],
+    "destinationUri": "icav2://<project-id>/primary/<instrument-run-id>/<portal-run-id>/InterOp/"
+}
+
+The step function expands the names back into a sourceUriList when it puts the copy event
+(the copy service takes a plain sourceUriList), i.e.
+    [$states.input.sourceNameList.($states.input.sourceBaseUri & $)]
+
+A large name list may also be gzipped and base64 encoded, as a sourceNameListGzip string in place of the sourceNameList.
+This cannot be expanded by the step function, so is only for copy jobs read by our own lambdas.
+
+decode_copy_job accepts the plain {sourceUriList, destinationUri} form too.
+"""
+
+# Standard libraries
+import gzip
+import json
+from base64 import b64decode, b64encode
+from os.path import commonprefix
+from typing import Dict, List, Optional
+
+# Globals
+DEFAULT_GZIP_MIN_SIZE_IN_BYTES = 16 * 2 ** 10  # 16 KiB
+
+
+def get_source_base_uri(source_uri_list: List[str]) -> str:
+    """
+    Get the longest folder uri that every source uri sits under,
+    a source uri is never its own base, so a single folder uri has its parent as the base
+    :param source_uri_list:
+    :return:
+    """
+    common_prefix = commonprefix(list(map(
+        lambda source_uri_iter_: source_uri_iter_.rstrip("/"),
+        source_uri_list
+    )))
+    return common_prefix[:common_prefix.rfind("/") + 1]
+
+
+def encode_source_name_list(source_name_list: List[str]) -> str:
+    """
+    Gzip and base64 encode a source name list
+    :param source_name_list:
+    :return:
+    """
+    return b64encode(
+        gzip.compress(json.dumps(source_name_list, separators=(",", ":")).encode(), mtime=0)
+    ).decode()
+
+
+def decode_source_name_list(source_name_list_gzip: str) -> List[str]:
+    """
+    Decode a gzipped and base64 encoded source name list
+    :param source_name_list_gzip:
+    :return:
+    """
+    return json.loads(gzip.decompress(b64decode(source_name_list_gzip)))
+
+
+def encode_copy_job(
+    source_uri_list: List[str],
+    destination_uri: str,
+    gzip_min_size_in_bytes: Optional[int] = None,
+) -> Dict:
+    """
+    Encode a copy job as a base uri and the source names relative to it
+
+    :param source_uri_list: The source uris of the copy job
+    :param destination_uri: The destination uri of the copy job
+    :param gzip_min_size_in_bytes: Gzip the source name list if its json is larger than this,
+      by default the source name list is never gzipped
+    :return:
+    """
+    source_base_uri = get_source_base_uri(source_uri_list)
+    source_name_list = list(map(
+        lambda source_uri_iter_: source_uri_iter_[len(source_base_uri):],
+        source_uri_list
+    ))
+
+    if (
+        gzip_min_size_in_bytes is not None and
+        len(json.dumps(source_name_list, separators=(",", ":")).encode()) > gzip_min_size_in_bytes
+    ):
+        return {
+            "sourceBaseUri": source_base_uri,
+            "sourceNameListGzip": encode_source_name_list(source_name_list),
+            "destinationUri": destination_uri,
+        }
+
+    return {
+        "sourceBaseUri": source_base_uri,
+        "sourceNameList": source_name_list,
+        "destinationUri": destination_uri,
+    }
+
+
+def get_source_uri_list(copy_job: Dict) -> Optional[List[str]]:
+    """
+    Get the source uris of an encoded (or plain) copy job
+    :param copy_job:
+    :return: The source uris, or None if the copy job has no source list
+    """
+    if copy_job.get("sourceUriList") is not None:
+        return copy_job["sourceUriList"]
+
+    if copy_job.get("sourceNameListGzip") is not None:
+        source_name_list = decode_source_name_list(copy_job["sourceNameListGzip"])
+    elif copy_job.get("sourceNameList") is not None:
+        source_name_list = copy_job["sourceNameList"]
+    else:
+        return None
+
+    if copy_job.get("sourceBaseUri") is None:
+        raise ValueError("The sourceBaseUri is required with a sourceNameList")
+
+    return list(map(
+        lambda source_name_iter_: copy_job["sourceBaseUri"] + source_name_iter_,
+        source_name_list
+    ))
+
+
+def decode_copy_job(copy_job: Dict) -> Dict:
+    """
+    Decode an encoded (or plain) copy job into the plain {sourceUriList, destinationUri} form
+    :param copy_job:
+    :return:
+    """
+    source_uri_list = get_source_uri_list(copy_job)
+
+    if source_uri_list is None:
+        raise ValueError("One of sourceUriList, sourceNameList or sourceNameListGzip is required")
+
+    return {
+        "sourceUriList": source_uri_list,
+        "destinationUri": copy_job["destinationUri"],
+    }
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+"""
+Memoise the copy job list of a run
+
+The same BCLConvert analysis can be planned more than once,
+i.e. a step function retry, a redriven execution, or a replayed READY event (which has a new portal run id,
+and so a new output uri).
+Each planning looks up the run folder, interop files and destination folder,
+lists every sample subfolder and writes the listing snapshots, all to arrive at the same copy job list.
+
+Instead, once planned, the copy job list is saved to the store, keyed on the project id and analysis id,
+along with a fingerprint of the source listing it was planned from.
+The destination uris of the saved copy jobs are relative to the destination folder,
+and are rebased onto the destination folder of the planning that reads them back,
+so a replay into a new output uri reuses the saved copy job list too.
+The next planning lists the BCLConvert output folder in bulk (a handful of paged calls),
+and if the fingerprint still matches, returns the saved copy job list.
+If any file under the output folder has been added, removed or changed, the fingerprint differs
+and the run is planned again, overwriting the entry.
+
+The fingerprint also covers the planning parameters (see get_copy_job_planning_parameters) and a version,
+so an entry is not reused by a planning with different parameters, or after the planning itself has changed.
+The copy job manifest thresholds are not planning parameters,
+the saved copy job list is written to a manifest (or not) by each planning that reads it back.
+
+The entry also records the portal run id whose copy job manifest, if any, was written from it,
+so that a retry of that same portal run can reuse the manifest rather than write it again.
+
+Entries are json, a single object, and expire with the rest of the store.
+"""
+
+# Standard libraries
+import json
+from hashlib import sha256
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Local libraries
+from .copy_job_planning_helpers import get_max_shard_count, get_target_shard_size_in_bytes
+from .listing_diff_helpers import ListingRecord
+from .logger import get_logger
+from .store_helpers import Store
+
+# Globals
+COPY_JOB_LIST_CACHE_PREFIX = "copy-job-list-cache"
+
+# Bump this when the copy job planning or encoding changes, so that older entries are planned again
+COPY_JOB_LIST_CACHE_VERSION = 2
+
+# Set logger
+logger = get_logger(__name__)
+
+
+class CopyJobListCacheEntry(NamedTuple):
+    """
+    A saved copy job list, rebased onto the destination folder of the planning that read it back
+    """
+    icav2_copy_job_list: List[Dict]
+    manifest_id: Optional[str]
+
+
+def get_copy_job_list_cache_key(project_id: str, analysis_id: str) -> str:
+    """
+    Get the store key for the copy job list of an analysis
+    :param project_id:
+    :param analysis_id:
+    :return:
+    """
+    return (
+        f"{COPY_JOB_LIST_CACHE_PREFIX}/{analysis_id}/"
+        f"{sha256(json.dumps([project_id, analysis_id]).encode()).hexdigest()}.json"
+    )
+
+
+def get_copy_job_planning_parameters() -> Dict:
+    """
+    Get every input, other than the source listing, that changes the planned copy job list
+    :return:
+    """
+    return {
+        "targetShardSizeInBytes": get_target_shard_size_in_bytes(),
+        "maxShardCount": get_max_shard_count(),
+    }
+
+
+def get_source_listing_fingerprint(
+    listing_records: Iterable[ListingRecord],
+) -> str:
+    """
+    Get the fingerprint of a source listing and the current planning parameters,
+    independent of the order the records were listed in
+
+    :param listing_records: The listing records of every file under the source folder
+    :return: The hex digest
+    """
+    source_listing_hash = sha256(
+        json.dumps(
+            [COPY_JOB_LIST_CACHE_VERSION, get_copy_job_planning_parameters()],
+            sort_keys=True,
+            separators=(",", ":")
+        ).encode()
+    )
+
+    for listing_record in sorted(listing_records, key=lambda listing_record_iter_: listing_record_iter_.relative_path):
+        source_listing_hash.update(
+            json.dumps(list(listing_record), separators=(",", ":")).encode() + b"\n"
+        )
+
+    return source_listing_hash.hexdigest()
+
+
+def get_relative_copy_job_list(icav2_copy_job_list: List[Dict], destination_folder_uri: str) -> List[Dict]:
+    """
+    Make the destination uri of each copy job relative to the destination folder
+    :param icav2_copy_job_list: The encoded copy jobs
+    :param destination_folder_uri: The destination folder every copy job copies into
+    :return: The copy jobs, with a destinationRelativePath in place of the destinationUri
+    """
+    destination_folder_uri = destination_folder_uri.rstrip("/") + "/"
+
+    relative_copy_job_list = []
+    for copy_job in icav2_copy_job_list:
+        if not copy_job["destinationUri"].startswith(destination_folder_uri):
+            raise ValueError(f"{copy_job['destinationUri']} is not underneath {destination_folder_uri}")
+        relative_copy_job = dict(copy_job)
+        relative_copy_job["destinationRelativePath"] = relative_copy_job.pop(
+            "destinationUri"
+        )[len(destination_folder_uri):]
+        relative_copy_job_list.append(relative_copy_job)
+
+    return relative_copy_job_list
+
+
+def rebase_copy_job_list(relative_copy_job_list: List[Dict], destination_folder_uri: str) -> List[Dict]:
+    """
+    Rebase copy jobs with a destinationRelativePath onto a destination folder
+    :param relative_copy_job_list: The copy jobs, see get_relative_copy_job_list
+    :param destination_folder_uri: The destination folder to copy into
+    :return: The copy jobs, with a destinationUri in place of the destinationRelativePath
+    """
+    destination_folder_uri = destination_folder_uri.rstrip("/") + "/"
+
+    return list(map(
+        lambda copy_job_iter_: {
+            **dict(filter(
+                lambda item_iter_: item_iter_[0] != "destinationRelativePath",
+                copy_job_iter_.items()
+            )),
+            "destinationUri": destination_folder_uri + copy_job_iter_["destinationRelativePath"],
+        },
+        relative_copy_job_list
+    ))
+
+
+def write_copy_job_list_cache_entry(
+    store: Store,
+    project_id: str,
+    analysis_id: str,
+    source_listing_fingerprint: str,
+    icav2_copy_job_list: List[Dict],
+    destination_folder_uri: str,
+    manifest_id: Optional[str] = None,
+):
+    """
+    Write the planned copy job list of an analysis to the store
+    :param store: The store to write to
+    :param project_id: The source project id
+    :param analysis_id: The BCLConvert analysis id
+    :param source_listing_fingerprint: The fingerprint of the source listing the copy job list was planned from
+    :param icav2_copy_job_list: The encoded copy jobs
+    :param destination_folder_uri: The destination folder the copy jobs copy into
+    :param manifest_id: The portal run id, if the copy jobs were also written to a copy job manifest
+    :return:
+    """
+    cache_key = get_copy_job_list_cache_key(project_id, analysis_id)
+    store.put_bytes(
+        cache_key,
+        json.dumps(
+            {
+                "sourceListingFingerprint": source_listing_fingerprint,
+                "manifestId": manifest_id,
+                "icav2CopyJobList": get_relative_copy_job_list(icav2_copy_job_list, destination_folder_uri),
+            },
+            separators=(",", ":")
+        ).encode()
+    )
+
+    logger.info("Saved the copy job list to %s", store.get_uri(cache_key))
+
+
+def read_copy_job_list_cache_entry(
+    store: Store,
+    project_id: str,
+    analysis_id: str,
+    source_listing_fingerprint: str,
+    destination_folder_uri: str,
+) -> Optional[CopyJobListCacheEntry]:
+    """
+    Read the planned copy job list of an analysis from the store
+
+    :param store: The store to read from
+    :param project_id: The source project id
+    :param analysis_id: The BCLConvert analysis id
+    :param source_listing_fingerprint: The fingerprint of the source listing as it is now
+    :param destination_folder_uri: The destination folder of this planning, the copy jobs are rebased onto it
+    :return: The saved copy job list, or None if there is none, or the source listing has changed since
+    """
+    cache_key = get_copy_job_list_cache_key(project_id, analysis_id)
+    cache_entry_bytes = store.get_bytes(cache_key)
+
+    if cache_entry_bytes is None:
+        return None
+
+    cache_entry = json.loads(cache_entry_bytes)
+
+    if cache_entry["sourceListingFingerprint"] != source_listing_fingerprint:
+        logger.info("The source listing of %s has changed since %s was saved", analysis_id, store.get_uri(cache_key))
+        return None
+
+    logger.info("Read the copy job list from %s", store.get_uri(cache_key))
+
+    return CopyJobListCacheEntry(
+        icav2_copy_job_list=rebase_copy_job_list(cache_entry["icav2CopyJobList"], destination_folder_uri),
+        manifest_id=cache_entry["manifestId"],
+    )
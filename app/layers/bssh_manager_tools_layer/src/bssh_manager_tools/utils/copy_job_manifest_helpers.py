@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+"""
+Copy job manifests for very large runs
+
+The copy job list is passed between states in the step function payload,
+which is capped at 256 KiB, and iterated over by an INLINE map, which has limited concurrency.
+For a very large run (many copy jobs, or copy jobs with very long source uri lists)
+we instead write the copy jobs to the store as a json lines manifest, one copy job per line,
+and the step function iterates over the manifest with a DISTRIBUTED map that reads it with an ItemReader.
+
+The run is written to a manifest if it has more than the min copy job count,
+or if the copy job list would be larger than the max inline payload size.
+Both thresholds are set by the step function (see infrastructure/stage/step-functions).
+"""
+
+# Standard libraries
+import json
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+# Local libraries
+from .logger import get_logger
+from .store_helpers import Store
+
+# Globals
+COPY_JOB_MANIFESTS_PREFIX = "copy-job-manifests"
+COPY_JOB_MANIFEST_NAME = "copy-jobs.jsonl"
+COPY_JOB_RESULTS_NAME = "results"
+DEFAULT_MIN_COPY_JOB_COUNT = 8
+DEFAULT_MAX_INLINE_PAYLOAD_SIZE_IN_BYTES = 128 * 2 ** 10  # 128 KiB, half of the step function payload limit
+
+# Set logger
+logger = get_logger(__name__)
+
+
+def get_copy_job_manifest_key(manifest_id: str) -> str:
+    """
+    Get the store key for the copy job manifest of a run
+    :param manifest_id: The portal run id
+    :return:
+    """
+    return f"{COPY_JOB_MANIFESTS_PREFIX}/{manifest_id}/{COPY_JOB_MANIFEST_NAME}"
+
+
+def get_copy_job_results_key_prefix(manifest_id: str) -> str:
+    """
+    Get the store key prefix the distributed map writes its results under
+    :param manifest_id: The portal run id
+    :return:
+    """
+    return f"{COPY_JOB_MANIFESTS_PREFIX}/{manifest_id}/{COPY_JOB_RESULTS_NAME}/"
+
+
+def get_copy_job_list_payload_size_in_bytes(icav2_copy_job_list: List[Dict]) -> int:
+    """
+    Get the size of the copy job list, as it would be serialised into the step function payload
+    :param icav2_copy_job_list:
+    :return:
+    """
+    return len(json.dumps(icav2_copy_job_list, separators=(",", ":")).encode())
+
+
+def is_copy_job_list_too_large_for_payload(
+    icav2_copy_job_list: List[Dict],
+    max_inline_payload_size_in_bytes: Optional[int] = None,
+) -> bool:
+    """
+    Is the copy job list too large to be passed inline through the step function payload
+    :param icav2_copy_job_list: The copy jobs
+    :param max_inline_payload_size_in_bytes: The largest copy job list we pass inline
+    :return:
+    """
+    if max_inline_payload_size_in_bytes is None:
+        max_inline_payload_size_in_bytes = DEFAULT_MAX_INLINE_PAYLOAD_SIZE_IN_BYTES
+
+    return get_copy_job_list_payload_size_in_bytes(icav2_copy_job_list) > max_inline_payload_size_in_bytes
+
+
+def is_copy_job_manifest_required(
+    icav2_copy_job_list: List[Dict],
+    min_copy_job_count: Optional[int] = None,
+    max_inline_payload_size_in_bytes: Optional[int] = None,
+) -> bool:
+    """
+    Should the copy jobs be written to a manifest and iterated over by a distributed map
+    :param icav2_copy_job_list: The copy jobs
+    :param min_copy_job_count: Use a manifest if there are more copy jobs than this
+    :param max_inline_payload_size_in_bytes: Use a manifest if the copy job list is larger than this
+    :return:
+    """
+    if min_copy_job_count is None:
+        min_copy_job_count = DEFAULT_MIN_COPY_JOB_COUNT
+
+    return (
+        len(icav2_copy_job_list) > min_copy_job_count or
+        is_copy_job_list_too_large_for_payload(icav2_copy_job_list, max_inline_payload_size_in_bytes)
+    )
+
+
+def get_bucket_and_key_from_uri(uri: str) -> Dict[str, str]:
+    """
+    Split a store uri into the Bucket and Key the ItemReader and ResultWriter expect,
+    a file:// uri (the local store) has an empty bucket and the absolute path as the key
+    :param uri:
+    :return:
+    """
+    uri_obj = urlparse(uri)
+    return {
+        "bucket": uri_obj.netloc,
+        "key": uri_obj.path.lstrip("/") if uri_obj.scheme == "s3" else uri_obj.path,
+    }
+
+
+def get_copy_job_manifest_reference(
+    store: Store,
+    manifest_id: str,
+    copy_job_count: int,
+) -> Dict:
+    """
+    Get the manifest reference handed to the step function, for a manifest in the store
+    :param store: The store the manifest is in
+    :param manifest_id: The portal run id
+    :param copy_job_count: The number of copy jobs in the manifest
+    :return: See write_copy_job_manifest
+    """
+    manifest_uri = store.get_uri(get_copy_job_manifest_key(manifest_id))
+    results_location = get_bucket_and_key_from_uri(store.get_uri(get_copy_job_results_key_prefix(manifest_id)))
+
+    return {
+        "manifestUri": manifest_uri,
+        **get_bucket_and_key_from_uri(manifest_uri),
+        "resultsPrefix": results_location["key"],
+        "copyJobCount": copy_job_count,
+    }
+
+
+def write_copy_job_manifest(
+    store: Store,
+    manifest_id: str,
+    icav2_copy_job_list: List[Dict],
+) -> Dict:
+    """
+    Write the copy jobs to the store as a json lines manifest
+
+    :param store: The store to write to
+    :param manifest_id: The portal run id
+    :param icav2_copy_job_list: The encoded copy jobs, each a {sourceBaseUri, sourceNameList, destinationUri} dict
+    :return: The manifest reference handed to the step function, i.e.
+      {
+        "manifestUri": "s3://bucket/copy-job-manifests/<portal_run_id>/copy-jobs.jsonl",
+        "bucket": "bucket",
+        "key": "copy-job-manifests/<portal_run_id>/copy-jobs.jsonl",
+        "resultsPrefix": "copy-job-manifests/<portal_run_id>/results/",
+        "copyJobCount": 123
+      }
+    """
+    manifest_key = get_copy_job_manifest_key(manifest_id)
+    store.put_bytes(
+        manifest_key,
+        "".join(map(
+            lambda copy_job_iter_: json.dumps(copy_job_iter_, separators=(",", ":")) + "\n",
+            icav2_copy_job_list
+        )).encode()
+    )
+
+    logger.info("Wrote a manifest of %s copy jobs to %s", len(icav2_copy_job_list), store.get_uri(manifest_key))
+
+    return get_copy_job_manifest_reference(store, manifest_id, len(icav2_copy_job_list))
+
+
+def read_copy_job_manifest(
+    store: Store,
+    manifest_id: str,
+) -> Optional[Iterator[Dict]]:
+    """
+    Read the copy jobs back from a manifest in the store
+    :param store: The store to read from
+    :param manifest_id: The portal run id
+    :return: An iterator over the copy jobs, or None if there is no manifest
+    """
+    manifest_bytes = store.get_bytes(get_copy_job_manifest_key(manifest_id))
+
+    if manifest_bytes is None:
+        return None
+
+    return map(
+        json.loads,
+        filter(
+            lambda line_iter_: len(line_iter_.strip()) > 0,
+            manifest_bytes.decode().splitlines()
+        )
+    )
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+
+"""
+Split a large folder copy into size-balanced copy jobs (shards)
+
+Copying the whole Samples tree as a single copy job means a multi-TB copy runs as one unit,
+that cannot be parallelised and that has to be retried in full if it times out.
+
+Instead, each top-level entry of the folder (one subfolder per sample, or a stray file) becomes a copy unit,
+and the copy units are bin-packed on their size in bytes into a number of shards.
+The number of shards is the total size divided by the target shard size, capped at the max shard count.
+
+The target shard size and the max shard count can be overridden with the
+BSSH_MANAGER_TARGET_SHARD_SIZE_IN_BYTES and BSSH_MANAGER_MAX_SHARD_COUNT env vars.
+
+When resuming a copy, plan_incremental_copy_units compares the source against what is already in the destination,
+and only plans copy units for files that are missing or a different size,
+coalescing them back into a single folder copy where a whole subfolder is missing from the destination.
+Files are not compared on their e-tags, since a copy made with a different multipart part size
+has a different e-tag for identical content, the folder validation step does not compare them either.
+"""
+
+# Standard libraries
+import heapq
+from itertools import groupby
+from math import ceil
+from os import environ
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple
+
+# Local libraries
+from .listing_diff_helpers import ListingRecord
+
+# Globals
+TARGET_SHARD_SIZE_IN_BYTES_ENV_VAR = "BSSH_MANAGER_TARGET_SHARD_SIZE_IN_BYTES"
+MAX_SHARD_COUNT_ENV_VAR = "BSSH_MANAGER_MAX_SHARD_COUNT"
+DEFAULT_TARGET_SHARD_SIZE_IN_BYTES = 500 * 2 ** 30  # 500 GiB
+DEFAULT_MAX_SHARD_COUNT = 16
+
+
+class CopyUnit(NamedTuple):
+    """
+    The smallest piece of a folder that we will place into a shard
+    """
+    source_uri: str
+    size_in_bytes: int
+    file_count: int
+
+
+def get_target_shard_size_in_bytes() -> int:
+    """
+    Get the target shard size in bytes, can be overridden with the BSSH_MANAGER_TARGET_SHARD_SIZE_IN_BYTES env var
+    :return:
+    """
+    return max(1, int(environ.get(TARGET_SHARD_SIZE_IN_BYTES_ENV_VAR, DEFAULT_TARGET_SHARD_SIZE_IN_BYTES)))
+
+
+def get_max_shard_count() -> int:
+    """
+    Get the maximum number of shards, can be overridden with the BSSH_MANAGER_MAX_SHARD_COUNT env var
+    :return:
+    """
+    return max(1, int(environ.get(MAX_SHARD_COUNT_ENV_VAR, DEFAULT_MAX_SHARD_COUNT)))
+
+
+def iter_top_level_listing_record_groups(
+    listing_records: Iterable[ListingRecord],
+) -> Iterator[Tuple[str, bool, List[ListingRecord]]]:
+    """
+    Group listing records (in listing record order) by the top-level entry of the folder they sit under
+
+    Yields (name, is_folder, listing_records) tuples,
+    where the listing records of a subfolder are made relative to that subfolder.
+    Only one group is held in memory at a time.
+
+    :param listing_records: The listing records of a folder, in listing record order
+    :return:
+    """
+    for top_level_name, listing_record_group in groupby(
+        listing_records,
+        key=lambda listing_record_iter_: listing_record_iter_.relative_path.split("/", 1)[0]
+    ):
+        listing_record_list = list(listing_record_group)
+
+        # A file directly underneath the folder
+        if len(listing_record_list) == 1 and listing_record_list[0].relative_path == top_level_name:
+            yield top_level_name, False, listing_record_list
+            continue
+
+        yield top_level_name, True, list(map(
+            lambda listing_record_iter_: listing_record_iter_._replace(
+                relative_path=listing_record_iter_.relative_path.split("/", 1)[1]
+            ),
+            listing_record_list
+        ))
+
+
+def plan_copy_shards(
+    copy_units: Iterable[CopyUnit],
+    target_shard_size_in_bytes: int,
+    max_shard_count: int,
+) -> List[List[CopyUnit]]:
+    """
+    Bin-pack the copy units into size-balanced shards
+
+    Units are placed largest first onto the shard with the fewest bytes so far,
+    which keeps the largest shard within 4/3 of the best possible split.
+    Empty shards are dropped, and units keep their original order within each shard.
+
+    :param copy_units: The copy units to place
+    :param target_shard_size_in_bytes: The number of bytes we would like in each shard
+    :param max_shard_count: The maximum number of shards
+    :return: A list of shards, each a list of copy units
+    """
+    copy_unit_list = list(copy_units)
+
+    if len(copy_unit_list) == 0:
+        return []
+
+    total_size_in_bytes = sum(map(lambda copy_unit_iter_: copy_unit_iter_.size_in_bytes, copy_unit_list))
+    shard_count = min(
+        max(1, ceil(total_size_in_bytes / target_shard_size_in_bytes)),
+        max_shard_count,
+        len(copy_unit_list)
+    )
+
+    # Heap of (shard size in bytes, shard index)
+    shard_heap = [(0, shard_index) for shard_index in range(shard_count)]
+    shard_unit_indexes: List[List[int]] = [[] for _ in range(shard_count)]
+
+    for unit_index in sorted(
+        range(len(copy_unit_list)),
+        key=lambda unit_index_iter_: copy_unit_list[unit_index_iter_].size_in_bytes,
+        reverse=True
+    ):
+        shard_size_in_bytes, shard_index = heapq.heappop(shard_heap)
+        shard_unit_indexes[shard_index].append(unit_index)
+        heapq.heappush(
+            shard_heap,
+            (shard_size_in_bytes + copy_unit_list[unit_index].size_in_bytes, shard_index)
+        )
+
+    return list(map(
+        lambda unit_indexes_iter_: list(map(
+            lambda unit_index_iter_: copy_unit_list[unit_index_iter_],
+            sorted(unit_indexes_iter_)
+        )),
+        filter(
+            lambda unit_indexes_iter_: len(unit_indexes_iter_) > 0,
+            shard_unit_indexes
+        )
+    ))
+
+
+def is_listing_record_copied(
+    source_listing_record: ListingRecord,
+    destination_listing_record: ListingRecord,
+) -> bool:
+    """
+    A file is considered copied if its size matches the destination, as in the folder validation step.
+    E-tags are not compared, a copy made with a different multipart part size has a different e-tag
+    for identical content.
+    :param source_listing_record:
+    :param destination_listing_record:
+    :return:
+    """
+    return source_listing_record.file_size_in_bytes == destination_listing_record.file_size_in_bytes
+
+
+def plan_incremental_copy_units(
+    source_listing_records: Iterable[ListingRecord],
+    destination_listing_records: Iterable[ListingRecord],
+    source_folder_uri: str,
+    destination_folder_uri: str,
+    coalesce_missing_folders: bool = True,
+    coalesce_missing_root_folder: bool = False,
+) -> Dict[str, List[CopyUnit]]:
+    """
+    Plan the copy units needed to bring the destination folder up to date with the source folder
+
+    Files that are absent from the destination, or whose size differs, each become a file copy unit.
+    If coalesce_missing_folders is set, and none of a subfolder's files are in the destination,
+    the subfolder is copied as a whole instead (the top-most such subfolder is used).
+    If coalesce_missing_root_folder is also set, and the destination folder has no files at all,
+    the source folder itself is copied as a whole into the parent of the destination folder,
+    so the two folders must have the same name.
+
+    The destination listing is held in memory, the source listing is streamed.
+
+    :param source_listing_records: The listing records of the source folder
+    :param destination_listing_records: The listing records of the destination folder
+    :param source_folder_uri: The source folder uri that the source listing records are relative to
+    :param destination_folder_uri: The destination folder uri that the destination listing records are relative to
+    :param coalesce_missing_folders: Copy whole subfolders that are missing from the destination
+    :param coalesce_missing_root_folder: Copy the whole folder if the destination folder has no files
+    :return: A dictionary of destination folder uri to the copy units to place in that destination folder
+    """
+    source_folder_uri = source_folder_uri.rstrip("/") + "/"
+    destination_folder_uri = destination_folder_uri.rstrip("/") + "/"
+
+    # Collect the destination files, and every folder that contains at least one destination file
+    destination_listing_records_by_path: Dict[str, ListingRecord] = {}
+    destination_folder_paths: Set[str] = set()
+    for destination_listing_record in destination_listing_records:
+        destination_listing_records_by_path[destination_listing_record.relative_path] = destination_listing_record
+        path_parts = destination_listing_record.relative_path.split("/")
+        for parts_index in range(1, len(path_parts)):
+            destination_folder_paths.add("/".join(path_parts[:parts_index]))
+
+    # The folder itself, as the top-most missing folder, has the empty relative path
+    is_root_folder_missing = (
+        coalesce_missing_folders and coalesce_missing_root_folder and
+        len(destination_listing_records_by_path) == 0
+    )
+
+    def _get_destination_uri(relative_path: str) -> str:
+        if relative_path == "":
+            return destination_folder_uri.rstrip("/").rsplit("/", 1)[0] + "/"
+        parent_path = relative_path.rsplit("/", 1)[0] if "/" in relative_path else ""
+        return destination_folder_uri + (parent_path + "/" if parent_path else "")
+
+    # Subfolders to copy as a whole, (file count, size in bytes) by relative path, in the order first seen
+    missing_folders: Dict[str, Tuple[int, int]] = {}
+    copy_units_by_destination_uri: Dict[str, List[CopyUnit]] = {}
+
+    for source_listing_record in source_listing_records:
+        destination_listing_record = destination_listing_records_by_path.get(source_listing_record.relative_path)
+        if (
+            destination_listing_record is not None and
+            is_listing_record_copied(source_listing_record, destination_listing_record)
+        ):
+            continue
+
+        # Find the top-most subfolder that has nothing in the destination
+        path_parts = source_listing_record.relative_path.split("/")
+        missing_folder_path = None
+        if is_root_folder_missing:
+            missing_folder_path = ""
+        elif coalesce_missing_folders:
+            missing_folder_path = next(
+                filter(
+                    lambda folder_path_iter_: folder_path_iter_ not in destination_folder_paths,
+                    map(
+                        lambda parts_index_iter_: "/".join(path_parts[:parts_index_iter_]),
+                        range(1, len(path_parts))
+                    )
+                ),
+                None
+            )
+
+        if missing_folder_path is not None:
+            file_count, size_in_bytes = missing_folders.get(missing_folder_path, (0, 0))
+            missing_folders[missing_folder_path] = (
+                file_count + 1,
+                size_in_bytes + (source_listing_record.file_size_in_bytes or 0)
+            )
+            continue
+
+        copy_units_by_destination_uri.setdefault(
+            _get_destination_uri(source_listing_record.relative_path), []
+        ).append(
+            CopyUnit(
+                source_uri=source_folder_uri + source_listing_record.relative_path,
+                size_in_bytes=source_listing_record.file_size_in_bytes or 0,
+                file_count=1
+            )
+        )
+
+    for missing_folder_path, (file_count, size_in_bytes) in missing_folders.items():
+        copy_units_by_destination_uri.setdefault(
+            _get_destination_uri(missing_folder_path), []
+        ).append(
+            CopyUnit(
+                source_uri=source_folder_uri + (missing_folder_path + "/" if missing_folder_path else ""),
+                size_in_bytes=size_in_bytes,
+                file_count=file_count
+            )
+        )
+
+    return copy_units_by_destination_uri
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+Cache the expected file inventory of a copied folder
+
+Once a copy has been validated, the files under the destination can no longer change,
+so the filemanager sync polling loop only needs to list ICAv2 once.
+The expected s3 key and size of every file is saved to the store under a cache key
+(the step function execution name), and read back on each subsequent poll.
+
+Inventories are gzipped json, a single {key: size} object.
+"""
+
+# Standard libraries
+import gzip
+import json
+from hashlib import sha256
+from typing import Dict, Optional
+
+# Local libraries
+from .logger import get_logger
+from .store_helpers import Store
+
+# Globals
+EXPECTED_INVENTORIES_PREFIX = "expected-inventories"
+
+# Set logger
+logger = get_logger(__name__)
+
+
+def get_expected_inventory_key(s3_prefix: str, cache_key: str) -> str:
+    """
+    Get the store key for the expected inventory of an s3 prefix
+    :param s3_prefix:
+    :param cache_key:
+    :return:
+    """
+    s3_prefix = s3_prefix.rstrip("/") + "/"
+    return f"{EXPECTED_INVENTORIES_PREFIX}/{cache_key}/{sha256(s3_prefix.encode()).hexdigest()}.json.gz"
+
+
+def write_expected_inventory(
+    store: Store,
+    s3_prefix: str,
+    cache_key: str,
+    expected_sizes_by_key: Dict[str, Optional[int]],
+):
+    """
+    Write the expected inventory of an s3 prefix to the store
+    :param store: The store to write to
+    :param s3_prefix: The s3 prefix the inventory was listed under
+    :param cache_key: The cache key, i.e. the step function execution name
+    :param expected_sizes_by_key: The expected size of every s3 key under the prefix
+    :return:
+    """
+    inventory_key = get_expected_inventory_key(s3_prefix, cache_key)
+    store.put_bytes(
+        inventory_key,
+        gzip.compress(json.dumps(expected_sizes_by_key, separators=(",", ":")).encode())
+    )
+
+    logger.info(
+        "Wrote expected inventory of %s files for %s to %s",
+        len(expected_sizes_by_key), s3_prefix, store.get_uri(inventory_key)
+    )
+
+
+def read_expected_inventory(
+    store: Store,
+    s3_prefix: str,
+    cache_key: str,
+) -> Optional[Dict[str, Optional[int]]]:
+    """
+    Read the expected inventory of an s3 prefix from the store
+    :param store: The store to read from
+    :param s3_prefix: The s3 prefix the inventory was listed under
+    :param cache_key: The cache key, i.e. the step function execution name
+    :return: The expected size of every s3 key under the prefix, or None if there is no inventory in the store
+    """
+    inventory_key = get_expected_inventory_key(s3_prefix, cache_key)
+    inventory_bytes = store.get_bytes(inventory_key)
+
+    if inventory_bytes is None:
+        return None
+
+    logger.info("Reading expected inventory for %s from %s", s3_prefix, store.get_uri(inventory_key))
+
+    return json.loads(gzip.decompress(inventory_bytes))
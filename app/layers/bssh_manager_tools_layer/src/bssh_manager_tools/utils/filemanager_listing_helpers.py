@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+Stream S3 object records from the filemanager
+
+The orcabus_api_tools list_files_recursively collects every page before returning,
+here we request one page at a time, and project each record down to the attributes we compare on.
+
+Requires the orcabus api tools layer, which is imported on first use.
+"""
+
+# Standard libraries
+from functools import partial
+from typing import Dict, Iterator, List
+
+# Local libraries
+from .filemanager_sync_helpers import FilemanagerRecord
+from .metrics_helpers import CallMetrics
+from .retry_helpers import call_with_retries
+
+# Globals
+FILEMANAGER_ROWS_PER_PAGE = 1000
+
+
+def iter_filemanager_record_pages(
+    bucket: str,
+    key_prefix: str,
+    rows_per_page: int = FILEMANAGER_ROWS_PER_PAGE,
+    start_page_number: int = 1,
+) -> Iterator[List[FilemanagerRecord]]:
+    """
+    List the current S3 objects under a bucket and key prefix, yielding one page of records at a time.
+    The next page is only requested once the caller has consumed the current one.
+
+    :param bucket: The S3 bucket
+    :param key_prefix: The key prefix
+    :param rows_per_page: The number of records to request per page
+    :param start_page_number: The first page to request, to resume a listing
+    :return: An iterator over pages of filemanager records
+    """
+    from orcabus_api_tools.filemanager import get_file_manager_request
+    from orcabus_api_tools.filemanager.globals import S3_LIST_ENDPOINT
+
+    page_number = start_page_number
+
+    # Only the time spent waiting on the filemanager is recorded, not the time the caller spends on each page
+    call_metrics = CallMetrics("filemanager_list_s3_objects")
+
+    try:
+        while True:
+            # A throttled or failed page is retried, the retries are recorded on the call metrics
+            with call_metrics.time_request():
+                response: Dict = call_with_retries(
+                    partial(
+                        get_file_manager_request,
+                        S3_LIST_ENDPOINT,
+                        params={
+                            "bucket": bucket,
+                            "key": f"{key_prefix}*",
+                            "currentState": "true",
+                            "page": page_number,
+                            "rowsPerPage": rows_per_page,
+                        }
+                    ),
+                    call_metrics=call_metrics
+                )
+
+            results = response.get("results", [])
+            call_metrics.add_page(len(results))
+
+            yield list(map(
+                lambda result_iter_: FilemanagerRecord(
+                    key=result_iter_["key"],
+                    size=result_iter_.get("size"),
+                    ingest_id=result_iter_.get("ingestId"),
+                    s3_object_id=result_iter_.get("s3ObjectId"),
+                    portal_run_id=(result_iter_.get("attributes") or {}).get("portalRunId"),
+                ),
+                results
+            ))
+
+            # Check if there is a next page
+            if len(results) == 0 or response.get("links", {}).get("next") is None:
+                break
+
+            page_number += 1
+    finally:
+        call_metrics.emit()
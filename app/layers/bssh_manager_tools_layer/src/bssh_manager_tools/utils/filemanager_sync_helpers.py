@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+"""
+Check how far the filemanager has got in syncing a copied folder
+
+The expected inventory (the key and size of every file we copied) is held in memory,
+and the filemanager records are streamed against it page by page.
+
+The check stops early as soon as the outcome is known:
+  * every expected key has been found with a matching size and an ingest id, the folder is synced
+  * an expected key has been found with a different size, the folder is not synced (yet)
+After stopping early on a size mismatch, the synced count only covers the pages read,
+and the missing keys are not reported, as the keys on the unread pages may well be synced.
+
+Between checks, the step function waits for get_next_wait_seconds,
+which is based on how quickly the sync has been converging,
+and gives up after get_max_total_wait_seconds, which scales with the number of files expected.
+If the run is tracked (see filemanager_sync_tracker_helpers), the step function first waits on the
+S3 object created events for up to get_max_event_wait_seconds, a fraction of that budget,
+so that a wait for events that never arrive leaves most of the budget for polling.
+"""
+
+# Standard libraries
+from dataclasses import dataclass, field
+from math import ceil
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Globals
+# The number of missing keys to return, keeps the step function payload small
+MAX_MISSING_KEYS = 100
+
+# Polling schedule
+MIN_WAIT_SECONDS = 5
+MAX_WAIT_SECONDS = 60
+MIN_TOTAL_WAIT_SECONDS = 300
+MAX_TOTAL_WAIT_SECONDS = 3600
+TOTAL_WAIT_SECONDS_PER_FILE = 0.1
+# The fraction of the max total wait spent waiting on the S3 object created events
+EVENT_WAIT_FRACTION = 0.25
+
+
+class FilemanagerRecord(NamedTuple):
+    """
+    The attributes of a filemanager S3 object record we need to check a sync
+    """
+    key: str
+    size: Optional[int]
+    ingest_id: Optional[str]
+    # Only needed to patch the record's attributes
+    s3_object_id: Optional[str] = None
+    portal_run_id: Optional[str] = None
+
+
+@dataclass
+class SyncCheckResult:
+    """
+    The outcome of comparing the expected inventory against the filemanager records
+    """
+    is_synced: bool
+    synced_count: int
+    expected_count: int
+    # A sample of the expected keys not (yet) synced, at most MAX_MISSING_KEYS,
+    # only set once every filemanager page has been read
+    missing_keys: List[str] = field(default_factory=list)
+    # Expected keys found in the filemanager with a different size
+    size_mismatched_keys: List[str] = field(default_factory=list)
+    # The number of filemanager pages we read
+    pages_read: int = 0
+    # Whether every filemanager page was read, rather than stopping early on a size mismatch
+    is_complete_pass: bool = True
+
+    def to_dict(self) -> Dict:
+        return {
+            "isSynced": self.is_synced,
+            "syncedCount": self.synced_count,
+            "expectedCount": self.expected_count,
+            "missingKeys": self.missing_keys,
+            "sizeMismatchedKeys": self.size_mismatched_keys[:MAX_MISSING_KEYS],
+            "isCompletePass": self.is_complete_pass,
+        }
+
+
+def check_filemanager_sync(
+    expected_sizes_by_key: Dict[str, Optional[int]],
+    filemanager_record_pages: Iterable[List[FilemanagerRecord]],
+    max_missing_keys: int = MAX_MISSING_KEYS,
+    stop_on_size_mismatch: bool = True,
+) -> SyncCheckResult:
+    """
+    Stream the filemanager records against the expected inventory
+
+    A key counts as synced once the filemanager has a record for it with the expected size and an ingest id.
+    If we stop early on a size mismatch, the keys we did not get to are neither counted as synced nor as missing.
+
+    :param expected_sizes_by_key: The expected size of every key, this dictionary is not modified
+    :param filemanager_record_pages: Pages of filemanager records
+    :param max_missing_keys: The number of missing keys to return, on a complete pass
+    :param stop_on_size_mismatch: Stop at the end of the page with a size mismatch,
+      rather than reading every page to find every missing key
+    :return:
+    """
+    pending_keys = set(expected_sizes_by_key.keys())
+    size_mismatched_keys: List[str] = []
+    pages_read = 0
+    is_complete_pass = True
+
+    for filemanager_record_page in filemanager_record_pages:
+        pages_read += 1
+
+        for filemanager_record in filemanager_record_page:
+            if filemanager_record.key not in pending_keys:
+                continue
+
+            if filemanager_record.size != expected_sizes_by_key[filemanager_record.key]:
+                size_mismatched_keys.append(filemanager_record.key)
+                continue
+
+            if filemanager_record.ingest_id is None:
+                continue
+
+            pending_keys.remove(filemanager_record.key)
+
+        # Synced, no need to read any further pages
+        if len(pending_keys) == 0:
+            break
+
+        # A stale record proves that the sync is not complete
+        if stop_on_size_mismatch and len(size_mismatched_keys) > 0:
+            is_complete_pass = False
+            break
+
+    return SyncCheckResult(
+        is_synced=len(pending_keys) == 0,
+        synced_count=len(expected_sizes_by_key) - len(pending_keys),
+        expected_count=len(expected_sizes_by_key),
+        # The keys still pending after an early exit include those on pages we never read
+        missing_keys=sorted(pending_keys)[:max_missing_keys] if is_complete_pass else [],
+        size_mismatched_keys=size_mismatched_keys,
+        pages_read=pages_read,
+        is_complete_pass=is_complete_pass,
+    )
+
+
+def get_next_wait_seconds(
+    expected_count: int,
+    synced_count: int,
+    previous_synced_count: Optional[int] = None,
+    previous_wait_seconds: Optional[int] = None,
+) -> int:
+    """
+    Get the number of seconds to wait before the next sync check
+
+    If the sync made progress over the last wait, we wait for roughly as long as the remaining files
+    should take at the observed rate.
+    If the sync made no progress, we double the last wait.
+
+    :param expected_count: The number of files expected
+    :param synced_count: The number of files synced as of this check
+    :param previous_synced_count: The number of files synced as of the previous check
+    :param previous_wait_seconds: The number of seconds waited since the previous check
+    :return:
+    """
+    # First check, no rate to go on yet
+    if previous_synced_count is None or not previous_wait_seconds:
+        return MIN_WAIT_SECONDS
+
+    # No progress, back off
+    if synced_count <= previous_synced_count:
+        return min(previous_wait_seconds * 2, MAX_WAIT_SECONDS)
+
+    files_per_second = (synced_count - previous_synced_count) / previous_wait_seconds
+    estimated_seconds_remaining = ceil((expected_count - synced_count) / files_per_second)
+
+    return max(MIN_WAIT_SECONDS, min(estimated_seconds_remaining, MAX_WAIT_SECONDS))
+
+
+def get_max_total_wait_seconds(expected_count: int) -> int:
+    """
+    Get the number of seconds to keep waiting for the sync before giving up, scaled by the number of files expected
+    :param expected_count: The number of files expected
+    :return:
+    """
+    return max(
+        MIN_TOTAL_WAIT_SECONDS,
+        min(
+            MIN_TOTAL_WAIT_SECONDS + ceil(expected_count * TOTAL_WAIT_SECONDS_PER_FILE),
+            MAX_TOTAL_WAIT_SECONDS
+        )
+    )
+
+
+def get_max_event_wait_seconds(expected_count: int) -> int:
+    """
+    Get the number of seconds to wait on the S3 object created events before falling back to polling,
+    a fraction of the max total wait
+    :param expected_count: The number of files expected
+    :return:
+    """
+    return ceil(get_max_total_wait_seconds(expected_count) * EVENT_WAIT_FRACTION)
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+
+"""
+Track the files created under an output uri, and resume the step function once they have all arrived
+
+Polling the filemanager costs a full listing per check, every few seconds, until the counts match.
+Instead, the S3 object created events for the output uri are counted as they arrive:
+  * the run is registered before the copy starts, under its portal run id
+  * each object created event under the run's output uri adds its key to the run, and
+    the run's synced count is incremented the first time each key is seen
+  * once the copy has been validated, the step function waits with a task token,
+    and the expected count is set on the run
+  * whichever of the two sees the synced count reach the expected count sends the task success,
+    a conditional update on the run makes sure it is only sent once
+
+Only the objects created after the run was registered are counted, so the expected count is not every file
+of the run: files that were already in place (an incremental copy, a rerun) never have an event.
+Instead we wait for the keys the filemanager is still missing that have not had an event yet,
+on top of the synced count as it was before they were looked up (see set_expected_missing_keys).
+
+The run is looked up from an event by the folder names in the object key,
+as the output uri always ends with the portal run id.
+
+Runs and keys are held in a SyncTracker, the default is a DynamoDB table (BSSH_MANAGER_SYNC_TRACKER_TABLE_NAME),
+InMemorySyncTracker can be swapped in with set_sync_tracker for tests and benchmarks.
+If neither is set, get_sync_tracker returns None and callers should fall back to polling.
+The task success is sent with Step Functions SendTaskSuccess, set_task_success_sender swaps in a local sender.
+"""
+
+# Standard libraries
+import json
+import typing
+from abc import ABC, abstractmethod
+from os import environ
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+from urllib.parse import urlparse
+
+# Local libraries
+from .logger import get_logger
+from .metrics_helpers import instrument_call
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+    from mypy_boto3_stepfunctions import SFNClient
+
+# Globals
+SYNC_TRACKER_TABLE_NAME_ENV_VAR = "BSSH_MANAGER_SYNC_TRACKER_TABLE_NAME"
+
+# Tracker items are removed by the table's time to live, well after the run has completed
+SYNC_TRACKER_ITEM_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# BatchGetItem limit, an object key nested deeper than this is not looked up past this many folders
+MAX_CANDIDATE_PORTAL_RUN_IDS = 100
+BATCH_GET_ITEM_MAX_KEYS = 100
+
+# Set logger
+logger = get_logger(__name__)
+
+
+class SyncTrackerRun(NamedTuple):
+    """
+    The tracked state of a run
+    """
+    portal_run_id: str
+    # The step function execution name, so that a new execution of the same run counts its keys from zero
+    tracking_id: str
+    s3_prefix: str
+    synced_count: int = 0
+    expected_count: Optional[int] = None
+    task_token: Optional[str] = None
+    is_resumed: bool = False
+
+    @property
+    def is_complete(self) -> bool:
+        return self.expected_count is not None and self.synced_count >= self.expected_count
+
+    def is_key_under_s3_prefix(self, bucket: str, key: str) -> bool:
+        s3_prefix_obj = urlparse(self.s3_prefix)
+        return (
+            s3_prefix_obj.netloc == bucket and
+            key.startswith(s3_prefix_obj.path.strip("/") + "/")
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "isSynced": self.is_complete,
+            "syncedCount": self.synced_count,
+            "expectedCount": self.expected_count,
+        }
+
+
+class SyncTracker(ABC):
+    """
+    Somewhere to count the keys created under each run's output uri
+    """
+
+    @abstractmethod
+    def register_run(self, portal_run_id: str, tracking_id: str, s3_prefix: str) -> SyncTrackerRun:
+        """
+        Start tracking a run, replacing any previous registration of the same portal run id
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_runs(self, portal_run_ids: List[str]) -> List[SyncTrackerRun]:
+        """
+        Get the runs registered under any of the portal run ids
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_synced_key(self, run: SyncTrackerRun, key: str) -> Optional[SyncTrackerRun]:
+        """
+        Add a key to the run, return the run with its synced count incremented,
+        or None if the key has already been added (or the run has since been registered again)
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_synced_keys(self, run: SyncTrackerRun, keys: List[str]) -> Set[str]:
+        """
+        Get the keys that have already been added to the run
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_expected_count(
+        self, portal_run_id: str, tracking_id: str, expected_count: int, task_token: str
+    ) -> Optional[SyncTrackerRun]:
+        """
+        Set the expected count and the task token to resume, return None if the run is not registered
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def claim_resume(self, run: SyncTrackerRun) -> bool:
+        """
+        Mark the run as resumed, return True for the first caller only
+        """
+        raise NotImplementedError
+
+
+class DynamoDbSyncTracker(SyncTracker):
+    """
+    Track runs in a DynamoDB table with a string partition key 'id' and 'expiresAt' as its time to live attribute
+
+    Each run is a single item, id = run#<portal_run_id>, holding the synced count,
+    each key added to a run is an item of its own, id = key#<portal_run_id>#<tracking_id>#<key>,
+    written with a condition and in the same transaction as the count,
+    so that a repeated event does not count the key twice.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self._dynamodb_client: Optional['DynamoDBClient'] = None
+
+    @property
+    def dynamodb_client(self) -> 'DynamoDBClient':
+        if self._dynamodb_client is None:
+            import boto3
+            self._dynamodb_client = boto3.client("dynamodb")
+        return self._dynamodb_client
+
+    @staticmethod
+    def get_run_id(portal_run_id: str) -> str:
+        return f"run#{portal_run_id}"
+
+    @staticmethod
+    def get_key_id(run: SyncTrackerRun, key: str) -> str:
+        return f"key#{run.portal_run_id}#{run.tracking_id}#{key}"
+
+    @staticmethod
+    def get_expires_at() -> Dict:
+        return {"N": str(int(time()) + SYNC_TRACKER_ITEM_TTL_SECONDS)}
+
+    @staticmethod
+    def item_to_run(item: Dict) -> SyncTrackerRun:
+        return SyncTrackerRun(
+            portal_run_id=item["portalRunId"]["S"],
+            tracking_id=item["trackingId"]["S"],
+            s3_prefix=item["s3Prefix"]["S"],
+            synced_count=int(item["syncedCount"]["N"]),
+            expected_count=int(item["expectedCount"]["N"]) if "expectedCount" in item else None,
+            task_token=item["taskToken"]["S"] if "taskToken" in item else None,
+            is_resumed=item["isResumed"]["BOOL"],
+        )
+
+    @instrument_call("dynamodb_register_run")
+    def register_run(self, portal_run_id: str, tracking_id: str, s3_prefix: str) -> SyncTrackerRun:
+        run = SyncTrackerRun(portal_run_id=portal_run_id, tracking_id=tracking_id, s3_prefix=s3_prefix)
+        self.dynamodb_client.put_item(
+            TableName=self.table_name,
+            Item={
+                "id": {"S": self.get_run_id(portal_run_id)},
+                "portalRunId": {"S": portal_run_id},
+                "trackingId": {"S": tracking_id},
+                "s3Prefix": {"S": s3_prefix},
+                "syncedCount": {"N": "0"},
+                "isResumed": {"BOOL": False},
+                "expiresAt": self.get_expires_at(),
+            }
+        )
+        return run
+
+    @instrument_call("dynamodb_get_runs")
+    def get_runs(self, portal_run_ids: List[str]) -> List[SyncTrackerRun]:
+        if len(portal_run_ids) == 0:
+            return []
+
+        response = self.dynamodb_client.batch_get_item(
+            RequestItems={
+                self.table_name: {
+                    "Keys": list(map(
+                        lambda portal_run_id_iter_: {"id": {"S": self.get_run_id(portal_run_id_iter_)}},
+                        portal_run_ids
+                    )),
+                    "ConsistentRead": True,
+                }
+            }
+        )
+
+        # At most a handful of small items, so no unprocessed keys to retry
+        return list(map(self.item_to_run, response["Responses"].get(self.table_name, [])))
+
+    @instrument_call("dynamodb_add_synced_key")
+    def add_synced_key(self, run: SyncTrackerRun, key: str) -> Optional[SyncTrackerRun]:
+        from botocore.exceptions import ClientError
+
+        # The key and the count are written together, so a retried event can never add the key without the count
+        try:
+            self.dynamodb_client.transact_write_items(
+                TransactItems=[
+                    {
+                        "Put": {
+                            "TableName": self.table_name,
+                            "Item": {
+                                "id": {"S": self.get_key_id(run, key)},
+                                "expiresAt": self.get_expires_at(),
+                            },
+                            "ConditionExpression": "attribute_not_exists(#id)",
+                            "ExpressionAttributeNames": {"#id": "id"},
+                        }
+                    },
+                    {
+                        "Update": {
+                            "TableName": self.table_name,
+                            "Key": {"id": {"S": self.get_run_id(run.portal_run_id)}},
+                            "UpdateExpression": "ADD syncedCount :one",
+                            "ConditionExpression": "trackingId = :tracking_id",
+                            "ExpressionAttributeValues": {
+                                ":one": {"N": "1"},
+                                ":tracking_id": {"S": run.tracking_id},
+                            },
+                        }
+                    },
+                ]
+            )
+        except ClientError as client_error:
+            if client_error.response["Error"]["Code"] == "TransactionCanceledException":
+                return None
+            raise
+
+        response = self.dynamodb_client.get_item(
+            TableName=self.table_name,
+            Key={"id": {"S": self.get_run_id(run.portal_run_id)}},
+            ConsistentRead=True,
+        )
+
+        return self.item_to_run(response["Item"])
+
+    @instrument_call("dynamodb_get_synced_keys")
+    def get_synced_keys(self, run: SyncTrackerRun, keys: List[str]) -> Set[str]:
+        keys_by_id = dict(map(
+            lambda key_iter_: (self.get_key_id(run, key_iter_), key_iter_),
+            keys
+        ))
+        key_ids = list(keys_by_id.keys())
+
+        synced_keys: Set[str] = set()
+        for batch_start in range(0, len(key_ids), BATCH_GET_ITEM_MAX_KEYS):
+            request_items = {
+                self.table_name: {
+                    "Keys": list(map(
+                        lambda key_id_iter_: {"id": {"S": key_id_iter_}},
+                        key_ids[batch_start:batch_start + BATCH_GET_ITEM_MAX_KEYS]
+                    )),
+                    "ProjectionExpression": "#id",
+                    "ExpressionAttributeNames": {"#id": "id"},
+                    "ConsistentRead": True,
+                }
+            }
+            # Keys the table was too busy to read are handed back to us as unprocessed
+            while request_items:
+                response = self.dynamodb_client.batch_get_item(RequestItems=request_items)
+                synced_keys.update(map(
+                    lambda item_iter_: keys_by_id[item_iter_["id"]["S"]],
+                    response["Responses"].get(self.table_name, [])
+                ))
+                request_items = response.get("UnprocessedKeys") or {}
+
+        return synced_keys
+
+    @instrument_call("dynamodb_set_expected_count")
+    def set_expected_count(
+        self, portal_run_id: str, tracking_id: str, expected_count: int, task_token: str
+    ) -> Optional[SyncTrackerRun]:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.dynamodb_client.update_item(
+                TableName=self.table_name,
+                Key={"id": {"S": self.get_run_id(portal_run_id)}},
+                UpdateExpression="SET expectedCount = :expected_count, taskToken = :task_token",
+                ConditionExpression="trackingId = :tracking_id",
+                ExpressionAttributeValues={
+                    ":expected_count": {"N": str(expected_count)},
+                    ":task_token": {"S": task_token},
+                    ":tracking_id": {"S": tracking_id},
+                },
+                ReturnValues="ALL_NEW",
+            )
+        except ClientError as client_error:
+            if client_error.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return None
+            raise
+
+        return self.item_to_run(response["Attributes"])
+
+    @instrument_call("dynamodb_claim_resume")
+    def claim_resume(self, run: SyncTrackerRun) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.dynamodb_client.update_item(
+                TableName=self.table_name,
+                Key={"id": {"S": self.get_run_id(run.portal_run_id)}},
+                UpdateExpression="SET isResumed = :true",
+                ConditionExpression="trackingId = :tracking_id AND isResumed = :false",
+                ExpressionAttributeValues={
+                    ":true": {"BOOL": True},
+                    ":false": {"BOOL": False},
+                    ":tracking_id": {"S": run.tracking_id},
+                },
+            )
+        except ClientError as client_error:
+            if client_error.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise
+
+        return True
+
+
+class InMemorySyncTracker(SyncTracker):
+    """
+    Track runs in memory, for tests and benchmarks
+    """
+
+    def __init__(self):
+        self.runs: Dict[str, SyncTrackerRun] = {}
+        self.synced_keys: Dict[str, Set[str]] = {}
+        self._lock = Lock()
+
+    def register_run(self, portal_run_id: str, tracking_id: str, s3_prefix: str) -> SyncTrackerRun:
+        with self._lock:
+            self.runs[portal_run_id] = SyncTrackerRun(
+                portal_run_id=portal_run_id, tracking_id=tracking_id, s3_prefix=s3_prefix
+            )
+            self.synced_keys[portal_run_id] = set()
+            return self.runs[portal_run_id]
+
+    def get_runs(self, portal_run_ids: List[str]) -> List[SyncTrackerRun]:
+        with self._lock:
+            return list(map(
+                lambda portal_run_id_iter_: self.runs[portal_run_id_iter_],
+                filter(lambda portal_run_id_iter_: portal_run_id_iter_ in self.runs, portal_run_ids)
+            ))
+
+    def add_synced_key(self, run: SyncTrackerRun, key: str) -> Optional[SyncTrackerRun]:
+        with self._lock:
+            current_run = self.runs.get(run.portal_run_id)
+            if (
+                current_run is None or
+                current_run.tracking_id != run.tracking_id or
+                key in self.synced_keys[run.portal_run_id]
+            ):
+                return None
+            self.synced_keys[run.portal_run_id].add(key)
+            self.runs[run.portal_run_id] = current_run._replace(synced_count=current_run.synced_count + 1)
+            return self.runs[run.portal_run_id]
+
+    def get_synced_keys(self, run: SyncTrackerRun, keys: List[str]) -> Set[str]:
+        with self._lock:
+            current_run = self.runs.get(run.portal_run_id)
+            if current_run is None or current_run.tracking_id != run.tracking_id:
+                return set()
+            return self.synced_keys[run.portal_run_id].intersection(keys)
+
+    def set_expected_count(
+        self, portal_run_id: str, tracking_id: str, expected_count: int, task_token: str
+    ) -> Optional[SyncTrackerRun]:
+        with self._lock:
+            current_run = self.runs.get(portal_run_id)
+            if current_run is None or current_run.tracking_id != tracking_id:
+                return None
+            self.runs[portal_run_id] = current_run._replace(expected_count=expected_count, task_token=task_token)
+            return self.runs[portal_run_id]
+
+    def claim_resume(self, run: SyncTrackerRun) -> bool:
+        with self._lock:
+            current_run = self.runs.get(run.portal_run_id)
+            if current_run is None or current_run.tracking_id != run.tracking_id or current_run.is_resumed:
+                return False
+            self.runs[run.portal_run_id] = current_run._replace(is_resumed=True)
+            return True
+
+
+# Module level, lives for the life of the lambda container
+_SYNC_TRACKER: Optional[SyncTracker] = None
+_TASK_SUCCESS_SENDER: Optional[Callable[[str, Dict], None]] = None
+_SFN_CLIENT: Optional['SFNClient'] = None
+
+
+def set_sync_tracker(sync_tracker: Optional[SyncTracker]):
+    """
+    Set the sync tracker
+    :param sync_tracker: The sync tracker, None to use the DynamoDB table (if configured)
+    :return:
+    """
+    global _SYNC_TRACKER
+    _SYNC_TRACKER = sync_tracker
+
+
+def get_sync_tracker() -> Optional[SyncTracker]:
+    """
+    Get the sync tracker, or None if there is no sync tracker table configured
+    :return:
+    """
+    global _SYNC_TRACKER
+
+    if _SYNC_TRACKER is None and environ.get(SYNC_TRACKER_TABLE_NAME_ENV_VAR):
+        _SYNC_TRACKER = DynamoDbSyncTracker(environ[SYNC_TRACKER_TABLE_NAME_ENV_VAR])
+
+    return _SYNC_TRACKER
+
+
+def set_task_success_sender(task_success_sender: Optional[Callable[[str, Dict], None]]):
+    """
+    Set the function that sends the task success
+    :param task_success_sender: Called with the task token and the task output, None to use Step Functions
+    :return:
+    """
+    global _TASK_SUCCESS_SENDER
+    _TASK_SUCCESS_SENDER = task_success_sender
+
+
+@instrument_call("sfn_send_task_success")
+def _send_task_success_with_sfn(task_token: str, output: Dict):
+    global _SFN_CLIENT
+
+    if _SFN_CLIENT is None:
+        import boto3
+        _SFN_CLIENT = boto3.client("stepfunctions")
+
+    _SFN_CLIENT.send_task_success(taskToken=task_token, output=json.dumps(output))
+
+
+def send_task_success(task_token: str, output: Dict):
+    """
+    Resume the step function waiting on the task token
+    :param task_token:
+    :param output:
+    :return:
+    """
+    (_TASK_SUCCESS_SENDER or _send_task_success_with_sfn)(task_token, output)
+
+
+def get_candidate_portal_run_ids(key: str) -> List[str]:
+    """
+    Get the folder names in an object key, any of which could be the portal run id at the end of an output uri
+    :param key: The object key
+    :return: The folder names, deepest first
+    """
+    return list(reversed(list(dict.fromkeys(Path(key).parent.parts))))[:MAX_CANDIDATE_PORTAL_RUN_IDS]
+
+
+def get_tracked_run(sync_tracker: SyncTracker, portal_run_id: str, tracking_id: str) -> Optional[SyncTrackerRun]:
+    """
+    Get the run, if it is registered under this tracking id
+    :param sync_tracker:
+    :param portal_run_id:
+    :param tracking_id:
+    :return:
+    """
+    return next(
+        filter(
+            lambda run_iter_: run_iter_.tracking_id == tracking_id,
+            sync_tracker.get_runs([portal_run_id])
+        ),
+        None
+    )
+
+
+def set_expected_missing_keys(
+    sync_tracker: SyncTracker,
+    run: SyncTrackerRun,
+    missing_keys: List[str],
+    task_token: str,
+) -> Optional[SyncTrackerRun]:
+    """
+    Wait for the events of the keys the filemanager is missing that have not been counted yet
+
+    The expected count is the synced count of the run as it was before the missing keys were found,
+    plus the missing keys without an event.
+    An event counted after the run was read but before the keys were looked up lowers the expected count,
+    so at worst the step function is resumed early, and confirms the sync with one more check.
+
+    :param sync_tracker:
+    :param run: The run, read before the missing keys were found
+    :param missing_keys: Every key the filemanager is missing
+    :param task_token: The task token to resume
+    :return: The run with its expected count and task token set, or None if the run has since been registered again
+    """
+    pending_count = len(missing_keys) - len(sync_tracker.get_synced_keys(run, missing_keys))
+
+    logger.info(
+        "%s of the %s files missing from the filemanager have not had an object created event yet",
+        pending_count, len(missing_keys)
+    )
+
+    return sync_tracker.set_expected_count(
+        portal_run_id=run.portal_run_id,
+        tracking_id=run.tracking_id,
+        expected_count=run.synced_count + pending_count,
+        task_token=task_token
+    )
+
+
+def resume_if_complete(sync_tracker: SyncTracker, run: SyncTrackerRun) -> bool:
+    """
+    Send the task success if every expected key has been synced, and no one else has sent it already
+    :param sync_tracker:
+    :param run:
+    :return: True if we sent the task success
+    """
+    if not run.is_complete or run.task_token is None or run.is_resumed:
+        return False
+
+    if not sync_tracker.claim_resume(run):
+        return False
+
+    logger.info(
+        "Synced %s of %s files for %s, resuming the step function",
+        run.synced_count, run.expected_count, run.portal_run_id
+    )
+    send_task_success(run.task_token, run.to_dict())
+
+    return True
+
+
+def record_object_created(sync_tracker: SyncTracker, bucket: str, key: str) -> Optional[SyncTrackerRun]:
+    """
+    Count an object created under a tracked run's output uri, and resume the step function if it was the last one
+    :param sync_tracker:
+    :param bucket: The bucket of the object
+    :param key: The key of the object
+    :return: The run with its updated synced count, or None if the object is not under a tracked run
+      or has been counted already
+    """
+    run = next(
+        filter(
+            lambda run_iter_: run_iter_.is_key_under_s3_prefix(bucket, key),
+            sync_tracker.get_runs(get_candidate_portal_run_ids(key))
+        ),
+        None
+    )
+
+    if run is None:
+        return None
+
+    run = sync_tracker.add_synced_key(run, key)
+
+    if run is None:
+        return None
+
+    resume_if_complete(sync_tracker, run)
+
+    return run
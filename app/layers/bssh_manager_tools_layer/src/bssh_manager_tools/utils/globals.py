@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+
+"""
+ICAv2 constants, as in wrapica.utils.globals
+
+Importing anything from wrapica imports all of wrapica and the libica models,
+so the constants we need at module level are kept here,
+and wrapica is only imported by the functions that call it.
+"""
+
+FILE_DATA_TYPE = "FILE"
+FOLDER_DATA_TYPE = "FOLDER"
+
+ICAV2_URI_SCHEME = "icav2"
+
+DEFAULT_ICAV2_BASE_URL = "https://ica.illumina.com/ica/rest"
+
+LIBICAV2_DEFAULT_PAGE_SIZE = 1000
@@ -2,40 +2,33 @@
 
 """
 Get the output objects from the analysis id
+
+wrapica is imported on first use, so that importing this module does not import it.
 """
 
 # Standard libraries
-from typing import List, Tuple
+import typing
+from functools import cached_property
+from typing import Iterator, List, Union
 from pathlib import Path
 
-# UMCCR Libraries
-from wrapica.libica_models import (
-    AnalysisInput,
-    ProjectData
-)
-from wrapica.project_data import (
-    find_project_data_bulk,
-    get_project_data_obj_by_id,
-    get_project_data_folder_id_from_project_id_and_path,
-    list_project_data_non_recursively
-)
-from wrapica.project_analysis import (
-    get_analysis_input_object_from_analysis_input_code,
-    get_analysis_output_object_from_analysis_output_code
-)
-from wrapica.utils.globals import FILE_DATA_TYPE
-
 # Local libraries
+from .globals import FILE_DATA_TYPE
+from .icav2_listing_helpers import iter_project_data_bulk
 from .logger import get_logger
 
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from wrapica.libica_models import AnalysisInput, ProjectData
+
 
 # Set logger
-logger = get_logger()
+logger = get_logger(__name__)
 
 
 def get_interop_files_from_run_folder(
-    run_folder_obj: ProjectData,
-) -> List[ProjectData]:
+    run_folder_obj: 'ProjectData',
+) -> List['ProjectData']:
     """
     Get the interop files from the run folder
 
@@ -43,6 +36,10 @@ def get_interop_files_from_run_folder(
 
     :return:
     """
+    from wrapica.project_data import (
+        get_project_data_folder_id_from_project_id_and_path,
+        list_project_data_non_recursively
+    )
 
     # Get the interop directory ID
     interop_directory_id = get_project_data_folder_id_from_project_id_and_path(
@@ -63,12 +60,14 @@ def get_interop_files_from_run_folder(
     )
 
 
-def get_run_folder_obj_from_analysis_id(project_id: str, analysis_id: str) -> ProjectData:
+def get_run_folder_obj_from_analysis_id(project_id: str, analysis_id: str) -> 'ProjectData':
     """
     Query the outputs object from analysis id
     """
+    from wrapica.project_analysis import get_analysis_input_object_from_analysis_input_code
+    from wrapica.project_data import get_project_data_obj_by_id
 
-    run_folder_input: AnalysisInput = get_analysis_input_object_from_analysis_input_code(
+    run_folder_input: 'AnalysisInput' = get_analysis_input_object_from_analysis_input_code(
         project_id,
         analysis_id,
         "run_folder"
@@ -81,10 +80,53 @@ def get_run_folder_obj_from_analysis_id(project_id: str, analysis_id: str) -> Pr
     return get_project_data_obj_by_id(project_id, run_folder_id)
 
 
+class BclconvertOutputs:
+    """
+    A lazy handle on the outputs of a BCLConvert analysis
+
+    The output folder id is available immediately,
+    the output folder object is only fetched when first needed,
+    and the files underneath the output folder are only listed (page by page) when iterated over.
+    """
+
+    def __init__(self, project_id: str, output_folder_id: str):
+        self.project_id = project_id
+        self.output_folder_id = output_folder_id
+
+    @cached_property
+    def output_folder_obj(self) -> 'ProjectData':
+        from wrapica.project_data import get_project_data_obj_by_id
+
+        return get_project_data_obj_by_id(
+            project_id=self.project_id,
+            data_id=self.output_folder_id
+        )
+
+    def iter_files(self, relative_folder_path: Union[Path, str] = "") -> Iterator['ProjectData']:
+        """
+        Lazily list all files recursively underneath the output folder, or a subfolder of the output folder
+        :param relative_folder_path: The subfolder to list, relative to the output folder, i.e. 'output/Samples'
+        :return:
+        """
+        return iter_project_data_bulk(
+            project_id=self.project_id,
+            parent_folder_path=Path(self.output_folder_obj.data.details.path) / relative_folder_path,
+            data_type=FILE_DATA_TYPE
+        )
+
+    def __iter__(self) -> Iterator['ProjectData']:
+        return self.iter_files()
+
+
 def get_bclconvert_outputs_from_analysis_id(
     project_id: str,
     analysis_id: str
-) -> Tuple[str, List[ProjectData]]:
+) -> BclconvertOutputs:
+    """
+    Get a lazy handle on the outputs of the bclconvert analysis.
+    Only the output folder id is collected here, files are listed when the handle is iterated over.
+    """
+    from wrapica.project_analysis import get_analysis_output_object_from_analysis_output_code
 
     # Get output folder id
     bclconvert_output_folder_id = (
@@ -95,9 +137,7 @@ def get_bclconvert_outputs_from_analysis_id(
         ).data[0].data_id
     )
 
-    # Return all files recursively
-    return bclconvert_output_folder_id, find_project_data_bulk(
+    return BclconvertOutputs(
         project_id=project_id,
-        parent_folder_id=bclconvert_output_folder_id,
-        data_type=FILE_DATA_TYPE
+        output_folder_id=bclconvert_output_folder_id
     )
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+"""
+Cache the ICAv2 access token for the life of a warm lambda container
+
+icav2_tools.set_icav2_env_vars fetches the access token from Secrets Manager on every call.
+Here the token is held at module level, and only fetched again once it is within
+a refresh margin of the expiry time in its JWT 'exp' claim.
+
+The cache is guarded by a lock, so concurrent callers (i.e. threads of a concurrent listing)
+trigger at most one fetch between them.
+
+The secret is read through a SecretsBackend, the default reads from Secrets Manager,
+LocalSecretsBackend can be swapped in with set_secrets_backend for tests and benchmarks.
+"""
+
+# Standard libraries
+import base64
+import json
+import sys
+import typing
+from abc import ABC, abstractmethod
+from os import environ
+from threading import Lock
+from time import time
+from typing import Dict, Optional
+
+# Local libraries
+from .globals import DEFAULT_ICAV2_BASE_URL
+from .logger import get_logger
+from .metrics_helpers import instrument_call
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_secretsmanager import SecretsManagerClient
+
+# Globals
+ICAV2_ACCESS_TOKEN_SECRET_ID_ENV_VAR = "ICAV2_ACCESS_TOKEN_SECRET_ID"
+ICAV2_ACCESS_TOKEN_ENV_VAR = "ICAV2_ACCESS_TOKEN"
+ICAV2_BASE_URL_ENV_VAR = "ICAV2_BASE_URL"
+
+# Fetch a new token once the current one is this close to expiring
+REFRESH_MARGIN_SECONDS = 300
+
+# Set logger
+logger = get_logger(__name__)
+
+
+class SecretsBackend(ABC):
+    """
+    Somewhere to read secrets from
+    """
+
+    @abstractmethod
+    def get_secret_value(self, secret_id: str) -> str:
+        raise NotImplementedError
+
+
+class SecretsManagerBackend(SecretsBackend):
+    """
+    Read secrets from AWS Secrets Manager
+    """
+
+    def __init__(self):
+        self._secretsmanager_client: Optional['SecretsManagerClient'] = None
+
+    @property
+    def secretsmanager_client(self) -> 'SecretsManagerClient':
+        if self._secretsmanager_client is None:
+            import boto3
+            self._secretsmanager_client = boto3.client("secretsmanager")
+        return self._secretsmanager_client
+
+    @instrument_call("secretsmanager_get_secret_value")
+    def get_secret_value(self, secret_id: str) -> str:
+        return self.secretsmanager_client.get_secret_value(SecretId=secret_id)["SecretString"]
+
+
+class LocalSecretsBackend(SecretsBackend):
+    """
+    Read secrets from a dictionary, counting each read
+    """
+
+    def __init__(self, secrets: Dict[str, str]):
+        self.secrets = secrets
+        self.get_secret_value_count = 0
+
+    def get_secret_value(self, secret_id: str) -> str:
+        self.get_secret_value_count += 1
+        if secret_id not in self.secrets:
+            raise KeyError(f"Secret {secret_id} not found")
+        return self.secrets[secret_id]
+
+
+# Module level cache, lives for the life of the lambda container
+_SECRETS_BACKEND: Optional[SecretsBackend] = None
+_ACCESS_TOKEN: Optional[str] = None
+_ACCESS_TOKEN_EXPIRY_EPOCH: Optional[float] = None
+_ACCESS_TOKEN_LOCK = Lock()
+
+
+def set_secrets_backend(secrets_backend: Optional[SecretsBackend]):
+    """
+    Set the secrets backend, and clear any cached token
+    :param secrets_backend: The secrets backend, None to use Secrets Manager
+    :return:
+    """
+    global _SECRETS_BACKEND
+
+    with _ACCESS_TOKEN_LOCK:
+        _SECRETS_BACKEND = secrets_backend
+        _clear_cached_access_token()
+
+
+def get_secrets_backend() -> SecretsBackend:
+    global _SECRETS_BACKEND
+
+    if _SECRETS_BACKEND is None:
+        _SECRETS_BACKEND = SecretsManagerBackend()
+
+    return _SECRETS_BACKEND
+
+
+def _clear_cached_access_token():
+    global _ACCESS_TOKEN, _ACCESS_TOKEN_EXPIRY_EPOCH
+
+    _ACCESS_TOKEN = None
+    _ACCESS_TOKEN_EXPIRY_EPOCH = None
+
+
+def get_jwt_expiry_epoch(jwt_token: str) -> Optional[float]:
+    """
+    Get the 'exp' claim of a JWT without verifying its signature
+    :param jwt_token: The jwt token in base64url format
+    :return: The expiry time in seconds since the epoch, or None if the token has no readable 'exp' claim
+    """
+    try:
+        payload_b64 = jwt_token.split(".")[1]
+        payload = json.loads(base64.urlsafe_b64decode(payload_b64 + "=" * (-len(payload_b64) % 4)))
+    except (IndexError, ValueError):
+        logger.warning("Could not decode the ICAv2 access token, it will not be cached")
+        return None
+
+    expiry_epoch = payload.get("exp")
+
+    if not isinstance(expiry_epoch, (int, float)):
+        return None
+
+    return float(expiry_epoch)
+
+
+def get_cached_icav2_access_token(refresh_margin_seconds: int = REFRESH_MARGIN_SECONDS) -> str:
+    """
+    Get the ICAv2 access token, only going to the secrets backend if we have no token
+    or our token is about to expire
+    :param refresh_margin_seconds: Fetch a new token once the current one is this close to expiring
+    :return:
+    """
+    global _ACCESS_TOKEN, _ACCESS_TOKEN_EXPIRY_EPOCH
+
+    with _ACCESS_TOKEN_LOCK:
+        if (
+            _ACCESS_TOKEN is not None and
+            _ACCESS_TOKEN_EXPIRY_EPOCH is not None and
+            time() < _ACCESS_TOKEN_EXPIRY_EPOCH - refresh_margin_seconds
+        ):
+            return _ACCESS_TOKEN
+
+        logger.info("Fetching the ICAv2 access token")
+        _ACCESS_TOKEN = get_secrets_backend().get_secret_value(environ[ICAV2_ACCESS_TOKEN_SECRET_ID_ENV_VAR])
+        _ACCESS_TOKEN_EXPIRY_EPOCH = get_jwt_expiry_epoch(_ACCESS_TOKEN)
+
+        return _ACCESS_TOKEN
+
+
+def set_cached_icav2_env_vars():
+    """
+    A drop-in replacement for icav2_tools.set_icav2_env_vars that uses the cached access token
+
+    If the token has changed, wrapica's cached configuration is cleared so that it picks up the new token.
+    wrapica is not imported here, if it has not been imported yet there is no cached configuration to clear.
+    :return:
+    """
+    access_token = get_cached_icav2_access_token()
+
+    if environ.get(ICAV2_ACCESS_TOKEN_ENV_VAR) != access_token:
+        environ[ICAV2_ACCESS_TOKEN_ENV_VAR] = access_token
+        wrapica_configuration = sys.modules.get("wrapica.utils.configuration")
+        if wrapica_configuration is not None:
+            wrapica_configuration.ICAV2_CONFIGURATION = None
+
+    if ICAV2_BASE_URL_ENV_VAR not in environ:
+        environ[ICAV2_BASE_URL_ENV_VAR] = DEFAULT_ICAV2_BASE_URL
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+"""
+Stream project data listings from ICAv2
+
+wrapica's find_project_data_bulk collects every page of a recursive listing into a single list
+of ProjectData objects before returning.
+For large run folders we instead yield the listing page by page,
+and project each ProjectData object down to a compact ListingRecord
+so that the pydantic objects of a page can be garbage collected as soon as the page has been consumed.
+
+Folders with many subfolders (such as the per-sample subfolders of Samples/)
+can also be listed concurrently, one subfolder per worker.
+
+libica and wrapica are imported on first use, so that importing this module does not import them.
+"""
+
+# Standard libraries
+import typing
+from pathlib import Path
+from functools import partial
+from typing import Iterable, Iterator, List, Optional, Union
+
+# Local libraries
+from .concurrency_helpers import iter_concurrently_in_order
+from .globals import FILE_DATA_TYPE, FOLDER_DATA_TYPE, LIBICAV2_DEFAULT_PAGE_SIZE
+from .listing_diff_helpers import ListingRecord, listing_record_sort_key
+from .logger import get_logger
+from .metrics_helpers import CallMetrics, record_call
+from .retry_helpers import call_with_retries
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from wrapica.libica_models import ProjectData
+    from wrapica.literals import DataType
+
+# Globals
+# Files placed by ICAv2 to test write access to a folder
+IGNORED_FILE_NAMES = (
+    ".iap_upload_test.tmp",
+    ".iap_xaccount_test.tmp",
+)
+
+# Set logger
+logger = get_logger(__name__)
+
+
+def iter_project_data_pages(
+    project_id: str,
+    parent_folder_path: Union[Path, str],
+    data_type: 'DataType' = FILE_DATA_TYPE,
+) -> Iterator[List['ProjectData']]:
+    """
+    Recursively list all data under a folder, yielding one page of results at a time.
+
+    Uses the same bulk (file path prefix) query as wrapica's find_project_data_bulk,
+    but the next page is only requested once the caller has consumed the current one.
+
+    :param project_id: The project id to list
+    :param parent_folder_path: The path to the parent folder
+    :param data_type: The data type to list, one of FILE or FOLDER
+    :return: An iterator over pages of project data objects
+    """
+    from libica.openapi.v3 import ApiClient, ApiException
+    from libica.openapi.v3.api.project_data_api import ProjectDataApi
+    from wrapica.utils.configuration import get_icav2_configuration
+
+    # Get the parent folder path as a string, with a trailing slash
+    parent_folder_path_str = str(parent_folder_path).rstrip("/") + "/"
+
+    # Collect api instance
+    with ApiClient(get_icav2_configuration()) as api_client:
+        api_instance = ProjectDataApi(api_client)
+
+    page_token = ""
+
+    # Only the time spent waiting on ICAv2 is recorded, not the time the caller spends on each page
+    call_metrics = CallMetrics("get_project_data_list")
+
+    # Iterate over all pages
+    try:
+        while True:
+            try:
+                # A throttled or failed page is retried, the retries are recorded on the call metrics
+                with call_metrics.time_request():
+                    api_response = call_with_retries(
+                        partial(
+                            api_instance.get_project_data_list,
+                            project_id=str(project_id),
+                            file_path=[parent_folder_path_str],
+                            file_path_match_mode="STARTS_WITH_CASE_INSENSITIVE",
+                            page_size=str(LIBICAV2_DEFAULT_PAGE_SIZE),
+                            page_token=page_token,
+                            type=data_type
+                        ),
+                        call_metrics=call_metrics
+                    )
+            except ApiException as e:
+                logger.error("Exception when calling ProjectDataApi->get_project_data_list: %s", e)
+                raise
+
+            call_metrics.add_page(len(api_response.items))
+
+            yield api_response.items
+
+            # Check if there is a next page
+            page_token = api_response.next_page_token
+            if page_token is None or page_token == "":
+                break
+    finally:
+        call_metrics.emit()
+
+
+def iter_project_data_bulk(
+    project_id: str,
+    parent_folder_path: Union[Path, str],
+    data_type: 'DataType' = FILE_DATA_TYPE,
+) -> Iterator['ProjectData']:
+    """
+    Recursively list all data under a folder, one project data object at a time.
+
+    :param project_id: The project id to list
+    :param parent_folder_path: The path to the parent folder
+    :param data_type: The data type to list, one of FILE or FOLDER
+    :return: An iterator over project data objects
+    """
+    for project_data_page in iter_project_data_pages(
+        project_id=project_id,
+        parent_folder_path=parent_folder_path,
+        data_type=data_type
+    ):
+        yield from project_data_page
+
+
+def project_data_to_listing_record(
+    project_data_obj: 'ProjectData',
+    parent_folder_path: Union[Path, str],
+) -> ListingRecord:
+    """
+    Project a project data object down to a listing record, relative to the parent folder path
+
+    :param project_data_obj: The project data object
+    :param parent_folder_path: The folder to which the relative path is computed
+    :return: The listing record
+    """
+    return ListingRecord(
+        relative_path=str(
+            Path(project_data_obj.data.details.path).relative_to(Path(parent_folder_path))
+        ),
+        file_size_in_bytes=project_data_obj.data.details.file_size_in_bytes,
+        object_e_tag=project_data_obj.data.details.object_e_tag,
+        data_id=project_data_obj.data.id,
+    )
+
+
+def iter_listing_records(
+    project_data_iter: Iterable['ProjectData'],
+    parent_folder_path: Union[Path, str],
+    ignored_file_names: Iterable[str] = IGNORED_FILE_NAMES,
+) -> Iterator[ListingRecord]:
+    """
+    Project a stream of project data objects down to listing records, dropping any ignored files
+
+    :param project_data_iter: The project data objects
+    :param parent_folder_path: The folder to which relative paths are computed
+    :param ignored_file_names: File names to skip
+    :return: An iterator over listing records
+    """
+    ignored_file_names = frozenset(ignored_file_names)
+
+    for project_data_obj in project_data_iter:
+        if project_data_obj.data.details.name in ignored_file_names:
+            continue
+        yield project_data_to_listing_record(project_data_obj, parent_folder_path)
+
+
+def iter_folder_listing_records(
+    folder_obj: 'ProjectData',
+    ignored_file_names: Iterable[str] = IGNORED_FILE_NAMES,
+) -> Iterator[ListingRecord]:
+    """
+    Stream the listing records of all files under a folder, relative to the folder itself
+
+    :param folder_obj: The folder project data object
+    :param ignored_file_names: File names to skip
+    :return: An iterator over listing records
+    """
+    return iter_listing_records(
+        iter_project_data_bulk(
+            project_id=folder_obj.project_id,
+            parent_folder_path=folder_obj.data.details.path,
+            data_type=FILE_DATA_TYPE
+        ),
+        parent_folder_path=folder_obj.data.details.path,
+        ignored_file_names=ignored_file_names
+    )
+
+
+def list_subfolder_listing_records(
+    project_id: str,
+    subfolder_path: Union[Path, str],
+    parent_folder_path: Union[Path, str],
+    ignored_file_names: Iterable[str] = IGNORED_FILE_NAMES,
+) -> List[ListingRecord]:
+    """
+    List all files under a subfolder as listing records, relative to the parent folder
+
+    :param project_id: The project id
+    :param subfolder_path: The subfolder to list recursively
+    :param parent_folder_path: The folder to which relative paths are computed
+    :param ignored_file_names: File names to skip
+    :return: The listing records, sorted by relative path
+    """
+    return sorted(
+        iter_listing_records(
+            iter_project_data_bulk(
+                project_id=project_id,
+                parent_folder_path=subfolder_path,
+                data_type=FILE_DATA_TYPE
+            ),
+            parent_folder_path=parent_folder_path,
+            ignored_file_names=ignored_file_names
+        ),
+        key=listing_record_sort_key
+    )
+
+
+def iter_folder_listing_records_concurrently(
+    folder_obj: 'ProjectData',
+    ignored_file_names: Iterable[str] = IGNORED_FILE_NAMES,
+    max_workers: Optional[int] = None,
+) -> Iterator[ListingRecord]:
+    """
+    Stream the listing records of all files under a folder,
+    fanning out the recursive listing across the immediate subfolders of the folder.
+
+    Files directly under the folder are yielded first, then the files of each subfolder,
+    subfolders sorted by name.
+    Since two copies of the same folder are yielded in the same order,
+    the streaming diff only ever holds a handful of subfolders worth of records in memory.
+
+    :param folder_obj: The folder project data object
+    :param ignored_file_names: File names to skip
+    :param max_workers: The maximum number of subfolders to list at once
+    :return: An iterator over listing records
+    """
+    from wrapica.project_data import list_project_data_non_recursively
+
+    # List the top level of the folder
+    with record_call("list_project_data_non_recursively") as call_metrics:
+        top_level_data_list = list_project_data_non_recursively(
+            project_id=folder_obj.project_id,
+            parent_folder_id=folder_obj.data.id,
+        )
+        call_metrics.add_page(len(top_level_data_list))
+
+    # Files directly under the folder
+    yield from sorted(
+        iter_listing_records(
+            filter(
+                lambda data_iter_: data_iter_.data.details.data_type == FILE_DATA_TYPE,
+                top_level_data_list
+            ),
+            parent_folder_path=folder_obj.data.details.path,
+            ignored_file_names=ignored_file_names
+        ),
+        key=listing_record_sort_key
+    )
+
+    # Subfolders, one worker per subfolder
+    subfolder_paths = sorted(
+        map(
+            lambda data_iter_: data_iter_.data.details.path,
+            filter(
+                lambda data_iter_: data_iter_.data.details.data_type == FOLDER_DATA_TYPE,
+                top_level_data_list
+            )
+        )
+    )
+
+    for subfolder_records in iter_concurrently_in_order(
+        map(
+            lambda subfolder_path_iter_: partial(
+                list_subfolder_listing_records,
+                project_id=folder_obj.project_id,
+                subfolder_path=subfolder_path_iter_,
+                parent_folder_path=folder_obj.data.details.path,
+                ignored_file_names=ignored_file_names,
+            ),
+            subfolder_paths
+        ),
+        max_workers=max_workers
+    ):
+        yield from subfolder_records
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+"""
+Compare a source and destination listing keyed on relative path
+
+Both listings are consumed as streams, one record from each side at a time.
+A record is only held in memory until its counterpart turns up on the other side,
+so when both listings arrive in a similar order (as two bulk listings of copies of the same folder do)
+the number of records held at any one time stays small, regardless of the size of the folder.
+
+Every missing, extra, size-mismatched and e-tag-mismatched file is reported in a single pass.
+
+A relative path listed more than once on a side (i.e. a record repeated across two pages of a listing)
+is matched one to one with the records of that path on the other side, in the order they arrive,
+so a path listed twice in the source and once in the destination is reported as missing once.
+"""
+
+# Standard libraries
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Globals
+# Number of files to list per category when summarising a diff
+DEFAULT_MAX_LISTED_PER_CATEGORY = 20
+
+SOURCE_SIDE = 0
+DESTINATION_SIDE = 1
+
+
+class ListingRecord(NamedTuple):
+    """
+    The attributes of a data object we need to compare two listings
+    """
+    relative_path: str
+    file_size_in_bytes: Optional[int]
+    object_e_tag: Optional[str]
+    data_id: str
+
+
+def listing_record_sort_key(listing_record: ListingRecord) -> Tuple[bool, str]:
+    """
+    The order in which listing records of a folder are produced:
+    files directly under the folder first, then the files of each subfolder, subfolders in name order.
+
+    Producing both sides of a diff in this order keeps the diff's pending records to a minimum.
+    """
+    return "/" in listing_record.relative_path, listing_record.relative_path
+
+
+@dataclass
+class ListingDiff:
+    """
+    The differences between a source and a destination listing
+    """
+    # Relative paths present in the source but not in the destination
+    missing: List[str] = field(default_factory=list)
+    # Relative paths present in the destination but not in the source
+    extra: List[str] = field(default_factory=list)
+    # (relative path, source size, destination size)
+    size_mismatched: List[Tuple[str, Optional[int], Optional[int]]] = field(default_factory=list)
+    # (relative path, source e-tag, destination e-tag)
+    e_tag_mismatched: List[Tuple[str, Optional[str], Optional[str]]] = field(default_factory=list)
+
+    # Counts
+    source_count: int = 0
+    destination_count: int = 0
+    matched_count: int = 0
+
+    # The largest number of unmatched records held in memory at any one time
+    peak_pending_count: int = 0
+
+    def has_missing_extra_or_size_mismatches(self) -> bool:
+        return bool(self.missing or self.extra or self.size_mismatched)
+
+    def has_differences(self) -> bool:
+        return self.has_missing_extra_or_size_mismatches() or bool(self.e_tag_mismatched)
+
+    def summary(self, max_listed_per_category: int = DEFAULT_MAX_LISTED_PER_CATEGORY) -> str:
+        """
+        Summarise the differences in a human-readable form
+        :param max_listed_per_category: The number of files to list for each category
+        :return:
+        """
+        summary_lines = [
+            f"Source files: {self.source_count}, Destination files: {self.destination_count}, "
+            f"Matched: {self.matched_count}, Missing: {len(self.missing)}, Extra: {len(self.extra)}, "
+            f"Size mismatches: {len(self.size_mismatched)}, E-tag mismatches: {len(self.e_tag_mismatched)}"
+        ]
+
+        for category_name, category_items in (
+            ("Missing from destination", self.missing),
+            ("Extra in destination", self.extra),
+            ("Size mismatches (path, source, destination)", self.size_mismatched),
+            ("E-tag mismatches (path, source, destination)", self.e_tag_mismatched),
+        ):
+            if not category_items:
+                continue
+            summary_lines.append(f"{category_name}:")
+            summary_lines.extend(
+                map(
+                    lambda item_iter: f"  {item_iter}",
+                    category_items[:max_listed_per_category]
+                )
+            )
+            if len(category_items) > max_listed_per_category:
+                summary_lines.append(f"  ... and {len(category_items) - max_listed_per_category} more")
+
+        return "\n".join(summary_lines)
+
+
+def _interleave(
+    source_records: Iterable[ListingRecord],
+    destination_records: Iterable[ListingRecord],
+) -> Iterator[Tuple[int, ListingRecord]]:
+    """
+    Alternate between the two listings, yielding (side, record) pairs until both are exhausted
+    """
+    iterators = {
+        SOURCE_SIDE: iter(source_records),
+        DESTINATION_SIDE: iter(destination_records),
+    }
+
+    while iterators:
+        for side in list(iterators.keys()):
+            try:
+                yield side, next(iterators[side])
+            except StopIteration:
+                del iterators[side]
+
+
+def _get_pending_relative_paths(side_pending: Dict[str, List[ListingRecord]]) -> List[str]:
+    """
+    The sorted relative paths of the unmatched records of one side, a path once per unmatched record
+    """
+    return sorted(chain.from_iterable(map(
+        lambda side_pending_iter_: [side_pending_iter_[0]] * len(side_pending_iter_[1]),
+        side_pending.items()
+    )))
+
+
+def diff_listing_records(
+    source_records: Iterable[ListingRecord],
+    destination_records: Iterable[ListingRecord],
+) -> ListingDiff:
+    """
+    Compare two streams of listing records keyed on relative path
+
+    :param source_records: The source listing, in any order
+    :param destination_records: The destination listing, in any order
+    :return: The differences between the two listings
+    """
+    listing_diff = ListingDiff()
+
+    # Records seen on one side that have not yet been seen on the other side,
+    # a list per relative path in case a path is listed more than once
+    pending: Dict[int, Dict[str, List[ListingRecord]]] = {
+        SOURCE_SIDE: {},
+        DESTINATION_SIDE: {},
+    }
+    pending_count = 0
+
+    for side, record in _interleave(source_records, destination_records):
+        if side == SOURCE_SIDE:
+            listing_diff.source_count += 1
+        else:
+            listing_diff.destination_count += 1
+
+        other_side_pending = pending[DESTINATION_SIDE if side == SOURCE_SIDE else SOURCE_SIDE]
+        counterparts = other_side_pending.get(record.relative_path)
+
+        # Hold onto the record until its counterpart turns up
+        if counterparts is None:
+            pending[side].setdefault(record.relative_path, []).append(record)
+            pending_count += 1
+            listing_diff.peak_pending_count = max(listing_diff.peak_pending_count, pending_count)
+            continue
+
+        counterpart = counterparts.pop(0)
+        if not counterparts:
+            del other_side_pending[record.relative_path]
+        pending_count -= 1
+
+        source_record, destination_record = (
+            (record, counterpart) if side == SOURCE_SIDE else (counterpart, record)
+        )
+
+        listing_diff.matched_count += 1
+
+        # Compare the two records
+        if source_record.file_size_in_bytes != destination_record.file_size_in_bytes:
+            listing_diff.size_mismatched.append(
+                (
+                    source_record.relative_path,
+                    source_record.file_size_in_bytes,
+                    destination_record.file_size_in_bytes
+                )
+            )
+        elif source_record.object_e_tag != destination_record.object_e_tag:
+            listing_diff.e_tag_mismatched.append(
+                (
+                    source_record.relative_path,
+                    source_record.object_e_tag,
+                    destination_record.object_e_tag
+                )
+            )
+
+    # Anything left over never found its counterpart
+    listing_diff.missing = _get_pending_relative_paths(pending[SOURCE_SIDE])
+    listing_diff.extra = _get_pending_relative_paths(pending[DESTINATION_SIDE])
+
+    return listing_diff
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+Snapshots of a source folder listing
+
+The manifest step already lists the BCLConvert output in full.
+We save a compact snapshot of that listing (relative path, size, e-tag and data id for each file)
+to the store, keyed on the folder uri, so that the validation step can read it back
+instead of listing the same source folder again.
+
+Snapshots are gzipped json lines, one [relative_path, file_size_in_bytes, object_e_tag, data_id] array per file,
+written in listing record order (see listing_record_sort_key).
+"""
+
+# Standard libraries
+import gzip
+import json
+from hashlib import sha256
+from io import BytesIO, TextIOWrapper
+from typing import Iterable, Iterator, Optional
+
+# Local libraries
+from .listing_diff_helpers import ListingRecord, listing_record_sort_key
+from .logger import get_logger
+from .store_helpers import Store
+
+# Globals
+LISTING_SNAPSHOTS_PREFIX = "listing-snapshots"
+
+# Set logger
+logger = get_logger(__name__)
+
+
+def get_listing_snapshot_key(folder_uri: str) -> str:
+    """
+    Get the store key for the snapshot of a folder uri
+    :param folder_uri:
+    :return:
+    """
+    folder_uri = folder_uri.rstrip("/") + "/"
+    return f"{LISTING_SNAPSHOTS_PREFIX}/{sha256(folder_uri.encode()).hexdigest()}.jsonl.gz"
+
+
+def write_listing_snapshot(
+    store: Store,
+    folder_uri: str,
+    listing_records: Iterable[ListingRecord],
+) -> int:
+    """
+    Write the listing snapshot of a folder to the store
+
+    :param store: The store to write to
+    :param folder_uri: The uri of the folder the listing records are relative to
+    :param listing_records: The listing records of every file under the folder
+    :return: The number of records written
+    """
+    snapshot_bytes = BytesIO()
+    num_records = 0
+
+    with gzip.GzipFile(fileobj=snapshot_bytes, mode="wb") as gzip_h, TextIOWrapper(gzip_h, encoding="utf-8") as text_h:
+        for listing_record in sorted(listing_records, key=listing_record_sort_key):
+            text_h.write(json.dumps(list(listing_record), separators=(",", ":")) + "\n")
+            num_records += 1
+
+    snapshot_key = get_listing_snapshot_key(folder_uri)
+    store.put_bytes(snapshot_key, snapshot_bytes.getvalue())
+
+    logger.info(
+        "Wrote listing snapshot of %s files for %s to %s",
+        num_records, folder_uri, store.get_uri(snapshot_key)
+    )
+
+    return num_records
+
+
+def read_listing_snapshot(
+    store: Store,
+    folder_uri: str,
+) -> Optional[Iterator[ListingRecord]]:
+    """
+    Read the listing snapshot of a folder from the store
+
+    :param store: The store to read from
+    :param folder_uri: The folder uri
+    :return: An iterator over the listing records, or None if there is no snapshot for this folder
+    """
+    snapshot_key = get_listing_snapshot_key(folder_uri)
+    snapshot_bytes = store.get_bytes(snapshot_key)
+
+    if snapshot_bytes is None:
+        return None
+
+    logger.info("Reading listing snapshot for %s from %s", folder_uri, store.get_uri(snapshot_key))
+
+    def _iter_records() -> Iterator[ListingRecord]:
+        with gzip.GzipFile(fileobj=BytesIO(snapshot_bytes), mode="rb") as gzip_h:
+            for line in TextIOWrapper(gzip_h, encoding="utf-8"):
+                yield ListingRecord(*json.loads(line))
+
+    return _iter_records()
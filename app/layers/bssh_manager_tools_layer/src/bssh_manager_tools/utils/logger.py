@@ -1,64 +1,145 @@
 #!/usr/bin/env python3
 
 """
-Collect logger through verboselogs package
+Collect loggers and install log handlers
+
+Loggers are looked up by name and cached, the calling function and line number
+are already recorded on each log record by the logging module, so we never need to inspect the stack.
+
+Handlers installed by this module are tagged, so calling set_basic_logger or set_logger again
+(i.e. on every invocation of a warm lambda container) does not add another handler.
+
+Log records are written as one JSON object per line,
+the message is only formatted (and the JSON only serialised) if the record passes the log level.
+Set the BSSH_MANAGER_LOG_FORMAT env var to 'text' to use the plain LOGGER_STYLE format instead.
 """
 
-# External imports
-import verboselogs
+# Standard imports
+import json
 import logging
-import inspect
+import sys
+from datetime import datetime, timezone
+from functools import lru_cache
+from os import environ
+from typing import Dict, Optional
 
 # Globals
 LOGGER_STYLE = "%(asctime)s - %(levelname)-8s - %(module)-25s - %(funcName)-40s : LineNo. %(lineno)-4d - %(message)s"
 
-# Set logger
-logger = verboselogs.VerboseLogger(__name__)
-logger.addHandler(logging.StreamHandler())
+LOG_FORMAT_ENV_VAR = "BSSH_MANAGER_LOG_FORMAT"
+JSON_LOG_FORMAT = "json"
+TEXT_LOG_FORMAT = "text"
+DEFAULT_LOG_FORMAT = JSON_LOG_FORMAT
+
+# The logger returned by get_logger when no name is given
+DEFAULT_LOGGER_NAME = "bssh_manager_tools"
+
+# Set on the handlers we install, so we can tell them apart from handlers installed by the lambda runtime
+HANDLER_TAG_ATTR = "_bssh_manager_tools_handler"
 
+# Attributes of every log record, anything else on a record was passed in through 'extra'
+LOG_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({})).keys()) | {"message", "asctime"}
 
-def get_caller_function():
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format each log record as a single line JSON object
+
+    Values passed in through 'extra' are added as top level keys
     """
-    Get the function that was used to call the previous
-    Some loggers report <module>
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_dict: Dict = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "lineNo": record.lineno,
+            "message": record.getMessage(),
+        }
+
+        for key, value in vars(record).items():
+            if key not in LOG_RECORD_ATTRS and key not in log_dict:
+                log_dict[key] = value
+
+        if record.exc_info:
+            log_dict["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(log_dict, default=str)
+
+
+def get_log_format() -> str:
+    """
+    Get the log format, can be overridden with the BSSH_MANAGER_LOG_FORMAT env var
     :return:
     """
-    # Get the inspect stack trace
-    inspect_stack = inspect.stack()
+    log_format = environ.get(LOG_FORMAT_ENV_VAR, DEFAULT_LOG_FORMAT).lower()
+
+    if log_format not in [JSON_LOG_FORMAT, TEXT_LOG_FORMAT]:
+        raise ValueError(
+            f"{LOG_FORMAT_ENV_VAR} must be one of '{JSON_LOG_FORMAT}' or '{TEXT_LOG_FORMAT}', got '{log_format}'"
+        )
+
+    return log_format
 
-    # Since we're already in a function, we need the third attribute
-    # i.e function of interest -> function that called this one -> this function
-    frame_info = inspect_stack[2]
 
-    # Required attribute is' function
-    function_id = getattr(frame_info, "function", None)
+def get_formatter() -> logging.Formatter:
+    if get_log_format() == JSON_LOG_FORMAT:
+        return JsonFormatter()
+    return logging.Formatter(LOGGER_STYLE)
 
-    if function_id is None:
-        # Don't really want to break on this just yet but code is ready to go for it.
+
+def get_caller_function() -> Optional[str]:
+    """
+    Get the name of the function that called the function calling this one
+    :return:
+    """
+    # Frame 0 is this function, frame 1 the function calling this one, frame 2 its caller
+    try:
+        return sys._getframe(2).f_code.co_name
+    except ValueError:
         return None
-    else:
-        return function_id
+
+
+def install_handler(logger: logging.Logger, log_level: int = logging.INFO) -> logging.Handler:
+    """
+    Add a console handler to the logger, unless we have already added one,
+    in which case its level and formatter are updated
+    :param logger:
+    :param log_level: The level of the console handler
+    :return: The console handler
+    """
+    console_handler = next(
+        filter(
+            lambda handler_iter_: getattr(handler_iter_, HANDLER_TAG_ATTR, False),
+            logger.handlers
+        ),
+        None
+    )
+
+    if console_handler is None:
+        console_handler = logging.StreamHandler()
+        setattr(console_handler, HANDLER_TAG_ATTR, True)
+        logger.addHandler(console_handler)
+
+    console_handler.setLevel(log_level)
+    console_handler.setFormatter(get_formatter())
+
+    return console_handler
 
 
 def set_basic_logger():
     """
     Set the basic logger before we then take in the --deploy-env values to see where we write to
+    Safe to call more than once, the console handler is only added to the root logger the first time
     :return:
     """
     # Get a basic logger
     logger = logging.getLogger()
 
-    # Get a stderr handler
-    console = logging.StreamHandler()
-
-    # Set level
-    console.setLevel(logging.INFO)
-
-    # Set format
-    formatter = logging.Formatter(LOGGER_STYLE)
-    console.setFormatter(formatter)
-
-    logger.addHandler(console)
+    # Add a stderr handler (if we haven't already)
+    install_handler(logger, log_level=logging.INFO)
 
     return logger
 
@@ -66,36 +147,21 @@ def set_basic_logger():
 def set_logger(script_dir, script, deploy_env, log_level=logging.INFO):
     """
     Initialise a logger
+    Safe to call more than once, the console handler is only added to the root logger the first time
     :return:
     """
     new_logger = logging.getLogger()
     new_logger.setLevel(log_level)
 
-    # create a logging format
-    formatter = logging.Formatter(LOGGER_STYLE)
-
-    # create a file handler
-    #file_handler = RotatingFileHandler(filename=script_dir / "{}.{}".format(script, LOG_FILE_SUFFIX[deploy_env]),
-    #                                   maxBytes=100000000, backupCount=5)
-    ## Set Level
-    #file_handler.setLevel(log_level)
-    #file_handler.setFormatter(formatter)
-
-    # create a console handler
-    console_handler = logging.StreamHandler()
     # Hard coded as don't need too much verbosity on the console side
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-
-    # add the handlers to the logger
-    #new_logger.addHandler(file_handler)
-    new_logger.addHandler(console_handler)
+    install_handler(new_logger, log_level=logging.INFO)
 
 
-def get_logger():
+@lru_cache(maxsize=None)
+def get_logger(name: Optional[str] = None) -> logging.Logger:
     """
-    Return logger object
+    Return logger object, cached by name
+    :param name: The logger name, usually the __name__ of the calling module
     :return:
     """
-    function_that_called_this_one = get_caller_function()
-    return logging.getLogger(function_that_called_this_one)
+    return logging.getLogger(name if name is not None else DEFAULT_LOGGER_NAME)
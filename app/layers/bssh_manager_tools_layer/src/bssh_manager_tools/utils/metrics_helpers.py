@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+"""
+Record the latency of our external calls (ICAv2, filemanager, Secrets Manager)
+and emit them as CloudWatch Embedded Metric Format (EMF) log lines
+
+Each call records:
+  * LatencyMs, the time spent waiting on the external service (not the time the caller spent consuming pages)
+  * PageCount and ItemCount, for paginated listings
+  * RetryCount, the number of requests retried after a transient error (see retry_helpers)
+  * ErrorCount, 1 if the call raised (after any retries)
+
+Metrics are published under the BSSH_MANAGER_METRICS_NAMESPACE namespace,
+with the dimensions HandlerName and CallName.
+The portalRunId is added to each line as a property rather than a dimension, so it can be searched
+with CloudWatch Logs Insights without creating a new metric per run.
+
+Handlers set the HandlerName and portalRunId with set_metrics_context at the start of each invocation.
+
+Lines are printed to stdout by default, where the lambda runtime picks them up,
+LocalMetricsSink can be swapped in with set_metrics_sink for tests and benchmarks.
+"""
+
+# Standard libraries
+import json
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import wraps
+from os import environ
+from threading import Lock
+from time import perf_counter, time
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+
+# Globals
+METRICS_NAMESPACE_ENV_VAR = "BSSH_MANAGER_METRICS_NAMESPACE"
+DEFAULT_METRICS_NAMESPACE = "OrcaBus/BsshToAwsS3Copy"
+
+HANDLER_NAME_DIMENSION = "HandlerName"
+CALL_NAME_DIMENSION = "CallName"
+PORTAL_RUN_ID_PROPERTY = "portalRunId"
+
+METRIC_UNITS = {
+    "LatencyMs": "Milliseconds",
+    "PageCount": "Count",
+    "ItemCount": "Count",
+    "RetryCount": "Count",
+    "ErrorCount": "Count",
+}
+
+T = TypeVar("T")
+
+
+class MetricsSink(ABC):
+    """
+    Somewhere to write EMF log lines to
+    """
+
+    @abstractmethod
+    def emit(self, emf_dict: Dict):
+        raise NotImplementedError
+
+
+class StdoutMetricsSink(MetricsSink):
+    """
+    Print each EMF log line to stdout, one JSON object per line
+    """
+
+    def emit(self, emf_dict: Dict):
+        print(json.dumps(emf_dict), flush=True)
+
+
+class LocalMetricsSink(MetricsSink):
+    """
+    Hold each EMF log line in memory
+    """
+
+    def __init__(self):
+        self.emf_dicts: List[Dict] = []
+        self._lock = Lock()
+
+    def emit(self, emf_dict: Dict):
+        with self._lock:
+            self.emf_dicts.append(emf_dict)
+
+    def get_metric_values(self, metric_name: str, call_name: Optional[str] = None) -> List[float]:
+        """
+        Get every value recorded for a metric, optionally for a single call name
+        :param metric_name:
+        :param call_name:
+        :return:
+        """
+        return list(map(
+            lambda emf_dict_iter_: emf_dict_iter_[metric_name],
+            filter(
+                lambda emf_dict_iter_: call_name is None or emf_dict_iter_[CALL_NAME_DIMENSION] == call_name,
+                self.emf_dicts
+            )
+        ))
+
+
+# Module level context, set once per invocation
+_METRICS_SINK: Optional[MetricsSink] = None
+_METRICS_CONTEXT: Dict[str, Optional[str]] = {
+    HANDLER_NAME_DIMENSION: None,
+    PORTAL_RUN_ID_PROPERTY: None,
+}
+
+
+def get_metrics_namespace() -> str:
+    """
+    Get the metrics namespace, can be overridden with the BSSH_MANAGER_METRICS_NAMESPACE env var
+    :return:
+    """
+    return environ.get(METRICS_NAMESPACE_ENV_VAR, DEFAULT_METRICS_NAMESPACE)
+
+
+def set_metrics_sink(metrics_sink: Optional[MetricsSink]):
+    """
+    Set the metrics sink
+    :param metrics_sink: The metrics sink, None to print to stdout
+    :return:
+    """
+    global _METRICS_SINK
+
+    _METRICS_SINK = metrics_sink
+
+
+def get_metrics_sink() -> MetricsSink:
+    global _METRICS_SINK
+
+    if _METRICS_SINK is None:
+        _METRICS_SINK = StdoutMetricsSink()
+
+    return _METRICS_SINK
+
+
+def set_metrics_context(handler_name: str, portal_run_id: Optional[str] = None):
+    """
+    Set the handler name and portal run id added to every metric emitted from here on
+    :param handler_name: The name of the lambda handler
+    :param portal_run_id: The portal run id of the workflow run being processed
+    :return:
+    """
+    _METRICS_CONTEXT[HANDLER_NAME_DIMENSION] = handler_name
+    _METRICS_CONTEXT[PORTAL_RUN_ID_PROPERTY] = portal_run_id
+
+
+class CallMetrics:
+    """
+    The metrics of a single external call, or a single paginated listing
+    """
+
+    def __init__(self, call_name: str):
+        self.call_name = call_name
+        self.latency_seconds = 0.0
+        self.page_count = 0
+        self.item_count = 0
+        self.retry_count = 0
+        self.error_count = 0
+        self._is_emitted = False
+
+    @contextmanager
+    def time_request(self) -> Iterator[None]:
+        """
+        Add the time spent in the block to the latency, and count an error if the block raises
+        :return:
+        """
+        start_time = perf_counter()
+        try:
+            yield
+        except Exception:
+            self.error_count += 1
+            raise
+        finally:
+            self.latency_seconds += perf_counter() - start_time
+
+    def add_page(self, item_count: int):
+        self.page_count += 1
+        self.item_count += item_count
+
+    def add_retry(self):
+        self.retry_count += 1
+
+    def to_emf_dict(self) -> Dict:
+        """
+        Get the metrics as an EMF log line
+        :return:
+        """
+        return {
+            "_aws": {
+                "Timestamp": int(time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": get_metrics_namespace(),
+                        "Dimensions": [[HANDLER_NAME_DIMENSION, CALL_NAME_DIMENSION]],
+                        "Metrics": list(map(
+                            lambda metric_iter_: {"Name": metric_iter_[0], "Unit": metric_iter_[1]},
+                            METRIC_UNITS.items()
+                        )),
+                    }
+                ],
+            },
+            HANDLER_NAME_DIMENSION: _METRICS_CONTEXT[HANDLER_NAME_DIMENSION] or environ.get(
+                "AWS_LAMBDA_FUNCTION_NAME", "unknown"
+            ),
+            CALL_NAME_DIMENSION: self.call_name,
+            PORTAL_RUN_ID_PROPERTY: _METRICS_CONTEXT[PORTAL_RUN_ID_PROPERTY],
+            "LatencyMs": round(self.latency_seconds * 1000, 3),
+            "PageCount": self.page_count,
+            "ItemCount": self.item_count,
+            "RetryCount": self.retry_count,
+            "ErrorCount": self.error_count,
+        }
+
+    def emit(self):
+        """
+        Write the metrics to the metrics sink, only the first call emits anything
+        :return:
+        """
+        if self._is_emitted:
+            return
+        self._is_emitted = True
+        get_metrics_sink().emit(self.to_emf_dict())
+
+
+@contextmanager
+def record_call(call_name: str) -> Iterator[CallMetrics]:
+    """
+    Time the block as a single external call, and emit its metrics when the block exits
+
+    Usage:
+        with record_call("crawl_filemanager_sync") as call_metrics:
+            crawl_filemanager_sync(...)
+
+    :param call_name: The name of the external call
+    :return:
+    """
+    call_metrics = CallMetrics(call_name)
+    try:
+        with call_metrics.time_request():
+            yield call_metrics
+    finally:
+        call_metrics.emit()
+
+
+def instrument_call(call_name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorate a function so that each call to it is recorded with record_call
+    :param call_name: The name of the external call
+    :return:
+    """
+    def _decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @wraps(func)
+        def _wrapper(*args, **kwargs) -> T:
+            with record_call(call_name):
+                return func(*args, **kwargs)
+        return _wrapper
+
+    return _decorator
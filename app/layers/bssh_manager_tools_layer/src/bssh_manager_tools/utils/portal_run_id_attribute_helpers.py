@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+
+"""
+Add the portalRunId attribute to every filemanager record under an output uri
+
+A single wildcard patch over <outputUri>/* is slow on runs with tens of thousands of objects,
+can outlast the lambda timeout, and on a retry starts again from nothing.
+Instead, the records under the prefix are listed one page at a time, and for each page
+  * records that already carry the portal run id are skipped
+  * the remaining records are patched one by one, with a bounded number of patches in flight
+  * the cursor (the next page to list, and the counts so far) is saved to the store
+
+The patching stops between pages once the lambda is running out of time,
+the step function then invokes the lambda again, and it resumes from the saved cursor.
+A transient failure of a patch (a throttled or failed request, or a dropped connection, see retry_helpers)
+is raised as a PortalRunIdPatchingTransientError, the error the step function retries on.
+The retry resumes from the saved cursor, and any records of the failed page that were patched before the failure are skipped.
+Any other error is raised as it is, and is not retried.
+Once every page has been patched the cursor is deleted, so the next pass
+(the step function patches again while it waits for the filemanager sync) picks up newly ingested records.
+
+Cursors are json, saved under a cache key (the step function execution name).
+
+Requires the orcabus api tools layer, which is imported on first use.
+"""
+
+# Standard libraries
+import json
+from dataclasses import asdict, dataclass
+from functools import partial
+from hashlib import sha256
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+# Local libraries
+from .concurrency_helpers import iter_concurrently_in_order
+from .filemanager_listing_helpers import FILEMANAGER_ROWS_PER_PAGE, iter_filemanager_record_pages
+from .logger import get_logger
+from .metrics_helpers import record_call
+from .retry_helpers import is_transient_error
+from .store_helpers import Store
+
+# Globals
+PORTAL_RUN_ID_PATCHING_CURSORS_PREFIX = "portal-run-id-patching-cursors"
+PORTAL_RUN_ID_ATTRIBUTE_PATH = "/portalRunId"
+
+# Stop once the time remaining is less than this plus twice the slowest page so far
+MIN_REMAINING_TIME_SECONDS = 5.0
+
+# Set logger
+logger = get_logger(__name__)
+
+
+class PortalRunIdPatchingTransientError(Exception):
+    """
+    A patch failed with an error that is worth retrying,
+    the step function retries the lambda on this error (by its name) and resumes from the saved cursor
+    """
+    pass
+
+
+@dataclass
+class PortalRunIdPatchingCursor:
+    """
+    How far the patching of an output uri has got
+    """
+    next_page_number: int = 1
+    patched_count: int = 0
+    skipped_count: int = 0
+    is_complete: bool = False
+
+    def to_dict(self) -> Dict:
+        return {
+            "isComplete": self.is_complete,
+            "nextPageNumber": self.next_page_number,
+            "patchedCount": self.patched_count,
+            "skippedCount": self.skipped_count,
+        }
+
+
+def get_portal_run_id_patching_cursor_key(output_uri: str, cache_key: str) -> str:
+    """
+    Get the store key for the patching cursor of an output uri
+    :param output_uri:
+    :param cache_key:
+    :return:
+    """
+    output_uri = output_uri.rstrip("/") + "/"
+    return f"{PORTAL_RUN_ID_PATCHING_CURSORS_PREFIX}/{cache_key}/{sha256(output_uri.encode()).hexdigest()}.json"
+
+
+def write_portal_run_id_patching_cursor(
+    store: Store,
+    output_uri: str,
+    cache_key: str,
+    cursor: PortalRunIdPatchingCursor,
+):
+    """
+    Write the patching cursor of an output uri to the store
+    :param store: The store to write to
+    :param output_uri: The output uri being patched
+    :param cache_key: The cache key, i.e. the step function execution name
+    :param cursor: The patching cursor
+    :return:
+    """
+    store.put_bytes(
+        get_portal_run_id_patching_cursor_key(output_uri, cache_key),
+        json.dumps(asdict(cursor)).encode()
+    )
+
+
+def read_portal_run_id_patching_cursor(
+    store: Store,
+    output_uri: str,
+    cache_key: str,
+) -> Optional[PortalRunIdPatchingCursor]:
+    """
+    Read the patching cursor of an output uri from the store
+    :param store: The store to read from
+    :param output_uri: The output uri being patched
+    :param cache_key: The cache key, i.e. the step function execution name
+    :return: The patching cursor, or None if the patching has not started
+    """
+    cursor_key = get_portal_run_id_patching_cursor_key(output_uri, cache_key)
+    cursor_bytes = store.get_bytes(cursor_key)
+
+    if cursor_bytes is None:
+        return None
+
+    cursor = PortalRunIdPatchingCursor(**json.loads(cursor_bytes))
+
+    logger.info(
+        "Resuming the portal run id patching of %s from page %s, from %s",
+        output_uri, cursor.next_page_number, store.get_uri(cursor_key)
+    )
+
+    return cursor
+
+
+def delete_portal_run_id_patching_cursor(
+    store: Store,
+    output_uri: str,
+    cache_key: str,
+):
+    """
+    Delete the patching cursor of an output uri from the store, once every page has been patched
+    :param store: The store to delete from
+    :param output_uri: The output uri being patched
+    :param cache_key: The cache key, i.e. the step function execution name
+    :return:
+    """
+    store.delete(get_portal_run_id_patching_cursor_key(output_uri, cache_key))
+
+
+def patch_portal_run_id_attribute(s3_object_id: str, portal_run_id: str):
+    """
+    Add the portalRunId attribute to a single filemanager record
+    :param s3_object_id: The filemanager s3 object id
+    :param portal_run_id: The portal run id
+    :return:
+    """
+    from orcabus_api_tools.filemanager import file_manager_patch_request
+    from orcabus_api_tools.filemanager.globals import S3_LIST_ENDPOINT
+
+    file_manager_patch_request(
+        endpoint=f"{S3_LIST_ENDPOINT}/{s3_object_id}",
+        json_data=[
+            {
+                'op': 'add',
+                'path': PORTAL_RUN_ID_ATTRIBUTE_PATH,
+                'value': portal_run_id
+            }
+        ]
+    )
+
+
+def patch_portal_run_id_attributes(
+    bucket: str,
+    key_prefix: str,
+    portal_run_id: str,
+    cursor: Optional[PortalRunIdPatchingCursor] = None,
+    max_workers: Optional[int] = None,
+    rows_per_page: int = FILEMANAGER_ROWS_PER_PAGE,
+    get_remaining_time_seconds: Optional[Callable[[], float]] = None,
+    on_page_patched: Optional[Callable[[PortalRunIdPatchingCursor], None]] = None,
+) -> PortalRunIdPatchingCursor:
+    """
+    Add the portalRunId attribute to every filemanager record under the key prefix, one page at a time
+
+    :param bucket: The S3 bucket
+    :param key_prefix: The key prefix
+    :param portal_run_id: The portal run id
+    :param cursor: The cursor to resume from, None to start from the first page
+    :param max_workers: The maximum number of patches in flight
+    :param rows_per_page: The number of records to list per page
+    :param get_remaining_time_seconds: The time left before the caller times out,
+      if not set the patching runs until every page has been patched
+    :param on_page_patched: Called with the cursor once each page has been patched, i.e. to save it
+    :return: The cursor, is_complete is set once every page has been patched
+    """
+    if cursor is None:
+        cursor = PortalRunIdPatchingCursor()
+
+    max_page_duration_seconds = 0.0
+
+    for filemanager_record_page in iter_filemanager_record_pages(
+        bucket=bucket,
+        key_prefix=key_prefix,
+        rows_per_page=rows_per_page,
+        start_page_number=cursor.next_page_number
+    ):
+        page_start_time = perf_counter()
+
+        unpatched_s3_object_ids = list(map(
+            lambda filemanager_record_iter_: filemanager_record_iter_.s3_object_id,
+            filter(
+                lambda filemanager_record_iter_: filemanager_record_iter_.portal_run_id != portal_run_id,
+                filemanager_record_page
+            )
+        ))
+
+        with record_call("filemanager_patch_s3_objects") as call_metrics:
+            call_metrics.add_page(len(unpatched_s3_object_ids))
+            # Consume the results, so that the first failed patch is raised
+            try:
+                for _ in iter_concurrently_in_order(
+                    map(
+                        lambda s3_object_id_iter_: partial(
+                            patch_portal_run_id_attribute, s3_object_id_iter_, portal_run_id
+                        ),
+                        unpatched_s3_object_ids
+                    ),
+                    max_workers=max_workers
+                ):
+                    pass
+            except Exception as e:
+                if not is_transient_error(e):
+                    raise
+                raise PortalRunIdPatchingTransientError(
+                    f"Patching page {cursor.next_page_number} of {key_prefix} failed with {type(e).__name__}: {e}"
+                ) from e
+
+        cursor.next_page_number += 1
+        cursor.patched_count += len(unpatched_s3_object_ids)
+        cursor.skipped_count += len(filemanager_record_page) - len(unpatched_s3_object_ids)
+
+        if on_page_patched is not None:
+            on_page_patched(cursor)
+
+        max_page_duration_seconds = max(max_page_duration_seconds, perf_counter() - page_start_time)
+
+        # Leave enough time to patch another page, and to save the cursor
+        if (
+            get_remaining_time_seconds is not None and
+            get_remaining_time_seconds() < 2 * max_page_duration_seconds + MIN_REMAINING_TIME_SECONDS
+        ):
+            logger.info(
+                "Stopping the portal run id patching of %s before page %s, patched %s and skipped %s records so far",
+                key_prefix, cursor.next_page_number, cursor.patched_count, cursor.skipped_count
+            )
+            return cursor
+
+    cursor.is_complete = True
+
+    logger.info(
+        "Completed the portal run id patching of %s, patched %s and skipped %s records",
+        key_prefix, cursor.patched_count, cursor.skipped_count
+    )
+
+    return cursor
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""
+Retry a single request of a paged listing on a transient error
+
+A listing of a large run folder makes hundreds of page requests,
+without a retry a single throttled or dropped request fails the whole listing (and the lambda),
+and the step function then lists every page again from the start.
+
+Only errors that are worth retrying are retried:
+  * http errors with a 429 (throttled) or 5xx status, from libica (ApiException.status)
+    or requests (HTTPError.response.status_code)
+  * connection errors and timeouts, i.e. OSError and its subclasses (the requests exceptions are OSErrors)
+Any other error (i.e. a 404, or a bad request) is raised straight away.
+
+Each retry is counted on the call's CallMetrics, and published as its RetryCount.
+
+The number of attempts can be overridden with the BSSH_MANAGER_MAX_REQUEST_ATTEMPTS env var.
+"""
+
+# Standard libraries
+from os import environ
+from random import uniform
+from time import sleep
+from typing import Callable, Optional, TypeVar
+
+# Local libraries
+from .logger import get_logger
+from .metrics_helpers import CallMetrics
+
+# Globals
+MAX_REQUEST_ATTEMPTS_ENV_VAR = "BSSH_MANAGER_MAX_REQUEST_ATTEMPTS"
+DEFAULT_MAX_REQUEST_ATTEMPTS = 4
+BASE_DELAY_SECONDS = 0.5
+MAX_DELAY_SECONDS = 8.0
+
+RETRYABLE_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+T = TypeVar("T")
+
+# Set logger
+logger = get_logger(__name__)
+
+
+def get_max_request_attempts() -> int:
+    """
+    Get the number of attempts per request, can be overridden with the BSSH_MANAGER_MAX_REQUEST_ATTEMPTS env var
+    :return:
+    """
+    return max(1, int(environ.get(MAX_REQUEST_ATTEMPTS_ENV_VAR, DEFAULT_MAX_REQUEST_ATTEMPTS)))
+
+
+def get_error_status_code(error: Exception) -> Optional[int]:
+    """
+    Get the http status code of a libica ApiException or a requests HTTPError, None if there is none
+    :param error:
+    :return:
+    """
+    status_code = getattr(error, "status", None)
+    if not status_code:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if not status_code:
+        return None
+    return int(status_code)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Is the error worth retrying, a throttled or failed request, or a dropped connection
+    :param error:
+    :return:
+    """
+    status_code = get_error_status_code(error)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, OSError)
+
+
+def call_with_retries(
+    func: Callable[[], T],
+    call_metrics: Optional[CallMetrics] = None,
+    max_attempts: Optional[int] = None,
+    is_retryable: Callable[[Exception], bool] = is_transient_error,
+) -> T:
+    """
+    Call func, retrying with exponential backoff and full jitter while it raises a retryable error
+
+    :param func: The request, takes no arguments
+    :param call_metrics: The metrics of the call, each retry is added to its retry count
+    :param max_attempts: The maximum number of attempts, including the first
+    :param is_retryable: Whether an error is worth retrying
+    :return: The result of the first successful attempt
+    """
+    if max_attempts is None:
+        max_attempts = get_max_request_attempts()
+
+    attempt_number = 1
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt_number >= max_attempts or not is_retryable(e):
+                raise
+            delay_seconds = uniform(0, min(MAX_DELAY_SECONDS, BASE_DELAY_SECONDS * 2 ** (attempt_number - 1)))
+            logger.warning(
+                "Attempt %s of %s failed with %s: %s, retrying in %.2f seconds",
+                attempt_number, max_attempts, type(e).__name__, e, delay_seconds
+            )
+            if call_metrics is not None:
+                call_metrics.add_retry()
+            sleep(delay_seconds)
+            attempt_number += 1
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+"""
+Resolve SSM parameters in batches, and cache them for the life of a warm lambda container
+
+All parameters a handler needs are fetched with a single GetParameters call (up to 10 names per call),
+and held in process until the cache TTL expires.
+The TTL can be overridden with the BSSH_MANAGER_SSM_PARAMETER_CACHE_TTL_SECONDS env var.
+
+Values are cached under the name they were requested by, which may be a name, an ARN,
+or either with a version or label selector (i.e. '/some/parameter:3'),
+GetParameters returns the canonical name instead, so each returned parameter is matched back to the requested name.
+"""
+
+# Standard libraries
+import typing
+from os import environ
+from threading import Lock
+from time import monotonic
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Local libraries
+from .logger import get_logger
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_ssm import SSMClient
+
+# Globals
+SSM_PARAMETER_CACHE_TTL_SECONDS_ENV_VAR = "BSSH_MANAGER_SSM_PARAMETER_CACHE_TTL_SECONDS"
+DEFAULT_SSM_PARAMETER_CACHE_TTL_SECONDS = 300
+
+# GetParameters accepts at most 10 names per call
+MAX_PARAMETER_NAMES_PER_CALL = 10
+
+# Set logger
+logger = get_logger(__name__)
+
+# Module level cache, parameter name to (value, time fetched)
+_SSM_PARAMETER_CACHE: Dict[str, Tuple[str, float]] = {}
+_SSM_PARAMETER_CACHE_LOCK = Lock()
+_SSM_CLIENT: Optional['SSMClient'] = None
+
+
+def get_ssm_parameter_cache_ttl_seconds() -> float:
+    """
+    Get the ssm parameter cache ttl, can be overridden with the BSSH_MANAGER_SSM_PARAMETER_CACHE_TTL_SECONDS env var
+    :return:
+    """
+    return max(0.0, float(environ.get(SSM_PARAMETER_CACHE_TTL_SECONDS_ENV_VAR, DEFAULT_SSM_PARAMETER_CACHE_TTL_SECONDS)))
+
+
+def get_ssm_client() -> 'SSMClient':
+    global _SSM_CLIENT
+
+    if _SSM_CLIENT is None:
+        import boto3
+        _SSM_CLIENT = boto3.client("ssm")
+
+    return _SSM_CLIENT
+
+
+def clear_ssm_parameter_cache():
+    with _SSM_PARAMETER_CACHE_LOCK:
+        _SSM_PARAMETER_CACHE.clear()
+
+
+def get_parameter_values_by_requested_name(
+    requested_parameter_names: Iterable[str],
+    parameters: List[Dict],
+) -> Dict[str, str]:
+    """
+    Match the parameters returned by GetParameters back to the names they were requested by
+
+    A parameter may have been requested by its name or its ARN, either with the selector (':version' or ':label')
+    the parameter was returned with.
+
+    :param requested_parameter_names: The names given to GetParameters
+    :param parameters: The Parameters of the GetParameters response
+    :return: Dictionary of requested parameter name to parameter value, for the names that were returned
+    """
+    parameter_values_by_key: Dict[str, str] = {}
+    for parameter in parameters:
+        for parameter_key in filter(None, [parameter.get("Name"), parameter.get("ARN")]):
+            parameter_values_by_key[parameter_key] = parameter["Value"]
+            if parameter.get("Selector"):
+                parameter_values_by_key[parameter_key + parameter["Selector"]] = parameter["Value"]
+
+    return dict(map(
+        lambda parameter_name_iter_: (parameter_name_iter_, parameter_values_by_key[parameter_name_iter_]),
+        filter(
+            lambda parameter_name_iter_: parameter_name_iter_ in parameter_values_by_key,
+            requested_parameter_names
+        )
+    ))
+
+
+def get_ssm_parameter_values(
+    parameter_names: List[str],
+    ttl_seconds: Optional[float] = None,
+) -> Dict[str, str]:
+    """
+    Get the values of a list of SSM parameters,
+    fetching any that are not cached (or whose cache entry has expired) in as few GetParameters calls as possible
+
+    :param parameter_names: The names of the SSM parameters
+    :param ttl_seconds: How long a cached value is used for, defaults to get_ssm_parameter_cache_ttl_seconds()
+    :return: Dictionary of parameter name to parameter value
+    """
+    if ttl_seconds is None:
+        ttl_seconds = get_ssm_parameter_cache_ttl_seconds()
+
+    with _SSM_PARAMETER_CACHE_LOCK:
+        now = monotonic()
+
+        # Unique names, in the order given
+        parameter_names_to_fetch = list(dict.fromkeys(filter(
+            lambda parameter_name_iter_: (
+                parameter_name_iter_ not in _SSM_PARAMETER_CACHE or
+                now - _SSM_PARAMETER_CACHE[parameter_name_iter_][1] >= ttl_seconds
+            ),
+            parameter_names
+        )))
+
+        for batch_index in range(0, len(parameter_names_to_fetch), MAX_PARAMETER_NAMES_PER_CALL):
+            batch_parameter_names = parameter_names_to_fetch[batch_index:batch_index + MAX_PARAMETER_NAMES_PER_CALL]
+
+            logger.info("Fetching %s ssm parameters", len(batch_parameter_names))
+            response = get_ssm_client().get_parameters(
+                Names=batch_parameter_names,
+                WithDecryption=True
+            )
+
+            parameter_values = get_parameter_values_by_requested_name(
+                batch_parameter_names, response.get("Parameters", [])
+            )
+
+            # InvalidParameters holds the names as they were requested,
+            # any other name that could not be matched back is reported with them
+            missing_parameter_names = list(dict.fromkeys(
+                list(response.get("InvalidParameters", [])) +
+                list(filter(
+                    lambda parameter_name_iter_: parameter_name_iter_ not in parameter_values,
+                    batch_parameter_names
+                ))
+            ))
+            if missing_parameter_names:
+                raise ValueError(f"Could not find ssm parameters {', '.join(missing_parameter_names)}")
+
+            for parameter_name, parameter_value in parameter_values.items():
+                _SSM_PARAMETER_CACHE[parameter_name] = (parameter_value, now)
+
+        return {
+            parameter_name: _SSM_PARAMETER_CACHE[parameter_name][0]
+            for parameter_name in parameter_names
+        }
+
+
+def get_ssm_parameter_value(parameter_name: str) -> str:
+    """
+    Get the value of a single SSM parameter, through the same cache
+    :param parameter_name:
+    :return:
+    """
+    return get_ssm_parameter_values([parameter_name])[parameter_name]
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+
+"""
+A small key-value object store shared between the steps of a copy run
+
+The store is selected by the BSSH_MANAGER_STORE_URI environment variable:
+  * s3://bucket/prefix/ - objects are written to S3 (the deployed stack)
+  * file:///path/to/dir/ - objects are written to the local filesystem (tests and benchmarks)
+
+If the environment variable is not set, get_store returns None and callers should skip
+anything that depends on the store.
+"""
+
+# Standard libraries
+import typing
+from abc import ABC, abstractmethod
+from os import environ
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3 import S3Client
+
+# Globals
+STORE_URI_ENV_VAR = "BSSH_MANAGER_STORE_URI"
+
+
+class Store(ABC):
+    """
+    Key-value store for bytes
+    """
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """
+        Return the bytes stored under key, or None if the key does not exist
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """
+        Return True if an object is stored under key, without reading it
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_uri(self, key: str) -> str:
+        """
+        Return a uri for the key, used for logging and for handing objects to other services
+        """
+        raise NotImplementedError
+
+
+class LocalFileStore(Store):
+    """
+    Store objects as files underneath a local directory
+    """
+
+    def __init__(self, root_dir: Path):
+        self.root_dir = Path(root_dir)
+
+    def _get_path(self, key: str) -> Path:
+        return self.root_dir / key.lstrip("/")
+
+    def put_bytes(self, key: str, data: bytes):
+        path = self._get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so that a reader never sees a partial object
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        path = self._get_path(key)
+        if not path.is_file():
+            return None
+        return path.read_bytes()
+
+    def exists(self, key: str) -> bool:
+        return self._get_path(key).is_file()
+
+    def delete(self, key: str):
+        self._get_path(key).unlink(missing_ok=True)
+
+    def get_uri(self, key: str) -> str:
+        # Keep the trailing slash of a key prefix, which Path drops
+        return self._get_path(key).absolute().as_uri() + ("/" if key.endswith("/") else "")
+
+
+class S3Store(Store):
+    """
+    Store objects in an S3 bucket underneath a prefix
+    """
+
+    def __init__(self, bucket: str, prefix: str = ""):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._s3_client: Optional['S3Client'] = None
+
+    @property
+    def s3_client(self) -> 'S3Client':
+        if self._s3_client is None:
+            import boto3
+            self._s3_client = boto3.client("s3")
+        return self._s3_client
+
+    def _get_key(self, key: str) -> str:
+        return self.prefix + key.lstrip("/")
+
+    def put_bytes(self, key: str, data: bytes):
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=self._get_key(key),
+            Body=data
+        )
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket,
+                Key=self._get_key(key)
+            )
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.s3_client.head_object(
+                Bucket=self.bucket,
+                Key=self._get_key(key)
+            )
+        except ClientError as e:
+            # A head request has no body, so a missing key is a plain 404 rather than a NoSuchKey error
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, key: str):
+        self.s3_client.delete_object(
+            Bucket=self.bucket,
+            Key=self._get_key(key)
+        )
+
+    def get_uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._get_key(key)}"
+
+
+def get_store_from_uri(store_uri: str) -> Store:
+    """
+    Get a store from a s3:// or file:// uri
+    :param store_uri:
+    :return:
+    """
+    store_uri_obj = urlparse(store_uri)
+
+    if store_uri_obj.scheme == "s3":
+        return S3Store(
+            bucket=store_uri_obj.netloc,
+            prefix=store_uri_obj.path
+        )
+    if store_uri_obj.scheme == "file":
+        return LocalFileStore(Path(store_uri_obj.path))
+
+    raise ValueError(f"Unsupported store uri scheme '{store_uri_obj.scheme}' in {store_uri}")
+
+
+def get_store() -> Optional[Store]:
+    """
+    Get the store configured by the BSSH_MANAGER_STORE_URI environment variable, or None if not configured
+    :return:
+    """
+    store_uri = environ.get(STORE_URI_ENV_VAR)
+
+    if not store_uri:
+        return None
+
+    return get_store_from_uri(store_uri)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the concurrency helpers
+"""
+
+# Standard libraries
+import gc
+from itertools import count
+from threading import Barrier
+from typing import Iterator, List
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils.concurrency_helpers import (
+    TaskGraphResult,
+    TaskNode,
+    TaskTiming,
+    iter_prefetched,
+    run_task_graph,
+)
+
+# Globals
+THREAD_JOIN_TIMEOUT_SECONDS = 5
+
+
+def iter_forever() -> Iterator[int]:
+    yield from count()
+
+
+def iter_then_raise() -> Iterator[int]:
+    yield 1
+    yield 2
+    raise ValueError("listing failed")
+
+
+def test_prefetched_items_are_yielded_in_order():
+    assert list(iter_prefetched(range(100), max_prefetched=3)) == list(range(100))
+
+
+def test_prefetched_exception_is_raised_after_the_items_before_it():
+    prefetched_items = iter_prefetched(iter_then_raise())
+    assert next(prefetched_items) == 1
+    assert next(prefetched_items) == 2
+    with pytest.raises(ValueError):
+        next(prefetched_items)
+
+
+def test_closing_an_unstarted_iterator_stops_the_thread():
+    prefetched_items = iter_prefetched(iter_forever(), max_prefetched=1)
+    prefetch_thread = prefetched_items._thread
+
+    prefetched_items.close()
+
+    prefetch_thread.join(THREAD_JOIN_TIMEOUT_SECONDS)
+    assert not prefetch_thread.is_alive()
+    with pytest.raises(StopIteration):
+        next(prefetched_items)
+
+
+def test_dropping_an_unstarted_iterator_stops_the_thread():
+    prefetched_items = iter_prefetched(iter_forever(), max_prefetched=1)
+    prefetch_thread = prefetched_items._thread
+
+    del prefetched_items
+    gc.collect()
+
+    prefetch_thread.join(THREAD_JOIN_TIMEOUT_SECONDS)
+    assert not prefetch_thread.is_alive()
+
+
+def test_leaving_the_with_block_early_stops_the_thread():
+    with iter_prefetched(iter_forever(), max_prefetched=1) as prefetched_items:
+        prefetch_thread = prefetched_items._thread
+        assert next(prefetched_items) == 0
+
+    prefetch_thread.join(THREAD_JOIN_TIMEOUT_SECONDS)
+    assert not prefetch_thread.is_alive()
+
+
+def test_task_graph_passes_dependency_results_as_keyword_arguments():
+    task_graph_result = run_task_graph({
+        "project_id": TaskNode(func=lambda: "project"),
+        "folder_path": TaskNode(func=lambda: "/output/"),
+        "folder_uri": TaskNode(
+            func=lambda project_id, folder_path: f"icav2://{project_id}{folder_path}",
+            dependencies=("project_id", "folder_path")
+        ),
+    })
+
+    assert task_graph_result.results == {
+        "project_id": "project",
+        "folder_path": "/output/",
+        "folder_uri": "icav2://project/output/",
+    }
+    # Every task is timed, and a task starts only once its dependencies have ended
+    timings_by_name = {timing.task_name: timing for timing in task_graph_result.timings}
+    assert set(timings_by_name) == {"project_id", "folder_path", "folder_uri"}
+    assert timings_by_name["folder_uri"].start_seconds >= max(
+        timings_by_name["project_id"].end_seconds, timings_by_name["folder_path"].end_seconds
+    )
+
+
+def test_independent_tasks_run_concurrently():
+    # Each task waits for the other, so they only complete if they run at the same time
+    barrier = Barrier(2, timeout=THREAD_JOIN_TIMEOUT_SECONDS)
+
+    task_graph_result = run_task_graph({
+        "destination": TaskNode(func=lambda: barrier.wait() is not None),
+        "run_folder": TaskNode(func=lambda: barrier.wait() is not None),
+    }, max_workers=2)
+
+    assert task_graph_result.results == {"destination": True, "run_folder": True}
+
+
+def test_a_raising_task_stops_its_dependents():
+    started_task_names: List[str] = []
+
+    def _fail():
+        raise FileNotFoundError("no such folder")
+
+    with pytest.raises(FileNotFoundError):
+        run_task_graph({
+            "folder": TaskNode(func=_fail),
+            "files": TaskNode(func=lambda folder: started_task_names.append("files"), dependencies=("folder",)),
+        })
+
+    assert started_task_names == []
+
+
+def test_a_missing_dependency_is_rejected():
+    with pytest.raises(ValueError, match="not in the task graph"):
+        run_task_graph({"files": TaskNode(func=lambda folder: folder, dependencies=("folder",))})
+
+
+def test_a_cycle_is_rejected():
+    with pytest.raises(ValueError, match="cycle between a, b"):
+        run_task_graph({
+            "a": TaskNode(func=lambda b: b, dependencies=("b",)),
+            "b": TaskNode(func=lambda a: a, dependencies=("a",)),
+            "c": TaskNode(func=lambda: None),
+        })
+
+
+def test_critical_path_follows_the_dependency_that_ended_last():
+    task_graph_result = TaskGraphResult(timings=[
+        TaskTiming("destination", 0.0, 0.3, ()),
+        TaskTiming("analysis", 0.0, 0.1, ()),
+        TaskTiming("bclconvert_outputs", 0.1, 0.5, ("analysis",)),
+        TaskTiming("run_folder", 0.1, 0.2, ("analysis",)),
+        TaskTiming("samples", 0.5, 0.6, ("bclconvert_outputs", "destination")),
+        TaskTiming("interops", 0.2, 0.4, ("run_folder",)),
+    ])
+
+    assert list(map(lambda timing_iter_: timing_iter_.task_name, task_graph_result.critical_path)) == [
+        "analysis", "bclconvert_outputs", "samples"
+    ]
+    assert list(map(
+        lambda timing_trace_iter_: timing_trace_iter_["taskName"],
+        filter(
+            lambda timing_trace_iter_: timing_trace_iter_["isOnCriticalPath"],
+            task_graph_result.get_timing_trace()
+        )
+    )) == ["analysis", "bclconvert_outputs", "samples"]
+    assert task_graph_result.get_timing_trace()[0] == {
+        "taskName": "destination", "startMs": 0.0, "endMs": 300.0, "durationMs": 300.0, "isOnCriticalPath": False
+    }
+
+
+def test_an_empty_task_graph_has_no_critical_path():
+    assert run_task_graph({}).critical_path == []
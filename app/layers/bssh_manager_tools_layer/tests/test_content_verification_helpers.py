@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the content verification helpers, run against local files through the LocalFileRangeReader
+"""
+
+# Standard libraries
+import hashlib
+import os
+from functools import partial
+from pathlib import Path
+
+# Local libraries
+from bssh_manager_tools.utils.content_verification_helpers import (
+    COMPOSITE_E_TAG_VERIFICATION_METHOD,
+    MIB,
+    SHA256_VERIFICATION_METHOD,
+    ContentVerificationBudget,
+    LocalFileRangeReader,
+    get_composite_e_tag,
+    get_e_tag_part_count,
+    get_part_size_candidates,
+    verify_content_match,
+)
+
+# Globals
+PART_SIZE_IN_BYTES = 5 * MIB
+CHUNK_SIZE_IN_BYTES = MIB
+
+
+def get_multipart_e_tag(data: bytes, part_size_in_bytes: int) -> str:
+    """
+    The e-tag of a multipart upload, computed independently of the helpers under test
+    """
+    part_digests = b"".join(map(
+        lambda part_start_iter_: hashlib.md5(data[part_start_iter_:part_start_iter_ + part_size_in_bytes]).digest(),
+        range(0, len(data), part_size_in_bytes)
+    ))
+    return f"{hashlib.md5(part_digests).hexdigest()}-{-(-len(data) // part_size_in_bytes)}"
+
+
+def write_file(path: Path, data: bytes) -> Path:
+    path.write_bytes(data)
+    return path
+
+
+def test_e_tag_part_count():
+    # A plain md5, a single part upload
+    assert get_e_tag_part_count('"d41d8cd98f00b204e9800998ecf8427e"') == 0
+    # A multipart upload of 13 parts, upper case and quoted as S3 returns it
+    assert get_e_tag_part_count('"0A1B2C3D4E5F60718293A4B5C6D7E8F9-13"') == 13
+    # Not md5 based
+    assert get_e_tag_part_count("not-an-md5-e-tag") is None
+    assert get_e_tag_part_count(None) is None
+
+
+def test_part_size_candidates():
+    # A 100 MiB file uploaded with the aws cli default 8 MiB part size has 13 parts
+    assert get_part_size_candidates(100 * MIB, 13)[0] == 8 * MIB
+    # A 1 GiB file uploaded in 16 MiB parts has 64 parts
+    assert get_part_size_candidates(1024 * MIB, 64)[0] == 16 * MIB
+    # Every candidate splits the file into the same number of parts
+    for part_size_in_bytes in get_part_size_candidates(100 * MIB, 13, max_candidates=10):
+        assert -(-100 * MIB // part_size_in_bytes) == 13
+    assert get_part_size_candidates(100 * MIB, 13, max_candidates=1) == [8 * MIB]
+    # Not a multipart upload
+    assert get_part_size_candidates(100 * MIB, 0) == []
+
+
+def test_composite_e_tag(tmp_path: Path):
+    data = os.urandom(2 * PART_SIZE_IN_BYTES + 12345)
+    range_reader = LocalFileRangeReader(write_file(tmp_path / "data.bin", data))
+
+    for max_workers in [1, 4]:
+        assert get_composite_e_tag(
+            range_reader, len(data), PART_SIZE_IN_BYTES,
+            max_workers=max_workers, chunk_size_in_bytes=CHUNK_SIZE_IN_BYTES
+        ) == get_multipart_e_tag(data, PART_SIZE_IN_BYTES)
+
+
+def test_verify_matching_copy(tmp_path: Path):
+    data = os.urandom(2 * PART_SIZE_IN_BYTES + 12345)
+    source_path = write_file(tmp_path / "source.bin", data)
+    destination_path = write_file(tmp_path / "destination.bin", data)
+
+    # The destination was copied with a different part size, so the e-tags differ for the same content
+    content_verification_result = verify_content_match(
+        source_e_tag=get_multipart_e_tag(data, PART_SIZE_IN_BYTES),
+        destination_e_tag=get_multipart_e_tag(data, 8 * MIB),
+        file_size_in_bytes=len(data),
+        get_source_range_reader=partial(LocalFileRangeReader, source_path),
+        get_destination_range_reader=partial(LocalFileRangeReader, destination_path),
+        max_workers=4,
+        chunk_size_in_bytes=CHUNK_SIZE_IN_BYTES,
+    )
+
+    assert content_verification_result.is_match
+    assert content_verification_result.method == COMPOSITE_E_TAG_VERIFICATION_METHOD
+
+
+def test_verify_corrupt_copy(tmp_path: Path):
+    data = os.urandom(2 * PART_SIZE_IN_BYTES + 12345)
+    corrupt_data = bytearray(data)
+    corrupt_data[PART_SIZE_IN_BYTES + 1] ^= 0xFF
+    source_path = write_file(tmp_path / "source.bin", data)
+    destination_path = write_file(tmp_path / "destination.bin", bytes(corrupt_data))
+
+    content_verification_result = verify_content_match(
+        source_e_tag=get_multipart_e_tag(data, PART_SIZE_IN_BYTES),
+        destination_e_tag=get_multipart_e_tag(bytes(corrupt_data), 8 * MIB),
+        file_size_in_bytes=len(data),
+        get_source_range_reader=partial(LocalFileRangeReader, source_path),
+        get_destination_range_reader=partial(LocalFileRangeReader, destination_path),
+        max_workers=4,
+        chunk_size_in_bytes=CHUNK_SIZE_IN_BYTES,
+    )
+
+    # No part size gives the source e-tag, so the full content is compared
+    assert not content_verification_result.is_match
+    assert content_verification_result.method == SHA256_VERIFICATION_METHOD
+
+
+def test_verify_copy_with_a_non_md5_e_tag(tmp_path: Path):
+    # SSE-KMS encrypted objects have an e-tag that looks like, but is not, the md5 of their content
+    data = os.urandom(PART_SIZE_IN_BYTES + 12345)
+    source_path = write_file(tmp_path / "source.bin", data)
+    destination_path = write_file(tmp_path / "destination.bin", data)
+
+    content_verification_result = verify_content_match(
+        source_e_tag="0a1b2c3d4e5f60718293a4b5c6d7e8f9",
+        destination_e_tag=hashlib.md5(data).hexdigest(),
+        file_size_in_bytes=len(data),
+        get_source_range_reader=partial(LocalFileRangeReader, source_path),
+        get_destination_range_reader=partial(LocalFileRangeReader, destination_path),
+        max_workers=1,
+        chunk_size_in_bytes=CHUNK_SIZE_IN_BYTES,
+    )
+
+    assert content_verification_result.is_match
+    assert content_verification_result.method == SHA256_VERIFICATION_METHOD
+
+
+def test_verification_budget():
+    verification_budget = ContentVerificationBudget(max_bytes=100, max_files=2)
+
+    assert verification_budget.try_reserve(60)
+    # Over the bytes left
+    assert not verification_budget.try_reserve(50)
+    assert verification_budget.try_reserve(40)
+    # Over the files left
+    assert not verification_budget.try_reserve(0)
+
+    # Past the deadline
+    assert not ContentVerificationBudget(max_bytes=100, max_files=2, deadline=0).try_reserve(1)
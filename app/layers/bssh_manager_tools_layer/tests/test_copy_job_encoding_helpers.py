@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the base uri plus relative names encoding of a copy job
+"""
+
+# Standard libraries
+import json
+from typing import List
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils.copy_job_encoding_helpers import (
+    decode_copy_job,
+    decode_source_name_list,
+    encode_copy_job,
+    encode_source_name_list,
+    get_source_base_uri,
+    get_source_uri_list,
+)
+
+# Globals
+RUN_FOLDER_URI = "icav2://source-project-id/ilmn-runs/bssh_aps2-sh-prod_4505508/"
+DESTINATION_URI = "icav2://destination-project-id/primary/run/20240207abcduuid/InterOp/"
+
+
+def get_interop_uri_list(file_count: int) -> List[str]:
+    return list(map(
+        lambda file_index_iter_: f"{RUN_FOLDER_URI}InterOp/Metric{file_index_iter_:02d}Out.bin",
+        range(file_count)
+    ))
+
+
+@pytest.mark.parametrize("source_uri_list, source_base_uri", [
+    (get_interop_uri_list(3), f"{RUN_FOLDER_URI}InterOp/"),
+    # Names that share a prefix do not split a name
+    ([f"{RUN_FOLDER_URI}Samples/Sample1/", f"{RUN_FOLDER_URI}Samples/Sample10/"], f"{RUN_FOLDER_URI}Samples/"),
+    # A single folder has its parent as the base
+    ([f"{RUN_FOLDER_URI}Reports/"], RUN_FOLDER_URI),
+    ([f"{RUN_FOLDER_URI}InterOp/IndexMetricsOut.bin"], f"{RUN_FOLDER_URI}InterOp/"),
+    # Sources in different folders share their common parent
+    ([f"{RUN_FOLDER_URI}InterOp/a.bin", f"{RUN_FOLDER_URI}Reports/b.csv"], RUN_FOLDER_URI),
+])
+def test_source_base_uri(source_uri_list: List[str], source_base_uri: str):
+    assert get_source_base_uri(source_uri_list) == source_base_uri
+
+
+@pytest.mark.parametrize("source_uri_list", [
+    get_interop_uri_list(1),
+    get_interop_uri_list(20),
+    [f"{RUN_FOLDER_URI}Samples/Sample1/", f"{RUN_FOLDER_URI}Samples/Sample10/", f"{RUN_FOLDER_URI}Reports/"],
+    [f"{RUN_FOLDER_URI}Reports/"],
+])
+def test_encode_decode_round_trip(source_uri_list: List[str]):
+    copy_job = encode_copy_job(source_uri_list=source_uri_list, destination_uri=DESTINATION_URI)
+
+    assert "sourceUriList" not in copy_job
+    assert decode_copy_job(copy_job) == {"sourceUriList": source_uri_list, "destinationUri": DESTINATION_URI}
+
+
+def test_encoded_copy_job_is_smaller():
+    source_uri_list = get_interop_uri_list(20)
+
+    copy_job = encode_copy_job(source_uri_list=source_uri_list, destination_uri=DESTINATION_URI)
+
+    assert copy_job["sourceBaseUri"] == f"{RUN_FOLDER_URI}InterOp/"
+    assert copy_job["sourceNameList"][0] == "Metric00Out.bin"
+    assert len(json.dumps(copy_job)) < len(json.dumps({
+        "sourceUriList": source_uri_list, "destinationUri": DESTINATION_URI
+    }))
+
+
+def test_large_name_lists_are_gzipped_on_request():
+    source_uri_list = get_interop_uri_list(200)
+
+    copy_job = encode_copy_job(source_uri_list=source_uri_list, destination_uri=DESTINATION_URI, gzip_min_size_in_bytes=0)
+
+    assert "sourceNameList" not in copy_job
+    assert decode_source_name_list(copy_job["sourceNameListGzip"]) == list(map(
+        lambda source_uri_iter_: source_uri_iter_[len(f"{RUN_FOLDER_URI}InterOp/"):],
+        source_uri_list
+    ))
+    assert get_source_uri_list(copy_job) == source_uri_list
+    # Below the threshold the name list is left as it is
+    assert "sourceNameList" in encode_copy_job(
+        source_uri_list=source_uri_list, destination_uri=DESTINATION_URI, gzip_min_size_in_bytes=2 ** 20
+    )
+
+
+def test_gzipped_name_list_is_deterministic():
+    source_name_list = ["a.bin", "b.bin"]
+    assert encode_source_name_list(source_name_list) == encode_source_name_list(list(source_name_list))
+
+
+def test_plain_copy_jobs_are_decoded_as_they_are():
+    plain_copy_job = {"sourceUriList": get_interop_uri_list(2), "destinationUri": DESTINATION_URI}
+    assert decode_copy_job(plain_copy_job) == plain_copy_job
+
+
+def test_invalid_copy_jobs_are_rejected():
+    with pytest.raises(ValueError):
+        decode_copy_job({"destinationUri": DESTINATION_URI})
+    with pytest.raises(ValueError):
+        decode_copy_job({"sourceNameList": ["a.bin"], "destinationUri": DESTINATION_URI})
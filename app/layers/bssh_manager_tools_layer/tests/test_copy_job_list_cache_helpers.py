@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the copy job list cache helpers, against the local store
+"""
+
+# Standard libraries
+from pathlib import Path
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils.copy_job_list_cache_helpers import (
+    get_relative_copy_job_list,
+    get_source_listing_fingerprint,
+    read_copy_job_list_cache_entry,
+    rebase_copy_job_list,
+    write_copy_job_list_cache_entry,
+)
+from bssh_manager_tools.utils.copy_job_planning_helpers import (
+    MAX_SHARD_COUNT_ENV_VAR,
+    TARGET_SHARD_SIZE_IN_BYTES_ENV_VAR,
+)
+from bssh_manager_tools.utils.listing_diff_helpers import ListingRecord
+from bssh_manager_tools.utils.store_helpers import LocalFileStore
+
+# Globals
+PROJECT_ID = "source-project-id"
+ANALYSIS_ID = "analysis-id"
+DESTINATION_FOLDER_URI = "icav2://destination-project-id/primary/run/20240207abcduuid/"
+NEW_DESTINATION_FOLDER_URI = "icav2://destination-project-id/primary/run/20240208efghuuid/"
+
+LISTING_RECORDS = [
+    ListingRecord("Reports/IndexMetricsOut.bin", 4096, "etag-1", "fil.1"),
+    ListingRecord("Samples/SampleA/SampleA_R1_001.fastq.gz", 1000, "etag-2", "fil.2"),
+    ListingRecord("Samples/SampleB/SampleB_R1_001.fastq.gz", 2000, "etag-3", "fil.3"),
+]
+
+
+def get_copy_job_list(destination_folder_uri: str):
+    return [
+        {
+            "sourceBaseUri": "icav2://source-project-id/analysis/output/Samples/",
+            "sourceNameList": ["SampleA/", "SampleB/"],
+            "destinationUri": destination_folder_uri + "Samples/",
+        },
+        {
+            "sourceBaseUri": "icav2://source-project-id/analysis/output/",
+            "sourceNameList": ["Reports/"],
+            "destinationUri": destination_folder_uri,
+        },
+    ]
+
+
+def test_fingerprint_is_independent_of_listing_order():
+    assert (
+        get_source_listing_fingerprint(LISTING_RECORDS) ==
+        get_source_listing_fingerprint(list(reversed(LISTING_RECORDS)))
+    )
+
+
+def test_fingerprint_changes_with_a_changed_file():
+    changed_listing_records = [LISTING_RECORDS[0], LISTING_RECORDS[1]._replace(object_e_tag="etag-changed")]
+    assert (
+        get_source_listing_fingerprint(LISTING_RECORDS[:2]) !=
+        get_source_listing_fingerprint(changed_listing_records)
+    )
+
+
+@pytest.mark.parametrize("env_var", [TARGET_SHARD_SIZE_IN_BYTES_ENV_VAR, MAX_SHARD_COUNT_ENV_VAR])
+def test_fingerprint_changes_with_the_shard_parameters(monkeypatch: pytest.MonkeyPatch, env_var: str):
+    source_listing_fingerprint = get_source_listing_fingerprint(LISTING_RECORDS)
+    monkeypatch.setenv(env_var, "3")
+    assert get_source_listing_fingerprint(LISTING_RECORDS) != source_listing_fingerprint
+
+
+def test_relative_copy_job_list_round_trip():
+    relative_copy_job_list = get_relative_copy_job_list(
+        get_copy_job_list(DESTINATION_FOLDER_URI), DESTINATION_FOLDER_URI.rstrip("/")
+    )
+
+    assert list(map(lambda copy_job_iter_: copy_job_iter_["destinationRelativePath"], relative_copy_job_list)) == [
+        "Samples/", ""
+    ]
+    assert rebase_copy_job_list(relative_copy_job_list, NEW_DESTINATION_FOLDER_URI) == get_copy_job_list(
+        NEW_DESTINATION_FOLDER_URI
+    )
+
+
+def test_copy_job_outside_the_destination_folder_raises():
+    with pytest.raises(ValueError):
+        get_relative_copy_job_list(get_copy_job_list(NEW_DESTINATION_FOLDER_URI), DESTINATION_FOLDER_URI)
+
+
+def test_entry_is_rebased_onto_a_new_destination_folder(tmp_path: Path):
+    store = LocalFileStore(tmp_path)
+    source_listing_fingerprint = get_source_listing_fingerprint(LISTING_RECORDS)
+
+    write_copy_job_list_cache_entry(
+        store=store,
+        project_id=PROJECT_ID,
+        analysis_id=ANALYSIS_ID,
+        source_listing_fingerprint=source_listing_fingerprint,
+        icav2_copy_job_list=get_copy_job_list(DESTINATION_FOLDER_URI),
+        destination_folder_uri=DESTINATION_FOLDER_URI,
+        manifest_id="20240207abcduuid"
+    )
+
+    copy_job_list_cache_entry = read_copy_job_list_cache_entry(
+        store=store,
+        project_id=PROJECT_ID,
+        analysis_id=ANALYSIS_ID,
+        source_listing_fingerprint=source_listing_fingerprint,
+        destination_folder_uri=NEW_DESTINATION_FOLDER_URI
+    )
+
+    assert copy_job_list_cache_entry.icav2_copy_job_list == get_copy_job_list(NEW_DESTINATION_FOLDER_URI)
+    assert copy_job_list_cache_entry.manifest_id == "20240207abcduuid"
+
+
+def test_entry_with_a_different_fingerprint_is_not_read(tmp_path: Path):
+    store = LocalFileStore(tmp_path)
+
+    write_copy_job_list_cache_entry(
+        store=store,
+        project_id=PROJECT_ID,
+        analysis_id=ANALYSIS_ID,
+        source_listing_fingerprint=get_source_listing_fingerprint(LISTING_RECORDS),
+        icav2_copy_job_list=get_copy_job_list(DESTINATION_FOLDER_URI),
+        destination_folder_uri=DESTINATION_FOLDER_URI
+    )
+
+    assert read_copy_job_list_cache_entry(
+        store=store,
+        project_id=PROJECT_ID,
+        analysis_id=ANALYSIS_ID,
+        source_listing_fingerprint=get_source_listing_fingerprint(LISTING_RECORDS[:2]),
+        destination_folder_uri=DESTINATION_FOLDER_URI
+    ) is None
+
+
+def test_local_store_exists(tmp_path: Path):
+    store = LocalFileStore(tmp_path)
+    assert not store.exists("some/key.json")
+    store.put_bytes("some/key.json", b"{}")
+    assert store.exists("some/key.json")
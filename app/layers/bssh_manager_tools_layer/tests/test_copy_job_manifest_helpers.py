@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the copy job manifest helpers
+"""
+
+# Standard libraries
+import json
+from pathlib import Path
+
+# Local libraries
+from bssh_manager_tools.utils.copy_job_manifest_helpers import (
+    get_copy_job_list_payload_size_in_bytes,
+    get_copy_job_manifest_key,
+    is_copy_job_list_too_large_for_payload,
+    is_copy_job_manifest_required,
+    read_copy_job_manifest,
+    write_copy_job_manifest,
+)
+from bssh_manager_tools.utils.store_helpers import LocalFileStore
+
+
+def get_copy_job_list(copy_job_count: int, source_name_count: int = 1):
+    return list(map(
+        lambda copy_job_iter_: {
+            "sourceBaseUri": f"s3://bucket/run/Samples/Lane_1/sample_{copy_job_iter_}/",
+            "sourceNameList": list(map(
+                lambda source_name_iter_: f"sample_{copy_job_iter_}_R{source_name_iter_}_001.fastq.gz",
+                range(source_name_count)
+            )),
+            "destinationUri": f"s3://bucket/primary/run/portal_run_id/Samples/Lane_1/sample_{copy_job_iter_}/",
+        },
+        range(copy_job_count)
+    ))
+
+
+def test_small_copy_job_list_is_passed_inline():
+    assert not is_copy_job_manifest_required(get_copy_job_list(3))
+
+
+def test_copy_job_count_above_the_min_requires_a_manifest():
+    copy_job_list = get_copy_job_list(9)
+    assert is_copy_job_manifest_required(copy_job_list)
+    assert not is_copy_job_manifest_required(copy_job_list, min_copy_job_count=9)
+
+
+def test_copy_job_list_above_the_max_payload_size_requires_a_manifest():
+    copy_job_list = get_copy_job_list(2, source_name_count=1000)
+    payload_size = get_copy_job_list_payload_size_in_bytes(copy_job_list)
+
+    assert payload_size == len(json.dumps(copy_job_list, separators=(",", ":")).encode())
+    assert is_copy_job_list_too_large_for_payload(copy_job_list, max_inline_payload_size_in_bytes=payload_size - 1)
+    assert not is_copy_job_list_too_large_for_payload(copy_job_list, max_inline_payload_size_in_bytes=payload_size)
+    assert is_copy_job_manifest_required(copy_job_list, max_inline_payload_size_in_bytes=payload_size - 1)
+    assert not is_copy_job_manifest_required(copy_job_list, max_inline_payload_size_in_bytes=payload_size)
+
+
+def test_manifest_round_trip_on_the_local_store(tmp_path: Path):
+    store = LocalFileStore(tmp_path)
+    copy_job_list = get_copy_job_list(20, source_name_count=3)
+
+    manifest = write_copy_job_manifest(store=store, manifest_id="20240207abcduuid", icav2_copy_job_list=copy_job_list)
+
+    manifest_path = tmp_path / get_copy_job_manifest_key("20240207abcduuid")
+    assert manifest["copyJobCount"] == 20
+    assert manifest["manifestUri"] == manifest_path.absolute().as_uri()
+    # The local store has no bucket, the key is the absolute path
+    assert manifest["bucket"] == ""
+    assert manifest["key"] == str(manifest_path.absolute())
+    assert manifest["resultsPrefix"].endswith("copy-job-manifests/20240207abcduuid/results/")
+    # One copy job per line
+    assert len(manifest_path.read_text().splitlines()) == 20
+
+    assert list(read_copy_job_manifest(store=store, manifest_id="20240207abcduuid")) == copy_job_list
+
+
+def test_reading_a_missing_manifest_returns_none(tmp_path: Path):
+    assert read_copy_job_manifest(store=LocalFileStore(tmp_path), manifest_id="missing") is None
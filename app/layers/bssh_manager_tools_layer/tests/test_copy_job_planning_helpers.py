@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the copy job planning helpers
+"""
+
+# Standard libraries
+from itertools import chain
+from typing import List
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils.copy_job_planning_helpers import (
+    DEFAULT_MAX_SHARD_COUNT,
+    DEFAULT_TARGET_SHARD_SIZE_IN_BYTES,
+    MAX_SHARD_COUNT_ENV_VAR,
+    TARGET_SHARD_SIZE_IN_BYTES_ENV_VAR,
+    CopyUnit,
+    get_max_shard_count,
+    get_target_shard_size_in_bytes,
+    is_listing_record_copied,
+    iter_top_level_listing_record_groups,
+    plan_copy_shards,
+    plan_incremental_copy_units,
+)
+from bssh_manager_tools.utils.listing_diff_helpers import ListingRecord
+
+# Globals
+SOURCE_FOLDER_URI = "icav2://source-project-id/analysis/output/Samples/"
+DESTINATION_FOLDER_URI = "icav2://destination-project-id/primary/run/20240207abcduuid/Samples/"
+
+SOURCE_LISTING_RECORDS = [
+    ListingRecord("SampleA/SampleA_R1_001.fastq.gz", 10, "etag-a1", "fil.a1"),
+    ListingRecord("SampleA/SampleA_R2_001.fastq.gz", 20, "etag-a2", "fil.a2"),
+    ListingRecord("SampleB/SampleB_R1_001.fastq.gz", 30, "etag-b1", "fil.b1"),
+    ListingRecord("SampleB/SampleB_R2_001.fastq.gz", 40, "etag-b2", "fil.b2"),
+    ListingRecord("SampleC/nested/SampleC_R1_001.fastq.gz", 50, "etag-c1", "fil.c1"),
+]
+
+
+def get_copy_units(sizes_in_bytes: List[int]) -> List[CopyUnit]:
+    return list(map(
+        lambda unit_iter_: CopyUnit(
+            source_uri=f"{SOURCE_FOLDER_URI}Sample{unit_iter_[0]:03d}/",
+            size_in_bytes=unit_iter_[1],
+            file_count=1
+        ),
+        enumerate(sizes_in_bytes)
+    ))
+
+
+def get_shard_sizes_in_bytes(copy_shards: List[List[CopyUnit]]) -> List[int]:
+    return list(map(
+        lambda copy_shard_iter_: sum(map(lambda copy_unit_iter_: copy_unit_iter_.size_in_bytes, copy_shard_iter_)),
+        copy_shards
+    ))
+
+
+def test_no_copy_units_plan_no_shards():
+    assert plan_copy_shards([], target_shard_size_in_bytes=100, max_shard_count=4) == []
+
+
+def test_shard_count_is_the_total_size_over_the_target_size():
+    copy_shards = plan_copy_shards(get_copy_units([100] * 10), target_shard_size_in_bytes=250, max_shard_count=16)
+
+    # 1000 bytes over a 250 byte target
+    assert len(copy_shards) == 4
+    assert sorted(get_shard_sizes_in_bytes(copy_shards)) == [200, 200, 300, 300]
+
+
+def test_shard_count_is_capped_by_the_max_shard_count_and_the_unit_count():
+    assert len(plan_copy_shards(get_copy_units([100] * 10), target_shard_size_in_bytes=1, max_shard_count=3)) == 3
+    assert len(plan_copy_shards(get_copy_units([100] * 2), target_shard_size_in_bytes=1, max_shard_count=16)) == 2
+
+
+def test_every_unit_is_placed_once_in_its_original_order():
+    copy_units = get_copy_units([5, 70, 3, 40, 40, 1, 90, 20])
+
+    copy_shards = plan_copy_shards(copy_units, target_shard_size_in_bytes=100, max_shard_count=16)
+
+    assert sorted(chain.from_iterable(copy_shards)) == sorted(copy_units)
+    for copy_shard in copy_shards:
+        assert copy_shard == sorted(copy_shard, key=copy_units.index)
+
+
+def test_shards_are_size_balanced():
+    copy_shards = plan_copy_shards(
+        get_copy_units([90, 70, 40, 40, 20, 5, 3, 1]), target_shard_size_in_bytes=100, max_shard_count=16
+    )
+
+    # 269 bytes over 3 shards, largest first onto the smallest shard
+    assert sorted(get_shard_sizes_in_bytes(copy_shards)) == [89, 90, 90]
+
+
+def test_a_single_oversized_unit_is_never_split():
+    copy_shards = plan_copy_shards(get_copy_units([1000, 10]), target_shard_size_in_bytes=100, max_shard_count=16)
+
+    assert get_shard_sizes_in_bytes(copy_shards) == [1000, 10]
+
+
+def test_shard_parameters_can_be_overridden(monkeypatch: pytest.MonkeyPatch):
+    assert get_target_shard_size_in_bytes() == DEFAULT_TARGET_SHARD_SIZE_IN_BYTES
+    assert get_max_shard_count() == DEFAULT_MAX_SHARD_COUNT
+
+    monkeypatch.setenv(TARGET_SHARD_SIZE_IN_BYTES_ENV_VAR, "1024")
+    monkeypatch.setenv(MAX_SHARD_COUNT_ENV_VAR, "0")
+
+    assert get_target_shard_size_in_bytes() == 1024
+    # Never fewer than one shard
+    assert get_max_shard_count() == 1
+
+
+def test_listing_records_are_grouped_by_their_top_level_entry():
+    listing_records = [
+        ListingRecord("stray.csv", 1, "etag-1", "fil.1"),
+        ListingRecord("SampleA/SampleA_R1_001.fastq.gz", 10, "etag-2", "fil.2"),
+        ListingRecord("SampleA/SampleA_R2_001.fastq.gz", 20, "etag-3", "fil.3"),
+        ListingRecord("SampleB/nested/SampleB_R1_001.fastq.gz", 30, "etag-4", "fil.4"),
+    ]
+
+    assert list(iter_top_level_listing_record_groups(listing_records)) == [
+        ("stray.csv", False, [listing_records[0]]),
+        ("SampleA", True, [
+            listing_records[1]._replace(relative_path="SampleA_R1_001.fastq.gz"),
+            listing_records[2]._replace(relative_path="SampleA_R2_001.fastq.gz"),
+        ]),
+        ("SampleB", True, [listing_records[3]._replace(relative_path="nested/SampleB_R1_001.fastq.gz")]),
+    ]
+
+
+def test_a_copy_is_checked_on_size_not_e_tag():
+    listing_record = SOURCE_LISTING_RECORDS[0]
+    assert is_listing_record_copied(listing_record, listing_record._replace(object_e_tag="etag-multipart"))
+    assert not is_listing_record_copied(listing_record, listing_record._replace(file_size_in_bytes=11))
+
+
+def test_an_up_to_date_destination_plans_nothing():
+    assert plan_incremental_copy_units(
+        source_listing_records=SOURCE_LISTING_RECORDS,
+        destination_listing_records=list(map(
+            lambda listing_record_iter_: listing_record_iter_._replace(object_e_tag="etag-multipart"),
+            SOURCE_LISTING_RECORDS
+        )),
+        source_folder_uri=SOURCE_FOLDER_URI,
+        destination_folder_uri=DESTINATION_FOLDER_URI
+    ) == {}
+
+
+def test_missing_and_size_changed_files_are_copied_file_by_file():
+    copy_units_by_destination_uri = plan_incremental_copy_units(
+        source_listing_records=SOURCE_LISTING_RECORDS,
+        destination_listing_records=[
+            SOURCE_LISTING_RECORDS[0],
+            SOURCE_LISTING_RECORDS[2]._replace(file_size_in_bytes=1),
+            SOURCE_LISTING_RECORDS[4],
+        ],
+        source_folder_uri=SOURCE_FOLDER_URI,
+        destination_folder_uri=DESTINATION_FOLDER_URI
+    )
+
+    assert copy_units_by_destination_uri == {
+        f"{DESTINATION_FOLDER_URI}SampleA/": [
+            CopyUnit(f"{SOURCE_FOLDER_URI}SampleA/SampleA_R2_001.fastq.gz", 20, 1),
+        ],
+        f"{DESTINATION_FOLDER_URI}SampleB/": [
+            CopyUnit(f"{SOURCE_FOLDER_URI}SampleB/SampleB_R1_001.fastq.gz", 30, 1),
+            CopyUnit(f"{SOURCE_FOLDER_URI}SampleB/SampleB_R2_001.fastq.gz", 40, 1),
+        ],
+    }
+
+
+def test_missing_subfolders_are_coalesced_into_folder_copies():
+    copy_units_by_destination_uri = plan_incremental_copy_units(
+        source_listing_records=SOURCE_LISTING_RECORDS,
+        destination_listing_records=[SOURCE_LISTING_RECORDS[0]],
+        source_folder_uri=SOURCE_FOLDER_URI,
+        destination_folder_uri=DESTINATION_FOLDER_URI
+    )
+
+    assert copy_units_by_destination_uri == {
+        f"{DESTINATION_FOLDER_URI}SampleA/": [
+            CopyUnit(f"{SOURCE_FOLDER_URI}SampleA/SampleA_R2_001.fastq.gz", 20, 1),
+        ],
+        # The top-most missing subfolder is copied as a whole
+        DESTINATION_FOLDER_URI: [
+            CopyUnit(f"{SOURCE_FOLDER_URI}SampleB/", 70, 2),
+            CopyUnit(f"{SOURCE_FOLDER_URI}SampleC/", 50, 1),
+        ],
+    }
+
+
+def test_missing_subfolders_are_not_coalesced_when_disabled():
+    copy_units_by_destination_uri = plan_incremental_copy_units(
+        source_listing_records=SOURCE_LISTING_RECORDS,
+        destination_listing_records=[SOURCE_LISTING_RECORDS[0]],
+        source_folder_uri=SOURCE_FOLDER_URI,
+        destination_folder_uri=DESTINATION_FOLDER_URI,
+        coalesce_missing_folders=False
+    )
+
+    assert sum(map(len, copy_units_by_destination_uri.values())) == 4
+    assert copy_units_by_destination_uri[f"{DESTINATION_FOLDER_URI}SampleC/nested/"] == [
+        CopyUnit(f"{SOURCE_FOLDER_URI}SampleC/nested/SampleC_R1_001.fastq.gz", 50, 1),
+    ]
+
+
+def test_a_missing_root_folder_is_copied_as_a_whole_into_the_parent():
+    copy_units_by_destination_uri = plan_incremental_copy_units(
+        source_listing_records=SOURCE_LISTING_RECORDS,
+        destination_listing_records=[],
+        source_folder_uri=SOURCE_FOLDER_URI,
+        destination_folder_uri=DESTINATION_FOLDER_URI,
+        coalesce_missing_root_folder=True
+    )
+
+    assert copy_units_by_destination_uri == {
+        "icav2://destination-project-id/primary/run/20240207abcduuid/": [
+            CopyUnit(SOURCE_FOLDER_URI, 150, 5),
+        ],
+    }
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the filemanager sync tracker helpers, against the in-memory tracker
+"""
+
+# Standard libraries
+from typing import Dict, Iterator, List
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils.filemanager_sync_tracker_helpers import (
+    InMemorySyncTracker,
+    get_tracked_run,
+    record_object_created,
+    set_expected_missing_keys,
+    set_task_success_sender,
+)
+
+# Globals
+PORTAL_RUN_ID = "20240207abcduuid"
+TRACKING_ID = "execution-name"
+BUCKET = "bucket"
+S3_PREFIX = f"s3://{BUCKET}/primary/run/{PORTAL_RUN_ID}/"
+
+
+def get_keys(file_names: List[str]) -> List[str]:
+    return list(map(lambda file_name_iter_: f"primary/run/{PORTAL_RUN_ID}/{file_name_iter_}", file_names))
+
+
+@pytest.fixture
+def task_success_outputs() -> Iterator[Dict[str, Dict]]:
+    """
+    The task successes sent, by task token
+    """
+    task_success_outputs: Dict[str, Dict] = {}
+    set_task_success_sender(lambda task_token, output: task_success_outputs.__setitem__(task_token, output))
+    yield task_success_outputs
+    set_task_success_sender(None)
+
+
+@pytest.fixture
+def sync_tracker() -> InMemorySyncTracker:
+    sync_tracker = InMemorySyncTracker()
+    sync_tracker.register_run(portal_run_id=PORTAL_RUN_ID, tracking_id=TRACKING_ID, s3_prefix=S3_PREFIX)
+    return sync_tracker
+
+
+def test_files_already_in_place_do_not_hold_the_wait(sync_tracker, task_success_outputs):
+    # An incremental copy, only new.fastq.gz is copied, the other files were in place before the run was registered
+    run = get_tracked_run(sync_tracker, PORTAL_RUN_ID, TRACKING_ID)
+    run = set_expected_missing_keys(sync_tracker, run, get_keys(["new.fastq.gz"]), task_token="token")
+
+    assert run.expected_count == 1
+    assert not run.is_complete
+
+    record_object_created(sync_tracker, BUCKET, get_keys(["new.fastq.gz"])[0])
+
+    assert task_success_outputs["token"]["isSynced"]
+
+
+def test_missing_keys_with_an_event_are_not_waited_on(sync_tracker, task_success_outputs):
+    # The events arrive before the filemanager has ingested the objects
+    for key in get_keys(["a.fastq.gz", "b.fastq.gz", "c.fastq.gz"]):
+        record_object_created(sync_tracker, BUCKET, key)
+
+    run = get_tracked_run(sync_tracker, PORTAL_RUN_ID, TRACKING_ID)
+    run = set_expected_missing_keys(
+        sync_tracker, run, get_keys(["b.fastq.gz", "c.fastq.gz", "d.fastq.gz"]), task_token="token"
+    )
+
+    # Only d.fastq.gz is still to come
+    assert run.synced_count == 3
+    assert run.expected_count == 4
+
+    # A repeated event is not counted twice
+    record_object_created(sync_tracker, BUCKET, get_keys(["c.fastq.gz"])[0])
+    assert "token" not in task_success_outputs
+
+    record_object_created(sync_tracker, BUCKET, get_keys(["d.fastq.gz"])[0])
+    assert task_success_outputs["token"] == {"isSynced": True, "syncedCount": 4, "expectedCount": 4}
+
+
+def test_nothing_missing_is_complete_straight_away(sync_tracker, task_success_outputs):
+
+    run = set_expected_missing_keys(
+        sync_tracker, get_tracked_run(sync_tracker, PORTAL_RUN_ID, TRACKING_ID), [], task_token="token"
+    )
+
+    assert run.is_complete
+
+
+def test_a_new_execution_is_tracked_separately(sync_tracker):
+
+    assert get_tracked_run(sync_tracker, PORTAL_RUN_ID, "another-execution-name") is None
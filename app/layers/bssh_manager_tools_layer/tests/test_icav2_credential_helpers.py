@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the ICAv2 access token cache, against an in-memory secrets backend
+"""
+
+# Standard libraries
+import base64
+import json
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import sleep
+from types import ModuleType
+from typing import Iterator, List
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils import icav2_credential_helpers
+from bssh_manager_tools.utils.icav2_credential_helpers import (
+    ICAV2_ACCESS_TOKEN_ENV_VAR,
+    ICAV2_ACCESS_TOKEN_SECRET_ID_ENV_VAR,
+    ICAV2_BASE_URL_ENV_VAR,
+    REFRESH_MARGIN_SECONDS,
+    SecretsBackend,
+    get_cached_icav2_access_token,
+    get_jwt_expiry_epoch,
+    set_cached_icav2_env_vars,
+    set_secrets_backend,
+)
+
+# Globals
+SECRET_ID = "IcaV2AccessToken"
+NOW_EPOCH = 1_700_000_000.0
+TOKEN_LIFETIME_SECONDS = 3600
+
+
+def get_jwt(expiry_epoch: float, subject: str = "service-user") -> str:
+    """
+    An unsigned JWT with an 'exp' claim
+    """
+    def _encode(obj) -> str:
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).decode().rstrip("=")
+
+    return ".".join([_encode({"alg": "none"}), _encode({"sub": subject, "exp": expiry_epoch}), "signature"])
+
+
+class InMemorySecretsBackend(SecretsBackend):
+    """
+    Hand out the next token on each read, counting the reads
+    """
+
+    def __init__(self, tokens: List[str], read_delay_seconds: float = 0):
+        self.tokens = tokens
+        self.read_delay_seconds = read_delay_seconds
+        self.read_count = 0
+        self._read_count_lock = Lock()
+
+    def get_secret_value(self, secret_id: str) -> str:
+        assert secret_id == SECRET_ID
+        # Widen the window in which a second caller could also miss the cache
+        sleep(self.read_delay_seconds)
+        with self._read_count_lock:
+            token = self.tokens[min(self.read_count, len(self.tokens) - 1)]
+            self.read_count += 1
+        return token
+
+
+@pytest.fixture
+def now_epoch(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """
+    The current time, as a single item list that the test can move forward
+    """
+    now_epoch = [NOW_EPOCH]
+    monkeypatch.setattr(icav2_credential_helpers, "time", lambda: now_epoch[0])
+    return now_epoch
+
+
+@pytest.fixture(autouse=True)
+def secret_id_env_var(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv(ICAV2_ACCESS_TOKEN_SECRET_ID_ENV_VAR, SECRET_ID)
+    yield
+    # Clear the module level cache for the next test
+    set_secrets_backend(None)
+
+
+def test_jwt_expiry_is_read_from_the_exp_claim():
+    assert get_jwt_expiry_epoch(get_jwt(NOW_EPOCH + 60)) == NOW_EPOCH + 60
+    assert get_jwt_expiry_epoch("not-a-jwt") is None
+
+
+def test_cached_token_is_reused(now_epoch: List[float]):
+    secrets_backend = InMemorySecretsBackend([get_jwt(NOW_EPOCH + TOKEN_LIFETIME_SECONDS)])
+    set_secrets_backend(secrets_backend)
+
+    first_token = get_cached_icav2_access_token()
+    now_epoch[0] += TOKEN_LIFETIME_SECONDS - REFRESH_MARGIN_SECONDS - 1
+
+    assert get_cached_icav2_access_token() == first_token
+    assert secrets_backend.read_count == 1
+
+
+def test_token_is_refreshed_near_its_expiry(now_epoch: List[float]):
+    first_token = get_jwt(NOW_EPOCH + TOKEN_LIFETIME_SECONDS, subject="first")
+    second_token = get_jwt(NOW_EPOCH + 2 * TOKEN_LIFETIME_SECONDS, subject="second")
+    secrets_backend = InMemorySecretsBackend([first_token, second_token])
+    set_secrets_backend(secrets_backend)
+
+    assert get_cached_icav2_access_token() == first_token
+    now_epoch[0] += TOKEN_LIFETIME_SECONDS - REFRESH_MARGIN_SECONDS
+
+    assert get_cached_icav2_access_token() == second_token
+    assert secrets_backend.read_count == 2
+
+
+def test_token_without_an_expiry_is_not_cached(now_epoch: List[float]):
+    secrets_backend = InMemorySecretsBackend(["not-a-jwt"])
+    set_secrets_backend(secrets_backend)
+
+    get_cached_icav2_access_token()
+    get_cached_icav2_access_token()
+
+    assert secrets_backend.read_count == 2
+
+
+def test_concurrent_callers_fetch_the_token_once(now_epoch: List[float]):
+    secrets_backend = InMemorySecretsBackend(
+        [get_jwt(NOW_EPOCH + TOKEN_LIFETIME_SECONDS)],
+        read_delay_seconds=0.05
+    )
+    set_secrets_backend(secrets_backend)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        access_tokens = list(executor.map(lambda _: get_cached_icav2_access_token(), range(32)))
+
+    assert len(set(access_tokens)) == 1
+    assert secrets_backend.read_count == 1
+
+
+def test_a_new_token_clears_the_wrapica_configuration(monkeypatch: pytest.MonkeyPatch, now_epoch: List[float]):
+    first_token = get_jwt(NOW_EPOCH + TOKEN_LIFETIME_SECONDS, subject="first")
+    second_token = get_jwt(NOW_EPOCH + 2 * TOKEN_LIFETIME_SECONDS, subject="second")
+    set_secrets_backend(InMemorySecretsBackend([first_token, second_token]))
+
+    wrapica_configuration = ModuleType("wrapica.utils.configuration")
+    monkeypatch.setitem(icav2_credential_helpers.sys.modules, "wrapica.utils.configuration", wrapica_configuration)
+    monkeypatch.delenv(ICAV2_ACCESS_TOKEN_ENV_VAR, raising=False)
+    monkeypatch.delenv(ICAV2_BASE_URL_ENV_VAR, raising=False)
+
+    # A new token, the cached configuration is cleared
+    wrapica_configuration.ICAV2_CONFIGURATION = "configuration"
+    set_cached_icav2_env_vars()
+    assert icav2_credential_helpers.environ[ICAV2_ACCESS_TOKEN_ENV_VAR] == first_token
+    assert icav2_credential_helpers.environ[ICAV2_BASE_URL_ENV_VAR]
+    assert wrapica_configuration.ICAV2_CONFIGURATION is None
+
+    # The same token, the cached configuration is kept
+    wrapica_configuration.ICAV2_CONFIGURATION = "configuration"
+    set_cached_icav2_env_vars()
+    assert wrapica_configuration.ICAV2_CONFIGURATION == "configuration"
+
+    # A refreshed token, the cached configuration is cleared again
+    now_epoch[0] += TOKEN_LIFETIME_SECONDS
+    set_cached_icav2_env_vars()
+    assert icav2_credential_helpers.environ[ICAV2_ACCESS_TOKEN_ENV_VAR] == second_token
+    assert wrapica_configuration.ICAV2_CONFIGURATION is None
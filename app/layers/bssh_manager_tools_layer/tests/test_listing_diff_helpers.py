@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the streaming listing diff
+"""
+
+# Standard libraries
+from random import Random
+from typing import List
+
+# Local libraries
+from bssh_manager_tools.utils.listing_diff_helpers import (
+    ListingRecord,
+    diff_listing_records,
+    listing_record_sort_key,
+)
+
+
+def get_listing_records(file_count: int) -> List[ListingRecord]:
+    return list(map(
+        lambda file_index_iter_: ListingRecord(
+            relative_path=f"Sample{file_index_iter_ // 4:03d}/file_{file_index_iter_ % 4}.fastq.gz",
+            file_size_in_bytes=1000 + file_index_iter_,
+            object_e_tag=f"etag-{file_index_iter_}",
+            data_id=f"fil.{file_index_iter_}",
+        ),
+        range(file_count)
+    ))
+
+
+def test_identical_listings_have_no_differences():
+    listing_records = get_listing_records(100)
+
+    listing_diff = diff_listing_records(listing_records, list(listing_records))
+
+    assert not listing_diff.has_differences()
+    assert listing_diff.source_count == listing_diff.destination_count == listing_diff.matched_count == 100
+    # Listings in the same order are matched record by record
+    assert listing_diff.peak_pending_count == 1
+
+
+def test_data_ids_are_not_compared():
+    source_records = get_listing_records(10)
+    destination_records = list(map(
+        lambda listing_record_iter_: listing_record_iter_._replace(data_id="fil.destination"),
+        source_records
+    ))
+
+    assert not diff_listing_records(source_records, destination_records).has_differences()
+
+
+def test_missing_and_extra_records():
+    listing_records = get_listing_records(10)
+    extra_record = ListingRecord("Undetermined/extra.fastq.gz", 10, "etag-extra", "fil.extra")
+
+    listing_diff = diff_listing_records(
+        listing_records,
+        listing_records[:3] + listing_records[5:] + [extra_record]
+    )
+
+    assert listing_diff.missing == [listing_records[3].relative_path, listing_records[4].relative_path]
+    assert listing_diff.extra == [extra_record.relative_path]
+    assert listing_diff.matched_count == 8
+    assert listing_diff.has_missing_extra_or_size_mismatches()
+
+
+def test_size_changed_record():
+    source_records = get_listing_records(5)
+    destination_records = list(source_records)
+    destination_records[2] = destination_records[2]._replace(file_size_in_bytes=1, object_e_tag="etag-other")
+
+    listing_diff = diff_listing_records(source_records, destination_records)
+
+    # A size mismatch is not also reported as an e-tag mismatch
+    assert listing_diff.size_mismatched == [(source_records[2].relative_path, source_records[2].file_size_in_bytes, 1)]
+    assert listing_diff.e_tag_mismatched == []
+    assert listing_diff.has_missing_extra_or_size_mismatches()
+
+
+def test_e_tag_changed_record():
+    source_records = get_listing_records(5)
+    destination_records = list(source_records)
+    destination_records[4] = destination_records[4]._replace(object_e_tag="etag-multipart-2")
+
+    listing_diff = diff_listing_records(source_records, destination_records)
+
+    assert listing_diff.e_tag_mismatched == [
+        (source_records[4].relative_path, source_records[4].object_e_tag, "etag-multipart-2")
+    ]
+    assert listing_diff.size_mismatched == []
+    # E-tag mismatches alone are left to the caller to decide on
+    assert not listing_diff.has_missing_extra_or_size_mismatches()
+    assert listing_diff.has_differences()
+
+
+def test_unsorted_listings_give_the_same_diff_as_sorted_listings():
+    source_records = get_listing_records(200)
+    destination_records = source_records[:150] + [
+        source_records[150]._replace(file_size_in_bytes=0),
+        source_records[151]._replace(object_e_tag="etag-other"),
+        ListingRecord("Reports/extra.csv", 10, "etag-extra", "fil.extra"),
+    ]
+
+    sorted_listing_diff = diff_listing_records(
+        sorted(source_records, key=listing_record_sort_key),
+        sorted(destination_records, key=listing_record_sort_key)
+    )
+
+    random = Random(42)
+    shuffled_source_records, shuffled_destination_records = list(source_records), list(destination_records)
+    random.shuffle(shuffled_source_records)
+    random.shuffle(shuffled_destination_records)
+    shuffled_listing_diff = diff_listing_records(shuffled_source_records, shuffled_destination_records)
+
+    for listing_diff in (sorted_listing_diff, shuffled_listing_diff):
+        assert listing_diff.missing == sorted(map(
+            lambda listing_record_iter_: listing_record_iter_.relative_path,
+            source_records[152:]
+        ))
+        assert listing_diff.extra == ["Reports/extra.csv"]
+        assert listing_diff.matched_count == 152
+    assert sorted(shuffled_listing_diff.size_mismatched) == sorted(sorted_listing_diff.size_mismatched)
+    assert sorted(shuffled_listing_diff.e_tag_mismatched) == sorted(sorted_listing_diff.e_tag_mismatched)
+    # Shuffled listings hold more records in memory than sorted listings
+    assert shuffled_listing_diff.peak_pending_count > sorted_listing_diff.peak_pending_count
+
+
+def test_duplicate_paths_are_matched_one_to_one():
+    listing_record = get_listing_records(1)[0]
+
+    # Listed twice in the source (i.e. repeated across two pages), once in the destination
+    listing_diff = diff_listing_records([listing_record, listing_record], [listing_record])
+    assert listing_diff.missing == [listing_record.relative_path]
+    assert listing_diff.matched_count == 1
+
+    # Listed twice on both sides, before either side's counterpart turns up
+    listing_diff = diff_listing_records(
+        [listing_record, listing_record],
+        [ListingRecord("other", 1, "etag", "fil.other"), listing_record, listing_record]
+    )
+    assert listing_diff.missing == []
+    assert listing_diff.extra == ["other"]
+    assert listing_diff.matched_count == 2
+
+    # Listed twice in the destination, the second with a different size
+    listing_diff = diff_listing_records(
+        [listing_record],
+        [listing_record, listing_record._replace(file_size_in_bytes=0)]
+    )
+    assert listing_diff.extra == [listing_record.relative_path]
+    assert listing_diff.size_mismatched == []
+
+
+def test_summary_lists_every_category():
+    source_records = get_listing_records(3)
+    destination_records = [
+        source_records[0]._replace(file_size_in_bytes=1),
+        source_records[1]._replace(object_e_tag="etag-other"),
+        ListingRecord("extra", 1, "etag", "fil.extra"),
+    ]
+
+    summary = diff_listing_records(source_records, destination_records).summary(max_listed_per_category=1)
+
+    assert "Missing: 1, Extra: 1, Size mismatches: 1, E-tag mismatches: 1" in summary
+    for category_name in ("Missing from destination", "Extra in destination", "Size mismatches", "E-tag mismatches"):
+        assert category_name in summary
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the EMF call metrics, against the local metrics sink
+"""
+
+# Standard libraries
+from typing import Iterator
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils.metrics_helpers import (
+    CALL_NAME_DIMENSION,
+    HANDLER_NAME_DIMENSION,
+    METRIC_UNITS,
+    METRICS_NAMESPACE_ENV_VAR,
+    PORTAL_RUN_ID_PROPERTY,
+    LocalMetricsSink,
+    instrument_call,
+    record_call,
+    set_metrics_context,
+    set_metrics_sink,
+)
+
+# Globals
+HANDLER_NAME = "validate_copy_job"
+PORTAL_RUN_ID = "20240207abcduuid"
+
+
+@pytest.fixture
+def metrics_sink() -> Iterator[LocalMetricsSink]:
+    metrics_sink = LocalMetricsSink()
+    set_metrics_sink(metrics_sink)
+    set_metrics_context(handler_name=HANDLER_NAME, portal_run_id=PORTAL_RUN_ID)
+    yield metrics_sink
+    set_metrics_sink(None)
+    set_metrics_context(handler_name=None, portal_run_id=None)
+
+
+def test_emf_line_shape(monkeypatch: pytest.MonkeyPatch, metrics_sink: LocalMetricsSink):
+    monkeypatch.setenv(METRICS_NAMESPACE_ENV_VAR, "Test/Namespace")
+
+    with record_call("list_project_data") as call_metrics:
+        call_metrics.add_page(100)
+        call_metrics.add_page(20)
+
+    assert len(metrics_sink.emf_dicts) == 1
+    emf_dict = metrics_sink.emf_dicts[0]
+
+    cloudwatch_metrics = emf_dict["_aws"]["CloudWatchMetrics"]
+    assert isinstance(emf_dict["_aws"]["Timestamp"], int)
+    assert len(cloudwatch_metrics) == 1
+    assert cloudwatch_metrics[0]["Namespace"] == "Test/Namespace"
+    assert cloudwatch_metrics[0]["Dimensions"] == [[HANDLER_NAME_DIMENSION, CALL_NAME_DIMENSION]]
+    assert cloudwatch_metrics[0]["Metrics"] == list(map(
+        lambda metric_iter_: {"Name": metric_iter_[0], "Unit": metric_iter_[1]},
+        METRIC_UNITS.items()
+    ))
+
+    # Every dimension and metric is a top-level member of the line
+    assert emf_dict[HANDLER_NAME_DIMENSION] == HANDLER_NAME
+    assert emf_dict[CALL_NAME_DIMENSION] == "list_project_data"
+    assert emf_dict[PORTAL_RUN_ID_PROPERTY] == PORTAL_RUN_ID
+    assert set(METRIC_UNITS).issubset(emf_dict)
+    assert emf_dict["PageCount"] == 2
+    assert emf_dict["ItemCount"] == 120
+    assert emf_dict["ErrorCount"] == 0
+    assert emf_dict["LatencyMs"] >= 0
+
+
+def test_portal_run_id_is_a_property_not_a_dimension(metrics_sink: LocalMetricsSink):
+    with record_call("get_secret_value"):
+        pass
+
+    dimensions = metrics_sink.emf_dicts[0]["_aws"]["CloudWatchMetrics"][0]["Dimensions"]
+    assert PORTAL_RUN_ID_PROPERTY not in dimensions[0]
+
+
+def test_a_raising_call_is_counted_as_an_error_and_still_emitted(metrics_sink: LocalMetricsSink):
+    with pytest.raises(ValueError):
+        with record_call("crawl_filemanager_sync"):
+            raise ValueError("filemanager is down")
+
+    assert metrics_sink.get_metric_values("ErrorCount", call_name="crawl_filemanager_sync") == [1]
+
+
+def test_instrumented_function_emits_one_line_per_call(metrics_sink: LocalMetricsSink):
+    @instrument_call("get_thing")
+    def get_thing(thing_id: str) -> str:
+        return thing_id
+
+    assert get_thing("a") == "a"
+    assert get_thing("b") == "b"
+
+    assert len(metrics_sink.get_metric_values("LatencyMs", call_name="get_thing")) == 2
+
+
+def test_handler_name_falls_back_to_the_function_name(
+    monkeypatch: pytest.MonkeyPatch, metrics_sink: LocalMetricsSink
+):
+    set_metrics_context(handler_name=None)
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "some-function")
+
+    with record_call("get_thing"):
+        pass
+
+    assert metrics_sink.emf_dicts[0][HANDLER_NAME_DIMENSION] == "some-function"
+    assert metrics_sink.emf_dicts[0][PORTAL_RUN_ID_PROPERTY] is None
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the paged, resumable portal run id patching, against an in-memory filemanager
+"""
+
+# Standard libraries
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils import portal_run_id_attribute_helpers
+from bssh_manager_tools.utils.filemanager_sync_helpers import FilemanagerRecord
+from bssh_manager_tools.utils.portal_run_id_attribute_helpers import (
+    PortalRunIdPatchingCursor,
+    PortalRunIdPatchingTransientError,
+    delete_portal_run_id_patching_cursor,
+    get_portal_run_id_patching_cursor_key,
+    patch_portal_run_id_attributes,
+    read_portal_run_id_patching_cursor,
+    write_portal_run_id_patching_cursor,
+)
+from bssh_manager_tools.utils.store_helpers import LocalFileStore
+
+# Globals
+BUCKET = "bucket"
+PORTAL_RUN_ID = "20240207abcduuid"
+KEY_PREFIX = f"primary/run/{PORTAL_RUN_ID}/"
+OUTPUT_URI = f"s3://{BUCKET}/{KEY_PREFIX}"
+CACHE_KEY = "execution-name"
+ROWS_PER_PAGE = 4
+RECORD_COUNT = 10
+
+
+class InMemoryFilemanager:
+    """
+    The filemanager records under the key prefix, listed in pages of a fixed size,
+    patches update the records in place so that the pages do not shift
+    """
+
+    def __init__(self, record_count: int):
+        self.records: Dict[str, FilemanagerRecord] = {
+            f"s3-object-{record_index:03d}": FilemanagerRecord(
+                key=f"{KEY_PREFIX}file_{record_index:03d}.fastq.gz",
+                size=record_index,
+                ingest_id=f"ingest-{record_index}",
+                s3_object_id=f"s3-object-{record_index:03d}",
+            )
+            for record_index in range(record_count)
+        }
+        self.patched_s3_object_ids: List[str] = []
+        self.failing_s3_object_id: Optional[str] = None
+        self.failing_error: Exception = ConnectionError("filemanager is unavailable")
+
+    def iter_filemanager_record_pages(
+        self, bucket: str, key_prefix: str, rows_per_page: int, start_page_number: int
+    ) -> Iterator[List[FilemanagerRecord]]:
+        assert (bucket, key_prefix) == (BUCKET, KEY_PREFIX)
+        s3_object_ids = sorted(self.records)
+        for page_index in range(start_page_number - 1, -(-len(s3_object_ids) // rows_per_page)):
+            yield list(map(
+                self.records.get,
+                s3_object_ids[page_index * rows_per_page:(page_index + 1) * rows_per_page]
+            ))
+
+    def patch_portal_run_id_attribute(self, s3_object_id: str, portal_run_id: str):
+        if s3_object_id == self.failing_s3_object_id:
+            self.failing_s3_object_id = None
+            raise self.failing_error
+        self.records[s3_object_id] = self.records[s3_object_id]._replace(portal_run_id=portal_run_id)
+        self.patched_s3_object_ids.append(s3_object_id)
+
+
+@pytest.fixture
+def filemanager(monkeypatch: pytest.MonkeyPatch) -> InMemoryFilemanager:
+    filemanager = InMemoryFilemanager(RECORD_COUNT)
+    monkeypatch.setattr(
+        portal_run_id_attribute_helpers, "iter_filemanager_record_pages", filemanager.iter_filemanager_record_pages
+    )
+    monkeypatch.setattr(
+        portal_run_id_attribute_helpers, "patch_portal_run_id_attribute", filemanager.patch_portal_run_id_attribute
+    )
+    return filemanager
+
+
+def patch_from_the_store(store: LocalFileStore, **kwargs) -> PortalRunIdPatchingCursor:
+    """
+    Patch as the lambda does, resuming from and saving the cursor in the store
+    """
+    return patch_portal_run_id_attributes(
+        bucket=BUCKET,
+        key_prefix=KEY_PREFIX,
+        portal_run_id=PORTAL_RUN_ID,
+        cursor=read_portal_run_id_patching_cursor(store, OUTPUT_URI, CACHE_KEY),
+        max_workers=1,
+        rows_per_page=ROWS_PER_PAGE,
+        on_page_patched=lambda cursor_iter_: write_portal_run_id_patching_cursor(
+            store, OUTPUT_URI, CACHE_KEY, cursor_iter_
+        ),
+        **kwargs
+    )
+
+
+def test_every_record_is_patched_once(filemanager: InMemoryFilemanager):
+    cursor = patch_portal_run_id_attributes(
+        bucket=BUCKET, key_prefix=KEY_PREFIX, portal_run_id=PORTAL_RUN_ID, rows_per_page=ROWS_PER_PAGE
+    )
+
+    assert cursor.to_dict() == {"isComplete": True, "nextPageNumber": 4, "patchedCount": 10, "skippedCount": 0}
+    assert sorted(filemanager.patched_s3_object_ids) == sorted(filemanager.records)
+
+
+def test_records_that_already_carry_the_portal_run_id_are_skipped(filemanager: InMemoryFilemanager):
+    for s3_object_id in ["s3-object-001", "s3-object-005"]:
+        filemanager.records[s3_object_id] = filemanager.records[s3_object_id]._replace(portal_run_id=PORTAL_RUN_ID)
+    # A record with another portal run id is patched over
+    filemanager.records["s3-object-002"] = filemanager.records["s3-object-002"]._replace(portal_run_id="other")
+
+    cursor = patch_portal_run_id_attributes(
+        bucket=BUCKET, key_prefix=KEY_PREFIX, portal_run_id=PORTAL_RUN_ID, rows_per_page=ROWS_PER_PAGE
+    )
+
+    assert (cursor.patched_count, cursor.skipped_count) == (8, 2)
+    assert "s3-object-001" not in filemanager.patched_s3_object_ids
+    assert "s3-object-002" in filemanager.patched_s3_object_ids
+
+
+def test_patching_stops_between_pages_and_resumes_from_the_cursor(
+    tmp_path: Path, filemanager: InMemoryFilemanager
+):
+    store = LocalFileStore(tmp_path)
+
+    # Out of time after the first page
+    cursor = patch_from_the_store(store, get_remaining_time_seconds=lambda: 0.0)
+    assert cursor.to_dict() == {"isComplete": False, "nextPageNumber": 2, "patchedCount": 4, "skippedCount": 0}
+    assert read_portal_run_id_patching_cursor(store, OUTPUT_URI, CACHE_KEY) == cursor
+
+    # The next invocation carries on from the second page
+    cursor = patch_from_the_store(store, get_remaining_time_seconds=lambda: 900.0)
+    assert cursor.to_dict() == {"isComplete": True, "nextPageNumber": 4, "patchedCount": 10, "skippedCount": 0}
+    assert len(filemanager.patched_s3_object_ids) == len(set(filemanager.patched_s3_object_ids)) == RECORD_COUNT
+
+
+def test_a_retry_after_a_failed_patch_skips_the_records_already_patched(
+    tmp_path: Path, filemanager: InMemoryFilemanager
+):
+    store = LocalFileStore(tmp_path)
+    # The third record of the second page fails
+    filemanager.failing_s3_object_id = "s3-object-006"
+
+    # Raised as the error the step function retries on
+    with pytest.raises(PortalRunIdPatchingTransientError, match="page 2"):
+        patch_from_the_store(store)
+
+    # The cursor was saved after the first page
+    assert read_portal_run_id_patching_cursor(store, OUTPUT_URI, CACHE_KEY).next_page_number == 2
+
+    cursor = patch_from_the_store(store)
+
+    # The two records of the second page patched before the failure are skipped
+    assert cursor.to_dict() == {"isComplete": True, "nextPageNumber": 4, "patchedCount": 8, "skippedCount": 2}
+    assert len(filemanager.patched_s3_object_ids) == len(set(filemanager.patched_s3_object_ids)) == RECORD_COUNT
+
+
+def test_a_deterministic_failure_is_not_raised_as_transient(filemanager: InMemoryFilemanager):
+    filemanager.failing_s3_object_id = "s3-object-006"
+    filemanager.failing_error = ValueError("s3 object s3-object-006 has no such attribute path")
+
+    with pytest.raises(ValueError):
+        patch_portal_run_id_attributes(
+            bucket=BUCKET, key_prefix=KEY_PREFIX, portal_run_id=PORTAL_RUN_ID, rows_per_page=ROWS_PER_PAGE
+        )
+
+
+def test_cursors_are_keyed_on_the_output_uri_and_cache_key(tmp_path: Path):
+    store = LocalFileStore(tmp_path)
+
+    assert (
+        get_portal_run_id_patching_cursor_key(OUTPUT_URI, CACHE_KEY) ==
+        get_portal_run_id_patching_cursor_key(OUTPUT_URI.rstrip("/"), CACHE_KEY)
+    )
+    assert (
+        get_portal_run_id_patching_cursor_key(OUTPUT_URI, CACHE_KEY) !=
+        get_portal_run_id_patching_cursor_key(OUTPUT_URI, "another-execution-name")
+    )
+
+    write_portal_run_id_patching_cursor(store, OUTPUT_URI, CACHE_KEY, PortalRunIdPatchingCursor(next_page_number=3))
+    assert read_portal_run_id_patching_cursor(store, OUTPUT_URI, "another-execution-name") is None
+
+    delete_portal_run_id_patching_cursor(store, OUTPUT_URI, CACHE_KEY)
+    assert read_portal_run_id_patching_cursor(store, OUTPUT_URI, CACHE_KEY) is None
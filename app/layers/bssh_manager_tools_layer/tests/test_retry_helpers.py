@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+"""
+Tests for retrying a request on a transient error, with sleep patched out
+"""
+
+# Standard libraries
+from types import SimpleNamespace
+from typing import Iterator, List
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils import retry_helpers
+from bssh_manager_tools.utils.metrics_helpers import LocalMetricsSink, record_call, set_metrics_sink
+from bssh_manager_tools.utils.retry_helpers import (
+    DEFAULT_MAX_REQUEST_ATTEMPTS,
+    MAX_DELAY_SECONDS,
+    MAX_REQUEST_ATTEMPTS_ENV_VAR,
+    call_with_retries,
+    is_transient_error,
+)
+
+
+class ApiException(Exception):
+    """
+    Like a libica ApiException, the status code is on the exception
+    """
+
+    def __init__(self, status: int):
+        super().__init__(f"({status})")
+        self.status = status
+
+
+class HTTPError(OSError):
+    """
+    Like a requests HTTPError, an OSError with the status code on its response
+    """
+
+    def __init__(self, status_code: int):
+        super().__init__(f"{status_code} error")
+        self.response = SimpleNamespace(status_code=status_code)
+
+
+class FailingRequest:
+    """
+    Raise each of the errors in turn, then return the result
+    """
+
+    def __init__(self, errors: List[Exception], result: str = "page"):
+        self.errors = list(errors)
+        self.result = result
+        self.call_count = 0
+
+    def __call__(self) -> str:
+        self.call_count += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+@pytest.fixture(autouse=True)
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """
+    The delays slept for, without sleeping
+    """
+    sleeps: List[float] = []
+    monkeypatch.setattr(retry_helpers, "sleep", sleeps.append)
+    return sleeps
+
+
+@pytest.fixture
+def metrics_sink() -> Iterator[LocalMetricsSink]:
+    metrics_sink = LocalMetricsSink()
+    set_metrics_sink(metrics_sink)
+    yield metrics_sink
+    set_metrics_sink(None)
+
+
+@pytest.mark.parametrize("error", [
+    ApiException(429),
+    ApiException(500),
+    ApiException(503),
+    HTTPError(502),
+    HTTPError(504),
+    ConnectionResetError(),
+    TimeoutError(),
+])
+def test_transient_errors_are_retried(error: Exception, sleeps: List[float]):
+    failing_request = FailingRequest([error])
+
+    assert call_with_retries(failing_request) == "page"
+    assert failing_request.call_count == 2
+    assert len(sleeps) == 1
+
+
+@pytest.mark.parametrize("error", [
+    ApiException(400),
+    ApiException(404),
+    HTTPError(403),
+    HTTPError(404),
+    ValueError("bad page"),
+])
+def test_other_errors_are_raised_straight_away(error: Exception, sleeps: List[float]):
+    failing_request = FailingRequest([error])
+
+    with pytest.raises(type(error)):
+        call_with_retries(failing_request)
+    assert failing_request.call_count == 1
+    assert sleeps == []
+
+
+def test_a_404_with_an_oserror_base_is_not_transient():
+    # The status code wins over the exception type
+    assert not is_transient_error(HTTPError(404))
+    assert is_transient_error(HTTPError(429))
+
+
+def test_retries_are_counted_on_the_call_metrics(metrics_sink: LocalMetricsSink):
+    with record_call("list_project_data") as call_metrics:
+        call_with_retries(
+            FailingRequest([ApiException(429), ApiException(503)]),
+            call_metrics=call_metrics
+        )
+
+    assert metrics_sink.get_metric_values("RetryCount", call_name="list_project_data") == [2]
+    assert metrics_sink.get_metric_values("ErrorCount", call_name="list_project_data") == [0]
+
+
+def test_the_last_error_is_raised_after_the_default_attempts(sleeps: List[float]):
+    failing_request = FailingRequest([ApiException(500)] * 10)
+
+    with pytest.raises(ApiException):
+        call_with_retries(failing_request)
+    assert failing_request.call_count == DEFAULT_MAX_REQUEST_ATTEMPTS
+    assert len(sleeps) == DEFAULT_MAX_REQUEST_ATTEMPTS - 1
+    assert all(map(lambda sleep_iter_: 0 <= sleep_iter_ <= MAX_DELAY_SECONDS, sleeps))
+
+
+def test_max_attempts_env_var_is_honoured(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(MAX_REQUEST_ATTEMPTS_ENV_VAR, "2")
+    failing_request = FailingRequest([ApiException(500)] * 10)
+
+    with pytest.raises(ApiException):
+        call_with_retries(failing_request)
+    assert failing_request.call_count == 2
+
+
+def test_a_single_attempt_is_never_retried(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(MAX_REQUEST_ATTEMPTS_ENV_VAR, "1")
+    failing_request = FailingRequest([ApiException(429)])
+
+    with pytest.raises(ApiException):
+        call_with_retries(failing_request)
+    assert failing_request.call_count == 1
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the batched, cached SSM parameter lookups, against an in-memory GetParameters
+"""
+
+# Standard libraries
+from typing import Dict, Iterator, List
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from bssh_manager_tools.utils import ssm_parameter_helpers
+from bssh_manager_tools.utils.ssm_parameter_helpers import (
+    MAX_PARAMETER_NAMES_PER_CALL,
+    SSM_PARAMETER_CACHE_TTL_SECONDS_ENV_VAR,
+    clear_ssm_parameter_cache,
+    get_ssm_parameter_value,
+    get_ssm_parameter_values,
+)
+
+# Globals
+ARN_PREFIX = "arn:aws:ssm:ap-southeast-2:123456789012:parameter"
+
+
+class InMemorySsmClient:
+    """
+    A GetParameters that answers like SSM, with the canonical name of each parameter,
+    and counts the calls made
+    """
+
+    def __init__(self, parameter_values: Dict[str, str]):
+        self.parameter_values = parameter_values
+        self.get_parameters_calls: List[List[str]] = []
+
+    def get_parameters(self, Names: List[str], WithDecryption: bool) -> Dict:
+        assert len(Names) <= MAX_PARAMETER_NAMES_PER_CALL
+        self.get_parameters_calls.append(list(Names))
+
+        parameters, invalid_parameters = [], []
+        for requested_name in Names:
+            name = requested_name[len(ARN_PREFIX):] if requested_name.startswith(ARN_PREFIX) else requested_name
+            name, _, selector_value = name.partition(":")
+            if name not in self.parameter_values:
+                invalid_parameters.append(requested_name)
+                continue
+            parameters.append({
+                "Name": name,
+                "Value": self.parameter_values[name],
+                "ARN": ARN_PREFIX + name,
+                **({"Selector": ":" + selector_value} if selector_value else {}),
+            })
+
+        return {"Parameters": parameters, "InvalidParameters": invalid_parameters}
+
+
+@pytest.fixture
+def ssm_client(monkeypatch: pytest.MonkeyPatch) -> Iterator[InMemorySsmClient]:
+    ssm_client = InMemorySsmClient({
+        f"/orcabus/parameter_{parameter_index:02d}": f"value_{parameter_index:02d}"
+        for parameter_index in range(25)
+    })
+    monkeypatch.setattr(ssm_parameter_helpers, "get_ssm_client", lambda: ssm_client)
+    clear_ssm_parameter_cache()
+    yield ssm_client
+    clear_ssm_parameter_cache()
+
+
+def test_parameters_are_fetched_in_batches_of_ten(ssm_client: InMemorySsmClient):
+    parameter_names = list(map(lambda parameter_index_iter_: f"/orcabus/parameter_{parameter_index_iter_:02d}", range(25)))
+
+    parameter_values = get_ssm_parameter_values(parameter_names + parameter_names[:3])
+
+    assert list(map(len, ssm_client.get_parameters_calls)) == [10, 10, 5]
+    assert parameter_values["/orcabus/parameter_24"] == "value_24"
+    assert len(parameter_values) == 25
+
+
+def test_cached_parameters_are_not_fetched_again(ssm_client: InMemorySsmClient):
+    get_ssm_parameter_values(["/orcabus/parameter_00", "/orcabus/parameter_01"])
+    assert get_ssm_parameter_values(["/orcabus/parameter_01", "/orcabus/parameter_02"]) == {
+        "/orcabus/parameter_01": "value_01",
+        "/orcabus/parameter_02": "value_02",
+    }
+
+    assert ssm_client.get_parameters_calls == [
+        ["/orcabus/parameter_00", "/orcabus/parameter_01"],
+        ["/orcabus/parameter_02"],
+    ]
+
+
+def test_expired_parameters_are_fetched_again(monkeypatch: pytest.MonkeyPatch, ssm_client: InMemorySsmClient):
+    monkeypatch.setenv(SSM_PARAMETER_CACHE_TTL_SECONDS_ENV_VAR, "0")
+
+    get_ssm_parameter_value("/orcabus/parameter_00")
+    get_ssm_parameter_value("/orcabus/parameter_00")
+
+    assert len(ssm_client.get_parameters_calls) == 2
+
+
+@pytest.mark.parametrize("requested_name", [
+    f"{ARN_PREFIX}/orcabus/parameter_03",
+    "/orcabus/parameter_03:2",
+    "/orcabus/parameter_03:some-label",
+    f"{ARN_PREFIX}/orcabus/parameter_03:2",
+])
+def test_parameters_are_cached_under_the_requested_name(requested_name: str, ssm_client: InMemorySsmClient):
+    assert get_ssm_parameter_value(requested_name) == "value_03"
+    assert get_ssm_parameter_values([requested_name, "/orcabus/parameter_03"]) == {
+        requested_name: "value_03",
+        "/orcabus/parameter_03": "value_03",
+    }
+
+    assert ssm_client.get_parameters_calls == [[requested_name], ["/orcabus/parameter_03"]]
+
+
+def test_missing_parameters_are_listed_in_the_error(ssm_client: InMemorySsmClient):
+    with pytest.raises(ValueError) as error_info:
+        get_ssm_parameter_values(["/orcabus/parameter_00", "/orcabus/missing_a", "/orcabus/missing_b"])
+
+    assert "/orcabus/missing_a, /orcabus/missing_b" in str(error_info.value)
+    assert "/orcabus/parameter_00," not in str(error_info.value)
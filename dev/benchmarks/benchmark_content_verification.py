@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark (and check) the content verification used by validate_copy_job for e-tag mismatched files
+
+A random source file is written to a temporary directory along with a destination copy of it,
+and each scenario verifies the destination against the source e-tag:
+  * composite, the source e-tag is a multipart e-tag with a --source-part-size-mb part size,
+    so the destination e-tag is recomputed with the inferred part size
+  * sha256, the source e-tag is not md5 based (i.e. SSE-KMS), so the full content is compared by SHA-256
+  * corrupt-composite, as composite, but one byte of the destination differs, so no part size matches
+    and the SHA-256 comparison finds the difference
+  * corrupt-sha256, as sha256, but one byte of the destination differs
+Each scenario must give the expected result, otherwise the script exits with a non-zero status.
+
+The files are read through a local stand-in for S3 presigned urls, a threaded http server that
+supports range requests (--reader http), or directly from disk (--reader file).
+--latency-ms is added to every range request, to show the effect of the concurrent range reads.
+
+Usage:
+    python dev/benchmarks/benchmark_content_verification.py --size-mb 256 --workers 1 4 8 --latency-ms 20
+    python dev/benchmarks/benchmark_content_verification.py --reader file --size-mb 1024
+"""
+
+# Standard imports
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Add the layer source to the path
+APP_DIR = Path(__file__).absolute().parent.parent.parent / "app"
+sys.path.insert(0, str(APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"))
+
+# Layer imports
+from bssh_manager_tools.utils.content_verification_helpers import (  # noqa: E402
+    COMPOSITE_E_TAG_VERIFICATION_METHOD,
+    SHA256_VERIFICATION_METHOD,
+    RangeReader,
+    get_range_reader_from_url,
+    verify_content_match,
+)
+
+# Globals
+MIB = 2 ** 20
+DEFAULT_SIZE_MB = 128
+DEFAULT_SOURCE_PART_SIZE_MB = 8
+DEFAULT_DESTINATION_PART_SIZE_MB = 16
+DEFAULT_WORKERS = [1, 4, 8]
+DEFAULT_LATENCY_MS = 10.0
+DEFAULT_CHUNK_SIZE_MB = 8
+
+RANGE_HEADER_REGEX = re.compile(r"^bytes=(\d+)-(\d+)$")
+
+# Scenario name to (is the source e-tag md5 based, is the destination corrupt, the expected result)
+SCENARIOS: Dict[str, Tuple[bool, bool, Tuple[bool, str]]] = {
+    "composite": (True, False, (True, COMPOSITE_E_TAG_VERIFICATION_METHOD)),
+    "sha256": (False, False, (True, SHA256_VERIFICATION_METHOD)),
+    "corrupt-composite": (True, True, (False, SHA256_VERIFICATION_METHOD)),
+    "corrupt-sha256": (False, True, (False, SHA256_VERIFICATION_METHOD)),
+}
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve the files of the server's root directory, with range requests, as S3 would
+    """
+    def do_GET(self):
+        file_path = Path(self.server.root_dir) / self.path.lstrip("/")
+        range_match = RANGE_HEADER_REGEX.match(self.headers.get("Range", ""))
+        if not file_path.is_file() or range_match is None:
+            self.send_error(400 if file_path.is_file() else 404)
+            return
+
+        start, end = int(range_match.group(1)), int(range_match.group(2)) + 1
+        with open(file_path, "rb") as file_h:
+            file_h.seek(start)
+            data = file_h.read(end - start)
+
+        self.send_response(206)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Range", f"bytes {start}-{start + len(data) - 1}/{file_path.stat().st_size}")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingRangeReader(RangeReader):
+    """
+    Add a fixed latency to every range read, and count the reads
+    """
+    def __init__(self, range_reader: RangeReader, latency_seconds: float):
+        self.range_reader = range_reader
+        self.latency_seconds = latency_seconds
+        self.read_count = 0
+        self.read_bytes = 0
+        self.lock = threading.Lock()
+
+    def read_range(self, start: int, end: int) -> bytes:
+        time.sleep(self.latency_seconds)
+        data = self.range_reader.read_range(start, end)
+        with self.lock:
+            self.read_count += 1
+            self.read_bytes += len(data)
+        return data
+
+
+def get_multipart_e_tag(file_path: Path, part_size_in_bytes: int) -> str:
+    part_digests = []
+    with open(file_path, "rb") as file_h:
+        while part := file_h.read(part_size_in_bytes):
+            part_digests.append(hashlib.md5(part).digest())
+    return hashlib.md5(b"".join(part_digests)).hexdigest() + f"-{len(part_digests)}"
+
+
+def write_files(root_dir: Path, size_in_bytes: int):
+    """
+    Write the source, the destination copy and a corrupt destination copy
+    """
+    with open(root_dir / "source", "wb") as source_h:
+        for chunk_start in range(0, size_in_bytes, 64 * MIB):
+            source_h.write(os.urandom(min(64 * MIB, size_in_bytes - chunk_start)))
+
+    shutil.copyfile(root_dir / "source", root_dir / "destination")
+    shutil.copyfile(root_dir / "source", root_dir / "destination-corrupt")
+
+    # Flip one byte in the middle of the corrupt copy
+    with open(root_dir / "destination-corrupt", "r+b") as corrupt_h:
+        corrupt_h.seek(size_in_bytes // 2)
+        original_byte = corrupt_h.read(1)
+        corrupt_h.seek(size_in_bytes // 2)
+        corrupt_h.write(bytes([original_byte[0] ^ 0xFF]))
+
+
+def run_scenario(
+    scenario_name: str,
+    source_e_tags: Dict[bool, str],
+    destination_e_tag: str,
+    size_in_bytes: int,
+    get_url: Callable[[str], str],
+    workers: int,
+    latency_seconds: float,
+    chunk_size_in_bytes: int,
+) -> Dict:
+    is_md5_e_tag, is_corrupt, (expected_is_match, expected_method) = SCENARIOS[scenario_name]
+
+    range_readers: List[CountingRangeReader] = []
+
+    def _get_range_reader(file_name: str) -> RangeReader:
+        range_reader = CountingRangeReader(get_range_reader_from_url(get_url(file_name)), latency_seconds)
+        range_readers.append(range_reader)
+        return range_reader
+
+    start_time = time.perf_counter()
+    content_verification_result = verify_content_match(
+        source_e_tag=source_e_tags[is_md5_e_tag],
+        destination_e_tag=destination_e_tag,
+        file_size_in_bytes=size_in_bytes,
+        get_source_range_reader=partial(_get_range_reader, "source"),
+        get_destination_range_reader=partial(
+            _get_range_reader, "destination-corrupt" if is_corrupt else "destination"
+        ),
+        max_workers=workers,
+        chunk_size_in_bytes=chunk_size_in_bytes,
+    )
+    wall_time_seconds = time.perf_counter() - start_time
+
+    return {
+        "scenario": scenario_name,
+        "workers": workers,
+        "isMatch": content_verification_result.is_match,
+        "method": content_verification_result.method,
+        "isExpected": (content_verification_result.is_match, content_verification_result.method) == (
+            expected_is_match, expected_method
+        ),
+        "wallTimeSeconds": round(wall_time_seconds, 3),
+        "rangeReadCount": sum(map(lambda range_reader_iter_: range_reader_iter_.read_count, range_readers)),
+        "readMb": round(sum(map(lambda range_reader_iter_: range_reader_iter_.read_bytes, range_readers)) / MIB, 1),
+        "throughputMbPerSecond": round(
+            sum(map(lambda range_reader_iter_: range_reader_iter_.read_bytes, range_readers)) / MIB / wall_time_seconds,
+            1
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=DEFAULT_SIZE_MB)
+    parser.add_argument("--source-part-size-mb", type=int, default=DEFAULT_SOURCE_PART_SIZE_MB)
+    parser.add_argument("--destination-part-size-mb", type=int, default=DEFAULT_DESTINATION_PART_SIZE_MB)
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS,
+                        help="Latency added to every range request")
+    parser.add_argument("--chunk-size-mb", type=int, default=DEFAULT_CHUNK_SIZE_MB)
+    parser.add_argument("--reader", choices=["http", "file"], default="http")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--output", type=Path, help="Save the results as JSON")
+    args = parser.parse_args()
+
+    size_in_bytes = args.size_mb * MIB
+
+    with tempfile.TemporaryDirectory(prefix="bssh-content-verification-") as root_dir:
+        write_files(Path(root_dir), size_in_bytes)
+
+        source_e_tags = {
+            True: get_multipart_e_tag(Path(root_dir) / "source", args.source_part_size_mb * MIB),
+            # Not md5 based, as for an SSE-KMS encrypted object
+            False: os.urandom(16).hex() + "kms",
+        }
+        destination_e_tag = get_multipart_e_tag(Path(root_dir) / "destination", args.destination_part_size_mb * MIB)
+
+        server = None
+        if args.reader == "http":
+            server = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+            server.root_dir = root_dir
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            def get_url(file_name: str) -> str:
+                return f"http://127.0.0.1:{server.server_address[1]}/{file_name}"
+        else:
+            def get_url(file_name: str) -> str:
+                return (Path(root_dir) / file_name).as_uri()
+
+        try:
+            results = []
+            for scenario_name in args.scenarios:
+                for workers in args.workers:
+                    results.append(run_scenario(
+                        scenario_name, source_e_tags, destination_e_tag, size_in_bytes, get_url,
+                        workers, args.latency_ms / 1000, args.chunk_size_mb * MIB
+                    ))
+        finally:
+            if server is not None:
+                server.shutdown()
+
+    print(
+        f"{'scenario':<20} {'workers':>7} {'match':>6} {'method':>16} {'wall (s)':>9} "
+        f"{'reads':>6} {'read MB':>8} {'MB/s':>8}"
+    )
+    for result in results:
+        print(
+            f"{result['scenario']:<20} {result['workers']:>7} {str(result['isMatch']):>6} {result['method']:>16} "
+            f"{result['wallTimeSeconds']:>9.2f} {result['rangeReadCount']:>6} {result['readMb']:>8.1f} "
+            f"{result['throughputMbPerSecond']:>8.1f}"
+            + ("" if result["isExpected"] else "  UNEXPECTED")
+        )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if not all(map(lambda result_iter_: result_iter_["isExpected"], results)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+"""
+Compare the size of the copy job list in the plain json form against the copy_job_encoding_helpers encodings
+
+For each run profile, the get_icav2_copy_job_list handler plans the copy jobs of a synthetic run
+(against the in-process fakes in offline_fakes.py, with no latency), then we report
+  * plain, the {sourceUriList, destinationUri} json of every copy job,
+  * prefix, the {sourceBaseUri, sourceNameList, destinationUri} json the handler emits,
+  * prefix+gzip, as prefix, but with every sourceNameList gzipped and base64 encoded,
+the size in KiB of the whole copy job list (carried through the step function state),
+the size of the largest copy event entry (the copy event always carries the plain sourceUriList,
+so this is the same for every encoding), and the time to encode and decode the list.
+Sizes over the 256 KiB step function and EventBridge limits are flagged.
+
+--per-file plans the copy jobs as an incremental copy into an empty destination without coalescing missing folders,
+so every file is its own source uri, the worst case for the size of the copy job list.
+
+Usage:
+    python dev/benchmarks/benchmark_copy_job_encoding.py
+    python dev/benchmarks/benchmark_copy_job_encoding.py --profiles novaseq_x_25b --per-file
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+from os import environ
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add the benchmarks directory, layer source and lambda to the path
+BENCHMARKS_DIR = Path(__file__).absolute().parent
+APP_DIR = BENCHMARKS_DIR.parent.parent / "app"
+sys.path.insert(0, str(BENCHMARKS_DIR))
+sys.path.insert(0, str(APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"))
+sys.path.insert(0, str(APP_DIR / "lambdas" / "get_icav2_copy_job_list_py"))
+
+# Benchmark imports
+from offline_fakes import (  # noqa: E402
+    ICAV2_ACCESS_TOKEN_SECRET_ID,
+    RUN_PROFILES,
+    FakeIcav2,
+    generate_run,
+    get_fake_access_token,
+    install_fake_modules,
+)
+
+# Globals
+DEFAULT_PROFILES = ["miseq", "nextseq_2000", "novaseq_6000_s4", "novaseq_x_25b"]
+ENCODINGS = ["plain", "prefix", "prefix+gzip"]
+
+# The step function payload and EventBridge entry limits
+MAX_PAYLOAD_SIZE_IN_BYTES = 256 * 1024
+
+# Large enough that the handler always returns the copy job list rather than writing a manifest
+NO_MANIFEST_THRESHOLD = 2 ** 62
+
+
+def get_json_size_in_bytes(value) -> int:
+    return len(json.dumps(value, separators=(",", ":")).encode())
+
+
+def time_call(func: Callable, repeat: int) -> float:
+    """
+    Return the best time of repeat calls in milliseconds
+    """
+    durations = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start_time)
+    return min(durations) * 1000
+
+
+def benchmark_profile(profile_name: str, per_file: bool, repeat: int) -> Dict:
+    fake_icav2 = FakeIcav2(latency_seconds=0)
+    install_fake_modules(fake_icav2)
+
+    environ["BSSH_MANAGER_STORE_URI"] = Path(tempfile.mkdtemp(prefix="bssh-benchmark-store-")).as_uri() + "/"
+    environ["ICAV2_ACCESS_TOKEN_SECRET_ID"] = ICAV2_ACCESS_TOKEN_SECRET_ID
+
+    # Layer imports, after the fake modules are installed
+    from bssh_manager_tools.utils.copy_job_encoding_helpers import decode_copy_job, encode_copy_job
+    from bssh_manager_tools.utils.icav2_credential_helpers import LocalSecretsBackend, set_secrets_backend
+    from bssh_manager_tools.utils.metrics_helpers import LocalMetricsSink, set_metrics_sink
+
+    set_secrets_backend(LocalSecretsBackend({ICAV2_ACCESS_TOKEN_SECRET_ID: get_fake_access_token()}))
+    set_metrics_sink(LocalMetricsSink())
+
+    # Lambda imports
+    import get_icav2_copy_job_list
+
+    # Only log warnings and above
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+    copy_job_list_event = generate_run(fake_icav2, RUN_PROFILES[profile_name])
+    copy_job_list_event.update({
+        "copyJobManifestMinCopyJobCount": NO_MANIFEST_THRESHOLD,
+        "copyJobManifestMaxInlinePayloadSizeInBytes": NO_MANIFEST_THRESHOLD,
+    })
+    if per_file:
+        copy_job_list_event.update({"incremental": True, "coalesceMissingFolders": False})
+
+    prefix_copy_job_list: List[Dict] = get_icav2_copy_job_list.handler(copy_job_list_event, None)["icav2CopyJobList"]
+    plain_copy_job_list = list(map(decode_copy_job, prefix_copy_job_list))
+
+    def _encode(gzip_min_size_in_bytes=None) -> List[Dict]:
+        return list(map(
+            lambda copy_job_iter_: encode_copy_job(
+                source_uri_list=copy_job_iter_["sourceUriList"],
+                destination_uri=copy_job_iter_["destinationUri"],
+                gzip_min_size_in_bytes=gzip_min_size_in_bytes
+            ),
+            plain_copy_job_list
+        ))
+
+    copy_job_lists = {
+        "plain": plain_copy_job_list,
+        "prefix": _encode(),
+        "prefix+gzip": _encode(gzip_min_size_in_bytes=0),
+    }
+
+    # Every encoding must round trip
+    for encoding, copy_job_list in copy_job_lists.items():
+        if list(map(decode_copy_job, copy_job_list)) != plain_copy_job_list:
+            raise AssertionError(f"The {encoding} encoding of {profile_name} does not round trip")
+
+    return {
+        "profile": profile_name,
+        "perFile": per_file,
+        "copyJobCount": len(plain_copy_job_list),
+        "sourceUriCount": sum(map(
+            lambda copy_job_iter_: len(copy_job_iter_["sourceUriList"]),
+            plain_copy_job_list
+        )),
+        "maxCopyEventEntryBytes": max(map(
+            lambda copy_job_iter_: get_json_size_in_bytes({"payload": copy_job_iter_, "taskToken": "x" * 1024}),
+            plain_copy_job_list
+        ), default=0),
+        "encodings": dict(map(
+            lambda encoding_iter_: (
+                encoding_iter_,
+                {
+                    "listBytes": get_json_size_in_bytes(copy_job_lists[encoding_iter_]),
+                    "encodeMs": round(time_call(
+                        {
+                            "plain": lambda: list(map(dict, plain_copy_job_list)),
+                            "prefix": lambda: _encode(),
+                            "prefix+gzip": lambda: _encode(gzip_min_size_in_bytes=0),
+                        }[encoding_iter_],
+                        repeat
+                    ), 3),
+                    "decodeMs": round(time_call(
+                        lambda: list(map(decode_copy_job, copy_job_lists[encoding_iter_])),
+                        repeat
+                    ), 3),
+                }
+            ),
+            ENCODINGS
+        )),
+    }
+
+
+def run_worker(profile_name: str, per_file: bool, repeat: int) -> Dict:
+    """
+    Each profile is benchmarked in a fresh interpreter, so the fakes and handler module are not shared between runs
+    """
+    completed_process = subprocess.run(
+        [
+            sys.executable, __file__, "--worker",
+            "--profiles", profile_name, "--repeat", str(repeat),
+        ] + (["--per-file"] if per_file else []),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed_process.stdout.strip().splitlines()[-1])
+
+
+def format_kib(size_in_bytes: int) -> str:
+    return f"{size_in_bytes / 1024:.1f}" + ("!" if size_in_bytes > MAX_PAYLOAD_SIZE_IN_BYTES else "")
+
+
+def print_results(results: List[Dict]):
+    print(
+        f"{'profile':<18} {'jobs':>5} {'uris':>7} {'event KiB':>10} "
+        + " ".join(map(lambda encoding_iter_: f"{encoding_iter_ + ' KiB':>16}", ENCODINGS))
+        + " " + " ".join(map(lambda encoding_iter_: f"{encoding_iter_ + ' enc/dec ms':>24}", ENCODINGS))
+    )
+    for result in results:
+        print(
+            f"{result['profile'] + (' per-file' if result['perFile'] else ''):<18} "
+            f"{result['copyJobCount']:>5} {result['sourceUriCount']:>7} "
+            f"{format_kib(result['maxCopyEventEntryBytes']):>10} "
+            + " ".join(map(
+                lambda encoding_iter_: f"{format_kib(result['encodings'][encoding_iter_]['listBytes']):>16}",
+                ENCODINGS
+            ))
+            + " " + " ".join(map(
+                lambda encoding_iter_: (
+                    f"{result['encodings'][encoding_iter_]['encodeMs']:>11.2f}/"
+                    f"{result['encodings'][encoding_iter_]['decodeMs']:<12.2f}"
+                ),
+                ENCODINGS
+            ))
+        )
+    print(f"(! over the {MAX_PAYLOAD_SIZE_IN_BYTES // 1024} KiB step function / EventBridge limit)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES, choices=list(RUN_PROFILES))
+    parser.add_argument("--per-file", action="store_true", help="Plan one source uri per file")
+    parser.add_argument("--repeat", type=int, default=5, help="Encode and decode timings are the best of this many")
+    parser.add_argument("--output", type=Path, help="Save the results as JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(benchmark_profile(args.profiles[0], args.per_file, args.repeat)))
+        return
+
+    results = list(map(
+        lambda profile_name_iter_: run_worker(profile_name_iter_, args.per_file, args.repeat),
+        args.profiles
+    ))
+
+    print_results(results)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
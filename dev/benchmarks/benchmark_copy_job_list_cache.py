@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark (and check) the memoised get_icav2_copy_job_list handler offline
+
+A synthetic run is planned against the in-process fakes in offline_fakes.py, with an empty local store,
+and then each scenario plans the same analysis into the same output uri again:
+  * cold, the store is emptied first, so the run is planned in full and the output saved
+  * replay, the saved copy job list is returned, after a bulk listing of the bclconvert output folder
+  * new_portal_run, a new portal run id and output uri, the saved copy job list is rebased onto the new output uri
+  * changed, one fastq under the Samples folder is given a new e-tag first, so the run is planned in full again
+  * parameters, the target shard size differs from the saved copy job list's, so the run is planned in full again
+  * incremental, incremental plans depend on the destination, so the run is always planned in full
+Each scenario is compared against a planning without a store (uncached), in both ICAv2 calls and wall time.
+A planning in full with a store reuses the bulk listing it fingerprinted for the Samples copy units
+and the Reports snapshot, so it must make no more ICAv2 calls than the uncached planning,
+and a replay must make fewer calls than the cold planning.
+Each scenario must also give the same output as the uncached planning, otherwise the script exits
+with a non-zero status.
+
+Pass --manifest to plan every run to a copy job manifest in the store, rather than a copy job list.
+
+Usage:
+    python dev/benchmarks/benchmark_copy_job_list_cache.py
+    python dev/benchmarks/benchmark_copy_job_list_cache.py --profile novaseq_x_10b --latency-ms 20 --manifest
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from os import environ
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add the benchmarks directory, layer source and lambdas to the path
+BENCHMARKS_DIR = Path(__file__).absolute().parent
+APP_DIR = BENCHMARKS_DIR.parent.parent / "app"
+sys.path.insert(0, str(BENCHMARKS_DIR))
+sys.path.insert(0, str(APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"))
+sys.path.insert(0, str(APP_DIR / "lambdas" / "get_icav2_copy_job_list_py"))
+
+# Benchmark imports
+from offline_fakes import (  # noqa: E402
+    DATA_TYPE_INDEX,
+    FILE_DATA_TYPE,
+    ICAV2_ACCESS_TOKEN_SECRET_ID,
+    RUN_PROFILES,
+    SOURCE_PROJECT_ID,
+    FakeIcav2,
+    generate_run,
+    get_fake_access_token,
+    install_fake_modules,
+)
+
+# Globals
+SCENARIOS = ["cold", "replay", "new_portal_run", "changed", "parameters", "incremental"]
+DEFAULT_PROFILE = "novaseq_6000_s4"
+DEFAULT_LATENCY_MS = 5.0
+PORTAL_RUN_ID = "20251003abcd1234"
+NEW_PORTAL_RUN_ID = "20251004efgh5678"
+PARAMETERS_TARGET_SHARD_SIZE_IN_BYTES = 2 ** 30
+
+# Does the scenario plan the run in full
+IS_PLANNED_IN_FULL = {
+    "cold": True,
+    "replay": False,
+    "new_portal_run": False,
+    "changed": True,
+    "parameters": True,
+    "incremental": True,
+}
+
+
+def get_copy_job_list_event(base_event: Dict, scenario_name: str, is_manifest: bool) -> Dict:
+    event = {
+        **base_event,
+        "portalRunId": PORTAL_RUN_ID,
+        "copyJobManifestMinCopyJobCount": 0 if is_manifest else 2 ** 62,
+        "copyJobManifestMaxInlinePayloadSizeInBytes": 2 ** 62,
+    }
+    if scenario_name == "new_portal_run":
+        event["portalRunId"] = NEW_PORTAL_RUN_ID
+        event["outputUri"] = event["outputUri"].replace(PORTAL_RUN_ID, NEW_PORTAL_RUN_ID)
+    if scenario_name == "incremental":
+        event["incremental"] = True
+    return event
+
+
+def change_one_source_file(fake_icav2: FakeIcav2, change_number: int):
+    """
+    Give the first fastq under the Samples folder a new e-tag
+    """
+    source_project = fake_icav2.get_project(SOURCE_PROJECT_ID)
+    fastq_path = next(filter(
+        lambda path_iter_: (
+            "/output/Samples/" in path_iter_ and
+            source_project.entries[path_iter_][DATA_TYPE_INDEX] == FILE_DATA_TYPE
+        ),
+        source_project.sorted_paths
+    ))
+    data_type, data_id, file_size_in_bytes, _ = source_project.entries[fastq_path]
+    source_project.entries[fastq_path] = (data_type, data_id, file_size_in_bytes, f"changed-{change_number}")
+
+
+def is_call_count_expected(scenario_name: str, call_count: int, uncached_call_count: int, cold_call_count: int):
+    """
+    An incremental planning is never memoised, so makes at least as many calls as the uncached planning,
+    a replay (into any output uri) fewer calls than the cold planning, and any other planning in full no more than the uncached planning
+    """
+    if scenario_name == "incremental":
+        return call_count >= uncached_call_count
+    if not IS_PLANNED_IN_FULL[scenario_name]:
+        return call_count < cold_call_count
+    return call_count <= uncached_call_count
+
+
+def run_handler(fake_icav2: FakeIcav2, event: Dict):
+    import get_icav2_copy_job_list
+
+    fake_icav2.reset_call_counts()
+    start_time = time.perf_counter()
+    handler_output = get_icav2_copy_job_list.handler(dict(event), None)
+    wall_time_seconds = time.perf_counter() - start_time
+
+    return handler_output, sum(fake_icav2.call_counts.values()), wall_time_seconds
+
+
+def get_uncached_output(fake_icav2: FakeIcav2, event: Dict, is_manifest: bool) -> Tuple[Dict, int, float]:
+    """
+    Plan the run without a store, to compare the scenario output, call count and wall time against
+    :return: The normalised output, the number of ICAv2 calls and the wall time
+    """
+    store_uri = environ.pop("BSSH_MANAGER_STORE_URI")
+    try:
+        handler_output, call_count, wall_time_seconds = run_handler(fake_icav2, event)
+    finally:
+        environ["BSSH_MANAGER_STORE_URI"] = store_uri
+
+    # Without a store there is no manifest, so the copy jobs are always in the copy job list
+    if is_manifest:
+        return (
+            {"icav2CopyJobList": [], "manifestCopyJobs": handler_output["icav2CopyJobList"]},
+            call_count, wall_time_seconds
+        )
+    return (
+        {"icav2CopyJobList": handler_output["icav2CopyJobList"], "manifestCopyJobs": None},
+        call_count, wall_time_seconds
+    )
+
+
+def normalise_output(handler_output: Dict, portal_run_id: str) -> Dict:
+    """
+    Replace a copy job manifest reference with the copy jobs in the manifest
+    """
+    from bssh_manager_tools.utils.copy_job_manifest_helpers import read_copy_job_manifest
+    from bssh_manager_tools.utils.store_helpers import get_store
+
+    if handler_output["icav2CopyJobManifest"] is None:
+        return {"icav2CopyJobList": handler_output["icav2CopyJobList"], "manifestCopyJobs": None}
+
+    return {
+        "icav2CopyJobList": handler_output["icav2CopyJobList"],
+        "manifestCopyJobs": list(read_copy_job_manifest(get_store(), portal_run_id)),
+    }
+
+
+def run_scenario(
+    fake_icav2: FakeIcav2,
+    base_event: Dict,
+    store_dir: Path,
+    scenario_name: str,
+    is_manifest: bool,
+    change_number: int,
+    cold_call_count: int,
+) -> Dict:
+    event = get_copy_job_list_event(base_event, scenario_name, is_manifest)
+
+    if scenario_name == "cold":
+        shutil.rmtree(store_dir)
+        store_dir.mkdir()
+    if scenario_name == "changed":
+        change_one_source_file(fake_icav2, change_number)
+    if scenario_name == "parameters":
+        environ["BSSH_MANAGER_TARGET_SHARD_SIZE_IN_BYTES"] = str(PARAMETERS_TARGET_SHARD_SIZE_IN_BYTES)
+
+    try:
+        expected_output, uncached_call_count, uncached_wall_time_seconds = get_uncached_output(
+            fake_icav2, event, is_manifest
+        )
+
+        handler_output, call_count, wall_time_seconds = run_handler(fake_icav2, event)
+    finally:
+        environ.pop("BSSH_MANAGER_TARGET_SHARD_SIZE_IN_BYTES", None)
+
+    return {
+        "scenario": scenario_name,
+        "isPlannedInFull": IS_PLANNED_IN_FULL[scenario_name],
+        "isExpected": (
+            normalise_output(handler_output, event["portalRunId"]) == expected_output and
+            is_call_count_expected(scenario_name, call_count, uncached_call_count, cold_call_count)
+        ),
+        "icav2CallCount": call_count,
+        "uncachedIcav2CallCount": uncached_call_count,
+        "wallTimeSeconds": round(wall_time_seconds, 3),
+        "uncachedWallTimeSeconds": round(uncached_wall_time_seconds, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=list(RUN_PROFILES))
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS,
+                        help="Latency added to every ICAv2 call")
+    parser.add_argument("--manifest", action="store_true",
+                        help="Plan every run to a copy job manifest in the store")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--output", type=Path, help="Save the results as JSON")
+    args = parser.parse_args()
+
+    fake_icav2 = FakeIcav2(latency_seconds=0)
+    install_fake_modules(fake_icav2)
+
+    store_dir = Path(tempfile.mkdtemp(prefix="bssh-benchmark-store-"))
+    environ["BSSH_MANAGER_STORE_URI"] = store_dir.as_uri() + "/"
+    environ["ICAV2_ACCESS_TOKEN_SECRET_ID"] = ICAV2_ACCESS_TOKEN_SECRET_ID
+
+    # Layer imports, after the fake modules are installed
+    from bssh_manager_tools.utils.icav2_credential_helpers import LocalSecretsBackend, set_secrets_backend
+    from bssh_manager_tools.utils.metrics_helpers import LocalMetricsSink, set_metrics_sink
+
+    set_secrets_backend(LocalSecretsBackend({ICAV2_ACCESS_TOKEN_SECRET_ID: get_fake_access_token()}))
+    set_metrics_sink(LocalMetricsSink())
+
+    # Lambda imports
+    import get_icav2_copy_job_list  # noqa: F401
+
+    # Only log warnings and above
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+    base_event = generate_run(fake_icav2, RUN_PROFILES[args.profile])
+    fake_icav2.latency_seconds = args.latency_ms / 1000
+
+    # Always plan cold first, so the other scenarios have a saved output (and a cold call count) to compare against
+    scenario_names = ["cold"] + list(filter(lambda scenario_iter_: scenario_iter_ != "cold", args.scenarios))
+
+    results: List[Dict] = []
+    cold_call_count = 0
+    for change_number, scenario_name in enumerate(scenario_names):
+        results.append(run_scenario(
+            fake_icav2, base_event, store_dir, scenario_name, args.manifest, change_number, cold_call_count
+        ))
+        if scenario_name == "cold":
+            cold_call_count = results[-1]["icav2CallCount"]
+
+    print(
+        f"{'scenario':<15} {'planned in full':>15} {'icav2 calls':>11} {'uncached calls':>14} "
+        f"{'wall (s)':>9} {'uncached wall (s)':>17}"
+    )
+    for result in results:
+        print(
+            f"{result['scenario']:<15} {str(result['isPlannedInFull']):>15} {result['icav2CallCount']:>11} "
+            f"{result['uncachedIcav2CallCount']:>14} {result['wallTimeSeconds']:>9.2f} "
+            f"{result['uncachedWallTimeSeconds']:>17.2f}"
+            + ("" if result["isExpected"] else "  UNEXPECTED")
+        )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if not all(map(lambda result_iter_: result_iter_["isExpected"], results)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
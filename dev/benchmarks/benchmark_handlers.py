@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the get_icav2_copy_job_list, validate_copy_job and filemanager_sync_check handlers offline
+
+ICAv2, the filemanager and Secrets Manager are replaced by the in-process fakes in offline_fakes.py,
+backed by a synthetic run of each of the requested run profiles, with a fixed latency added to every API call.
+
+Each (run profile, handler) pair runs in a fresh subprocess, which
+  * generates the synthetic run,
+  * runs any handlers the measured handler depends on
+    (validate_copy_job and filemanager_sync_check need the copy jobs to have been planned and run),
+  * resets the API call counts and the peak RSS,
+  * runs the measured handler, recording its wall time, peak RSS (and the increase in RSS) and API call counts.
+
+validate_copy_job is run once per copy job, one after the other, and the totals are reported.
+
+Results can be saved with --output and compared against a saved baseline with --baseline,
+the script exits with a non-zero status if any handler regressed by more than the allowed fraction:
+wall time and RSS increase by --max-regression, API call counts by --max-api-call-regression.
+Baselines should be recorded on the machine they are compared on.
+
+Peak RSS is read from VmHWM in /proc/self/status (reset after setup through /proc/self/clear_refs),
+falling back to ru_maxrss where that is not available.
+
+Usage:
+    python dev/benchmarks/benchmark_handlers.py --profiles miseq novaseq_6000_s4 --latency-ms 10 \\
+        --output /tmp/benchmark.json
+    python dev/benchmarks/benchmark_handlers.py --profiles miseq novaseq_6000_s4 --latency-ms 10 \\
+        --baseline /tmp/benchmark.json
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from os import environ
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add the benchmarks directory, layer source and lambdas to the path
+BENCHMARKS_DIR = Path(__file__).absolute().parent
+APP_DIR = BENCHMARKS_DIR.parent.parent / "app"
+sys.path.insert(0, str(BENCHMARKS_DIR))
+sys.path.insert(0, str(APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"))
+for lambda_dir_name in ["get_icav2_copy_job_list_py", "validate_copy_job_py", "filemanager_sync_check_py"]:
+    sys.path.insert(0, str(APP_DIR / "lambdas" / lambda_dir_name))
+
+# Benchmark imports
+from offline_fakes import (  # noqa: E402
+    ICAV2_ACCESS_TOKEN_SECRET_ID,
+    RUN_PROFILES,
+    FakeIcav2,
+    generate_run,
+    get_fake_access_token,
+    install_fake_modules,
+)
+
+# Globals
+HANDLER_NAMES = ["get_icav2_copy_job_list", "validate_copy_job", "filemanager_sync_check"]
+DEFAULT_PROFILES = ["miseq", "nextseq_2000", "novaseq_6000_s4"]
+DEFAULT_LATENCY_MS = 10.0
+DEFAULT_MAX_REGRESSION = 0.25
+DEFAULT_MAX_API_CALL_REGRESSION = 0.0
+
+# Gated metric name to the argument holding its allowed regression
+GATED_METRICS = {
+    "wallTimeSeconds": "max_regression",
+    "rssIncreaseMb": "max_regression",
+    "apiCallCount": "max_api_call_regression",
+}
+
+# Ignore regressions smaller than these, so that tiny values do not fail on noise
+MIN_GATED_DIFFERENCES = {
+    "wallTimeSeconds": 0.05,
+    "rssIncreaseMb": 5.0,
+    "apiCallCount": 0,
+}
+
+
+def get_rss_mb(field_name: str) -> Optional[float]:
+    """
+    Read a memory field (i.e. VmRSS, VmHWM) from /proc/self/status in MB
+    """
+    try:
+        with open("/proc/self/status") as status_h:
+            for line in status_h:
+                if line.startswith(field_name + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset VmHWM to the current RSS, returns False if this is not supported
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs_h:
+            clear_refs_h.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def run_worker(profile_name: str, handler_name: str, latency_ms: float, filemanager_synced_fraction: float) -> Dict:
+    """
+    Run a single handler against a synthetic run, in this process
+    """
+    fake_icav2 = FakeIcav2(
+        latency_seconds=latency_ms / 1000,
+        filemanager_synced_fraction=filemanager_synced_fraction,
+    )
+    install_fake_modules(fake_icav2)
+
+    store_dir = tempfile.mkdtemp(prefix="bssh-benchmark-store-")
+    environ["BSSH_MANAGER_STORE_URI"] = Path(store_dir).as_uri() + "/"
+    environ["ICAV2_ACCESS_TOKEN_SECRET_ID"] = ICAV2_ACCESS_TOKEN_SECRET_ID
+
+    # Layer imports, after the fake modules are installed
+    from bssh_manager_tools.utils.copy_job_encoding_helpers import decode_copy_job
+    from bssh_manager_tools.utils.icav2_credential_helpers import LocalSecretsBackend, set_secrets_backend
+    from bssh_manager_tools.utils.metrics_helpers import LocalMetricsSink, set_metrics_sink
+
+    set_secrets_backend(LocalSecretsBackend({ICAV2_ACCESS_TOKEN_SECRET_ID: get_fake_access_token()}))
+    set_metrics_sink(LocalMetricsSink())
+
+    # Lambda imports
+    import get_icav2_copy_job_list
+    import validate_copy_job
+    import filemanager_sync_check
+
+    # Only log warnings and above
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+    # Setup
+    copy_job_list_event = generate_run(fake_icav2, RUN_PROFILES[profile_name])
+    icav2_copy_job_list: List[Dict] = []
+    if handler_name != "get_icav2_copy_job_list":
+        icav2_copy_job_list = get_icav2_copy_job_list.handler(copy_job_list_event, None)["icav2CopyJobList"]
+        fake_icav2.run_copy_jobs(list(map(decode_copy_job, icav2_copy_job_list)))
+
+    fake_icav2.reset_call_counts()
+    is_peak_rss_reset = reset_peak_rss()
+    rss_before_mb = get_rss_mb("VmRSS")
+
+    # Run the handler
+    start_time = time.perf_counter()
+    if handler_name == "get_icav2_copy_job_list":
+        handler_output = get_icav2_copy_job_list.handler(copy_job_list_event, None)
+        is_successful = len(handler_output["icav2CopyJobList"]) > 0
+    elif handler_name == "validate_copy_job":
+        is_successful = all(map(
+            lambda icav2_copy_job_iter_: validate_copy_job.handler(icav2_copy_job_iter_, None)["isValid"],
+            icav2_copy_job_list
+        ))
+    else:
+        handler_output = filemanager_sync_check.handler(
+            {"s3Prefix": copy_job_list_event["outputUri"], "cacheKey": "benchmark"},
+            None
+        )
+        is_successful = handler_output["isSynced"] == (filemanager_synced_fraction >= 1.0)
+    wall_time_seconds = time.perf_counter() - start_time
+
+    peak_rss_mb = get_rss_mb("VmHWM") if is_peak_rss_reset else None
+    if peak_rss_mb is None:
+        # ru_maxrss is in KB on linux
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return {
+        "profile": profile_name,
+        "handler": handler_name,
+        "isSuccessful": is_successful,
+        "wallTimeSeconds": round(wall_time_seconds, 3),
+        "peakRssMb": round(peak_rss_mb, 1),
+        "rssIncreaseMb": round(peak_rss_mb - rss_before_mb, 1) if rss_before_mb is not None else None,
+        "apiCallCount": sum(fake_icav2.call_counts.values()),
+        "apiCallCounts": dict(sorted(fake_icav2.call_counts.items())),
+    }
+
+
+def run_in_subprocess(profile_name: str, handler_name: str, args: argparse.Namespace) -> Dict:
+    """
+    Run a single handler in a fresh interpreter, so that memory and imports are not shared between runs
+    """
+    completed_process = subprocess.run(
+        [
+            sys.executable, __file__,
+            "--worker",
+            "--profiles", profile_name,
+            "--handlers", handler_name,
+            "--latency-ms", str(args.latency_ms),
+            "--filemanager-synced-fraction", str(args.filemanager_synced_fraction),
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    if completed_process.returncode != 0:
+        raise RuntimeError(
+            f"Benchmark of {handler_name} on {profile_name} failed:\n{completed_process.stderr}"
+        )
+
+    return json.loads(completed_process.stdout.strip().splitlines()[-1])
+
+
+def get_regressions(results: List[Dict], baseline_results: List[Dict], args: argparse.Namespace) -> List[str]:
+    """
+    Compare the results against the baseline, return a description of each regression
+    """
+    baseline_results_by_key = dict(map(
+        lambda result_iter_: ((result_iter_["profile"], result_iter_["handler"]), result_iter_),
+        baseline_results
+    ))
+
+    regressions = []
+    for result in results:
+        baseline_result = baseline_results_by_key.get((result["profile"], result["handler"]))
+        if baseline_result is None:
+            continue
+
+        for metric_name, allowed_regression_arg in GATED_METRICS.items():
+            value, baseline_value = result.get(metric_name), baseline_result.get(metric_name)
+            if value is None or baseline_value is None:
+                continue
+
+            allowed_value = baseline_value * (1 + getattr(args, allowed_regression_arg))
+            if value > allowed_value and value - baseline_value > MIN_GATED_DIFFERENCES[metric_name]:
+                regressions.append(
+                    f"{result['handler']} on {result['profile']}: {metric_name} "
+                    f"{value} > {baseline_value} (baseline) "
+                    f"+ {getattr(args, allowed_regression_arg):.0%}"
+                )
+
+    return regressions
+
+
+def print_results(results: List[Dict]):
+    print(
+        f"{'profile':<18} {'handler':<26} {'ok':>3} {'wall (s)':>9} "
+        f"{'peak RSS (MB)':>14} {'RSS +(MB)':>10} {'API calls':>10}"
+    )
+    for result in results:
+        print(
+            f"{result['profile']:<18} {result['handler']:<26} {'y' if result['isSuccessful'] else 'n':>3} "
+            f"{result['wallTimeSeconds']:>9.3f} {result['peakRssMb']:>14.1f} "
+            f"{result['rssIncreaseMb'] if result['rssIncreaseMb'] is not None else '-':>10} "
+            f"{result['apiCallCount']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=DEFAULT_PROFILES, choices=list(RUN_PROFILES))
+    parser.add_argument("--handlers", nargs="+", default=HANDLER_NAMES, choices=HANDLER_NAMES)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS,
+                        help="Latency added to every fake API call")
+    parser.add_argument("--filemanager-synced-fraction", type=float, default=1.0,
+                        help="The fraction of copied files the fake filemanager has ingested")
+    parser.add_argument("--output", type=Path, help="Save the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Fail if the results regress against these saved results")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help="Allowed fractional increase in wall time and RSS")
+    parser.add_argument("--max-api-call-regression", type=float, default=DEFAULT_MAX_API_CALL_REGRESSION,
+                        help="Allowed fractional increase in API calls")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(
+            profile_name=args.profiles[0],
+            handler_name=args.handlers[0],
+            latency_ms=args.latency_ms,
+            filemanager_synced_fraction=args.filemanager_synced_fraction,
+        )))
+        return
+
+    results = []
+    for profile_name in args.profiles:
+        for handler_name in args.handlers:
+            results.append(run_in_subprocess(profile_name, handler_name, args))
+
+    print_results(results)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    failures = list(map(
+        lambda result_iter_: f"{result_iter_['handler']} on {result_iter_['profile']}: unexpected handler output",
+        filter(lambda result_iter_: not result_iter_["isSuccessful"], results)
+    ))
+
+    if args.baseline is not None:
+        failures.extend(get_regressions(results, json.loads(args.baseline.read_text()), args))
+
+    if len(failures) > 0:
+        print()
+        print("\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the streaming keyed diff used by validate_copy_job
+
+Synthetic source and destination listings are generated lazily,
+so that the memory measured is the memory held by the diff engine itself,
+not by the listings.
+
+Usage:
+    python dev/benchmarks/benchmark_listing_diff.py --sizes 100000 1000000 --trace-memory
+"""
+
+# Standard imports
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Iterator, List
+
+# Add the layer source to the path
+APP_DIR = Path(__file__).absolute().parent.parent.parent / "app"
+sys.path.insert(0, str(APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"))
+
+# Layer imports
+from bssh_manager_tools.utils.listing_diff_helpers import (  # noqa: E402
+    ListingRecord,
+    diff_listing_records,
+)
+
+# Globals
+FILES_PER_SAMPLE = 4
+DEFAULT_SIZES = [100_000, 250_000, 500_000, 1_000_000]
+
+
+def generate_listing(
+    num_files: int,
+    shuffle_window: int = 0,
+    seed: int = 0,
+    skip_every: int = 0,
+    resize_every: int = 0,
+    re_tag_every: int = 0,
+) -> Iterator[ListingRecord]:
+    """
+    Lazily generate a listing of a synthetic Samples folder
+
+    :param num_files: The number of files in the listing
+    :param shuffle_window: Shuffle records within windows of this size to mimic differences in listing order
+    :param seed: The random seed for the shuffle
+    :param skip_every: Drop every nth file (to create missing files)
+    :param resize_every: Change the size of every nth file
+    :param re_tag_every: Change the e-tag of every nth file
+    """
+    randomiser = random.Random(seed)
+    window: List[ListingRecord] = []
+
+    for file_index in range(num_files):
+        if skip_every and file_index % skip_every == 0:
+            continue
+        sample_index, read_index = divmod(file_index, FILES_PER_SAMPLE)
+        file_size = 1_000_000 + file_index
+        if resize_every and file_index % resize_every == 0:
+            file_size += 1
+        e_tag = f"{file_index:032x}"
+        if re_tag_every and file_index % re_tag_every == 0:
+            e_tag = f"{file_index:030x}-2"
+        record = ListingRecord(
+            relative_path=f"Sample_{sample_index:07d}/Sample_{sample_index:07d}_S1_L001_R{read_index}_001.fastq.gz",
+            file_size_in_bytes=file_size,
+            object_e_tag=e_tag,
+            data_id=f"fil.{file_index:032x}",
+        )
+        if not shuffle_window:
+            yield record
+            continue
+        window.append(record)
+        if len(window) >= shuffle_window:
+            randomiser.shuffle(window)
+            yield from window
+            window = []
+
+    randomiser.shuffle(window)
+    yield from window
+
+
+def run_scenario(name: str, num_files: int, trace_memory: bool, **destination_kwargs) -> None:
+    """
+    Diff a clean source listing against a destination listing generated with the given kwargs
+    """
+    if trace_memory:
+        tracemalloc.start()
+
+    start_time = time.perf_counter()
+    listing_diff = diff_listing_records(
+        source_records=generate_listing(num_files),
+        destination_records=generate_listing(num_files, seed=1, **destination_kwargs),
+    )
+    elapsed_seconds = time.perf_counter() - start_time
+
+    peak_memory_mb = None
+    if trace_memory:
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_memory_mb = peak_memory_bytes / 1024 / 1024
+
+    print(
+        f"{name:<28} files={num_files:>9,} "
+        f"time={elapsed_seconds:7.2f}s "
+        f"rate={num_files / elapsed_seconds:>11,.0f} files/s "
+        f"peak_pending={listing_diff.peak_pending_count:>8,} "
+        f"missing={len(listing_diff.missing):>6,} "
+        f"size_mismatched={len(listing_diff.size_mismatched):>6,} "
+        f"e_tag_mismatched={len(listing_diff.e_tag_mismatched):>6,}"
+        + (f" peak_memory={peak_memory_mb:8.1f}MB" if peak_memory_mb is not None else "")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--trace-memory", action="store_true", help="Measure peak memory with tracemalloc (slower)")
+    args = parser.parse_args()
+
+    for num_files in args.sizes:
+        run_scenario("identical, same order", num_files, args.trace_memory)
+        run_scenario("identical, shuffled x1000", num_files, args.trace_memory, shuffle_window=1000)
+        run_scenario(
+            "mismatches, shuffled x1000", num_files, args.trace_memory,
+            shuffle_window=1000, skip_every=997, resize_every=1009, re_tag_every=1013
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the per-call cost of bssh_manager_tools.utils.logger against the previous implementation
+
+  * get_logger: the previous get_logger called inspect.stack() (building frame records and reading source lines
+                for the whole stack) on every call, the current get_logger is a cached lookup by name
+  * set_basic_logger: the previous set_basic_logger added another root handler on every call,
+                      so every log line was written once per warm invocation
+  * log call: the cost of a log call that is filtered out by the log level, and one that is written,
+              as text (the previous format) and as JSON
+
+The stack depth is padded to mimic a call from inside a lambda handler.
+
+Usage:
+    python dev/benchmarks/benchmark_logger.py --iterations 20000
+"""
+
+# Standard imports
+import argparse
+import inspect
+import io
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+# Add the layer source to the path
+APP_DIR = Path(__file__).absolute().parent.parent.parent / "app"
+sys.path.insert(0, str(APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"))
+
+# Layer imports
+from bssh_manager_tools.utils import logger as logger_module  # noqa: E402
+
+# Globals
+DEFAULT_ITERATIONS = 10_000
+STACK_DEPTH = 20
+WARM_INVOCATIONS = 10
+
+
+def previous_get_logger() -> logging.Logger:
+    """
+    The previous implementation of get_logger
+    """
+    frame_info = inspect.stack()[2]
+    return logging.getLogger(getattr(frame_info, "function", None))
+
+
+def previous_set_basic_logger() -> logging.Logger:
+    """
+    The previous implementation of set_basic_logger
+    """
+    root_logger = logging.getLogger()
+    console = logging.StreamHandler()
+    console.setLevel(logging.INFO)
+    console.setFormatter(logging.Formatter(logger_module.LOGGER_STYLE))
+    root_logger.addHandler(console)
+    return root_logger
+
+
+def time_per_call(func: Callable[[], object], iterations: int, stack_depth: int = STACK_DEPTH) -> float:
+    """
+    Return the mean time per call in microseconds, called from stack_depth frames down
+    """
+    def _run(depth: int) -> float:
+        if depth > 0:
+            return _run(depth - 1)
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start_time) / iterations * 1_000_000
+
+    return _run(stack_depth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    args = parser.parse_args()
+
+    # Logger lookup
+    previous_lookup_us = time_per_call(previous_get_logger, max(1, args.iterations // 10))
+    current_lookup_us = time_per_call(lambda: logger_module.get_logger(__name__), args.iterations)
+
+    print(f"{'get_logger (previous)':<32} {previous_lookup_us:10.2f} us/call")
+    print(f"{'get_logger (current)':<32} {current_lookup_us:10.2f} us/call")
+    print(f"{'get_logger speed up':<32} {previous_lookup_us / current_lookup_us:10.0f} x")
+    print()
+
+    # Handler installation across warm invocations
+    root_logger = logging.getLogger()
+    root_handlers = list(root_logger.handlers)
+
+    for _ in range(WARM_INVOCATIONS):
+        previous_set_basic_logger()
+    previous_handler_count = len(root_logger.handlers) - len(root_handlers)
+    root_logger.handlers = list(root_handlers)
+
+    for _ in range(WARM_INVOCATIONS):
+        logger_module.set_basic_logger()
+    current_handler_count = len(root_logger.handlers) - len(root_handlers)
+    root_logger.handlers = list(root_handlers)
+
+    print(f"{'root handlers after ' + str(WARM_INVOCATIONS) + ' calls':<32} "
+          f"{previous_handler_count:>4} (previous) {current_handler_count:>4} (current)")
+    print()
+
+    # Log calls, written to an in-memory stream
+    benchmark_logger = logging.getLogger("benchmark_logger")
+    benchmark_logger.propagate = False
+    benchmark_logger.setLevel(logging.INFO)
+    stream_handler = logging.StreamHandler(io.StringIO())
+    benchmark_logger.addHandler(stream_handler)
+
+    for format_name, formatter in [
+        ("text", logging.Formatter(logger_module.LOGGER_STYLE)),
+        ("json", logger_module.JsonFormatter()),
+    ]:
+        stream_handler.setFormatter(formatter)
+        filtered_us = time_per_call(
+            lambda: benchmark_logger.debug("Listed %d files under %s", 1000, "Samples/"),
+            args.iterations
+        )
+        written_us = time_per_call(
+            lambda: benchmark_logger.info("Listed %d files under %s", 1000, "Samples/"),
+            args.iterations
+        )
+        print(f"{'log call, filtered (' + format_name + ')':<32} {filtered_us:10.2f} us/call")
+        print(f"{'log call, written (' + format_name + ')':<32} {written_us:10.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
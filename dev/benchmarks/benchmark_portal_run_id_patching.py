@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark (and check) the add_portal_run_id_attributes handler offline
+
+The copy jobs of a synthetic run are planned and run against the in-process fakes in offline_fakes.py,
+then each scenario adds the portal run id attribute to every filemanager record under the output uri:
+  * complete, a single invocation with no time limit
+  * time-budget, every invocation stops once it is within --time-budget-seconds of its (simulated) timeout,
+    and the handler is invoked again, as the step function would, until it returns isComplete
+  * retry, patch call --fail-at-patch-call drops its connection, the invocation fails with a
+    PortalRunIdPatchingTransientError (the error the step function retries on),
+    and the retry resumes from the saved cursor
+  * rerun, every record already carries the portal run id (i.e. a new execution for the same run),
+    so the records are listed but nothing is patched
+Each scenario must leave every record with the portal run id, patching each record at most once
+(the retry scenario allows the one failed patch to be repeated), otherwise the script exits with a non-zero status.
+
+Usage:
+    python dev/benchmarks/benchmark_portal_run_id_patching.py
+    python dev/benchmarks/benchmark_portal_run_id_patching.py --profile novaseq_x_10b --workers 1 8 --latency-ms 20
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+import uuid
+from os import environ
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+# Add the benchmarks directory, layer source and lambdas to the path
+BENCHMARKS_DIR = Path(__file__).absolute().parent
+APP_DIR = BENCHMARKS_DIR.parent.parent / "app"
+sys.path.insert(0, str(BENCHMARKS_DIR))
+sys.path.insert(0, str(APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"))
+for lambda_dir_name in ["get_icav2_copy_job_list_py", "add_portal_run_id_attributes_py"]:
+    sys.path.insert(0, str(APP_DIR / "lambdas" / lambda_dir_name))
+
+# Benchmark imports
+from offline_fakes import (  # noqa: E402
+    ICAV2_ACCESS_TOKEN_SECRET_ID,
+    RUN_PROFILES,
+    FakeIcav2,
+    generate_run,
+    get_fake_access_token,
+    install_fake_modules,
+)
+
+# Globals
+SCENARIOS = ["complete", "time-budget", "retry", "rerun"]
+DEFAULT_PROFILE = "novaseq_6000_s4"
+DEFAULT_WORKERS = [1, 8]
+DEFAULT_LATENCY_MS = 5.0
+DEFAULT_TIME_BUDGET_SECONDS = 3.0
+DEFAULT_FAIL_AT_PATCH_CALL = 1500
+PORTAL_RUN_ID = "20251003abcd1234"
+
+# The number of invocations before we give up on the time-budget scenario
+MAX_INVOCATIONS = 1000
+
+
+class BudgetedLambdaContext(SimpleNamespace):
+    """
+    A lambda context whose remaining time counts down from the time budget plus the handler's reserve
+    """
+    def __init__(self, time_budget_seconds: float, reserve_seconds: float):
+        super().__init__()
+        self.deadline = time.perf_counter() + time_budget_seconds + reserve_seconds
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int((self.deadline - time.perf_counter()) * 1000)
+
+
+def run_scenario(
+    fake_icav2: FakeIcav2,
+    output_uri: str,
+    record_count: int,
+    scenario_name: str,
+    workers: int,
+    time_budget_seconds: float,
+    fail_at_patch_call: int,
+) -> Dict:
+    # Layer and lambda imports, after the fake modules are installed
+    from bssh_manager_tools.utils.portal_run_id_attribute_helpers import (
+        MIN_REMAINING_TIME_SECONDS,
+        PortalRunIdPatchingTransientError,
+    )
+    import add_portal_run_id_attributes
+
+    environ["BSSH_MANAGER_MAX_WORKERS"] = str(workers)
+
+    # Start from records without attributes, unless rerunning
+    if scenario_name != "rerun":
+        fake_icav2.filemanager_attributes.clear()
+    fake_icav2.failing_call_numbers = (
+        {"file_manager_patch_request": fail_at_patch_call} if scenario_name == "retry" else {}
+    )
+    fake_icav2.reset_call_counts()
+
+    event = {"outputUri": output_uri, "portalRunId": PORTAL_RUN_ID, "cacheKey": str(uuid.uuid4())}
+    invocation_count = 0
+    failed_invocation_count = 0
+    handler_output: Dict = {"isComplete": False}
+
+    start_time = time.perf_counter()
+    while not handler_output["isComplete"] and invocation_count < MAX_INVOCATIONS:
+        invocation_count += 1
+        context = (
+            BudgetedLambdaContext(time_budget_seconds, MIN_REMAINING_TIME_SECONDS)
+            if scenario_name == "time-budget" else None
+        )
+        try:
+            handler_output = add_portal_run_id_attributes.handler(dict(event), context)
+        except PortalRunIdPatchingTransientError:
+            failed_invocation_count += 1
+    wall_time_seconds = time.perf_counter() - start_time
+
+    patched_record_count = sum(map(
+        lambda attributes_iter_: attributes_iter_.get("portalRunId") == PORTAL_RUN_ID,
+        fake_icav2.filemanager_attributes.values()
+    ))
+    patch_call_count = fake_icav2.call_counts["file_manager_patch_request"]
+    expected_patch_call_count = {
+        "complete": record_count,
+        "time-budget": record_count,
+        "retry": record_count + 1,
+        "rerun": 0,
+    }[scenario_name]
+
+    return {
+        "scenario": scenario_name,
+        "workers": workers,
+        "recordCount": record_count,
+        "isExpected": (
+            handler_output["isComplete"] and
+            patched_record_count == record_count and
+            patch_call_count <= expected_patch_call_count
+        ),
+        "invocationCount": invocation_count,
+        "failedInvocationCount": failed_invocation_count,
+        "listCallCount": fake_icav2.call_counts["get_file_manager_request"],
+        "patchCallCount": patch_call_count,
+        "skippedCount": handler_output.get("skippedCount"),
+        "wallTimeSeconds": round(wall_time_seconds, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=list(RUN_PROFILES))
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS,
+                        help="Latency added to every filemanager call")
+    parser.add_argument("--time-budget-seconds", type=float, default=DEFAULT_TIME_BUDGET_SECONDS,
+                        help="The time each invocation of the time-budget scenario has to patch records")
+    parser.add_argument("--fail-at-patch-call", type=int, default=DEFAULT_FAIL_AT_PATCH_CALL)
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--output", type=Path, help="Save the results as JSON")
+    args = parser.parse_args()
+
+    fake_icav2 = FakeIcav2(latency_seconds=0)
+    install_fake_modules(fake_icav2)
+
+    environ["BSSH_MANAGER_STORE_URI"] = Path(tempfile.mkdtemp(prefix="bssh-benchmark-store-")).as_uri() + "/"
+    environ["ICAV2_ACCESS_TOKEN_SECRET_ID"] = ICAV2_ACCESS_TOKEN_SECRET_ID
+
+    # Layer imports, after the fake modules are installed
+    from bssh_manager_tools.utils.copy_job_encoding_helpers import decode_copy_job
+    from bssh_manager_tools.utils.filemanager_listing_helpers import iter_filemanager_record_pages
+    from bssh_manager_tools.utils.icav2_credential_helpers import LocalSecretsBackend, set_secrets_backend
+    from bssh_manager_tools.utils.metrics_helpers import LocalMetricsSink, set_metrics_sink
+
+    set_secrets_backend(LocalSecretsBackend({ICAV2_ACCESS_TOKEN_SECRET_ID: get_fake_access_token()}))
+    set_metrics_sink(LocalMetricsSink())
+
+    # Lambda imports
+    import get_icav2_copy_job_list
+
+    # Only log warnings and above
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+    # Copy the run into the output uri
+    copy_job_list_event = generate_run(fake_icav2, RUN_PROFILES[args.profile])
+    copy_job_list_event["copyJobManifestMinCopyJobCount"] = 2 ** 62
+    copy_job_list_event["copyJobManifestMaxInlinePayloadSizeInBytes"] = 2 ** 62
+    fake_icav2.run_copy_jobs(list(map(
+        decode_copy_job,
+        get_icav2_copy_job_list.handler(copy_job_list_event, None)["icav2CopyJobList"]
+    )))
+
+    output_uri = copy_job_list_event["outputUri"]
+    record_count = sum(map(
+        len,
+        iter_filemanager_record_pages(
+            bucket=output_uri.split("/")[2],
+            key_prefix=output_uri.split("/", 3)[3].rstrip("/") + "/"
+        )
+    ))
+
+    fake_icav2.latency_seconds = args.latency_ms / 1000
+
+    results: List[Dict] = []
+    for scenario_name in args.scenarios:
+        for workers in args.workers:
+            results.append(run_scenario(
+                fake_icav2, output_uri, record_count, scenario_name, workers,
+                args.time_budget_seconds, args.fail_at_patch_call
+            ))
+
+    print(
+        f"{'scenario':<12} {'workers':>7} {'records':>8} {'invocations':>11} {'failed':>6} "
+        f"{'list calls':>10} {'patch calls':>11} {'skipped':>8} {'wall (s)':>9}"
+    )
+    for result in results:
+        print(
+            f"{result['scenario']:<12} {result['workers']:>7} {result['recordCount']:>8} "
+            f"{result['invocationCount']:>11} {result['failedInvocationCount']:>6} "
+            f"{result['listCallCount']:>10} {result['patchCallCount']:>11} {result['skippedCount']:>8} "
+            f"{result['wallTimeSeconds']:>9.2f}"
+            + ("" if result["isExpected"] else "  UNEXPECTED")
+        )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if not all(map(lambda result_iter_: result_iter_["isExpected"], results)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
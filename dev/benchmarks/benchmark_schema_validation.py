@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark cold versus warm validation in validate_draft_data_complete_schema
+
+The schema registry is swapped for the schema file in app/event-schemas, so that only
+the schema parsing, meta-schema checks and validation are measured.
+
+  * cold: what every invocation used to do, json.loads the schema, round trip the event through json,
+          and call jsonschema.validate (which checks the schema against its meta-schema each time)
+  * compile: a first call to get_compiled_validator, once per container and schema version
+  * warm: a cached validator collecting every error with iter_errors
+
+Usage:
+    python dev/benchmarks/benchmark_schema_validation.py --iterations 2000
+"""
+
+# Standard imports
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+# Add the layer source and lambda to the path
+APP_DIR = Path(__file__).absolute().parent.parent.parent / "app"
+sys.path.insert(0, str(APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"))
+sys.path.insert(0, str(APP_DIR / "lambdas" / "validate_draft_data_complete_schema_py"))
+
+# Lambda imports
+import jsonschema  # noqa: E402
+import validate_draft_data_complete_schema as validate_lambda  # noqa: E402
+
+# Globals
+SCHEMA_PATH = APP_DIR / "event-schemas" / "complete-data-draft-schema.json"
+DEFAULT_ITERATIONS = 1000
+
+VALID_EVENT = {
+    "tags": {
+        "instrumentRunId": "251003_A00130_0384_AHL7LWDSXF",
+        "basespaceRunId": 1234567890,
+        "experimentRunName": "Name of the run",
+    },
+    "inputs": {
+        "bsshProjectId": "a1234567-1234-1234-1234-1234567890ab",
+        "bsshAnalysisId": "b1234567-1234-1234-1234-1234567890ab",
+        "instrumentRunId": "251003_A00130_0384_AHL7LWDSXF",
+    },
+    "engineParameters": {
+        "outputUri": "s3://bucket/primary/251003_A00130_0384_AHL7LWDSXF/20251003abcd1234/",
+    },
+}
+
+
+def time_per_call(func: Callable[[], object], iterations: int) -> float:
+    """
+    Return the mean time per call in microseconds
+    """
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start_time) / iterations * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    args = parser.parse_args()
+
+    schema_str = SCHEMA_PATH.read_text()
+
+    # Use the local schema file in place of the schema registry
+    validate_lambda.get_schema_from_registry = lambda registry_name, schema_name, schema_version=None: schema_str
+
+    # Check the event used is valid, so both paths do the same work
+    event: Dict = VALID_EVENT
+    validator = validate_lambda.get_compiled_validator("registry", "schema", "1")
+    assert validate_lambda.get_validation_errors(validator, event) == []
+
+    def _cold():
+        jsonschema.validate(instance=json.loads(json.dumps(event)), schema=json.loads(schema_str))
+
+    def _compile():
+        validate_lambda.VALIDATOR_CACHE.clear()
+        validate_lambda.get_compiled_validator("registry", "schema", "1")
+
+    def _warm():
+        validate_lambda.get_validation_errors(
+            validate_lambda.get_compiled_validator("registry", "schema", "1"),
+            event
+        )
+
+    cold_us = time_per_call(_cold, args.iterations)
+    compile_us = time_per_call(_compile, args.iterations)
+    warm_us = time_per_call(_warm, args.iterations)
+
+    print(f"{'cold (validate per call)':<28} {cold_us:10.1f} us/call")
+    print(f"{'compile (once per version)':<28} {compile_us:10.1f} us/call")
+    print(f"{'warm (cached validator)':<28} {warm_us:10.1f} us/call")
+    print(f"{'warm speed up':<28} {cold_us / warm_us:10.1f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+
+"""
+Report the import time of each lambda handler module, and check it against the budget in import_time_budget.json
+
+Each handler module is imported in a fresh interpreter with python -X importtime,
+with the layer source and the lambda directory on the path, as in the lambda runtime.
+The import is repeated (--repeat) and the median taken, after one untimed import to write the bytecode caches.
+
+Import times depend on the machine, and on how busy it is, so they are not compared to a fixed number of milliseconds.
+Instead the same run also times the import of a fixed set of standard library modules (BASELINE_MODULE_NAMES)
+in the same way, and each handler's import time is reported as a ratio of that baseline.
+
+For each handler we report the total import time, its ratio of the baseline,
+and the import time of each top level package it imports
+(the sum of the 'self' times of the package's modules), largest first.
+
+The budget fails a handler if
+  * the handler module cannot be imported,
+  * any of the budget's deferredPackages is imported along with the handler module
+    (these are imported on first use, in the function that needs them),
+  * the ratio of its median import time to the median baseline import time is over the handler's maxBaselineRatio.
+
+--write-budget sets each handler's maxBaselineRatio to its measured ratio times --headroom (deferredPackages are kept).
+
+Usage:
+    python dev/benchmarks/import_time_budget.py
+    python dev/benchmarks/import_time_budget.py --handlers validate_copy_job --top 20
+    python dev/benchmarks/import_time_budget.py --write-budget --headroom 2
+"""
+
+# Standard imports
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from math import ceil
+from os import environ, pathsep
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+# Globals
+BENCHMARKS_DIR = Path(__file__).absolute().parent
+APP_DIR = BENCHMARKS_DIR.parent.parent / "app"
+LAYER_SRC_DIR = APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"
+LAMBDAS_DIR = APP_DIR / "lambdas"
+DEFAULT_BUDGET_PATH = BENCHMARKS_DIR / "import_time_budget.json"
+
+DEFAULT_REPEAT = 5
+DEFAULT_TOP = 10
+DEFAULT_HEADROOM = 2.0
+
+# The standard library modules timed as the baseline, most handlers import these (or their dependencies) anyway
+BASELINE_MODULE_NAMES = ["concurrent.futures", "dataclasses", "json", "logging", "typing", "urllib.parse"]
+
+# Budgets are at least this, so that fast imports do not fail on noise
+MIN_MAX_BASELINE_RATIO = 1.0
+
+IMPORT_TIME_PREFIX = "import time:"
+
+
+class ImportTimeEntry(NamedTuple):
+    """
+    A single line of the -X importtime output
+    """
+    module_name: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def get_handler_names() -> List[str]:
+    return sorted(map(
+        lambda lambda_dir_iter_: lambda_dir_iter_.name.removesuffix("_py"),
+        filter(
+            lambda lambda_dir_iter_: (lambda_dir_iter_ / (lambda_dir_iter_.name.removesuffix("_py") + ".py")).is_file(),
+            LAMBDAS_DIR.glob("*_py")
+        )
+    ))
+
+
+def parse_import_time_entries(stderr: str) -> List[ImportTimeEntry]:
+    """
+    Parse the lines of the -X importtime output, i.e.
+        import time: self [us] | cumulative | imported package
+        import time:       613 |        613 |   _json
+        import time:      1048 |       1661 | json
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+        self_us, cumulative_us, module_name = line[len(IMPORT_TIME_PREFIX):].split("|")
+        if not self_us.strip().isdigit():
+            # The header line
+            continue
+        entries.append(ImportTimeEntry(
+            module_name=module_name.strip(),
+            depth=(len(module_name) - len(module_name.lstrip()) - 1) // 2,
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+        ))
+    return entries
+
+
+def get_handler_subtree(entries: List[ImportTimeEntry], handler_name: str) -> List[ImportTimeEntry]:
+    """
+    Get the handler module's entry and every entry imported under it,
+    children are printed before their parent, so these are the entries back to the previous top level entry
+    """
+    subtree: List[ImportTimeEntry] = []
+    for entry in entries:
+        subtree.append(entry)
+        if entry.depth == 0:
+            if entry.module_name == handler_name:
+                return subtree
+            subtree = []
+    return []
+
+
+def import_modules(module_names: List[str], python_path: List[Path]) -> List[ImportTimeEntry]:
+    """
+    Import the modules in a fresh interpreter, return every import time entry
+    """
+    completed_process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(module_names)}"],
+        capture_output=True,
+        text=True,
+        env={
+            **environ,
+            "PYTHONPATH": pathsep.join(map(str, python_path)),
+        },
+    )
+
+    if completed_process.returncode != 0:
+        raise ImportError(completed_process.stderr.strip().splitlines()[-1])
+
+    return parse_import_time_entries(completed_process.stderr)
+
+
+def import_handler(handler_name: str) -> List[ImportTimeEntry]:
+    """
+    Import the handler module in a fresh interpreter, return the import time entries of the handler module
+    """
+    return get_handler_subtree(
+        import_modules([handler_name], [LAMBDAS_DIR / f"{handler_name}_py", LAYER_SRC_DIR]),
+        handler_name
+    )
+
+
+def measure_baseline(repeat: int) -> float:
+    """
+    Import the baseline modules repeat times (after one untimed import), and return the median import time in ms
+    """
+    import_modules(BASELINE_MODULE_NAMES, [])
+    return round(statistics.median(map(
+        lambda _: sum(map(
+            lambda entry_iter_: entry_iter_.cumulative_us,
+            filter(
+                lambda entry_iter_: entry_iter_.depth == 0,
+                import_modules(BASELINE_MODULE_NAMES, [])
+            )
+        )),
+        range(repeat)
+    )) / 1000, 2)
+
+
+def measure_handler(handler_name: str, repeat: int, baseline_import_time_ms: float) -> Dict:
+    """
+    Import the handler repeat times (after one untimed import), and return the median import times
+    """
+    try:
+        import_handler(handler_name)
+        runs = list(map(lambda _: import_handler(handler_name), range(repeat)))
+    except ImportError as import_error:
+        return {"handler": handler_name, "error": str(import_error)}
+
+    package_self_us_runs: List[Counter] = []
+    for run_entries in runs:
+        package_self_us = Counter()
+        for entry in run_entries:
+            package_self_us[entry.module_name.split(".")[0]] += entry.self_us
+        package_self_us_runs.append(package_self_us)
+
+    package_names = set().union(*package_self_us_runs)
+
+    import_time_ms = round(statistics.median(map(
+        lambda run_entries_iter_: run_entries_iter_[-1].cumulative_us,
+        runs
+    )) / 1000, 2)
+
+    return {
+        "handler": handler_name,
+        "error": None,
+        "importTimeMs": import_time_ms,
+        "baselineRatio": round(import_time_ms / baseline_import_time_ms, 2),
+        "moduleCount": len(runs[0]),
+        "packageImportTimesMs": dict(sorted(
+            map(
+                lambda package_name_iter_: (
+                    package_name_iter_,
+                    round(statistics.median(map(
+                        lambda package_self_us_iter_: package_self_us_iter_[package_name_iter_],
+                        package_self_us_runs
+                    )) / 1000, 2)
+                ),
+                package_names
+            ),
+            key=lambda package_item_iter_: -package_item_iter_[1]
+        )),
+    }
+
+
+def get_budget_failures(results: List[Dict], budget: Dict) -> List[str]:
+    failures = []
+    deferred_packages = set(budget.get("deferredPackages", []))
+
+    for result in results:
+        if result["error"] is not None:
+            failures.append(f"{result['handler']}: import failed, {result['error']}")
+            continue
+
+        eager_packages = sorted(deferred_packages.intersection(result["packageImportTimesMs"]))
+        if len(eager_packages) > 0:
+            failures.append(
+                f"{result['handler']}: imports {', '.join(eager_packages)} at module level, "
+                f"these should be imported on first use"
+            )
+
+        max_baseline_ratio: Optional[float] = budget.get("handlers", {}).get(result["handler"], {}).get(
+            "maxBaselineRatio"
+        )
+        if max_baseline_ratio is not None and result["baselineRatio"] > max_baseline_ratio:
+            failures.append(
+                f"{result['handler']}: import time {result['importTimeMs']} ms is {result['baselineRatio']}x "
+                f"the baseline, over the budget of {max_baseline_ratio}x"
+            )
+
+    return failures
+
+
+def write_budget(results: List[Dict], budget: Dict, budget_path: Path, headroom: float):
+    handler_budgets = dict(budget.get("handlers", {}))
+    for result in results:
+        if result["error"] is not None:
+            continue
+        handler_budgets[result["handler"]] = {
+            "maxBaselineRatio": max(MIN_MAX_BASELINE_RATIO, ceil(result["baselineRatio"] * headroom * 10) / 10)
+        }
+
+    budget_path.write_text(json.dumps(
+        {
+            "deferredPackages": budget.get("deferredPackages", []),
+            "handlers": dict(sorted(handler_budgets.items())),
+        },
+        indent=2
+    ) + "\n")
+
+
+def print_results(results: List[Dict], budget: Dict, top: int, baseline_import_time_ms: float):
+    print(f"baseline ({', '.join(BASELINE_MODULE_NAMES)}): {baseline_import_time_ms:.2f} ms")
+    print()
+    for result in results:
+        if result["error"] is not None:
+            print(f"{result['handler']}: import failed, {result['error']}")
+            print()
+            continue
+
+        max_baseline_ratio = budget.get("handlers", {}).get(result["handler"], {}).get("maxBaselineRatio")
+        print(
+            f"{result['handler']}: {result['importTimeMs']:.2f} ms, {result['baselineRatio']:.2f}x the baseline, "
+            f"{result['moduleCount']} modules"
+            + (f" (budget {max_baseline_ratio}x)" if max_baseline_ratio is not None else "")
+        )
+        for package_name, import_time_ms in list(result["packageImportTimesMs"].items())[:top]:
+            print(f"  {package_name:<36} {import_time_ms:>10.2f} ms")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--handlers", nargs="+", default=get_handler_names(), choices=get_handler_names())
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="The number of packages to list per handler")
+    parser.add_argument("--budget", type=Path, default=DEFAULT_BUDGET_PATH)
+    parser.add_argument("--write-budget", action="store_true",
+                        help="Set each handler's budget to its measured ratio of the baseline times --headroom")
+    parser.add_argument("--headroom", type=float, default=DEFAULT_HEADROOM)
+    parser.add_argument("--output", type=Path, help="Save the results as JSON")
+    args = parser.parse_args()
+
+    budget = json.loads(args.budget.read_text()) if args.budget.is_file() else {}
+
+    baseline_import_time_ms = measure_baseline(args.repeat)
+
+    results = list(map(
+        lambda handler_name_iter_: measure_handler(handler_name_iter_, args.repeat, baseline_import_time_ms),
+        args.handlers
+    ))
+
+    print_results(results, budget, args.top, baseline_import_time_ms)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(
+            {"baselineImportTimeMs": baseline_import_time_ms, "handlers": results}, indent=2
+        ) + "\n")
+
+    if args.write_budget:
+        write_budget(results, budget, args.budget, args.headroom)
+        print(f"Wrote the budget to {args.budget}")
+        return
+
+    failures = get_budget_failures(results, budget)
+    if len(failures) > 0:
+        print("\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+
+"""
+Evaluate the subset of JSONata used in the step function templates of this repo
+
+This is not a full JSONata implementation, it covers what our templates use:
+  * comments, number / string / boolean / null literals
+  * $variables, $ (the context), field paths (a.b.c, mapped over arrays) and filters (a[b = false], a[0])
+  * object and array constructors, parentheses and blocks ( a; b )
+  * the operators + - * / & = != < <= > >= and or, the conditional a ? b : c and the chain a ~> $f
+  * lambdas, function($v, $k){ ... }
+  * the functions in FUNCTIONS ($merge, $exists, $string, $lookup, $sift, $now, ...)
+
+Anything else raises a JsonataSubsetError, so that an unsupported template fails loudly
+rather than being evaluated incorrectly.
+
+Usage:
+    evaluate_expression('$states.input.a ? $b : {}', variables={"states": {"input": {"a": 1}}, "b": 2})
+"""
+
+# Standard imports
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class JsonataSubsetError(Exception):
+    pass
+
+
+class _Undefined:
+    """
+    JSONata's 'undefined', distinct from null
+    """
+
+    def __repr__(self):
+        return "UNDEFINED"
+
+    def __bool__(self):
+        return False
+
+
+UNDEFINED = _Undefined()
+
+TOKEN_REGEX = re.compile(
+    r"""
+    (?P<space>\s+|/\*.*?\*/)
+    |(?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    |(?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    |(?P<variable>\$[A-Za-z_][A-Za-z0-9_]*|\$)
+    |(?P<name>[A-Za-z_][A-Za-z0-9_]*|`[^`]*`)
+    |(?P<operator>~>|!=|>=|<=|[=<>+\-*/&?:.,;()\[\]{}])
+    """,
+    re.VERBOSE | re.DOTALL
+)
+
+KEYWORD_VALUES = {"true": True, "false": False, "null": None}
+
+# Binding power of each infix operator
+INFIX_BINDING_POWERS = {
+    ".": 75, "[": 80, "(": 80,
+    "*": 60, "/": 60,
+    "+": 50, "-": 50, "&": 50,
+    "=": 40, "!=": 40, "<": 40, "<=": 40, ">": 40, ">=": 40, "~>": 40,
+    "and": 30, "or": 25,
+    "?": 20,
+}
+
+
+class Token(NamedTuple):
+    kind: str
+    value: Any
+
+
+def tokenize(expression: str) -> List[Token]:
+    tokens: List[Token] = []
+    position = 0
+
+    while position < len(expression):
+        match = TOKEN_REGEX.match(expression, position)
+        if match is None:
+            raise JsonataSubsetError(f"Unexpected character {expression[position]!r} at position {position}")
+        position = match.end()
+
+        kind = match.lastgroup
+        value = match.group(kind)
+
+        if kind == "space":
+            continue
+        if kind == "number":
+            tokens.append(Token("literal", float(value) if any(c in value for c in ".eE") else int(value)))
+        elif kind == "string":
+            tokens.append(Token("literal", json.loads('"' + value[1:-1].replace('"', '\\"') + '"')
+                                if value[0] == "'" else json.loads(value)))
+        elif kind == "name" and value in KEYWORD_VALUES:
+            tokens.append(Token("literal", KEYWORD_VALUES[value]))
+        elif kind == "name" and value in ("and", "or", "function"):
+            tokens.append(Token("operator", value))
+        elif kind == "name":
+            tokens.append(Token("name", value.strip("`")))
+        else:
+            tokens.append(Token(kind, value))
+
+    tokens.append(Token("end", None))
+    return tokens
+
+
+class Parser:
+    """
+    A Pratt parser, each node is a tuple of (node type, *children)
+    """
+
+    def __init__(self, expression: str):
+        self.tokens = tokenize(expression)
+        self.position = 0
+
+    def peek(self) -> Token:
+        return self.tokens[self.position]
+
+    def advance(self, expected_value: Optional[str] = None) -> Token:
+        token = self.tokens[self.position]
+        if expected_value is not None and token.value != expected_value:
+            raise JsonataSubsetError(f"Expected {expected_value!r}, got {token.value!r}")
+        self.position += 1
+        return token
+
+    def parse(self) -> Tuple:
+        node = self.parse_expression(0)
+        if self.peek().kind != "end":
+            raise JsonataSubsetError(f"Unexpected token {self.peek().value!r}")
+        return node
+
+    def parse_expression(self, min_binding_power: int) -> Tuple:
+        node = self.parse_prefix()
+
+        while True:
+            token = self.peek()
+            if token.kind != "operator" or token.value not in INFIX_BINDING_POWERS:
+                return node
+            binding_power = INFIX_BINDING_POWERS[token.value]
+            if binding_power <= min_binding_power:
+                return node
+            self.advance()
+            node = self.parse_infix(token.value, node, binding_power)
+
+    def parse_delimited(self, closing_value: str, separator: str = ",") -> List[Tuple]:
+        nodes: List[Tuple] = []
+        while self.peek().value != closing_value:
+            nodes.append(self.parse_expression(0))
+            if self.peek().value == separator:
+                self.advance()
+        self.advance(closing_value)
+        return nodes
+
+    def parse_prefix(self) -> Tuple:
+        token = self.advance()
+
+        if token.kind == "literal":
+            return ("literal", token.value)
+        if token.kind == "variable":
+            return ("variable", token.value[1:])
+        if token.kind == "name":
+            return ("name", token.value)
+        if token.value == "-":
+            return ("negate", self.parse_expression(70))
+        if token.value == "(":
+            return ("block", self.parse_delimited(")", separator=";"))
+        if token.value == "[":
+            return ("array", self.parse_delimited("]"))
+        if token.value == "{":
+            pairs = []
+            while self.peek().value != "}":
+                key_node = self.parse_expression(0)
+                self.advance(":")
+                pairs.append((key_node, self.parse_expression(0)))
+                if self.peek().value == ",":
+                    self.advance()
+            self.advance("}")
+            return ("object", pairs)
+        if token.value == "function":
+            self.advance("(")
+            parameter_names = list(map(lambda node_iter_: node_iter_[1], self.parse_delimited(")")))
+            self.advance("{")
+            body = self.parse_expression(0)
+            self.advance("}")
+            return ("lambda", parameter_names, body)
+
+        raise JsonataSubsetError(f"Unsupported token {token.value!r}")
+
+    def parse_infix(self, operator: str, left: Tuple, binding_power: int) -> Tuple:
+        if operator == ".":
+            return ("path", left, self.parse_expression(binding_power))
+        if operator == "[":
+            predicate = self.parse_expression(0)
+            self.advance("]")
+            return ("filter", left, predicate)
+        if operator == "(":
+            return ("call", left, self.parse_delimited(")"))
+        if operator == "?":
+            then_node = self.parse_expression(0)
+            else_node = ("literal", UNDEFINED)
+            if self.peek().value == ":":
+                self.advance()
+                else_node = self.parse_expression(0)
+            return ("condition", left, then_node, else_node)
+        return ("binary", operator, left, self.parse_expression(binding_power))
+
+
+def to_boolean(value: Any) -> bool:
+    if value is UNDEFINED or value is None:
+        return False
+    if isinstance(value, (list, dict, str)):
+        return len(value) > 0
+    return bool(value)
+
+
+def to_string(value: Any) -> str:
+    if value is UNDEFINED:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"))
+
+
+def unwrap_sequence(values: List[Any]) -> Any:
+    """
+    JSONata sequences of one item are the item itself, and empty sequences are undefined
+    """
+    if len(values) == 0:
+        return UNDEFINED
+    if len(values) == 1:
+        return values[0]
+    return values
+
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "exists": lambda value: value is not UNDEFINED,
+    "string": to_string,
+    "boolean": to_boolean,
+    "not": lambda value: not to_boolean(value),
+    "number": lambda value: float(value) if "." in str(value) else int(value),
+    "count": lambda value: 0 if value is UNDEFINED else (len(value) if isinstance(value, list) else 1),
+    "sum": lambda values: sum(values if isinstance(values, list) else [values]),
+    "keys": lambda value: list(value.keys()) if isinstance(value, dict) else UNDEFINED,
+    "lookup": lambda value, key: value.get(key, UNDEFINED) if isinstance(value, dict) else UNDEFINED,
+    "append": lambda left, right: (
+        (left if isinstance(left, list) else [left]) + (right if isinstance(right, list) else [right])
+    ),
+    "merge": lambda values: {
+        key: value
+        for obj in (values if isinstance(values, list) else [values]) if isinstance(obj, dict)
+        for key, value in obj.items()
+    },
+    "sift": lambda value, func: {
+        key: item for key, item in value.items() if to_boolean(func(item, key))
+    },
+    "now": lambda: datetime.now(tz=timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+}
+
+
+class Evaluator:
+    def __init__(self, variables: Dict[str, Any]):
+        self.variables = variables
+
+    def evaluate(self, node: Tuple, context: Any, scope: Dict[str, Any]) -> Any:
+        node_type = node[0]
+
+        if node_type == "literal":
+            return node[1]
+
+        if node_type == "variable":
+            if node[1] == "":
+                return context
+            if node[1] in scope:
+                return scope[node[1]]
+            if node[1] in self.variables:
+                return self.variables[node[1]]
+            if node[1] in FUNCTIONS:
+                return FUNCTIONS[node[1]]
+            return UNDEFINED
+
+        if node_type == "name":
+            return self.get_field(context, node[1])
+
+        if node_type == "path":
+            left_value = self.evaluate(node[1], context, scope)
+            if left_value is UNDEFINED:
+                return UNDEFINED
+            if isinstance(left_value, list):
+                return unwrap_sequence(self.flatten(list(map(
+                    lambda item_iter_: self.evaluate(node[2], item_iter_, scope),
+                    left_value
+                ))))
+            return self.evaluate(node[2], left_value, scope)
+
+        if node_type == "filter":
+            left_value = self.evaluate(node[1], context, scope)
+            if left_value is UNDEFINED:
+                return UNDEFINED
+            items = left_value if isinstance(left_value, list) else [left_value]
+            if node[2][0] == "literal" and isinstance(node[2][1], int):
+                index = node[2][1]
+                return items[index] if -len(items) <= index < len(items) else UNDEFINED
+            return unwrap_sequence(list(filter(
+                lambda item_iter_: to_boolean(self.evaluate(node[2], item_iter_, scope)),
+                items
+            )))
+
+        if node_type == "block":
+            value = UNDEFINED
+            block_scope = dict(scope)
+            for child_node in node[1]:
+                value = self.evaluate(child_node, context, block_scope)
+            return value
+
+        if node_type == "array":
+            values = []
+            for child_node in node[1]:
+                value = self.evaluate(child_node, context, scope)
+                if value is UNDEFINED:
+                    continue
+                if child_node[0] == "path" and isinstance(value, list):
+                    values.extend(value)
+                else:
+                    values.append(value)
+            return values
+
+        if node_type == "object":
+            obj = {}
+            for key_node, value_node in node[1]:
+                value = self.evaluate(value_node, context, scope)
+                if value is not UNDEFINED:
+                    obj[to_string(self.evaluate(key_node, context, scope))] = value
+            return obj
+
+        if node_type == "lambda":
+            parameter_names, body = node[1], node[2]
+
+            def _lambda(*args):
+                lambda_scope = dict(scope)
+                lambda_scope.update(zip(parameter_names, args))
+                return self.evaluate(body, context, lambda_scope)
+
+            return _lambda
+
+        if node_type == "call":
+            func = self.evaluate(node[1], context, scope)
+            if not callable(func):
+                raise JsonataSubsetError(f"Unsupported function {node[1]}")
+            return func(*map(lambda arg_iter_: self.evaluate(arg_iter_, context, scope), node[2]))
+
+        if node_type == "condition":
+            if to_boolean(self.evaluate(node[1], context, scope)):
+                return self.evaluate(node[2], context, scope)
+            return self.evaluate(node[3], context, scope)
+
+        if node_type == "negate":
+            return -self.evaluate(node[1], context, scope)
+
+        if node_type == "binary":
+            return self.evaluate_binary(node[1], node[2], node[3], context, scope)
+
+        raise JsonataSubsetError(f"Unsupported node {node_type}")
+
+    def evaluate_binary(self, operator: str, left_node: Tuple, right_node: Tuple, context: Any, scope: Dict) -> Any:
+        # Chain, a ~> $f(b) is $f(a, b)
+        if operator == "~>":
+            left_value = self.evaluate(left_node, context, scope)
+            if right_node[0] == "call":
+                func = self.evaluate(right_node[1], context, scope)
+                args = list(map(lambda arg_iter_: self.evaluate(arg_iter_, context, scope), right_node[2]))
+                return func(left_value, *args)
+            return self.evaluate(right_node, context, scope)(left_value)
+
+        if operator == "and":
+            return (
+                to_boolean(self.evaluate(left_node, context, scope)) and
+                to_boolean(self.evaluate(right_node, context, scope))
+            )
+        if operator == "or":
+            return (
+                to_boolean(self.evaluate(left_node, context, scope)) or
+                to_boolean(self.evaluate(right_node, context, scope))
+            )
+
+        left_value = self.evaluate(left_node, context, scope)
+        right_value = self.evaluate(right_node, context, scope)
+
+        if operator == "&":
+            return to_string(left_value) + to_string(right_value)
+
+        if left_value is UNDEFINED or right_value is UNDEFINED:
+            return UNDEFINED if operator in "+-*/" else False
+
+        if operator == "=":
+            return left_value == right_value
+        if operator == "!=":
+            return left_value != right_value
+
+        return {
+            "+": lambda: left_value + right_value,
+            "-": lambda: left_value - right_value,
+            "*": lambda: left_value * right_value,
+            "/": lambda: left_value / right_value,
+            "<": lambda: left_value < right_value,
+            "<=": lambda: left_value <= right_value,
+            ">": lambda: left_value > right_value,
+            ">=": lambda: left_value >= right_value,
+        }[operator]()
+
+    def get_field(self, value: Any, field_name: str) -> Any:
+        if isinstance(value, dict):
+            return value.get(field_name, UNDEFINED)
+        if isinstance(value, list):
+            return unwrap_sequence(self.flatten(list(map(
+                lambda item_iter_: self.get_field(item_iter_, field_name),
+                value
+            ))))
+        return UNDEFINED
+
+    @staticmethod
+    def flatten(values: List[Any]) -> List[Any]:
+        flattened = []
+        for value in values:
+            if value is UNDEFINED:
+                continue
+            if isinstance(value, list):
+                flattened.extend(value)
+            else:
+                flattened.append(value)
+        return flattened
+
+
+def evaluate_expression(expression: str, variables: Optional[Dict[str, Any]] = None, context: Any = None) -> Any:
+    """
+    Evaluate a JSONata expression
+    :param expression: The expression, without the surrounding {% %}
+    :param variables: Variables by name, without the leading $
+    :param context: The context value, $
+    :return: The result, UNDEFINED if the expression has no value
+    """
+    return Evaluator(variables or {}).evaluate(Parser(expression).parse(), context, {})
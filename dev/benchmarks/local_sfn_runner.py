@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+
+"""
+Run a JSONata step function definition locally, on a simulated clock
+
+Supports the states our templates use, Pass, Task, Map (inline and distributed), Choice, Wait, Succeed and Fail,
+with Arguments, Output, Assign, Items, ItemSelector, ItemReader, ResultWriter and MaxConcurrency.
+Expressions are evaluated with jsonata_subset.
+The definition_substitutions are applied to the definition first, as CDK would,
+any other ${__...__} placeholders are left as they are.
+
+Task resources
+  * arn:aws:states:::lambda:invoke, the FunctionName (as written in the template, i.e. the ${__...__} placeholder)
+    is looked up in lambda_handlers and the python handler is called directly
+  * arn:aws:states:::events:putEvents, the entries are recorded
+  * arn:aws:states:::events:putEvents.waitForTaskToken, the task arguments and the simulated clock
+    are passed to the task_token_handler, which does the work of whatever would have sent the task success,
+    and returns the task result and how long (in simulated seconds) the callback would have taken
+  * arn:aws:states:::lambda:invoke.waitForTaskToken, the lambda handler is called as above,
+    then the task arguments are passed to the task_token_handler as for putEvents
+
+Nothing sleeps, each state advances the simulated clock by
+  * Task (lambda), the measured wall time of the handler plus lambda_overhead_seconds
+  * Task (putEvents), event_overhead_seconds
+  * Task (waitForTaskToken), the duration returned by the task_token_handler
+    (after the measured wall time of the handler plus lambda_overhead_seconds, for a lambda)
+  * Wait, its Seconds
+plus transition_seconds for every state.
+Map iterations are scheduled onto MaxConcurrency lanes, each iteration starting when a lane is free,
+iterations are run one after the other in this process.
+
+A distributed Map with an ItemReader gets the object from the item_reader_handler (called with the evaluated
+ItemReader Arguments, returning the object bytes, or None if it does not exist) and parses it by its
+ReaderConfig InputType (JSON or JSONL). A ResultWriter passes the evaluated ResultWriter Arguments and the
+iteration outputs to the result_writer_handler.
+Iterations of a distributed Map are child executions, so cannot read the variables of the enclosing states.
+
+Retry, Catch and TimeoutSeconds are not simulated, a handler that raises fails the execution
+with the exception class name as the error.
+
+Usage:
+    runner = LocalStateMachineRunner(
+        definition=json.loads(Path("my_sfn_template.asl.json").read_text()),
+        lambda_handlers={"${__my_lambda_function_arn__}": my_lambda.handler},
+        task_token_handler=lambda arguments, clock_seconds: ({}, 60.0),
+    )
+    report = runner.run({"portalRunId": "20251003abcd1234"})
+    print(report.duration_seconds, report.transition_count)
+"""
+
+# Standard imports
+import json
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from heapq import heappop, heappush
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Local imports
+from jsonata_subset import UNDEFINED, evaluate_expression
+
+# Globals
+LAMBDA_INVOKE_RESOURCE = "arn:aws:states:::lambda:invoke"
+LAMBDA_INVOKE_WAIT_FOR_TASK_TOKEN_RESOURCE = "arn:aws:states:::lambda:invoke.waitForTaskToken"
+PUT_EVENTS_RESOURCE = "arn:aws:states:::events:putEvents"
+PUT_EVENTS_WAIT_FOR_TASK_TOKEN_RESOURCE = "arn:aws:states:::events:putEvents.waitForTaskToken"
+
+# The maximum size of a state input, output, result or task arguments
+MAX_PAYLOAD_SIZE_IN_BYTES = 256 * 1024
+
+DEFAULT_LAMBDA_OVERHEAD_SECONDS = 0.1
+DEFAULT_EVENT_OVERHEAD_SECONDS = 0.05
+DEFAULT_TRANSITION_SECONDS = 0.02
+
+DISTRIBUTED_MAP_MODE = "DISTRIBUTED"
+
+# Handler types
+LambdaHandler = Callable[[Any, Any], Any]
+TaskTokenHandler = Callable[[Dict, float], Tuple[Any, float]]
+ItemReaderHandler = Callable[[Dict], Optional[bytes]]
+ResultWriterHandler = Callable[[Dict, List], None]
+
+
+class StateMachineFailed(Exception):
+    def __init__(self, error: Optional[str], cause: Optional[str] = None):
+        self.error = error
+        self.cause = cause
+        super().__init__(f"{error}: {cause}")
+
+
+class StateRecord(NamedTuple):
+    """
+    A single state transition, sizes are of the JSON serialised values, None where the state has no such value
+    """
+    state_path: str
+    state_name: str
+    state_type: str
+    start_seconds: float
+    end_seconds: float
+    input_bytes: int
+    output_bytes: int
+    arguments_bytes: Optional[int] = None
+    result_bytes: Optional[int] = None
+    assigned_bytes: Optional[int] = None
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.end_seconds - self.start_seconds
+
+    @property
+    def max_payload_bytes(self) -> int:
+        return max(filter(
+            lambda size_iter_: size_iter_ is not None,
+            [self.input_bytes, self.output_bytes, self.arguments_bytes, self.result_bytes, self.assigned_bytes]
+        ))
+
+
+@dataclass
+class LocalRunReport:
+    status: str = "RUNNING"
+    output: Any = None
+    error: Optional[str] = None
+    cause: Optional[str] = None
+    duration_seconds: float = 0.0
+    wall_time_seconds: float = 0.0
+    state_records: List[StateRecord] = field(default_factory=list)
+    lambda_invocation_counts: Counter = field(default_factory=Counter)
+    event_detail_types: Counter = field(default_factory=Counter)
+
+    @property
+    def transition_count(self) -> int:
+        return len(self.state_records)
+
+    @property
+    def lambda_invocation_count(self) -> int:
+        return sum(self.lambda_invocation_counts.values())
+
+    def get_timeline(self) -> List[StateRecord]:
+        return sorted(self.state_records, key=lambda state_record_iter_: state_record_iter_.start_seconds)
+
+    def get_state_summaries(self) -> List[Dict]:
+        """
+        Summarise the state records by state name (so Map iterations are combined), in order of first entry
+        :return:
+        """
+        summaries: Dict[str, Dict] = {}
+        for state_record in self.get_timeline():
+            summary = summaries.setdefault(state_record.state_name, {
+                "stateName": state_record.state_name,
+                "stateType": state_record.state_type,
+                "transitionCount": 0,
+                "firstStartSeconds": state_record.start_seconds,
+                "lastEndSeconds": state_record.end_seconds,
+                "totalDurationSeconds": 0.0,
+                "maxDurationSeconds": 0.0,
+                "maxInputBytes": 0,
+                "maxOutputBytes": 0,
+                "maxArgumentsBytes": None,
+                "maxResultBytes": None,
+                "maxAssignedBytes": None,
+                "isOverPayloadLimit": False,
+            })
+            summary["transitionCount"] += 1
+            summary["lastEndSeconds"] = max(summary["lastEndSeconds"], state_record.end_seconds)
+            summary["totalDurationSeconds"] += state_record.duration_seconds
+            summary["maxDurationSeconds"] = max(summary["maxDurationSeconds"], state_record.duration_seconds)
+            for summary_key, size in [
+                ("maxInputBytes", state_record.input_bytes),
+                ("maxOutputBytes", state_record.output_bytes),
+                ("maxArgumentsBytes", state_record.arguments_bytes),
+                ("maxResultBytes", state_record.result_bytes),
+                ("maxAssignedBytes", state_record.assigned_bytes),
+            ]:
+                if size is not None:
+                    summary[summary_key] = max(summary[summary_key] or 0, size)
+            summary["isOverPayloadLimit"] = (
+                summary["isOverPayloadLimit"] or state_record.max_payload_bytes > MAX_PAYLOAD_SIZE_IN_BYTES
+            )
+
+        return list(summaries.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "cause": self.cause,
+            "durationSeconds": round(self.duration_seconds, 3),
+            "wallTimeSeconds": round(self.wall_time_seconds, 3),
+            "transitionCount": self.transition_count,
+            "lambdaInvocationCount": self.lambda_invocation_count,
+            "lambdaInvocationCounts": dict(self.lambda_invocation_counts),
+            "eventDetailTypes": dict(self.event_detail_types),
+            "states": self.get_state_summaries(),
+            "timeline": list(map(
+                lambda state_record_iter_: {
+                    "statePath": state_record_iter_.state_path,
+                    "stateType": state_record_iter_.state_type,
+                    "startSeconds": round(state_record_iter_.start_seconds, 3),
+                    "endSeconds": round(state_record_iter_.end_seconds, 3),
+                    "maxPayloadBytes": state_record_iter_.max_payload_bytes,
+                },
+                self.get_timeline()
+            )),
+        }
+
+
+def get_size_in_bytes(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":")).encode())
+
+
+class LocalStateMachineRunner:
+    def __init__(
+        self,
+        definition: Dict,
+        lambda_handlers: Dict[str, LambdaHandler],
+        task_token_handler: Optional[TaskTokenHandler] = None,
+        item_reader_handler: Optional[ItemReaderHandler] = None,
+        result_writer_handler: Optional[ResultWriterHandler] = None,
+        definition_substitutions: Optional[Dict[str, str]] = None,
+        lambda_overhead_seconds: float = DEFAULT_LAMBDA_OVERHEAD_SECONDS,
+        event_overhead_seconds: float = DEFAULT_EVENT_OVERHEAD_SECONDS,
+        transition_seconds: float = DEFAULT_TRANSITION_SECONDS,
+        enforce_payload_limit: bool = False,
+    ):
+        """
+        :param definition: The state machine definition
+        :param lambda_handlers: The handler to call for each FunctionName
+        :param task_token_handler: Called with the task arguments and simulated clock of each
+                                   waitForTaskToken task, returns the task result and its simulated duration
+        :param item_reader_handler: Called with the ItemReader arguments of each distributed map,
+                                    returns the object bytes
+        :param result_writer_handler: Called with the ResultWriter arguments and iteration outputs of each
+                                      distributed map
+        :param definition_substitutions: Substituted for the ${key} placeholders in the definition
+        :param lambda_overhead_seconds: Added to the measured duration of each lambda handler
+        :param event_overhead_seconds: The duration of each putEvents task
+        :param transition_seconds: Added to the duration of every state
+        :param enforce_payload_limit: Fail with States.DataLimitExceeded,
+                                      as Step Functions would, when a payload is over 256 KiB
+        """
+        if definition.get("QueryLanguage") != "JSONata":
+            raise ValueError("Only JSONata state machines are supported")
+
+        if definition_substitutions:
+            definition_text = json.dumps(definition)
+            for substitution_key, substitution_value in definition_substitutions.items():
+                definition_text = definition_text.replace("${" + substitution_key + "}", substitution_value)
+            definition = json.loads(definition_text)
+
+        self.definition = definition
+        self.lambda_handlers = lambda_handlers
+        self.task_token_handler = task_token_handler
+        self.item_reader_handler = item_reader_handler
+        self.result_writer_handler = result_writer_handler
+        self.lambda_overhead_seconds = lambda_overhead_seconds
+        self.event_overhead_seconds = event_overhead_seconds
+        self.transition_seconds = transition_seconds
+        self.enforce_payload_limit = enforce_payload_limit
+
+        # Set on each run
+        self.report = LocalRunReport()
+        self.start_datetime = datetime.now(tz=timezone.utc)
+        self.execution_context: Dict = {}
+
+    def run(self, execution_input: Any, execution_name: Optional[str] = None) -> LocalRunReport:
+        """
+        Run the state machine to completion
+        :param execution_input:
+        :param execution_name:
+        :return:
+        """
+        execution_name = execution_name or str(uuid.uuid4())
+        self.report = LocalRunReport()
+        self.start_datetime = datetime.now(tz=timezone.utc)
+        self.execution_context = {
+            "Id": f"arn:aws:states:local:000000000000:execution:local:{execution_name}",
+            "Name": execution_name,
+            "StartTime": self.get_timestamp(0.0),
+            "Input": execution_input,
+        }
+
+        start_time = time.perf_counter()
+        try:
+            self.report.output, self.report.duration_seconds = self.run_states(
+                states_definition=self.definition,
+                state_input=execution_input,
+                variables={},
+                clock_seconds=0.0,
+                path_prefix="",
+            )
+            self.report.status = "SUCCEEDED"
+        except StateMachineFailed as state_machine_failed:
+            self.report.status = "FAILED"
+            self.report.error = state_machine_failed.error
+            self.report.cause = state_machine_failed.cause
+            self.report.duration_seconds = max(map(
+                lambda state_record_iter_: state_record_iter_.end_seconds,
+                self.report.state_records
+            ), default=0.0)
+        self.report.wall_time_seconds = time.perf_counter() - start_time
+
+        return self.report
+
+    def get_timestamp(self, clock_seconds: float) -> str:
+        return (
+            (self.start_datetime + timedelta(seconds=clock_seconds))
+            .isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        )
+
+    def evaluate(self, template: Any, variables: Dict, states_variable: Dict) -> Any:
+        """
+        Evaluate every {% %} expression in a template
+        :param template: A string, list or dict
+        :param variables: The workflow variables
+        :param states_variable: The $states variable
+        :return:
+        """
+        if isinstance(template, str) and template.startswith("{%") and template.endswith("%}"):
+            value = evaluate_expression(template[2:-2], {**variables, "states": states_variable})
+            return None if value is UNDEFINED else value
+        if isinstance(template, dict):
+            return dict(map(
+                lambda item_iter_: (item_iter_[0], self.evaluate(item_iter_[1], variables, states_variable)),
+                template.items()
+            ))
+        if isinstance(template, list):
+            return list(map(lambda value_iter_: self.evaluate(value_iter_, variables, states_variable), template))
+        return template
+
+    def run_states(
+        self,
+        states_definition: Dict,
+        state_input: Any,
+        variables: Dict,
+        clock_seconds: float,
+        path_prefix: str,
+    ) -> Tuple[Any, float]:
+        """
+        Run the states from StartAt until a state ends
+        :return: The output of the last state, and the clock when it ended
+        """
+        state_name = states_definition["StartAt"]
+        while True:
+            state_input, next_state_name, clock_seconds = self.run_state(
+                state_name=state_name,
+                state_definition=states_definition["States"][state_name],
+                state_input=state_input,
+                variables=variables,
+                clock_seconds=clock_seconds,
+                path_prefix=path_prefix,
+            )
+            if next_state_name is None:
+                return state_input, clock_seconds
+            state_name = next_state_name
+
+    def run_state(
+        self,
+        state_name: str,
+        state_definition: Dict,
+        state_input: Any,
+        variables: Dict,
+        clock_seconds: float,
+        path_prefix: str,
+        map_item_context: Optional[Dict] = None,
+    ) -> Tuple[Any, Optional[str], float]:
+        """
+        Run a single state, updating variables with its Assign
+        :return: The state output, the next state name (None if this is the last state) and the clock when it ended
+        """
+        state_type = state_definition["Type"]
+        state_path = path_prefix + state_name
+        start_seconds = clock_seconds
+        end_seconds = clock_seconds + self.transition_seconds
+
+        states_variable: Dict[str, Any] = {
+            "input": state_input,
+            "context": {
+                "Execution": self.execution_context,
+                "State": {"Name": state_name, "EnteredTime": self.get_timestamp(start_seconds), "RetryCount": 0},
+                "StateMachine": {"Id": "arn:aws:states:local:000000000000:stateMachine:local", "Name": "local"},
+            },
+        }
+        if map_item_context is not None:
+            states_variable["context"]["Map"] = {"Item": map_item_context}
+
+        default_output = state_input
+        next_state_name = None if state_definition.get("End", False) else state_definition.get("Next")
+        arguments = None
+
+        if state_type == "Task":
+            states_variable["context"]["Task"] = {"Token": f"local-task-token-{uuid.uuid4()}"}
+            arguments = self.evaluate(state_definition.get("Arguments", {}), variables, states_variable)
+            states_variable["result"], task_duration_seconds = self.run_task(
+                state_path, state_definition["Resource"], arguments, end_seconds
+            )
+            end_seconds += task_duration_seconds
+            default_output = states_variable["result"]
+
+        elif state_type == "Map":
+            if "ItemReader" in state_definition:
+                items = self.read_items(state_path, state_definition["ItemReader"], variables, states_variable)
+            elif "Items" in state_definition:
+                items = self.evaluate(state_definition["Items"], variables, states_variable)
+            else:
+                items = state_input
+            states_variable["result"], end_seconds = self.run_map(
+                state_path, state_definition, items, variables, states_variable, end_seconds
+            )
+            if "ResultWriter" in state_definition:
+                states_variable["result"] = self.write_results(
+                    state_path, state_definition["ResultWriter"], states_variable["result"],
+                    variables, states_variable
+                )
+            default_output = states_variable["result"]
+
+        elif state_type == "Choice":
+            next_state_name = state_definition.get("Default")
+            for choice in state_definition["Choices"]:
+                if self.evaluate(choice["Condition"], variables, states_variable) is True:
+                    next_state_name = choice["Next"]
+                    break
+            if next_state_name is None:
+                self.add_state_record(state_path, state_name, state_type, start_seconds, end_seconds, state_input, None)
+                raise StateMachineFailed("States.NoChoiceMatched", f"No choice matched in {state_path}")
+
+        elif state_type == "Wait":
+            end_seconds += float(self.evaluate(state_definition.get("Seconds", 0), variables, states_variable))
+
+        elif state_type == "Fail":
+            self.add_state_record(state_path, state_name, state_type, start_seconds, end_seconds, state_input, None)
+            raise StateMachineFailed(
+                self.evaluate(state_definition.get("Error"), variables, states_variable),
+                self.evaluate(state_definition.get("Cause"), variables, states_variable),
+            )
+
+        elif state_type == "Succeed":
+            next_state_name = None
+
+        elif state_type != "Pass":
+            raise ValueError(f"Unsupported state type {state_type} in {state_path}")
+
+        # Assign and Output are both evaluated against the variables as they were before this state
+        assigned_variables = self.evaluate(state_definition.get("Assign", {}), variables, states_variable)
+        output = (
+            self.evaluate(state_definition["Output"], variables, states_variable)
+            if "Output" in state_definition else default_output
+        )
+        variables.update(assigned_variables)
+
+        self.add_state_record(
+            state_path, state_name, state_type, start_seconds, end_seconds, state_input, output,
+            arguments=arguments,
+            result=states_variable.get("result", UNDEFINED),
+            assigned_variables=assigned_variables if "Assign" in state_definition else None,
+        )
+
+        return output, next_state_name, end_seconds
+
+    def run_task(
+        self,
+        state_path: str,
+        resource: str,
+        arguments: Dict,
+        clock_seconds: float,
+    ) -> Tuple[Any, float]:
+        """
+        Run a task
+        :return: The task result and its simulated duration
+        """
+        if resource == LAMBDA_INVOKE_WAIT_FOR_TASK_TOKEN_RESOURCE:
+            _, invoke_duration_seconds = self.run_task(state_path, LAMBDA_INVOKE_RESOURCE, arguments, clock_seconds)
+            if self.task_token_handler is None:
+                raise ValueError(f"No task token handler for {state_path}")
+            task_result, callback_duration_seconds = self.task_token_handler(
+                arguments, clock_seconds + invoke_duration_seconds
+            )
+            return task_result, invoke_duration_seconds + callback_duration_seconds
+
+        if resource == LAMBDA_INVOKE_RESOURCE:
+            function_name = arguments["FunctionName"]
+            if function_name not in self.lambda_handlers:
+                raise ValueError(f"No lambda handler for {function_name} in {state_path}")
+            self.report.lambda_invocation_counts[function_name] += 1
+
+            # Round trip the payloads through JSON, as the lambda service would
+            lambda_context = SimpleNamespace(
+                function_name=function_name,
+                aws_request_id=str(uuid.uuid4()),
+                simulated_time_seconds=clock_seconds,
+            )
+            start_time = time.perf_counter()
+            try:
+                payload = self.lambda_handlers[function_name](
+                    json.loads(json.dumps(arguments.get("Payload", {}))), lambda_context
+                )
+            except Exception as exception:
+                raise StateMachineFailed(type(exception).__name__, str(exception)) from exception
+            handler_duration_seconds = time.perf_counter() - start_time
+
+            return (
+                {"ExecutedVersion": "$LATEST", "Payload": json.loads(json.dumps(payload)), "StatusCode": 200},
+                handler_duration_seconds + self.lambda_overhead_seconds
+            )
+
+        if resource in [PUT_EVENTS_RESOURCE, PUT_EVENTS_WAIT_FOR_TASK_TOKEN_RESOURCE]:
+            for entry in arguments["Entries"]:
+                self.report.event_detail_types[entry.get("DetailType")] += 1
+
+            if resource == PUT_EVENTS_RESOURCE:
+                return (
+                    {
+                        "Entries": list(map(lambda _: {"EventId": str(uuid.uuid4())}, arguments["Entries"])),
+                        "FailedEntryCount": 0,
+                    },
+                    self.event_overhead_seconds
+                )
+
+            if self.task_token_handler is None:
+                raise ValueError(f"No task token handler for {state_path}")
+            task_result, callback_duration_seconds = self.task_token_handler(
+                arguments, clock_seconds + self.event_overhead_seconds
+            )
+            return task_result, self.event_overhead_seconds + callback_duration_seconds
+
+        raise ValueError(f"Unsupported resource {resource} in {state_path}")
+
+    def run_map(
+        self,
+        state_path: str,
+        state_definition: Dict,
+        items: List,
+        variables: Dict,
+        states_variable: Dict,
+        clock_seconds: float,
+    ) -> Tuple[List, float]:
+        """
+        Run each item through the item processor, starting each iteration when one of the MaxConcurrency lanes is free
+        :return: The iteration outputs, and the clock when the last iteration ended
+        """
+        if not isinstance(items, list):
+            raise StateMachineFailed("States.QueryEvaluationError", f"Items of {state_path} is not an array")
+
+        max_concurrency = int(
+            self.evaluate(state_definition.get("MaxConcurrency", 0), variables, states_variable)
+        ) or max(len(items), 1)
+        item_processor = state_definition.get("ItemProcessor", state_definition.get("Iterator"))
+        is_distributed = item_processor.get("ProcessorConfig", {}).get("Mode") == DISTRIBUTED_MAP_MODE
+        lane_free_seconds = [clock_seconds] * min(max_concurrency, max(len(items), 1))
+        end_seconds = clock_seconds
+        outputs = []
+
+        for item_index, item in enumerate(items):
+            iteration_start_seconds = heappop(lane_free_seconds)
+            map_item_context = {"Index": item_index, "Value": item}
+
+            if "ItemSelector" in state_definition:
+                item = self.evaluate(
+                    state_definition["ItemSelector"], variables,
+                    {**states_variable, "context": {**states_variable["context"], "Map": {"Item": map_item_context}}}
+                )
+
+            # Inline iterations can read, but not change, the variables of the enclosing states,
+            # distributed iterations are child executions and start with no variables
+            iteration_output, iteration_end_seconds = self.run_states(
+                states_definition=item_processor,
+                state_input=item,
+                variables={} if is_distributed else dict(variables),
+                clock_seconds=iteration_start_seconds,
+                path_prefix=f"{state_path}[{item_index}]/",
+            )
+            outputs.append(iteration_output)
+            heappush(lane_free_seconds, iteration_end_seconds)
+            end_seconds = max(end_seconds, iteration_end_seconds)
+
+        return outputs, end_seconds
+
+    def read_items(self, state_path: str, item_reader: Dict, variables: Dict, states_variable: Dict) -> List:
+        """
+        Get the items of a distributed map from the item_reader_handler
+        :return: The parsed items
+        """
+        if self.item_reader_handler is None:
+            raise ValueError(f"No item reader handler for {state_path}")
+
+        arguments = self.evaluate(item_reader.get("Arguments", {}), variables, states_variable)
+        item_bytes = self.item_reader_handler(arguments)
+        if item_bytes is None:
+            raise StateMachineFailed("States.ItemReaderFailed", f"The ItemReader object of {state_path} does not exist")
+
+        input_type = item_reader.get("ReaderConfig", {}).get("InputType", "JSON")
+        if input_type == "JSONL":
+            return list(map(
+                json.loads,
+                filter(lambda line_iter_: len(line_iter_.strip()) > 0, item_bytes.decode().splitlines())
+            ))
+        if input_type == "JSON":
+            return json.loads(item_bytes)
+        raise ValueError(f"Unsupported ItemReader InputType {input_type} in {state_path}")
+
+    def write_results(
+        self,
+        state_path: str,
+        result_writer: Dict,
+        outputs: List,
+        variables: Dict,
+        states_variable: Dict,
+    ) -> Dict:
+        """
+        Hand the iteration outputs of a distributed map to the result_writer_handler
+        :return: The map result, which with a ResultWriter is the location of the results rather than the results
+        """
+        if self.result_writer_handler is None:
+            raise ValueError(f"No result writer handler for {state_path}")
+
+        arguments = self.evaluate(result_writer.get("Arguments", {}), variables, states_variable)
+        self.result_writer_handler(arguments, outputs)
+
+        return {
+            "ResultWriterDetails": {
+                "Bucket": arguments.get("Bucket"),
+                "Key": arguments.get("Prefix", "") + "manifest.json",
+            }
+        }
+
+    def add_state_record(
+        self,
+        state_path: str,
+        state_name: str,
+        state_type: str,
+        start_seconds: float,
+        end_seconds: float,
+        state_input: Any,
+        output: Any,
+        arguments: Optional[Dict] = None,
+        result: Any = UNDEFINED,
+        assigned_variables: Optional[Dict] = None,
+    ):
+        state_record = StateRecord(
+            state_path=state_path,
+            state_name=state_name,
+            state_type=state_type,
+            start_seconds=start_seconds,
+            end_seconds=end_seconds,
+            input_bytes=get_size_in_bytes(state_input),
+            output_bytes=get_size_in_bytes(output),
+            arguments_bytes=get_size_in_bytes(arguments) if arguments is not None else None,
+            result_bytes=get_size_in_bytes(result) if result is not UNDEFINED else None,
+            assigned_bytes=get_size_in_bytes(assigned_variables) if assigned_variables is not None else None,
+        )
+        self.report.state_records.append(state_record)
+
+        if self.enforce_payload_limit and state_record.max_payload_bytes > MAX_PAYLOAD_SIZE_IN_BYTES:
+            raise StateMachineFailed(
+                "States.DataLimitExceeded",
+                f"{state_path} has a payload of {state_record.max_payload_bytes} bytes, "
+                f"over the {MAX_PAYLOAD_SIZE_IN_BYTES} byte limit"
+            )
@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+
+"""
+In-process stand-ins for ICAv2 and the OrcaBus APIs, so that the handlers can be benchmarked offline
+
+install_fake_modules registers fake libica, wrapica and orcabus_api_tools modules in sys.modules,
+it must be called before any handler (or layer module) is imported.
+Only the functions the handlers call are faked, each call is counted and delayed by a configurable latency.
+
+The fakes are backed by a FakeIcav2 instance, which holds one or more projects of synthetic data.
+Entries are held as compact tuples in a sorted index, ProjectData-like objects are only built when a call returns them,
+so the memory held by the fakes stays small next to the memory held by the handlers.
+
+generate_run populates the source project with a synthetic run folder and bclconvert analysis output,
+sized by a RunProfile, from a MiSeq run up to a NovaSeq X 25B run.
+
+The destination project is addressed both by icav2:// uris and by s3:// uris under FAKE_BUCKET_NAME,
+and the fake filemanager serves its S3 object records from the same entries.
+"""
+
+# Standard imports
+import base64
+import json
+import sys
+import time
+import types
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from pathlib import Path
+from threading import Lock
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+# Globals
+FILE_DATA_TYPE = "FILE"
+FOLDER_DATA_TYPE = "FOLDER"
+ICAV2_URI_SCHEME = "icav2"
+S3_URI_SCHEME = "s3"
+LIBICAV2_DEFAULT_PAGE_SIZE = 1000
+S3_LIST_ENDPOINT = "api/v1/s3"
+
+SOURCE_PROJECT_ID = "a1234567-1234-1234-1234-1234567890ab"
+DESTINATION_PROJECT_ID = "b1234567-1234-1234-1234-1234567890ab"
+FAKE_BUCKET_NAME = "fake-primary-data-bucket"
+ANALYSIS_ID = "c1234567-1234-1234-1234-1234567890ab"
+INSTRUMENT_RUN_ID = "251003_A00130_0384_AHL7LWDSXF"
+
+ICAV2_ACCESS_TOKEN_SECRET_ID = "fake-icav2-access-token"
+
+# Entry tuple positions
+DATA_TYPE_INDEX, DATA_ID_INDEX, FILE_SIZE_INDEX, E_TAG_INDEX = 0, 1, 2, 3
+
+
+class RunProfile(NamedTuple):
+    """
+    The shape of a synthetic sequencing run
+    """
+    sample_count: int
+    lane_count: int
+    read_count: int = 2
+    interop_file_count: int = 20
+    report_file_count: int = 12
+    fastq_size_in_bytes: int = 1024 ** 3
+
+
+RUN_PROFILES: Dict[str, RunProfile] = {
+    "miseq": RunProfile(sample_count=24, lane_count=1, interop_file_count=12, fastq_size_in_bytes=50 * 1024 ** 2),
+    "nextseq_2000": RunProfile(sample_count=96, lane_count=2, fastq_size_in_bytes=500 * 1024 ** 2),
+    "novaseq_6000_s4": RunProfile(sample_count=384, lane_count=4),
+    "novaseq_x_10b": RunProfile(sample_count=1536, lane_count=8),
+    "novaseq_x_25b": RunProfile(sample_count=10_000, lane_count=8),
+}
+
+
+class FakeApiException(Exception):
+    pass
+
+
+class FakeProject:
+    """
+    The data of a single project, every folder path ends with a '/'
+    """
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.entries: Dict[str, Tuple[str, str, Optional[int], Optional[str]]] = {}
+        self.paths_by_data_id: Dict[str, str] = {}
+        self.child_paths_by_folder_path: Dict[str, List[str]] = {}
+        self._sorted_paths: Optional[List[str]] = None
+        self._data_id_counter = 0
+
+    def add(
+        self,
+        path: str,
+        data_type: str,
+        file_size_in_bytes: Optional[int] = None,
+        object_e_tag: Optional[str] = None
+    ) -> str:
+        """
+        Add a file or folder (and any missing parent folders), return its path
+        """
+        if data_type == FOLDER_DATA_TYPE:
+            path = path.rstrip("/") + "/"
+
+        if path in self.entries:
+            return path
+
+        parent_path = str(Path(path).parent).rstrip("/") + "/"
+        if path != "/" and parent_path not in self.entries:
+            self.add(parent_path, FOLDER_DATA_TYPE)
+
+        self._data_id_counter += 1
+        data_id = ("fil." if data_type == FILE_DATA_TYPE else "fol.") + f"{self._data_id_counter:032x}"
+
+        self.entries[path] = (data_type, data_id, file_size_in_bytes, object_e_tag)
+        self.paths_by_data_id[data_id] = path
+        if path != "/":
+            self.child_paths_by_folder_path.setdefault(parent_path, []).append(path)
+        self._sorted_paths = None
+
+        return path
+
+    @property
+    def sorted_paths(self) -> List[str]:
+        if self._sorted_paths is None:
+            self._sorted_paths = sorted(self.entries)
+        return self._sorted_paths
+
+    def iter_paths_under(self, folder_path: str, after_path: Optional[str] = None) -> Iterator[str]:
+        """
+        Every path under the folder, at any depth, in sorted order
+        :param folder_path:
+        :param after_path: Only paths that sort after this path
+        """
+        folder_path = folder_path.rstrip("/") + "/"
+        sorted_paths = self.sorted_paths
+
+        start_index = bisect_left(sorted_paths, folder_path)
+        if after_path is not None:
+            start_index = max(start_index, bisect_right(sorted_paths, after_path))
+
+        for path_index in range(start_index, len(sorted_paths)):
+            path = sorted_paths[path_index]
+            if not path.startswith(folder_path):
+                break
+            if path != folder_path:
+                yield path
+
+    def to_project_data(self, path: str) -> SimpleNamespace:
+        """
+        Build a ProjectData-like object for the entry
+        """
+        data_type, data_id, file_size_in_bytes, object_e_tag = self.entries[path]
+        return SimpleNamespace(
+            project_id=self.project_id,
+            data=SimpleNamespace(
+                id=data_id,
+                details=SimpleNamespace(
+                    path=path,
+                    name=Path(path).name,
+                    data_type=data_type,
+                    file_size_in_bytes=file_size_in_bytes,
+                    object_e_tag=object_e_tag,
+                )
+            )
+        )
+
+
+class FakeIcav2:
+    """
+    The projects, analyses, filemanager records and call counts behind the fake modules
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        latency_seconds_by_call_name: Optional[Dict[str, float]] = None,
+        filemanager_synced_fraction: float = 1.0,
+    ):
+        self.projects: Dict[str, FakeProject] = {}
+        self.analyses: Dict[str, Tuple[str, str]] = {}
+        self.bucket_project_ids: Dict[str, str] = {}
+        self.latency_seconds = latency_seconds
+        self.latency_seconds_by_call_name = latency_seconds_by_call_name or {}
+        self.filemanager_synced_fraction = filemanager_synced_fraction
+        # The attributes patched onto each filemanager record, by s3 object id
+        self.filemanager_attributes: Dict[str, Dict] = {}
+        # Call name to the number of the call that raises, i.e. to test retries
+        self.failing_call_numbers: Dict[str, int] = {}
+        self.call_counts: Counter = Counter()
+        self._lock = Lock()
+        self._filemanager_key_cache: Dict[Tuple[str, str, int], List[str]] = {}
+
+    # Call accounting
+    def record_call(self, call_name: str):
+        with self._lock:
+            self.call_counts[call_name] += 1
+            call_number = self.call_counts[call_name]
+        if call_number == self.failing_call_numbers.get(call_name):
+            raise ConnectionError(f"Call {call_number} of {call_name} failed")
+        latency_seconds = self.latency_seconds_by_call_name.get(call_name, self.latency_seconds)
+        if latency_seconds > 0:
+            time.sleep(latency_seconds)
+
+    def reset_call_counts(self):
+        with self._lock:
+            self.call_counts.clear()
+
+    # Projects
+    def get_project(self, project_id: str) -> FakeProject:
+        if project_id not in self.projects:
+            self.projects[project_id] = FakeProject(project_id)
+            self.projects[project_id].add("/", FOLDER_DATA_TYPE)
+        return self.projects[project_id]
+
+    def uri_to_project_id_and_path(self, uri: str) -> Tuple[str, str]:
+        uri_parsed = urlparse(uri)
+        if uri_parsed.scheme == S3_URI_SCHEME:
+            return self.bucket_project_ids[uri_parsed.netloc], uri_parsed.path or "/"
+        return uri_parsed.netloc, uri_parsed.path or "/"
+
+    def get_path(self, project_id: str, data_path: Union[Path, str], data_type: Optional[str] = None) -> str:
+        """
+        Get the path of an existing entry, raises FileNotFoundError if there is no such entry
+        """
+        project = self.get_project(project_id)
+        data_path = str(data_path)
+
+        for path in [data_path, data_path.rstrip("/") + "/"]:
+            if path in project.entries and (data_type is None or project.entries[path][DATA_TYPE_INDEX] == data_type):
+                return path
+
+        raise FileNotFoundError(f"Could not find {data_path} in project {project_id}")
+
+    def copy_uri(self, source_uri: str, destination_folder_uri: str):
+        """
+        Copy a file or folder into the destination folder, as an ICAv2 copy job would
+        """
+        source_project_id, source_path = self.uri_to_project_id_and_path(source_uri)
+        destination_project_id, destination_folder_path = self.uri_to_project_id_and_path(destination_folder_uri)
+        source_project = self.get_project(source_project_id)
+        destination_project = self.get_project(destination_project_id)
+
+        source_path = self.get_path(source_project_id, source_path)
+        destination_path = destination_folder_path.rstrip("/") + "/" + Path(source_path).name
+
+        if source_project.entries[source_path][DATA_TYPE_INDEX] == FILE_DATA_TYPE:
+            _, _, file_size_in_bytes, object_e_tag = source_project.entries[source_path]
+            destination_project.add(destination_path, FILE_DATA_TYPE, file_size_in_bytes, object_e_tag)
+            return
+
+        destination_project.add(destination_path, FOLDER_DATA_TYPE)
+        for path in list(source_project.iter_paths_under(source_path)):
+            data_type, _, file_size_in_bytes, object_e_tag = source_project.entries[path]
+            destination_project.add(
+                destination_path + "/" + path[len(source_path):],
+                data_type, file_size_in_bytes, object_e_tag
+            )
+
+    def run_copy_jobs(self, icav2_copy_job_list: List[Dict]):
+        for icav2_copy_job in icav2_copy_job_list:
+            for source_uri in icav2_copy_job["sourceUriList"]:
+                self.copy_uri(source_uri, icav2_copy_job["destinationUri"])
+
+    # wrapica.project_data
+    def convert_uri_to_project_data_obj(self, uri: str, create_data_if_not_found: bool = False) -> SimpleNamespace:
+        self.record_call("convert_uri_to_project_data_obj")
+        project_id, path = self.uri_to_project_id_and_path(uri)
+        project = self.get_project(project_id)
+        try:
+            return project.to_project_data(self.get_path(project_id, path))
+        except FileNotFoundError:
+            if not create_data_if_not_found:
+                raise
+            return project.to_project_data(
+                project.add(path, FOLDER_DATA_TYPE if path.endswith("/") else FILE_DATA_TYPE)
+            )
+
+    def get_project_data_obj_by_id(self, project_id: str, data_id: str) -> SimpleNamespace:
+        self.record_call("get_project_data_obj_by_id")
+        project = self.get_project(project_id)
+        return project.to_project_data(project.paths_by_data_id[data_id])
+
+    def get_project_data_obj_from_project_id_and_path(
+        self,
+        project_id: str,
+        data_path: Union[Path, str],
+        data_type: Optional[str] = None,
+        create_data_if_not_found: bool = False
+    ) -> SimpleNamespace:
+        self.record_call("get_project_data_obj_from_project_id_and_path")
+        project = self.get_project(project_id)
+        try:
+            return project.to_project_data(self.get_path(project_id, data_path, data_type))
+        except FileNotFoundError:
+            if not create_data_if_not_found:
+                raise
+            return project.to_project_data(project.add(str(data_path), data_type or FILE_DATA_TYPE))
+
+    def get_project_data_folder_id_from_project_id_and_path(
+        self,
+        project_id: str,
+        folder_path: Union[Path, str],
+        create_folder_if_not_found: bool = False
+    ) -> str:
+        self.record_call("get_project_data_folder_id_from_project_id_and_path")
+        project = self.get_project(project_id)
+        try:
+            folder_path = self.get_path(project_id, folder_path, FOLDER_DATA_TYPE)
+        except FileNotFoundError:
+            if not create_folder_if_not_found:
+                raise
+            folder_path = project.add(str(folder_path), FOLDER_DATA_TYPE)
+        return project.entries[folder_path][DATA_ID_INDEX]
+
+    def list_project_data_non_recursively(
+        self,
+        project_id: str,
+        parent_folder_id: Optional[str] = None,
+        parent_folder_path: Optional[Union[Path, str]] = None,
+        data_type: Optional[str] = None,
+        **kwargs
+    ) -> List[SimpleNamespace]:
+        self.record_call("list_project_data_non_recursively")
+        project = self.get_project(project_id)
+        if parent_folder_id is not None:
+            parent_folder_path = project.paths_by_data_id[parent_folder_id]
+        parent_folder_path = str(parent_folder_path).rstrip("/") + "/"
+        return list(map(
+            project.to_project_data,
+            filter(
+                lambda path_iter_: data_type is None or project.entries[path_iter_][DATA_TYPE_INDEX] == data_type,
+                sorted(project.child_paths_by_folder_path.get(parent_folder_path, []))
+            )
+        ))
+
+    @staticmethod
+    def convert_project_id_and_data_path_to_uri(
+        project_id: str,
+        data_path: Union[Path, str],
+        data_type: str = FILE_DATA_TYPE,
+        uri_type: str = ICAV2_URI_SCHEME
+    ) -> str:
+        return (
+            f"{ICAV2_URI_SCHEME}://{project_id}{str(data_path).rstrip('/')}" +
+            ("/" if data_type == FOLDER_DATA_TYPE else "")
+        )
+
+    # libica ProjectDataApi
+    def get_project_data_list(
+        self,
+        project_id: str,
+        file_path: List[str],
+        page_size: str,
+        page_token: str,
+        type: str,
+        **kwargs
+    ) -> SimpleNamespace:
+        self.record_call("get_project_data_list")
+        project = self.get_project(project_id)
+        # The page token is the path of the last item on the previous page
+        page_paths: List[str] = []
+        for path in project.iter_paths_under(file_path[0], after_path=page_token or None):
+            if project.entries[path][DATA_TYPE_INDEX] != type:
+                continue
+            if len(page_paths) == int(page_size):
+                return SimpleNamespace(
+                    items=list(map(project.to_project_data, page_paths)),
+                    next_page_token=page_paths[-1]
+                )
+            page_paths.append(path)
+        return SimpleNamespace(items=list(map(project.to_project_data, page_paths)), next_page_token="")
+
+    # wrapica.project_analysis
+    def get_analysis_input_object_from_analysis_input_code(
+        self, project_id: str, analysis_id: str, analysis_input_code: str
+    ) -> SimpleNamespace:
+        self.record_call("get_analysis_input_object_from_analysis_input_code")
+        run_folder_path, _ = self.analyses[analysis_id]
+        return SimpleNamespace(analysis_data=[
+            SimpleNamespace(data_id=self.get_project(project_id).entries[run_folder_path][DATA_ID_INDEX])
+        ])
+
+    def get_analysis_output_object_from_analysis_output_code(
+        self, project_id: str, analysis_id: str, analysis_output_code: str
+    ) -> SimpleNamespace:
+        self.record_call("get_analysis_output_object_from_analysis_output_code")
+        _, analysis_folder_path = self.analyses[analysis_id]
+        return SimpleNamespace(data=[
+            SimpleNamespace(data_id=self.get_project(project_id).entries[analysis_folder_path][DATA_ID_INDEX])
+        ])
+
+    # orcabus_api_tools.filemanager
+    def get_file_manager_request(self, endpoint: str, params: Optional[Dict] = None, **kwargs) -> Dict:
+        self.record_call("get_file_manager_request")
+        params = params or {}
+        project = self.get_project(self.bucket_project_ids[params["bucket"]])
+        key_prefix = params.get("key", "").rstrip("*")
+        page_number = int(params.get("page", 1))
+        rows_per_page = int(params.get("rowsPerPage", 1000))
+
+        # The keys under the prefix, cached until the project changes
+        cache_key = (project.project_id, key_prefix, len(project.entries))
+        if cache_key not in self._filemanager_key_cache:
+            self._filemanager_key_cache[cache_key] = list(filter(
+                lambda path_iter_: (
+                    project.entries[path_iter_][DATA_TYPE_INDEX] == FILE_DATA_TYPE and
+                    path_iter_[1:].startswith(key_prefix)
+                ),
+                project.iter_paths_under("/" + key_prefix.rsplit("/", 1)[0])
+            ))
+        file_paths = self._filemanager_key_cache[cache_key]
+
+        # The first filemanager_synced_fraction of the keys have been ingested
+        synced_file_count = int(len(file_paths) * self.filemanager_synced_fraction)
+        start_index = (page_number - 1) * rows_per_page
+        end_index = min(page_number * rows_per_page, len(file_paths))
+
+        return {
+            "links": {"next": f"?page={page_number + 1}" if end_index < len(file_paths) else None},
+            "results": list(map(
+                lambda path_index_iter_: {
+                    "s3ObjectId": get_s3_object_id(project.entries[file_paths[path_index_iter_]][DATA_ID_INDEX]),
+                    "key": file_paths[path_index_iter_][1:],
+                    "size": project.entries[file_paths[path_index_iter_]][FILE_SIZE_INDEX],
+                    "attributes": self.filemanager_attributes.get(
+                        get_s3_object_id(project.entries[file_paths[path_index_iter_]][DATA_ID_INDEX])
+                    ),
+                    "ingestId": (
+                        f"ingest-{project.entries[file_paths[path_index_iter_]][DATA_ID_INDEX]}"
+                        if path_index_iter_ < synced_file_count else None
+                    ),
+                },
+                range(start_index, end_index)
+            )),
+        }
+
+    def crawl_filemanager_sync(self, bucket: str, prefix: str, **kwargs):
+        self.record_call("crawl_filemanager_sync")
+
+    def file_manager_patch_request(
+        self, endpoint: str, params: Optional[Dict] = None, json_data: Optional[List[Dict]] = None, **kwargs
+    ):
+        self.record_call("file_manager_patch_request")
+
+        # Only patches of a single record are applied
+        if not endpoint.startswith(S3_LIST_ENDPOINT + "/"):
+            return
+        attributes = self.filemanager_attributes.setdefault(endpoint.rsplit("/", 1)[-1], {})
+        for patch_op in json_data or []:
+            if patch_op["op"] == "add":
+                attributes[patch_op["path"].lstrip("/")] = patch_op["value"]
+
+    # orcabus_api_tools.workflow
+    def get_workflow_run_from_portal_run_id(self, portal_run_id: str) -> Dict:
+        self.record_call("get_workflow_run_from_portal_run_id")
+        return {"portalRunId": portal_run_id, "libraries": [], "currentState": {"status": "READY"}}
+
+    def get_latest_payload_from_portal_run_id(self, portal_run_id: str) -> Dict:
+        self.record_call("get_latest_payload_from_portal_run_id")
+        return {
+            "data": {
+                "tags": {"instrumentRunId": INSTRUMENT_RUN_ID},
+                "inputs": {"bsshProjectId": SOURCE_PROJECT_ID, "bsshAnalysisId": ANALYSIS_ID},
+                "engineParameters": {
+                    "projectId": SOURCE_PROJECT_ID,
+                    "analysisId": ANALYSIS_ID,
+                    "outputUri": get_output_uri(),
+                },
+            }
+        }
+
+    def list_workflows(self, workflow_name: Optional[str] = None, workflow_version: Optional[str] = None) -> List[Dict]:
+        self.record_call("list_workflows")
+        return [{"name": workflow_name, "version": workflow_version}]
+
+
+def get_s3_object_id(data_id: str) -> str:
+    return f"s3-object-{data_id}"
+
+
+def get_output_uri() -> str:
+    return f"{S3_URI_SCHEME}://{FAKE_BUCKET_NAME}/primary/{INSTRUMENT_RUN_ID}/20251003abcd1234/"
+
+
+def generate_run(fake_icav2: FakeIcav2, run_profile: RunProfile) -> Dict:
+    """
+    Populate the source project with a run folder and a bclconvert analysis output,
+    and map the destination project to the fake bucket
+    :return: The get_icav2_copy_job_list event for the run
+    """
+    source_project = fake_icav2.get_project(SOURCE_PROJECT_ID)
+    fake_icav2.get_project(DESTINATION_PROJECT_ID)
+    fake_icav2.bucket_project_ids[FAKE_BUCKET_NAME] = DESTINATION_PROJECT_ID
+
+    run_folder_path = source_project.add(f"/ilmn-runs/bssh_{INSTRUMENT_RUN_ID}/", FOLDER_DATA_TYPE)
+    analysis_folder_path = source_project.add(
+        f"/ilmn-analyses/{INSTRUMENT_RUN_ID}_{ANALYSIS_ID}/", FOLDER_DATA_TYPE
+    )
+    fake_icav2.analyses[ANALYSIS_ID] = (run_folder_path, analysis_folder_path)
+
+    # InterOp files (IndexMetricsOut.bin is collected from the bclconvert Reports folder)
+    for interop_index in range(run_profile.interop_file_count):
+        source_project.add(
+            f"{run_folder_path}InterOp/Metric{interop_index:02d}Out.bin",
+            FILE_DATA_TYPE, 1024 ** 2 + interop_index, f"interop-{interop_index}"
+        )
+
+    # Reports
+    source_project.add(f"{analysis_folder_path}output/Reports/IndexMetricsOut.bin", FILE_DATA_TYPE, 4096, "index-metrics")
+    for report_index in range(run_profile.report_file_count):
+        source_project.add(
+            f"{analysis_folder_path}output/Reports/Report{report_index:02d}.csv",
+            FILE_DATA_TYPE, 10 * 1024 + report_index, f"report-{report_index}"
+        )
+
+    # Samples, one fastq per lane per read
+    for sample_index in range(run_profile.sample_count):
+        sample_name = f"L{sample_index:06d}"
+        for lane_index in range(1, run_profile.lane_count + 1):
+            for read_index in range(1, run_profile.read_count + 1):
+                source_project.add(
+                    f"{analysis_folder_path}output/Samples/{sample_name}/"
+                    f"{sample_name}_S{sample_index + 1}_L{lane_index:03d}_R{read_index}_001.fastq.gz",
+                    FILE_DATA_TYPE,
+                    run_profile.fastq_size_in_bytes + sample_index * 10 + lane_index + read_index,
+                    f"{sample_index:06d}-{lane_index}-{read_index}"
+                )
+
+    return {
+        "projectId": SOURCE_PROJECT_ID,
+        "analysisId": ANALYSIS_ID,
+        "outputUri": get_output_uri(),
+    }
+
+
+def get_fake_access_token(expires_in_seconds: int = 24 * 60 * 60) -> str:
+    """
+    An unsigned JWT with an 'exp' claim, so that the access token cache can read its expiry
+    """
+    def _b64(obj: Dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).decode().rstrip("=")
+
+    return ".".join([
+        _b64({"alg": "none", "typ": "JWT"}),
+        _b64({"exp": int(time.time()) + expires_in_seconds}),
+        "signature",
+    ])
+
+
+def _add_module(name: str, **attrs: object) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def install_fake_modules(fake_icav2: FakeIcav2):
+    """
+    Register the fake libica, wrapica and orcabus_api_tools modules, replacing any installed ones
+    """
+    class _ApiClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    class _ProjectDataApi:
+        def __init__(self, api_client: _ApiClient):
+            self.get_project_data_list: Callable = fake_icav2.get_project_data_list
+
+    # libica
+    _add_module("libica")
+    _add_module("libica.openapi")
+    _add_module("libica.openapi.v3", ApiClient=_ApiClient, ApiException=FakeApiException)
+    _add_module("libica.openapi.v3.api")
+    _add_module("libica.openapi.v3.api.project_data_api", ProjectDataApi=_ProjectDataApi)
+
+    # wrapica
+    _add_module("wrapica")
+    _add_module("wrapica.libica_models", ProjectData=SimpleNamespace, AnalysisInput=SimpleNamespace)
+    _add_module("wrapica.literals", DataType=str)
+    _add_module("wrapica.utils")
+    _add_module("wrapica.utils.configuration", ICAV2_CONFIGURATION=None, get_icav2_configuration=lambda: None)
+    _add_module(
+        "wrapica.utils.globals",
+        FILE_DATA_TYPE=FILE_DATA_TYPE,
+        FOLDER_DATA_TYPE=FOLDER_DATA_TYPE,
+        ICAV2_URI_SCHEME=ICAV2_URI_SCHEME,
+        LIBICAV2_DEFAULT_PAGE_SIZE=LIBICAV2_DEFAULT_PAGE_SIZE,
+        DEFAULT_ICAV2_BASE_URL="https://ica.illumina.com/ica/rest",
+    )
+    _add_module(
+        "wrapica.project_data",
+        convert_uri_to_project_data_obj=fake_icav2.convert_uri_to_project_data_obj,
+        convert_project_id_and_data_path_to_uri=fake_icav2.convert_project_id_and_data_path_to_uri,
+        get_project_data_obj_by_id=fake_icav2.get_project_data_obj_by_id,
+        get_project_data_obj_from_project_id_and_path=fake_icav2.get_project_data_obj_from_project_id_and_path,
+        get_project_data_folder_id_from_project_id_and_path=(
+            fake_icav2.get_project_data_folder_id_from_project_id_and_path
+        ),
+        list_project_data_non_recursively=fake_icav2.list_project_data_non_recursively,
+    )
+    _add_module(
+        "wrapica.project_analysis",
+        get_analysis_input_object_from_analysis_input_code=(
+            fake_icav2.get_analysis_input_object_from_analysis_input_code
+        ),
+        get_analysis_output_object_from_analysis_output_code=(
+            fake_icav2.get_analysis_output_object_from_analysis_output_code
+        ),
+    )
+
+    # orcabus_api_tools
+    _add_module("orcabus_api_tools")
+    _add_module(
+        "orcabus_api_tools.filemanager",
+        get_file_manager_request=fake_icav2.get_file_manager_request,
+        file_manager_patch_request=fake_icav2.file_manager_patch_request,
+    )
+    _add_module("orcabus_api_tools.filemanager.globals", S3_LIST_ENDPOINT=S3_LIST_ENDPOINT)
+    _add_module("orcabus_api_tools.filemanager.file_helpers", crawl_filemanager_sync=fake_icav2.crawl_filemanager_sync)
+    _add_module(
+        "orcabus_api_tools.workflow",
+        get_workflow_run_from_portal_run_id=fake_icav2.get_workflow_run_from_portal_run_id,
+        get_latest_payload_from_portal_run_id=fake_icav2.get_latest_payload_from_portal_run_id,
+        list_workflows=fake_icav2.list_workflows,
+    )
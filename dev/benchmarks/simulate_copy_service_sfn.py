@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+
+"""
+Simulate the run bssh fastq copy service state machine offline, with local_sfn_runner
+
+The lambda handlers are called directly, against the in-process fakes in offline_fakes.py
+(a synthetic run of the requested run profile, with a fixed latency added to every API call).
+
+The copy events are stubbed, each 'Launch Copy Job' copies its sources in the fake ICAv2 and takes
+    --copy-job-startup-seconds + (bytes in the copy job) / --copy-throughput-mb-per-second
+simulated seconds.
+The fake filemanager ingests --ingest-files-per-second of the copied files (in simulated time)
+from when the last copy job ends, so the sync check polling loop runs as it would after a real copy.
+
+The filemanager sync tracker is kept in memory, and the S3 object created events of the copied files
+are delivered to handle_s3_object_created_event when 'Wait for filemanager sync events' is entered.
+The task success it sends resumes the state machine once the model has ingested every copied file,
+i.e. the events are assumed to arrive when the filemanager ingests the object.
+Pass --no-sync-events to simulate without a sync tracker, the state machine then polls the filemanager.
+Pass --incomplete-copy-job-count to have the first copy jobs report success without copying their last source,
+their validation then fails the execution with a CopyJobValidationError.
+
+Reports the simulated duration, the number of state transitions, lambda invocations and events,
+and per state the time spent and the largest input, output, task arguments, task result and assigned variables,
+flagging states over the 256 KiB payload limit.
+
+Runs over the copy job manifest thresholds (--copy-job-manifest-min-copy-job-count,
+--copy-job-manifest-max-inline-payload-size-kib, as set in infrastructure/stage/constants.ts)
+write their copy jobs to a manifest in the local store, and are iterated over by the distributed map,
+whose ItemReader and ResultWriter read and write the local store directly.
+
+Pass --template to simulate another version of the state machine, its lambda FunctionNames
+must be the same ${__..._lambda_function_arn__} placeholders.
+
+Usage:
+    python dev/benchmarks/simulate_copy_service_sfn.py --profile novaseq_6000_s4
+    python dev/benchmarks/simulate_copy_service_sfn.py --profile novaseq_x_25b --timeline --output /tmp/sfn.json
+    python dev/benchmarks/simulate_copy_service_sfn.py --profile nextseq_2000 --copy-job-manifest-min-copy-job-count 0
+    python dev/benchmarks/simulate_copy_service_sfn.py --profile novaseq_6000_s4 --no-sync-events
+    python dev/benchmarks/simulate_copy_service_sfn.py --profile miseq --incomplete-copy-job-count 1
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+import sys
+import tempfile
+from os import environ
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Add the benchmarks directory, layer source and lambdas to the path
+BENCHMARKS_DIR = Path(__file__).absolute().parent
+APP_DIR = BENCHMARKS_DIR.parent.parent / "app"
+sys.path.insert(0, str(BENCHMARKS_DIR))
+sys.path.insert(0, str(APP_DIR / "layers" / "bssh_manager_tools_layer" / "src"))
+for lambda_dir_path in sorted((APP_DIR / "lambdas").glob("*_py")):
+    sys.path.insert(0, str(lambda_dir_path))
+
+# Benchmark imports
+from local_sfn_runner import (  # noqa: E402
+    DEFAULT_EVENT_OVERHEAD_SECONDS,
+    DEFAULT_LAMBDA_OVERHEAD_SECONDS,
+    DEFAULT_TRANSITION_SECONDS,
+    MAX_PAYLOAD_SIZE_IN_BYTES,
+    LocalRunReport,
+    LocalStateMachineRunner,
+)
+from offline_fakes import (  # noqa: E402
+    DATA_TYPE_INDEX,
+    FILE_DATA_TYPE,
+    FILE_SIZE_INDEX,
+    ICAV2_ACCESS_TOKEN_SECRET_ID,
+    RUN_PROFILES,
+    FakeIcav2,
+    generate_run,
+    get_fake_access_token,
+    get_output_uri,
+    install_fake_modules,
+)
+
+# Globals
+DEFAULT_TEMPLATE_PATH = APP_DIR / "step-function-templates" / "run_bssh_fastq_copy_service_sfn_template.asl.json"
+DEFAULT_PROFILE = "nextseq_2000"
+DEFAULT_LATENCY_MS = 10.0
+DEFAULT_COPY_JOB_STARTUP_SECONDS = 60.0
+DEFAULT_COPY_THROUGHPUT_MB_PER_SECOND = 200.0
+DEFAULT_INGEST_FILES_PER_SECOND = 50.0
+
+# As in infrastructure/stage/constants.ts
+DEFAULT_COPY_JOB_MANIFEST_MIN_COPY_JOB_COUNT = 8
+DEFAULT_COPY_JOB_MANIFEST_MAX_INLINE_PAYLOAD_SIZE_KIB = 128
+DEFAULT_COPY_JOB_MANIFEST_MAX_CONCURRENCY = 64
+
+# The portal run id is the last part of the fake output uri
+PORTAL_RUN_ID = Path(get_output_uri()).name
+
+
+class CopyServiceSimulation:
+    """
+    The stubbed copy events and the filemanager ingestion model
+    """
+
+    def __init__(
+        self,
+        fake_icav2: FakeIcav2,
+        copy_job_startup_seconds: float,
+        copy_throughput_mb_per_second: float,
+        ingest_files_per_second: float,
+        s3_object_created_event_handler: Optional[Callable[[Dict, Any], Any]] = None,
+        incomplete_copy_job_count: int = 0,
+    ):
+        self.fake_icav2 = fake_icav2
+        self.copy_job_startup_seconds = copy_job_startup_seconds
+        self.copy_throughput_bytes_per_second = copy_throughput_mb_per_second * 1024 ** 2
+        self.ingest_files_per_second = ingest_files_per_second
+        self.s3_object_created_event_handler = s3_object_created_event_handler
+        self.incomplete_copy_job_count = incomplete_copy_job_count
+
+        # Updated by each copy job
+        self.copy_job_count = 0
+        self.copied_file_count = 0
+        self.last_copy_end_seconds = 0.0
+
+        # The outputs of the task successes sent, by task token
+        self.task_success_outputs: Dict[str, Dict] = {}
+        self.delivered_event_count = 0
+
+    def get_file_sizes(self, uri: str) -> Tuple[int, int]:
+        """
+        Get the number of files and total bytes under a uri
+        """
+        project_id, path = self.fake_icav2.uri_to_project_id_and_path(uri)
+        project = self.fake_icav2.get_project(project_id)
+        path = self.fake_icav2.get_path(project_id, path)
+
+        file_paths = [path] if project.entries[path][DATA_TYPE_INDEX] == FILE_DATA_TYPE else list(filter(
+            lambda path_iter_: project.entries[path_iter_][DATA_TYPE_INDEX] == FILE_DATA_TYPE,
+            project.iter_paths_under(path)
+        ))
+
+        return len(file_paths), sum(map(lambda path_iter_: project.entries[path_iter_][FILE_SIZE_INDEX], file_paths))
+
+    def run_copy_job(self, arguments: Dict, clock_seconds: float) -> Tuple[Any, float]:
+        """
+        The task token handler for 'Launch Copy Job', copy the sources and return the simulated copy duration
+        """
+        copy_job = arguments["Entries"][0]["Detail"]["payload"]
+
+        # The first incomplete_copy_job_count copy jobs leave out their last source
+        self.copy_job_count += 1
+        source_uri_list = (
+            copy_job["sourceUriList"][:-1]
+            if self.copy_job_count <= self.incomplete_copy_job_count
+            else copy_job["sourceUriList"]
+        )
+
+        file_count, total_bytes = 0, 0
+        for source_uri in source_uri_list:
+            source_file_count, source_bytes = self.get_file_sizes(source_uri)
+            file_count += source_file_count
+            total_bytes += source_bytes
+            self.fake_icav2.copy_uri(source_uri, copy_job["destinationUri"])
+
+        copy_duration_seconds = self.copy_job_startup_seconds + total_bytes / self.copy_throughput_bytes_per_second
+
+        self.copied_file_count += file_count
+        self.last_copy_end_seconds = max(self.last_copy_end_seconds, clock_seconds + copy_duration_seconds)
+
+        return {"status": "SUCCEEDED"}, copy_duration_seconds
+
+    def send_task_success(self, task_token: str, output: Dict):
+        """
+        The task success sender of the sync tracker
+        """
+        self.task_success_outputs[task_token] = output
+
+    def iter_output_keys(self, output_uri: str):
+        """
+        Yield the keys of the files under the output uri in the fake bucket
+        """
+        output_uri_parsed = urlparse(output_uri)
+        project = self.fake_icav2.get_project(self.fake_icav2.bucket_project_ids[output_uri_parsed.netloc])
+        for path in project.iter_paths_under(output_uri_parsed.path.rstrip("/")):
+            if project.entries[path][DATA_TYPE_INDEX] == FILE_DATA_TYPE:
+                yield output_uri_parsed.netloc, path[1:]
+
+    def wait_for_sync_events(self, arguments: Dict, clock_seconds: float) -> Tuple[Any, float]:
+        """
+        The task token handler for 'Wait for filemanager sync events',
+        deliver the object created events of the copied files,
+        and return the task success output and when the last of them arrives
+        """
+        task_token = arguments["Payload"]["taskToken"]
+
+        # Every event has already been counted, the wait lambda sent the task success itself
+        if task_token in self.task_success_outputs:
+            return self.task_success_outputs[task_token], 0.0
+
+        for bucket, key in self.iter_output_keys(get_output_uri()):
+            self.delivered_event_count += 1
+            self.s3_object_created_event_handler(
+                {
+                    "source": "aws.s3",
+                    "detail-type": "Object Created",
+                    "detail": {"bucket": {"name": bucket}, "object": {"key": key}},
+                },
+                None
+            )
+
+        if task_token not in self.task_success_outputs:
+            raise TimeoutError("The sync events did not reach the expected count")
+
+        ingest_end_seconds = self.last_copy_end_seconds + self.copied_file_count / self.ingest_files_per_second
+
+        return self.task_success_outputs[task_token], max(ingest_end_seconds - clock_seconds, 0.0)
+
+    def run_task_token_task(self, arguments: Dict, clock_seconds: float) -> Tuple[Any, float]:
+        """
+        The task token handler, the copy jobs put events, the sync events wait invokes a lambda
+        """
+        if "Entries" in arguments:
+            return self.run_copy_job(arguments, clock_seconds)
+        return self.wait_for_sync_events(arguments, clock_seconds)
+
+    def update_filemanager_synced_fraction(self, clock_seconds: float):
+        if self.copied_file_count == 0:
+            self.fake_icav2.filemanager_synced_fraction = 1.0
+            return
+        ingested_file_count = max(clock_seconds - self.last_copy_end_seconds, 0.0) * self.ingest_files_per_second
+        self.fake_icav2.filemanager_synced_fraction = min(ingested_file_count / self.copied_file_count, 1.0)
+
+
+def read_local_store_object(arguments: Dict) -> Optional[bytes]:
+    """
+    The ItemReader, the local store hands the step function an empty bucket and the absolute path as the key
+    """
+    object_path = Path(arguments["Key"])
+    return object_path.read_bytes() if object_path.is_file() else None
+
+
+def write_local_store_results(arguments: Dict, outputs: List):
+    """
+    The ResultWriter, writes the iteration outputs under the prefix in the local store
+    """
+    results_dir = Path(arguments["Prefix"])
+    results_dir.mkdir(parents=True, exist_ok=True)
+    (results_dir / "SUCCEEDED_0.json").write_text(json.dumps(outputs) + "\n")
+
+
+def run_simulation(args: argparse.Namespace) -> Tuple[LocalRunReport, Dict[str, int]]:
+    fake_icav2 = FakeIcav2(latency_seconds=args.latency_ms / 1000)
+    install_fake_modules(fake_icav2)
+
+    store_dir = tempfile.mkdtemp(prefix="bssh-sfn-simulation-store-")
+    environ["BSSH_MANAGER_STORE_URI"] = Path(store_dir).as_uri() + "/"
+    environ["ICAV2_ACCESS_TOKEN_SECRET_ID"] = ICAV2_ACCESS_TOKEN_SECRET_ID
+
+    # Layer imports, after the fake modules are installed
+    from bssh_manager_tools.utils.icav2_credential_helpers import LocalSecretsBackend, set_secrets_backend
+    from bssh_manager_tools.utils.filemanager_sync_tracker_helpers import (
+        InMemorySyncTracker,
+        set_sync_tracker,
+        set_task_success_sender,
+    )
+    from bssh_manager_tools.utils.metrics_helpers import LocalMetricsSink, set_metrics_sink
+
+    set_secrets_backend(LocalSecretsBackend({ICAV2_ACCESS_TOKEN_SECRET_ID: get_fake_access_token()}))
+    set_metrics_sink(LocalMetricsSink())
+
+    # Lambda imports
+    import add_portal_run_id_attributes
+    import filemanager_sync_check
+    import get_icav2_copy_job_list
+    import get_workflow_run_object
+    import handle_s3_object_created_event
+    import register_filemanager_sync_tracker
+    import run_filemanager_sync
+    import validate_copy_job
+    import wait_for_filemanager_sync_events
+
+    # Only log warnings and above
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+    generate_run(fake_icav2, RUN_PROFILES[args.profile])
+
+    simulation = CopyServiceSimulation(
+        fake_icav2=fake_icav2,
+        copy_job_startup_seconds=args.copy_job_startup_seconds,
+        copy_throughput_mb_per_second=args.copy_throughput_mb_per_second,
+        ingest_files_per_second=args.ingest_files_per_second,
+        s3_object_created_event_handler=handle_s3_object_created_event.handler,
+        incomplete_copy_job_count=args.incomplete_copy_job_count,
+    )
+
+    # Without a sync tracker the registration returns isTracked as false, and the filemanager is polled
+    set_sync_tracker(None if args.no_sync_events else InMemorySyncTracker())
+    set_task_success_sender(simulation.send_task_success)
+
+    def _filemanager_sync_check_handler(event, context):
+        simulation.update_filemanager_synced_fraction(context.simulated_time_seconds)
+        return filemanager_sync_check.handler(event, context)
+
+    runner = LocalStateMachineRunner(
+        definition=json.loads(args.template.read_text()),
+        lambda_handlers={
+            "${__get_workflow_run_object_lambda_function_arn__}": get_workflow_run_object.handler,
+            "${__get_icav2_copy_job_list_lambda_function_arn__}": get_icav2_copy_job_list.handler,
+            "${__validate_copy_job_lambda_function_arn__}": validate_copy_job.handler,
+            "${__run_filemanager_sync_lambda_function_arn__}": run_filemanager_sync.handler,
+            "${__add_portal_run_id_attributes_lambda_function_arn__}": add_portal_run_id_attributes.handler,
+            "${__filemanager_sync_check_lambda_function_arn__}": _filemanager_sync_check_handler,
+            "${__register_filemanager_sync_tracker_lambda_function_arn__}": register_filemanager_sync_tracker.handler,
+            "${__wait_for_filemanager_sync_events_lambda_function_arn__}": wait_for_filemanager_sync_events.handler,
+        },
+        task_token_handler=simulation.run_task_token_task,
+        item_reader_handler=read_local_store_object,
+        result_writer_handler=write_local_store_results,
+        definition_substitutions={
+            "__copy_job_manifest_min_copy_job_count__": str(args.copy_job_manifest_min_copy_job_count),
+            "__copy_job_manifest_max_inline_payload_size_in_bytes__": str(
+                args.copy_job_manifest_max_inline_payload_size_kib * 1024
+            ),
+            "__copy_job_manifest_max_concurrency__": str(args.copy_job_manifest_max_concurrency),
+        },
+        lambda_overhead_seconds=args.lambda_overhead_ms / 1000,
+        event_overhead_seconds=args.event_overhead_ms / 1000,
+        transition_seconds=args.transition_ms / 1000,
+        enforce_payload_limit=args.enforce_payload_limit,
+    )
+
+    report = runner.run({"portalRunId": PORTAL_RUN_ID}, execution_name=f"simulation-{args.profile}")
+
+    return report, {
+        "filemanager list calls": fake_icav2.call_counts["get_file_manager_request"],
+        "filemanager patch calls": fake_icav2.call_counts["file_manager_patch_request"],
+        "s3 events delivered": simulation.delivered_event_count,
+    }
+
+
+def format_bytes(size_in_bytes: Any) -> str:
+    if size_in_bytes is None:
+        return "-"
+    return f"{size_in_bytes / 1024:.1f}K"
+
+
+def print_report(report: LocalRunReport, call_counts: Dict[str, int], show_timeline: bool):
+    print(f"{'status':<28} {report.status}" + (f" ({report.error}: {report.cause})" if report.error else ""))
+    print(f"{'simulated duration (s)':<28} {report.duration_seconds:.1f}")
+    print(f"{'wall time (s)':<28} {report.wall_time_seconds:.1f}")
+    print(f"{'state transitions':<28} {report.transition_count}")
+    print(f"{'lambda invocations':<28} {report.lambda_invocation_count}")
+    for function_name, invocation_count in report.lambda_invocation_counts.items():
+        print(f"  {function_name.strip('${}_').removesuffix('_lambda_function_arn'):<38} {invocation_count:>6}")
+    print(f"{'events put':<28} {sum(report.event_detail_types.values())}")
+    for call_name, call_count in call_counts.items():
+        print(f"{call_name:<28} {call_count}")
+    print()
+
+    print(
+        f"{'state':<30} {'count':>6} {'first start':>12} {'last end':>10} {'max (s)':>9} "
+        f"{'input':>9} {'output':>9} {'args':>9} {'result':>9} {'assigned':>9}"
+    )
+    for state_summary in report.get_state_summaries():
+        print(
+            f"{state_summary['stateName'][:30]:<30} {state_summary['transitionCount']:>6} "
+            f"{state_summary['firstStartSeconds']:>12.1f} {state_summary['lastEndSeconds']:>10.1f} "
+            f"{state_summary['maxDurationSeconds']:>9.2f} "
+            f"{format_bytes(state_summary['maxInputBytes']):>9} {format_bytes(state_summary['maxOutputBytes']):>9} "
+            f"{format_bytes(state_summary['maxArgumentsBytes']):>9} {format_bytes(state_summary['maxResultBytes']):>9} "
+            f"{format_bytes(state_summary['maxAssignedBytes']):>9}"
+            + (" over payload limit" if state_summary["isOverPayloadLimit"] else "")
+        )
+
+    if show_timeline:
+        print()
+        for state_record in report.get_timeline():
+            print(
+                f"{state_record.start_seconds:>10.2f} {state_record.end_seconds:>10.2f}  "
+                f"{state_record.state_path} ({state_record.state_type})"
+            )
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=list(RUN_PROFILES))
+    parser.add_argument("--template", type=Path, default=DEFAULT_TEMPLATE_PATH)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS,
+                        help="Latency added to every fake API call")
+    parser.add_argument("--lambda-overhead-ms", type=float, default=DEFAULT_LAMBDA_OVERHEAD_SECONDS * 1000,
+                        help="Added to the measured duration of each lambda handler")
+    parser.add_argument("--event-overhead-ms", type=float, default=DEFAULT_EVENT_OVERHEAD_SECONDS * 1000)
+    parser.add_argument("--transition-ms", type=float, default=DEFAULT_TRANSITION_SECONDS * 1000)
+    parser.add_argument("--copy-job-startup-seconds", type=float, default=DEFAULT_COPY_JOB_STARTUP_SECONDS)
+    parser.add_argument("--copy-throughput-mb-per-second", type=float, default=DEFAULT_COPY_THROUGHPUT_MB_PER_SECOND)
+    parser.add_argument("--ingest-files-per-second", type=float, default=DEFAULT_INGEST_FILES_PER_SECOND)
+    parser.add_argument("--copy-job-manifest-min-copy-job-count", type=int,
+                        default=DEFAULT_COPY_JOB_MANIFEST_MIN_COPY_JOB_COUNT,
+                        help="Use the distributed map if there are more copy jobs than this")
+    parser.add_argument("--copy-job-manifest-max-inline-payload-size-kib", type=int,
+                        default=DEFAULT_COPY_JOB_MANIFEST_MAX_INLINE_PAYLOAD_SIZE_KIB,
+                        help="Use the distributed map if the copy job list is larger than this")
+    parser.add_argument("--copy-job-manifest-max-concurrency", type=int,
+                        default=DEFAULT_COPY_JOB_MANIFEST_MAX_CONCURRENCY)
+    parser.add_argument("--no-sync-events", action="store_true",
+                        help="Simulate without a sync tracker, polling the filemanager until it is synced")
+    parser.add_argument("--incomplete-copy-job-count", type=int, default=0,
+                        help="The number of copy jobs that report success without copying their last source")
+    parser.add_argument("--enforce-payload-limit", action="store_true",
+                        help=f"Fail as Step Functions would on payloads over {MAX_PAYLOAD_SIZE_IN_BYTES} bytes")
+    parser.add_argument("--timeline", action="store_true", help="Print every state transition")
+    parser.add_argument("--output", type=Path, help="Save the report, and the fake API call counts, as JSON")
+    return parser
+
+
+def main():
+    args = get_argument_parser().parse_args()
+
+    report, call_counts = run_simulation(args)
+    print_report(report, call_counts, show_timeline=args.timeline)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps({**report.to_dict(), "callCounts": call_counts}, indent=2) + "\n")
+
+    if report.status != "SUCCEEDED":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
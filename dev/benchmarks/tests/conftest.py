@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+
+"""
+Add the benchmarks directory to the path, so the tests can import the benchmark modules
+as the benchmark scripts do
+"""
+
+# Standard libraries
+import sys
+from pathlib import Path
+
+# Globals
+BENCHMARKS_DIR = Path(__file__).absolute().parent.parent
+sys.path.insert(0, str(BENCHMARKS_DIR))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the JSONata subset, against the results JSONata gives for the same expressions,
+and that it parses every expression in the step function templates
+"""
+
+# Standard libraries
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from jsonata_subset import UNDEFINED, JsonataSubsetError, Parser, evaluate_expression
+
+# Globals
+STEP_FUNCTION_TEMPLATES_DIR = Path(__file__).absolute().parents[3] / "app" / "step-function-templates"
+
+# The ${__...__} placeholders CDK substitutes in the templates before deploying them
+PLACEHOLDER_REGEX = re.compile(r"\$\{__[a-z_]+__\}")
+
+VARIABLES = {
+    "states": {
+        "input": {
+            "isValid": False,
+            "copyJobs": [
+                {"sourceUri": "icav2://project/a/", "isValid": True, "fileCount": 2},
+                {"sourceUri": "icav2://project/b/", "isValid": False, "fileCount": 3},
+            ],
+        },
+    },
+    "totalSyncWaitSeconds": 120,
+    "syncWaitSeconds": 60,
+    "portalRunId": "20240207abcduuid",
+}
+
+
+def iter_template_expressions() -> Iterator[str]:
+    def _iter_expressions(value: Any) -> Iterator[str]:
+        if isinstance(value, str) and value.startswith("{%") and value.endswith("%}"):
+            yield PLACEHOLDER_REGEX.sub("0", value[2:-2])
+        elif isinstance(value, dict):
+            for child_value in value.values():
+                yield from _iter_expressions(child_value)
+        elif isinstance(value, list):
+            for child_value in value:
+                yield from _iter_expressions(child_value)
+
+    for template_path in sorted(STEP_FUNCTION_TEMPLATES_DIR.glob("*.asl.json")):
+        yield from _iter_expressions(json.loads(template_path.read_text()))
+
+
+@pytest.mark.parametrize("expression, expected_value", [
+    # Literals and operators
+    ("1 + 2 * 3", 7),
+    ("(1 + 2) * 3", 9),
+    ("-2 + 1", -1),
+    ("'a' & 1 & true", "a1true"),
+    ("$totalSyncWaitSeconds + $syncWaitSeconds > 150", True),
+    ("$states.input.isValid or 1 = 1", True),
+    ("$states.input.isValid and 1 = 1", False),
+    # Paths are mapped over arrays, a sequence of one item is the item itself
+    ("$states.input.copyJobs.sourceUri", ["icav2://project/a/", "icav2://project/b/"]),
+    ("$states.input.copyJobs[isValid = false].sourceUri", "icav2://project/b/"),
+    ("$states.input.copyJobs[0].fileCount", 2),
+    ("$states.input.copyJobs[-1].fileCount", 3),
+    ("$sum($states.input.copyJobs.fileCount)", 5),
+    # Conditionals, and undefined values left out of objects and arrays
+    ("$states.input.isValid ? 'valid' : 'invalid'", "invalid"),
+    ("{'portalRunId': $portalRunId, 'missing': $states.input.missing}", {"portalRunId": "20240207abcduuid"}),
+    ("[1, $states.input.missing, 2]", [1, 2]),
+    # Functions
+    ("$exists($states.input.missing)", False),
+    ("$count($states.input.copyJobs)", 2),
+    ("$string({'a': [1, 2]})", '{"a":[1,2]}'),
+    ("$number('1.5')", 1.5),
+    ("$merge([{'a': 1, 'b': 1}, {'b': 2}])", {"a": 1, "b": 2}),
+    ("$lookup({'a': 1}, 'a')", 1),
+    ("$keys({'a': 1, 'b': 2})", ["a", "b"]),
+    ("[1, 2] ~> $append(3)", [1, 2, 3]),
+    ("$sift({'a': 1, 'b': null, 'c': 0}, function($v){ $v })", {"a": 1}),
+    ("( $states.input.copyJobs[isValid = false] ~> $count )", 1),
+])
+def test_expressions_evaluate_as_in_jsonata(expression: str, expected_value: Any):
+    assert evaluate_expression(expression, VARIABLES) == expected_value
+
+
+@pytest.mark.parametrize("expression", [
+    "$states.input.missing",
+    "$states.input.missing + 1",
+    "$states.input.copyJobs[isValid = null]",
+    "$states.input.copyJobs[5]",
+])
+def test_expressions_without_a_value_are_undefined(expression: str):
+    assert evaluate_expression(expression, VARIABLES) is UNDEFINED
+
+
+@pytest.mark.parametrize("expression", [
+    # Variable binding, regular expressions and functions outside of the subset
+    "( $x := 1; $x + 1 )",
+    "$states.input.copyJobs#$i",
+    "$uppercase('a')",
+])
+def test_unsupported_expressions_raise(expression: str):
+    with pytest.raises(JsonataSubsetError):
+        evaluate_expression(expression, VARIABLES)
+
+
+def test_every_template_expression_is_parsed():
+    expressions = list(iter_template_expressions())
+
+    assert len(expressions) > 0
+    for expression in expressions:
+        Parser(expression).parse()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the local step function runner, on small JSONata definitions with known outcomes
+"""
+
+# Standard libraries
+import json
+from typing import Any, Dict, List, Optional
+
+# Third party libraries
+import pytest
+
+# Local libraries
+from local_sfn_runner import (
+    LAMBDA_INVOKE_RESOURCE,
+    MAX_PAYLOAD_SIZE_IN_BYTES,
+    PUT_EVENTS_WAIT_FOR_TASK_TOKEN_RESOURCE,
+    LocalRunReport,
+    LocalStateMachineRunner,
+)
+
+# Globals
+TRANSITION_SECONDS = 0.5
+FUNCTION_NAME = "${__my_lambda_function_arn__}"
+
+
+def get_definition(states: Dict, start_at: Optional[str] = None) -> Dict:
+    return {"QueryLanguage": "JSONata", "StartAt": start_at or next(iter(states)), "States": states}
+
+
+def run_definition(definition: Dict, execution_input: Any = None, **kwargs) -> LocalRunReport:
+    return LocalStateMachineRunner(
+        definition=definition,
+        lambda_handlers=kwargs.pop("lambda_handlers", {}),
+        lambda_overhead_seconds=0.0,
+        event_overhead_seconds=0.0,
+        transition_seconds=TRANSITION_SECONDS,
+        **kwargs
+    ).run(execution_input if execution_input is not None else {}, execution_name="test-execution")
+
+
+def test_variables_choices_and_waits():
+    report = run_definition(get_definition({
+        "Assign": {
+            "Type": "Pass",
+            "Assign": {"fileCount": "{% $states.input.fileCount %}", "waitSeconds": 30},
+            "Output": {"portalRunId": "{% $states.input.portalRunId %}"},
+            "Next": "Is Large",
+        },
+        "Is Large": {
+            "Type": "Choice",
+            "Choices": [{"Condition": "{% $fileCount > 10 %}", "Next": "Wait"}],
+            "Default": "Done",
+        },
+        "Wait": {"Type": "Wait", "Seconds": "{% $waitSeconds %}", "Next": "Done"},
+        "Done": {
+            "Type": "Pass",
+            "Output": "{% $merge([$states.input, {'executionName': $states.context.Execution.Name}]) %}",
+            "End": True,
+        },
+    }), {"fileCount": 11, "portalRunId": "20240207abcduuid"})
+
+    assert report.status == "SUCCEEDED"
+    assert report.output == {"portalRunId": "20240207abcduuid", "executionName": "test-execution"}
+    assert report.transition_count == 4
+    assert report.duration_seconds == pytest.approx(30 + 4 * TRANSITION_SECONDS)
+
+
+def test_lambda_payloads_are_passed_through_json():
+    handler_events: List[Dict] = []
+
+    def _handler(event: Dict, context: Any) -> Dict:
+        handler_events.append(event)
+        return {"sourceUriCount": len(event["sourceUriList"]), "portalRunId": event["portalRunId"]}
+
+    report = run_definition(
+        get_definition({
+            "Get Copy Jobs": {
+                "Type": "Task",
+                "Resource": LAMBDA_INVOKE_RESOURCE,
+                "Arguments": {
+                    "FunctionName": FUNCTION_NAME,
+                    "Payload": {"portalRunId": "{% $states.input.portalRunId %}", "sourceUriList": ["a", "b"]},
+                },
+                "Output": "{% $states.result.Payload %}",
+                "End": True,
+            },
+        }),
+        {"portalRunId": "20240207abcduuid"},
+        lambda_handlers={FUNCTION_NAME: _handler},
+    )
+
+    assert report.output == {"sourceUriCount": 2, "portalRunId": "20240207abcduuid"}
+    assert handler_events == [{"portalRunId": "20240207abcduuid", "sourceUriList": ["a", "b"]}]
+    assert report.lambda_invocation_counts == {FUNCTION_NAME: 1}
+
+
+def test_a_raising_lambda_fails_the_execution_with_its_class_name():
+    def _handler(event: Dict, context: Any):
+        raise FileNotFoundError("no such folder")
+
+    report = run_definition(
+        get_definition({
+            "Get Copy Jobs": {
+                "Type": "Task",
+                "Resource": LAMBDA_INVOKE_RESOURCE,
+                "Arguments": {"FunctionName": FUNCTION_NAME, "Payload": {}},
+                "Next": "Done",
+            },
+            "Done": {"Type": "Succeed"},
+        }),
+        lambda_handlers={FUNCTION_NAME: _handler},
+    )
+
+    assert (report.status, report.error, report.cause) == ("FAILED", "FileNotFoundError", "no such folder")
+
+
+def test_fail_and_unmatched_choice_states():
+    report = run_definition(get_definition({
+        "Copy Job Invalid": {
+            "Type": "Fail",
+            "Error": "CopyJobValidationError",
+            "Cause": "{% $string($states.input.validationResults[isValid = false]) %}",
+        },
+    }), {"validationResults": [{"sourceUri": "a", "isValid": True}, {"sourceUri": "b", "isValid": False}]})
+    assert (report.status, report.error) == ("FAILED", "CopyJobValidationError")
+    assert json.loads(report.cause) == {"sourceUri": "b", "isValid": False}
+
+    report = run_definition(get_definition({
+        "Is Synced": {"Type": "Choice", "Choices": [{"Condition": "{% false %}", "Next": "Done"}]},
+        "Done": {"Type": "Succeed"},
+    }))
+    assert (report.status, report.error) == ("FAILED", "States.NoChoiceMatched")
+
+
+def test_map_iterations_share_the_max_concurrency_lanes():
+    report = run_definition(get_definition({
+        "For each copy job": {
+            "Type": "Map",
+            "Items": "{% $states.input.copyJobs %}",
+            "MaxConcurrency": 2,
+            "ItemSelector": {
+                "copyJob": "{% $states.context.Map.Item.Value %}",
+                "index": "{% $states.context.Map.Item.Index %}",
+                "portalRunId": "{% $portalRunId %}",
+            },
+            "ItemProcessor": {
+                "StartAt": "Copy",
+                "States": {"Copy": {"Type": "Wait", "Seconds": "{% $states.input.copyJob.seconds %}", "End": True}},
+            },
+            "Assign": {"portalRunId": "unchanged"},
+            "End": True,
+        },
+    }), {"copyJobs": [{"seconds": 10}, {"seconds": 10}, {"seconds": 10}, {"seconds": 1}]})
+
+    assert report.status == "SUCCEEDED"
+    assert list(map(lambda output_iter_: output_iter_["index"], report.output)) == [0, 1, 2, 3]
+    # Two lanes, 10 s then 10 s on one and 10 s then 1 s on the other, after the map's own transition
+    assert report.duration_seconds == pytest.approx(TRANSITION_SECONDS + 2 * (10 + TRANSITION_SECONDS))
+
+
+def test_distributed_map_reads_its_items_and_writes_its_results():
+    written_results: List = []
+    jsonl_bytes = b'{"sourceUri": "a"}\n{"sourceUri": "b"}\n\n'
+
+    report = run_definition(
+        get_definition({
+            "Set Variable": {"Type": "Pass", "Assign": {"portalRunId": "20240207abcduuid"}, "Next": "For each"},
+            "For each": {
+                "Type": "Map",
+                "ItemReader": {
+                    "Resource": "arn:aws:states:::s3:getObject",
+                    "ReaderConfig": {"InputType": "JSONL"},
+                    "Arguments": {"Bucket": "bucket", "Key": "{% $states.input.key %}"},
+                },
+                "ItemProcessor": {
+                    "ProcessorConfig": {"Mode": "DISTRIBUTED", "ExecutionType": "STANDARD"},
+                    "StartAt": "Copy",
+                    "States": {
+                        "Copy": {
+                            "Type": "Pass",
+                            "Output": {
+                                "sourceUri": "{% $states.input.sourceUri %}",
+                                # Child executions cannot read the variables of the parent execution
+                                "hasPortalRunId": "{% $exists($portalRunId) %}",
+                            },
+                            "End": True,
+                        },
+                    },
+                },
+                "ResultWriter": {
+                    "Resource": "arn:aws:states:::s3:putObject",
+                    "Arguments": {"Bucket": "bucket", "Prefix": "results/"},
+                },
+                "End": True,
+            },
+        }),
+        {"key": "copy-jobs.jsonl"},
+        item_reader_handler=lambda arguments: jsonl_bytes if arguments["Key"] == "copy-jobs.jsonl" else None,
+        result_writer_handler=lambda arguments, outputs: written_results.append((arguments["Prefix"], outputs)),
+    )
+
+    assert report.status == "SUCCEEDED"
+    assert written_results == [("results/", [
+        {"sourceUri": "a", "hasPortalRunId": False},
+        {"sourceUri": "b", "hasPortalRunId": False},
+    ])]
+    assert report.output == {"ResultWriterDetails": {"Bucket": "bucket", "Key": "results/manifest.json"}}
+
+
+
+def test_a_missing_item_reader_object_fails_the_execution():
+    report = run_definition(
+        get_definition({
+            "For each": {
+                "Type": "Map",
+                "ItemReader": {"Arguments": {"Bucket": "bucket", "Key": "{% $states.input.key %}"}},
+                "ItemProcessor": {
+                    "ProcessorConfig": {"Mode": "DISTRIBUTED"},
+                    "StartAt": "Done",
+                    "States": {"Done": {"Type": "Succeed"}},
+                },
+                "End": True,
+            },
+        }),
+        {"key": "missing.jsonl"},
+        item_reader_handler=lambda arguments: None,
+    )
+
+    assert (report.status, report.error) == ("FAILED", "States.ItemReaderFailed")
+
+
+def test_task_token_callbacks_take_their_simulated_duration():
+    callback_clocks: List[float] = []
+
+    def _task_token_handler(arguments: Dict, clock_seconds: float):
+        callback_clocks.append(clock_seconds)
+        return {"status": "SUCCEEDED", "detailType": arguments["Entries"][0]["DetailType"]}, 60.0
+
+    report = run_definition(
+        get_definition({
+            "Launch Copy Job": {
+                "Type": "Task",
+                "Resource": PUT_EVENTS_WAIT_FOR_TASK_TOKEN_RESOURCE,
+                "Arguments": {"Entries": [{"DetailType": "${__icav2_data_copy_detail_type__}", "Detail": {}}]},
+                "End": True,
+            },
+        }),
+        task_token_handler=_task_token_handler,
+        definition_substitutions={"__icav2_data_copy_detail_type__": "ICAv2DataCopySync"},
+    )
+
+    assert report.output == {"status": "SUCCEEDED", "detailType": "ICAv2DataCopySync"}
+    assert report.event_detail_types == {"ICAv2DataCopySync": 1}
+    assert callback_clocks == [pytest.approx(TRANSITION_SECONDS)]
+    assert report.duration_seconds == pytest.approx(TRANSITION_SECONDS + 60.0)
+
+
+def test_payloads_over_the_limit_are_flagged_or_fail():
+    definition = get_definition({
+        "Copy Jobs": {"Type": "Pass", "Output": {"copyJobs": "{% $states.input.copyJobs %}"}, "End": True},
+    })
+    execution_input = {"copyJobs": "x" * MAX_PAYLOAD_SIZE_IN_BYTES}
+
+    report = run_definition(definition, execution_input)
+    assert report.status == "SUCCEEDED"
+    assert report.get_state_summaries()[0]["isOverPayloadLimit"]
+
+    report = run_definition(definition, execution_input, enforce_payload_limit=True)
+    assert (report.status, report.error) == ("FAILED", "States.DataLimitExceeded")
+
+
+def test_only_jsonata_definitions_are_supported():
+    with pytest.raises(ValueError, match="JSONata"):
+        LocalStateMachineRunner(definition={"StartAt": "Done", "States": {}}, lambda_handlers={})
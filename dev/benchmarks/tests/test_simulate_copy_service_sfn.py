@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+"""
+Run the real copy service state machine template through the simulator, and check its known outcomes
+
+Each simulation runs in its own interpreter, as the simulator installs the fake modules
+and sets the environment of the handlers it calls.
+"""
+
+# Standard libraries
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Third party libraries
+import pytest
+
+# Globals
+SIMULATE_COPY_SERVICE_SFN_PATH = Path(__file__).absolute().parent.parent / "simulate_copy_service_sfn.py"
+
+# The miseq profile plans three copy jobs, each copy job is launched and validated once
+MISEQ_COPY_JOB_COUNT = 3
+
+
+def simulate(tmp_path: Path, *args: str) -> Dict:
+    output_path = tmp_path / "report.json"
+    completed_process = subprocess.run(
+        [sys.executable, str(SIMULATE_COPY_SERVICE_SFN_PATH), "--profile", "miseq", "--output", str(output_path)] +
+        list(args),
+        capture_output=True,
+        text=True,
+    )
+    # A failed execution exits with a non-zero status, but still writes its report
+    assert output_path.is_file(), completed_process.stderr
+    return json.loads(output_path.read_text())
+
+
+def get_lambda_invocation_count(report: Dict, lambda_name: str) -> int:
+    return report["lambdaInvocationCounts"].get(f"${{__{lambda_name}_lambda_function_arn__}}", 0)
+
+
+def get_state_names(report: Dict) -> List[str]:
+    return list(map(lambda state_iter_: state_iter_["stateName"], report["states"]))
+
+
+def test_copy_with_sync_events(tmp_path: Path):
+    report = simulate(tmp_path)
+
+    assert report["status"] == "SUCCEEDED"
+    assert "For each copy job request" in get_state_names(report)
+    assert get_lambda_invocation_count(report, "validate_copy_job") == MISEQ_COPY_JOB_COUNT
+    # The state machine waits for the object created events once, rather than polling the filemanager
+    assert get_lambda_invocation_count(report, "wait_for_filemanager_sync_events") == 1
+    assert report["callCounts"]["s3 events delivered"] > 0
+    # A RUNNING and a SUCCEEDED workflow run update, and a copy event per copy job
+    assert report["eventDetailTypes"] == {
+        "${__workflow_run_update_detail_type__}": 2,
+        "${__icav2_data_copy_detail_type__}": MISEQ_COPY_JOB_COUNT,
+    }
+
+
+def test_copy_polling_the_filemanager(tmp_path: Path):
+    report = simulate(tmp_path, "--no-sync-events")
+
+    assert report["status"] == "SUCCEEDED"
+    assert get_lambda_invocation_count(report, "wait_for_filemanager_sync_events") == 0
+    assert get_lambda_invocation_count(report, "filemanager_sync_check") >= 1
+    assert report["callCounts"]["s3 events delivered"] == 0
+
+
+def test_copy_from_a_manifest(tmp_path: Path):
+    report = simulate(tmp_path, "--copy-job-manifest-min-copy-job-count", "0")
+
+    assert report["status"] == "SUCCEEDED"
+    assert "For each copy job in manifest" in get_state_names(report)
+    assert "For each copy job request" not in get_state_names(report)
+    assert get_lambda_invocation_count(report, "validate_copy_job") == MISEQ_COPY_JOB_COUNT
+
+
+def test_an_incomplete_copy_job_fails_its_validation(tmp_path: Path):
+    report = simulate(tmp_path, "--incomplete-copy-job-count", "1")
+
+    assert (report["status"], report["error"]) == ("FAILED", "CopyJobValidationError")
+    assert json.loads(report["cause"])["isValid"] is False
+    assert "Run Filemanager sync" not in get_state_names(report)
+
+
+def test_a_filemanager_that_never_syncs_fails_after_the_max_total_wait(tmp_path: Path):
+    report = simulate(tmp_path, "--no-sync-events", "--ingest-files-per-second", "0")
+
+    assert report["status"] == "FAILED"
+    assert report["timeline"][-1]["statePath"] == "Fail"
+    assert get_lambda_invocation_count(report, "filemanager_sync_check") > 1
+
+
+@pytest.mark.parametrize("args", [[], ["--copy-job-manifest-min-copy-job-count", "0"]])
+def test_payloads_are_within_the_limit(tmp_path: Path, args: List[str]):
+    report = simulate(tmp_path, "--enforce-payload-limit", *args)
+
+    assert report["status"] == "SUCCEEDED"
+    assert not any(map(lambda state_iter_: state_iter_["isOverPayloadLimit"], report["states"]))
@@ -8,6 +8,8 @@ import {
   SSM_PARAMETER_PATH_PAYLOAD_VERSION,
   SSM_PARAMETER_PATH_PREFIX,
   SSM_PARAMETER_PATH_WORKFLOW_NAME,
+  STORE_BUCKET_NAME,
+  SYNC_TRACKER_TABLE_NAME,
   WORKFLOW_NAME,
   WORKFLOW_OUTPUT_PREFIX,
   WORKFLOW_VERSION,
@@ -52,6 +54,12 @@ export const getStatefulStackProps = (stage: StageName): StatefulApplicationStac
     /* SSM Parameter values and paths */
     ssmParameterValues: getSsmParameterValues(stage),
     ssmParameterPaths: getSsmParameterPaths(),
+
+    /* Store bucket */
+    storeBucketName: STORE_BUCKET_NAME,
+
+    /* Filemanager sync tracker table */
+    syncTrackerTableName: SYNC_TRACKER_TABLE_NAME,
   };
 };
 
@@ -65,5 +73,11 @@ export const getStatelessStackProps = (stage: StageName): StatelessApplicationSt
 
     /* SSM Parameter paths */
     ssmParameterPaths: getSsmParameterPaths(),
+
+    /* Store bucket */
+    storeBucketName: STORE_BUCKET_NAME,
+
+    /* Filemanager sync tracker table */
+    syncTrackerTableName: SYNC_TRACKER_TABLE_NAME,
   };
 };
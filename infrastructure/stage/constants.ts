@@ -1,6 +1,7 @@
 /* Constants for the stack */
 
 import path from 'path';
+import * as cdk from 'aws-cdk-lib';
 import { DATA_SCHEMA_REGISTRY_NAME } from '@orcabus/platform-cdk-constructs/shared-config/event-bridge';
 
 /* Directory constants */
@@ -20,6 +21,32 @@ export const ICAV2_DATA_COPY_DETAIL_TYPE = 'ICAv2DataCopySync';
 export const STACK_SOURCE = 'orcabus.bsshtoawss3';
 export const STACK_PREFIX = 'orca-bssh-to-s3-';
 
+/* Store constants */
+export const STORE_BUCKET_NAME = `${STACK_PREFIX}store-${cdk.Aws.ACCOUNT_ID}-${cdk.Aws.REGION}`;
+export const STORE_OBJECT_EXPIRATION_DAYS = 30;
+
+/*
+Filemanager sync tracker constants
+The object created events under the output prefix are counted per portal run id in the tracker table,
+so the copy service can wait for the last of them rather than polling the filemanager
+*/
+export const SYNC_TRACKER_TABLE_NAME = `${STACK_PREFIX}filemanager-sync-tracker`;
+export const SYNC_TRACKER_TABLE_TTL_ATTRIBUTE_NAME = 'expiresAt';
+export const S3_EVENT_SOURCE = 'aws.s3';
+export const S3_OBJECT_CREATED_DETAIL_TYPE = 'Object Created';
+export const DEFAULT_EVENT_BUS_NAME = 'default';
+
+/*
+Copy job manifest constants
+Runs with more copy jobs than this, or with a copy job list larger than this,
+are iterated over from a manifest in the store by a distributed map
+rather than passed through the step function payload to an inline map.
+The min copy job count is the MaxConcurrency of the inline map, so no copy job waits for a free lane
+*/
+export const COPY_JOB_MANIFEST_MIN_COPY_JOB_COUNT = 8;
+export const COPY_JOB_MANIFEST_MAX_INLINE_PAYLOAD_SIZE_IN_BYTES = 128 * 1024;
+export const COPY_JOB_MANIFEST_MAX_CONCURRENCY = 64;
+
 /* Event rule stuff */
 export const BCLCONVERT_WORKFLOW_NAME = 'BclConvert';
 
@@ -0,0 +1,34 @@
+import { Construct } from 'constructs';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
+import { RemovalPolicy } from 'aws-cdk-lib';
+import { NagSuppressions } from 'cdk-nag';
+import { BuildSyncTrackerTableProps } from './interfaces';
+
+export function buildSyncTrackerTable(
+  scope: Construct,
+  props: BuildSyncTrackerTableProps
+): dynamodb.Table {
+  /**
+   * The sync tracker table counts the object created events under the output uri of each copy run,
+   * one item per run, and one item per counted key so that a redelivered event is only counted once
+   */
+  const syncTrackerTable = new dynamodb.Table(scope, 'sync-tracker-table', {
+    tableName: props.tableName,
+    partitionKey: {
+      name: 'id',
+      type: dynamodb.AttributeType.STRING,
+    },
+    billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+    timeToLiveAttribute: props.timeToLiveAttributeName,
+    removalPolicy: RemovalPolicy.RETAIN,
+  });
+
+  NagSuppressions.addResourceSuppressions(syncTrackerTable, [
+    {
+      id: 'AwsSolutions-DDB3',
+      reason: 'Sync tracker table only holds short-lived counters, no point in time recovery needed',
+    },
+  ]);
+
+  return syncTrackerTable;
+}
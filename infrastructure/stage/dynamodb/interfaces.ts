@@ -0,0 +1,7 @@
+export interface BuildSyncTrackerTableProps {
+  /* Table name */
+  tableName: string;
+
+  /* Items are only needed for the lifetime of a copy run */
+  timeToLiveAttributeName: string;
+}
@@ -1,5 +1,6 @@
 import {
   BuildDraftRuleProps,
+  BuildOutputObjectCreatedRuleProps,
   BuildReadyRuleProps,
   eventBridgeNameList,
   EventBridgeRuleObject,
@@ -18,6 +19,8 @@ import {
   DRAFT_STATUS,
   READY_STATUS,
   STACK_PREFIX,
+  S3_EVENT_SOURCE,
+  S3_OBJECT_CREATED_DETAIL_TYPE,
 } from '../constants';
 
 function buildUpstreamWorkflowRunStateChangeSucceededEventPattern(): EventPattern {
@@ -59,6 +62,23 @@ function buildWorkflowManagerReadyEventPattern(): EventPattern {
   };
 }
 
+function buildOutputObjectCreatedEventPattern(outputPrefix: string): EventPattern {
+  // Split the output prefix uri into its bucket and key prefix
+  const [bucketName, ...keyPrefixParts] = outputPrefix.replace(/^s3:\/\//, '').split('/');
+  return {
+    detailType: [S3_OBJECT_CREATED_DETAIL_TYPE],
+    source: [S3_EVENT_SOURCE],
+    detail: {
+      bucket: {
+        name: [bucketName],
+      },
+      object: {
+        key: [{ prefix: keyPrefixParts.join('/') }],
+      },
+    },
+  };
+}
+
 function buildEventRule(scope: Construct, props: EventBridgeRuleProps): Rule {
   return new events.Rule(scope, props.ruleName, {
     ruleName: `${STACK_PREFIX}-${props.ruleName}`,
@@ -100,6 +120,17 @@ function buildWorkflowRunStateChangeReadyEventRule(
   });
 }
 
+function buildOutputObjectCreatedEventRule(
+  scope: Construct,
+  props: BuildOutputObjectCreatedRuleProps
+): Rule {
+  return buildEventRule(scope, {
+    ruleName: props.ruleName,
+    eventPattern: buildOutputObjectCreatedEventPattern(props.outputPrefix),
+    eventBus: props.eventBus,
+  });
+}
+
 export function buildAllEventRules(
   scope: Construct,
   props: EventBridgeRulesProps
@@ -142,6 +173,18 @@ export function buildAllEventRules(
         });
         break;
       }
+      // Objects created under the output prefix, counted by the filemanager sync tracker
+      case 'outputObjectCreated': {
+        eventBridgeRuleObjects.push({
+          ruleName: ruleName,
+          ruleObject: buildOutputObjectCreatedEventRule(scope, {
+            ruleName: ruleName,
+            eventBus: props.defaultEventBus,
+            outputPrefix: props.outputPrefix,
+          }),
+        });
+        break;
+      }
     }
   }
 
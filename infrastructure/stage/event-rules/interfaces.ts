@@ -6,7 +6,9 @@ export type EventBridgeNameList =
   // Draft Events
   | 'wrscDraft'
   // Pre-ready
-  | 'wrscReady';
+  | 'wrscReady'
+  // Output object created
+  | 'outputObjectCreated';
 
 export const eventBridgeNameList: EventBridgeNameList[] = [
   // Glue succeeded
@@ -15,6 +17,8 @@ export const eventBridgeNameList: EventBridgeNameList[] = [
   'wrscDraft',
   // Pre-ready
   'wrscReady',
+  // Output object created
+  'outputObjectCreated',
 ];
 
 export interface EventBridgeRuleProps {
@@ -31,6 +35,12 @@ export interface EventBridgeRuleProps {
 export interface EventBridgeRulesProps {
   /* EventBridge Rules */
   eventBus: IEventBus;
+
+  /* The default event bus, S3 sends its events here */
+  defaultEventBus: IEventBus;
+
+  /* The output prefix uri, i.e. s3://bucket/prefix/ */
+  outputPrefix: string;
 }
 
 export interface EventBridgeRuleObject {
@@ -40,3 +50,7 @@ export interface EventBridgeRuleObject {
 
 export type BuildDraftRuleProps = Omit<EventBridgeRuleProps, 'eventPattern'>;
 export type BuildReadyRuleProps = Omit<EventBridgeRuleProps, 'eventPattern'>;
+export interface BuildOutputObjectCreatedRuleProps extends Omit<EventBridgeRuleProps, 'eventPattern'> {
+  /* The output prefix uri, i.e. s3://bucket/prefix/ */
+  outputPrefix: string;
+}
@@ -1,4 +1,5 @@
 import {
+  AddLambdaAsEventBridgeTargetProps,
   AddSfnAsEventBridgeTargetProps,
   eventBridgeTargetsNameList,
   EventBridgeTargetsProps,
@@ -16,6 +17,11 @@ export function buildWrscToSfnTarget(props: AddSfnAsEventBridgeTargetProps) {
   );
 }
 
+export function buildEventToLambdaTarget(props: AddLambdaAsEventBridgeTargetProps) {
+  // The lambda takes in the entire event
+  props.eventBridgeRuleObj.addTarget(new eventsTargets.LambdaFunction(props.lambdaFunction));
+}
+
 export function buildAllEventBridgeTargets(props: EventBridgeTargetsProps) {
   for (const eventBridgeTargetsName of eventBridgeTargetsNameList) {
     switch (eventBridgeTargetsName) {
@@ -57,6 +63,19 @@ export function buildAllEventBridgeTargets(props: EventBridgeTargetsProps) {
         });
         break;
       }
+
+      // Output object created to the sync tracker
+      case 'outputObjectCreatedToSyncTrackerLambdaTarget': {
+        buildEventToLambdaTarget(<AddLambdaAsEventBridgeTargetProps>{
+          eventBridgeRuleObj: props.eventBridgeRuleObjects.find(
+            (eventBridgeObject) => eventBridgeObject.ruleName === 'outputObjectCreated'
+          )?.ruleObject,
+          lambdaFunction: props.lambdas.find(
+            (lambdaObject) => lambdaObject.lambdaName === 'handleS3ObjectCreatedEvent'
+          )?.lambdaFunction,
+        });
+        break;
+      }
     }
   }
 }
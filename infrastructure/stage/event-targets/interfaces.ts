@@ -2,6 +2,8 @@ import { StateMachine } from 'aws-cdk-lib/aws-stepfunctions';
 import { Rule } from 'aws-cdk-lib/aws-events';
 import { EventBridgeRuleObject } from '../event-rules/interfaces';
 import { SfnObject } from '../step-functions/interfaces';
+import { LambdaObject } from '../lambdas/interfaces';
+import { IFunction } from 'aws-cdk-lib/aws-lambda';
 
 /**
  * EventBridge Target Interfaces
@@ -14,7 +16,9 @@ export type EventBridgeTargetName =
   // Validate draft to ready
   | 'draftToValidateDraftSfnTarget'
   // Ready to BSSH Run
-  | 'readyToBsshRunSfnTarget';
+  | 'readyToBsshRunSfnTarget'
+  // Output object created to the sync tracker
+  | 'outputObjectCreatedToSyncTrackerLambdaTarget';
 
 export const eventBridgeTargetsNameList: EventBridgeTargetName[] = [
   // Upstream Succeeded
@@ -25,6 +29,8 @@ export const eventBridgeTargetsNameList: EventBridgeTargetName[] = [
   'draftToValidateDraftSfnTarget',
   // Ready to ICAv2 WES Submitted
   'readyToBsshRunSfnTarget',
+  // Output object created to the sync tracker
+  'outputObjectCreatedToSyncTrackerLambdaTarget',
 ];
 
 export interface AddSfnAsEventBridgeTargetProps {
@@ -32,7 +38,13 @@ export interface AddSfnAsEventBridgeTargetProps {
   eventBridgeRuleObj: Rule;
 }
 
+export interface AddLambdaAsEventBridgeTargetProps {
+  lambdaFunction: IFunction;
+  eventBridgeRuleObj: Rule;
+}
+
 export interface EventBridgeTargetsProps {
   eventBridgeRuleObjects: EventBridgeRuleObject[];
   stepFunctionObjects: SfnObject[];
+  lambdas: LambdaObject[];
 }
@@ -19,6 +19,12 @@ export interface StatefulApplicationStackConfig {
 
   // Keys
   ssmParameterPaths: SsmParameterPaths;
+
+  /* Store bucket */
+  storeBucketName: string;
+
+  /* Filemanager sync tracker table */
+  syncTrackerTableName: string;
 }
 
 export interface StatelessApplicationStackConfig extends cdk.StackProps {
@@ -30,4 +36,10 @@ export interface StatelessApplicationStackConfig extends cdk.StackProps {
 
   /* SSM Parameter paths */
   ssmParameterPaths: SsmParameterPaths;
+
+  /* Store bucket */
+  storeBucketName: string;
+
+  /* Filemanager sync tracker table */
+  syncTrackerTableName: string;
 }
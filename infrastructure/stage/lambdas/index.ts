@@ -81,7 +81,7 @@ function buildLambdaFunction(scope: Construct, props: BuildLambdaProps): LambdaO
   if (lambdaRequirementsMap.needsSsmParametersAccess) {
     lambdaFunction.addToRolePolicy(
       new iam.PolicyStatement({
-        actions: ['ssm:GetParameter'],
+        actions: ['ssm:GetParameter', 'ssm:GetParameters'],
         resources: [
           `arn:aws:ssm:${cdk.Aws.REGION}:${cdk.Aws.ACCOUNT_ID}:parameter${path.join(SSM_PARAMETER_PATH_PREFIX, '/*')}`,
         ],
@@ -163,6 +163,52 @@ function buildLambdaFunction(scope: Construct, props: BuildLambdaProps): LambdaO
     );
   }
 
+  /* Add store bucket access */
+  if (lambdaRequirementsMap.needsStoreAccess) {
+    lambdaFunction.addEnvironment('BSSH_MANAGER_STORE_URI', `s3://${props.storeBucket.bucketName}/`);
+    props.storeBucket.grantReadWrite(lambdaFunction);
+    NagSuppressions.addResourceSuppressions(
+      lambdaFunction,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason: 'The lambda reads and writes objects anywhere in the store bucket',
+        },
+      ],
+      true
+    );
+  }
+
+  /* Add sync tracker table access */
+  if (lambdaRequirementsMap.needsSyncTrackerAccess) {
+    lambdaFunction.addEnvironment(
+      'BSSH_MANAGER_SYNC_TRACKER_TABLE_NAME',
+      props.syncTrackerTable.tableName
+    );
+    props.syncTrackerTable.grantReadWriteData(lambdaFunction);
+  }
+
+  /* Add step function task success access */
+  if (lambdaRequirementsMap.needsTaskSuccessAccess) {
+    /* The task token could belong to any execution of the copy service state machine */
+    lambdaFunction.addToRolePolicy(
+      new iam.PolicyStatement({
+        actions: ['states:SendTaskSuccess'],
+        resources: ['*'],
+      })
+    );
+    NagSuppressions.addResourceSuppressions(
+      lambdaFunction,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason: 'SendTaskSuccess is authorised by the task token, not by a resource',
+        },
+      ],
+      true
+    );
+  }
+
   /* Return the lambda object */
   return {
     lambdaName: props.lambdaName,
@@ -1,4 +1,6 @@
 import { PythonFunction, PythonLayerVersion } from '@aws-cdk/aws-lambda-python-alpha';
+import { IBucket } from 'aws-cdk-lib/aws-s3';
+import { ITable } from 'aws-cdk-lib/aws-dynamodb';
 import { SsmParameterPaths } from '../ssm/interfaces';
 
 /** Lambda Interfaces **/
@@ -10,11 +12,15 @@ export type LambdaName =
   // RUNNING
   | 'getWorkflowRunObject'
   | 'getIcav2CopyJobList'
+  | 'registerFilemanagerSyncTracker'
   // POST COPY
   | 'runFilemanagerSync'
   | 'addPortalRunIdAttributes'
   | 'filemanagerSyncCheck'
-  | 'validateCopyJob';
+  | 'waitForFilemanagerSyncEvents'
+  | 'validateCopyJob'
+  // S3 EVENTS
+  | 'handleS3ObjectCreatedEvent';
 
 export const lambdaNameList: Array<LambdaName> = [
   // DRAFT
@@ -24,11 +30,15 @@ export const lambdaNameList: Array<LambdaName> = [
   // RUNNING
   'getWorkflowRunObject',
   'getIcav2CopyJobList',
+  'registerFilemanagerSyncTracker',
   // POST COPY
   'runFilemanagerSync',
   'addPortalRunIdAttributes',
   'filemanagerSyncCheck',
+  'waitForFilemanagerSyncEvents',
   'validateCopyJob',
+  // S3 EVENTS
+  'handleS3ObjectCreatedEvent',
 ];
 
 export interface LambdaRequirementProps {
@@ -52,6 +62,15 @@ export interface LambdaRequirementProps {
 
   /* Some lambdas may need an extended timeout */
   needsExtendedTimeout?: boolean;
+
+  /* Read / write access to the store bucket */
+  needsStoreAccess?: boolean;
+
+  /* Read / write access to the filemanager sync tracker table */
+  needsSyncTrackerAccess?: boolean;
+
+  /* Resume a step function waiting on a task token */
+  needsTaskSuccessAccess?: boolean;
 }
 
 export interface BuildLambdasProps {
@@ -61,6 +80,12 @@ export interface BuildLambdasProps {
 
   /* SSM Parameter paths */
   ssmParameterPaths: SsmParameterPaths;
+
+  /* Store bucket */
+  storeBucket: IBucket;
+
+  /* Filemanager sync tracker table */
+  syncTrackerTable: ITable;
 }
 
 export interface BuildLambdaProps extends BuildLambdasProps {
@@ -80,37 +105,67 @@ export type LambdaToRequirementsMapType = { [key in LambdaName]: LambdaRequireme
 export const lambdaToRequirementsMap: LambdaToRequirementsMapType = {
   // DRAFT
   createNewWorkflowRunObject: {
+    needsBsshLambdaLayer: true,
     needsSsmParametersAccess: true,
     needsBsshWorkflowEnvVars: true,
     needsOrcabusApiToolsLayer: true,
   },
   // Validation
   validateDraftDataCompleteSchema: {
+    needsBsshLambdaLayer: true,
     needsSsmParametersAccess: true,
     needsSchemaRegistryAccess: true,
   },
   // RUNNING
   getWorkflowRunObject: {
+    needsBsshLambdaLayer: true,
     needsOrcabusApiToolsLayer: true,
   },
   getIcav2CopyJobList: {
     needsBsshLambdaLayer: true,
     needsIcav2AccessToken: true,
+    needsStoreAccess: true,
+  },
+  registerFilemanagerSyncTracker: {
+    needsBsshLambdaLayer: true,
+    needsSyncTrackerAccess: true,
   },
   // POST COPY
   runFilemanagerSync: {
+    needsBsshLambdaLayer: true,
     needsOrcabusApiToolsLayer: true,
   },
   addPortalRunIdAttributes: {
+    needsBsshLambdaLayer: true,
     needsOrcabusApiToolsLayer: true,
+    needsStoreAccess: true,
   },
   filemanagerSyncCheck: {
+    needsBsshLambdaLayer: true,
     needsOrcabusApiToolsLayer: true,
     needsIcav2AccessToken: true,
     needsExtendedTimeout: true,
+    needsStoreAccess: true,
+  },
+  waitForFilemanagerSyncEvents: {
+    needsBsshLambdaLayer: true,
+    needsOrcabusApiToolsLayer: true,
+    needsExtendedTimeout: true,
+    needsStoreAccess: true,
+    needsSyncTrackerAccess: true,
+    needsTaskSuccessAccess: true,
   },
   validateCopyJob: {
+    needsBsshLambdaLayer: true,
     needsIcav2AccessToken: true,
     needsOrcabusApiToolsLayer: true,
+    needsExtendedTimeout: true,
+    needsStoreAccess: true,
+  },
+  // S3 EVENTS
+  handleS3ObjectCreatedEvent: {
+    needsBsshLambdaLayer: true,
+    needsSyncTrackerAccess: true,
+    needsTaskSuccessAccess: true,
   },
 };
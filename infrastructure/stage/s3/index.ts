@@ -0,0 +1,33 @@
+import { Construct } from 'constructs';
+import * as s3 from 'aws-cdk-lib/aws-s3';
+import { Duration, RemovalPolicy } from 'aws-cdk-lib';
+import { NagSuppressions } from 'cdk-nag';
+import { BuildStoreBucketProps } from './interfaces';
+
+export function buildStoreBucket(scope: Construct, props: BuildStoreBucketProps): s3.Bucket {
+  /**
+   * The store bucket holds the intermediate objects shared between the steps of a copy run,
+   * i.e. the source listing snapshots written by the manifest step and read by the validation step
+   */
+  const storeBucket = new s3.Bucket(scope, 'store-bucket', {
+    bucketName: props.bucketName,
+    blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+    encryption: s3.BucketEncryption.S3_MANAGED,
+    enforceSSL: true,
+    removalPolicy: RemovalPolicy.RETAIN,
+    lifecycleRules: [
+      {
+        expiration: Duration.days(props.objectExpirationDays),
+      },
+    ],
+  });
+
+  NagSuppressions.addResourceSuppressions(storeBucket, [
+    {
+      id: 'AwsSolutions-S1',
+      reason: 'Store bucket only holds short-lived intermediate objects, no server access logs needed',
+    },
+  ]);
+
+  return storeBucket;
+}
@@ -0,0 +1,7 @@
+export interface BuildStoreBucketProps {
+  /* Bucket name */
+  bucketName: string;
+
+  /* Objects are only needed for the lifetime of a copy run */
+  objectExpirationDays: number;
+}
@@ -3,6 +3,9 @@ import { Construct } from 'constructs';
 import { StatefulApplicationStackConfig } from './interfaces';
 import { buildSsmParameters } from './ssm';
 import { buildSchemas } from './event-schemas';
+import { buildStoreBucket } from './s3';
+import { buildSyncTrackerTable } from './dynamodb';
+import { STORE_OBJECT_EXPIRATION_DAYS, SYNC_TRACKER_TABLE_TTL_ATTRIBUTE_NAME } from './constants';
 
 export type StatefulApplicationStackProps = cdk.StackProps & StatefulApplicationStackConfig;
 
@@ -24,5 +27,17 @@ export class StatefulApplicationStack extends cdk.Stack {
 
     // Add to the schema registry
     buildSchemas(this);
+
+    // Build the store bucket
+    buildStoreBucket(this, {
+      bucketName: props.storeBucketName,
+      objectExpirationDays: STORE_OBJECT_EXPIRATION_DAYS,
+    });
+
+    // Build the filemanager sync tracker table
+    buildSyncTrackerTable(this, {
+      tableName: props.syncTrackerTableName,
+      timeToLiveAttributeName: SYNC_TRACKER_TABLE_TTL_ATTRIBUTE_NAME,
+    });
   }
 }
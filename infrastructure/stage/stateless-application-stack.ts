@@ -1,6 +1,8 @@
 // Standard cdk imports
 import * as cdk from 'aws-cdk-lib';
 import * as events from 'aws-cdk-lib/aws-events';
+import * as s3 from 'aws-cdk-lib/aws-s3';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import { Construct } from 'constructs';
 
 // Application imports
@@ -11,6 +13,8 @@ import { buildAllEventRules } from './event-rules';
 import { buildAllEventBridgeTargets } from './event-targets';
 import { NagSuppressions } from 'cdk-nag';
 import { StageName } from '@orcabus/platform-cdk-constructs/shared-config/accounts';
+import { DEFAULT_EVENT_BUS_NAME, WORKFLOW_OUTPUT_PREFIX } from './constants';
+import { substituteBucketConstants } from './utils';
 
 export type StatelessApplicationStackProps = StatelessApplicationStackConfig & cdk.StackProps;
 
@@ -26,12 +30,24 @@ export class StatelessApplicationStack extends cdk.Stack {
     // Get the event bus
     const eventBus = events.EventBus.fromEventBusName(this, 'eventBus', props.eventBusName);
 
+    // Get the store bucket
+    const storeBucket = s3.Bucket.fromBucketName(this, 'storeBucket', props.storeBucketName);
+
+    // Get the filemanager sync tracker table
+    const syncTrackerTable = dynamodb.Table.fromTableName(
+      this,
+      'syncTrackerTable',
+      props.syncTrackerTableName
+    );
+
     // Build BSSH Tools Layer
     const bsshToolsLayer = buildBsshToolsLayer(this);
 
     // Build Lambdas
     const lambdas = buildAllLambdaFunctions(this, {
       bsshToolsLayer: bsshToolsLayer,
+      storeBucket: storeBucket,
+      syncTrackerTable: syncTrackerTable,
       ...props,
     });
 
@@ -39,17 +55,25 @@ export class StatelessApplicationStack extends cdk.Stack {
     const stepFunctionObjects = buildAllStepFunctions(this, {
       lambdas: lambdas,
       eventBus: eventBus,
+      storeBucket: storeBucket,
     });
 
     // Build Event Rules
     const eventBridgeRuleObjects = buildAllEventRules(this, {
       eventBus: eventBus,
+      defaultEventBus: events.EventBus.fromEventBusName(
+        this,
+        'defaultEventBus',
+        DEFAULT_EVENT_BUS_NAME
+      ),
+      outputPrefix: substituteBucketConstants(WORKFLOW_OUTPUT_PREFIX, props.stageName),
     });
 
     // Build Event Targets
     buildAllEventBridgeTargets({
       eventBridgeRuleObjects: eventBridgeRuleObjects,
       stepFunctionObjects: stepFunctionObjects,
+      lambdas: lambdas,
     });
 
     // Add in stack-level suppressions
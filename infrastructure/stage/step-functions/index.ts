@@ -10,6 +10,9 @@ import {
 import * as sfn from 'aws-cdk-lib/aws-stepfunctions';
 import path from 'path';
 import {
+  COPY_JOB_MANIFEST_MAX_CONCURRENCY,
+  COPY_JOB_MANIFEST_MAX_INLINE_PAYLOAD_SIZE_IN_BYTES,
+  COPY_JOB_MANIFEST_MIN_COPY_JOB_COUNT,
   PAYLOAD_VERSION,
   ICAV2_DATA_COPY_DETAIL_TYPE,
   STACK_PREFIX,
@@ -21,6 +24,8 @@ import {
 } from '../constants';
 import { camelCaseToSnakeCase } from '../utils';
 import { Construct } from 'constructs';
+import * as iam from 'aws-cdk-lib/aws-iam';
+import * as cdk from 'aws-cdk-lib';
 import { NagSuppressions } from 'cdk-nag';
 
 function createStateMachineDefinitionSubstitutions(props: BuildSfnProps): {
@@ -62,6 +67,16 @@ function createStateMachineDefinitionSubstitutions(props: BuildSfnProps): {
   /* Substitute the bssh payload version in the state machine definition */
   definitionSubstitutions['__bssh_payload_version__'] = PAYLOAD_VERSION;
 
+  /* Substitute the run size thresholds that select the distributed map mode */
+  if (SfnRequirementsMapType[props.stateMachineName].needsDistributedMap) {
+    definitionSubstitutions['__copy_job_manifest_min_copy_job_count__'] =
+      COPY_JOB_MANIFEST_MIN_COPY_JOB_COUNT.toString();
+    definitionSubstitutions['__copy_job_manifest_max_inline_payload_size_in_bytes__'] =
+      COPY_JOB_MANIFEST_MAX_INLINE_PAYLOAD_SIZE_IN_BYTES.toString();
+    definitionSubstitutions['__copy_job_manifest_max_concurrency__'] =
+      COPY_JOB_MANIFEST_MAX_CONCURRENCY.toString();
+  }
+
   return definitionSubstitutions;
 }
 
@@ -92,6 +107,44 @@ function wireUpStateMachinePermissions(props: WirePermissionsProps): void {
   if (sfnRequirements.needsPutEvents) {
     props.eventBus.grantPutEventsTo(props.stateMachineObj);
   }
+
+  /* Wire up distributed map permissions */
+  if (sfnRequirements.needsDistributedMap) {
+    // The item reader reads the copy job manifest from the store, the result writer writes back to it
+    props.storeBucket.grantReadWrite(props.stateMachineObj);
+
+    // The distributed map runs each item as a child execution of this state machine
+    // We build the arn from the name, referencing the state machine arn here would be a circular dependency
+    const stateMachineName = `${STACK_PREFIX}${props.stateMachineName}`;
+    props.stateMachineObj.addToRolePolicy(
+      new iam.PolicyStatement({
+        actions: ['states:StartExecution'],
+        resources: [
+          `arn:aws:states:${cdk.Aws.REGION}:${cdk.Aws.ACCOUNT_ID}:stateMachine:${stateMachineName}`,
+        ],
+      })
+    );
+    props.stateMachineObj.addToRolePolicy(
+      new iam.PolicyStatement({
+        actions: ['states:DescribeExecution', 'states:StopExecution'],
+        resources: [
+          `arn:aws:states:${cdk.Aws.REGION}:${cdk.Aws.ACCOUNT_ID}:execution:${stateMachineName}/*`,
+        ],
+      })
+    );
+
+    NagSuppressions.addResourceSuppressions(
+      props.stateMachineObj,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason:
+            'The distributed map reads and writes manifests anywhere in the store bucket, and manages its own child executions',
+        },
+      ],
+      true
+    );
+  }
 }
 
 function buildStepFunction(scope: Construct, props: BuildSfnProps): SfnObject {
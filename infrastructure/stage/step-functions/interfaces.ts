@@ -1,5 +1,6 @@
 import { StateMachine } from 'aws-cdk-lib/aws-stepfunctions';
 import { IEventBus } from 'aws-cdk-lib/aws-events';
+import { IBucket } from 'aws-cdk-lib/aws-s3';
 import { LambdaName, LambdaObject } from '../lambdas/interfaces';
 
 export type SfnName =
@@ -29,10 +30,12 @@ export const stepFunctionToLambdasMap: Record<SfnName, LambdaName[]> = {
     // RUNNING
     'getWorkflowRunObject',
     'getIcav2CopyJobList',
+    'registerFilemanagerSyncTracker',
     // POST COPY
     'runFilemanagerSync',
     'addPortalRunIdAttributes',
     'filemanagerSyncCheck',
+    'waitForFilemanagerSyncEvents',
     'validateCopyJob',
   ],
 };
@@ -40,6 +43,9 @@ export const stepFunctionToLambdasMap: Record<SfnName, LambdaName[]> = {
 export interface SfnRequirementsProps {
   /* Event stuff */
   needsPutEvents?: boolean;
+
+  /* Distributed map over a copy job manifest in the store */
+  needsDistributedMap?: boolean;
 }
 
 export const SfnRequirementsMapType: { [key in SfnName]: SfnRequirementsProps } = {
@@ -52,6 +58,7 @@ export const SfnRequirementsMapType: { [key in SfnName]: SfnRequirementsProps }
   },
   runBsshFastqCopyService: {
     needsPutEvents: true,
+    needsDistributedMap: true,
   },
 };
 
@@ -61,6 +68,9 @@ export interface BuildSfnsProps {
 
   /* Event Stuff */
   eventBus: IEventBus;
+
+  /* Store bucket */
+  storeBucket: IBucket;
 }
 
 export interface BuildSfnProps extends BuildSfnsProps {